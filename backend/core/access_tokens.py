@@ -0,0 +1,123 @@
+"""
+Short-lived Admin Access Tokens
+Signed JWTs carrying is_admin / is_super_admin and a compact permission bitset, so admin
+authorization can be decided from the token alone. Role changes are enforced through a
+revocation list that rejects tokens issued before the change.
+"""
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional
+
+import jwt
+
+logger = logging.getLogger(__name__)
+
+ACCESS_TOKEN_TYPE = 'access'
+
+
+class AccessTokenIssuer:
+    """Mints and verifies access tokens with a permission bitset derived from the permission catalogue"""
+
+    def __init__(self, secret: str, algorithm: str, ttl_minutes: int, permission_keys: List[str]):
+        self.secret = secret
+        self.algorithm = algorithm
+        self.ttl_minutes = ttl_minutes
+        self.permission_keys = list(permission_keys)
+        self._bit_for = {key: index for index, key in enumerate(self.permission_keys)}
+        # Tokens minted against a different permission list are ignored rather than misread
+        self.permissions_version = hashlib.sha1('|'.join(self.permission_keys).encode()).hexdigest()[:8]
+
+    def encode_permissions(self, role: Optional[Dict[str, Any]]) -> str:
+        """Pack a role dict ({permission_key: bool}) into a hex bitset"""
+        bits = 0
+        for key, granted in (role or {}).items():
+            if granted and key in self._bit_for:
+                bits |= 1 << self._bit_for[key]
+        return format(bits, 'x')
+
+    def decode_permissions(self, bitset: str) -> Dict[str, bool]:
+        """Unpack a hex bitset into a role dict with only granted permissions"""
+        bits = int(bitset or '0', 16)
+        return {key: True for key, index in self._bit_for.items() if bits >> index & 1}
+
+    def create(self, user: Dict[str, Any]) -> str:
+        """Create an access token for a user document"""
+        now = datetime.now(timezone.utc)
+        payload = {
+            'typ': ACCESS_TOKEN_TYPE,
+            'user_id': user.get('id') or user.get('user_id'),
+            'email': user.get('email'),
+            'name': user.get('name'),
+            'adm': bool(user.get('is_admin')),
+            'sadm': bool(user.get('is_super_admin')),
+            'perms': self.encode_permissions(user.get('role')),
+            'pv': self.permissions_version,
+            'iat': int(now.timestamp()),
+            'exp': now + timedelta(minutes=self.ttl_minutes)
+        }
+        return jwt.encode(payload, self.secret, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return the claims of a valid, current access token, or None for anything else"""
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        except jwt.InvalidTokenError:
+            return None
+        if claims.get('typ') != ACCESS_TOKEN_TYPE or claims.get('pv') != self.permissions_version:
+            return None
+        return claims
+
+    def principal_from_claims(self, claims: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the user-shaped dict route handlers expect from token claims"""
+        return {
+            'id': claims['user_id'],
+            'user_id': claims['user_id'],
+            'email': claims.get('email'),
+            'name': claims.get('name'),
+            'is_admin': claims.get('adm', False),
+            'is_super_admin': claims.get('sadm', False),
+            'role': self.decode_permissions(claims.get('perms')),
+            'auth_source': 'access_token'
+        }
+
+
+class TokenRevocationList:
+    """
+    Per-user "not before" timestamps for access tokens.
+    Kept in memory for the request path; persisted to Mongo so other workers pick revocations
+    up on their next refresh. Entries need to outlive the longest token they are checked
+    against - access tokens, and the login tokens /auth/token/refresh accepts.
+    """
+
+    def __init__(self, ttl_minutes: int):
+        self.ttl_minutes = ttl_minutes
+        self._revoked_at: Dict[str, float] = {}
+
+    def is_revoked(self, user_id: str, issued_at: int) -> bool:
+        revoked_at = self._revoked_at.get(user_id)
+        return revoked_at is not None and issued_at <= revoked_at
+
+    async def revoke(self, db, *user_ids: str):
+        """Reject every access token issued to these users up to now"""
+        now = time.time()
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=self.ttl_minutes)
+        for user_id in {uid for uid in user_ids if uid}:
+            self._revoked_at[user_id] = now
+            await db.token_revocations.update_one(
+                {'user_id': user_id},
+                {'$set': {'revoked_at': now, 'expires_at': expires_at}},
+                upsert=True
+            )
+
+    async def refresh(self, db):
+        """Reload revocations written by any worker"""
+        try:
+            cutoff = time.time() - self.ttl_minutes * 60
+            entries = await db.token_revocations.find(
+                {'revoked_at': {'$gte': cutoff}}, {'_id': 0, 'user_id': 1, 'revoked_at': 1}
+            ).to_list(10000)
+            self._revoked_at = {entry['user_id']: entry['revoked_at'] for entry in entries}
+        except Exception as e:
+            logger.error(f"Failed to refresh token revocation list: {str(e)}")
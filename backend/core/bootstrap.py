@@ -0,0 +1,129 @@
+"""
+Storefront Bootstrap Snapshot
+Everything the storefront fetches on first load (site texts, CMS settings, pricing, system config,
+currency rates, categories, clothing items) as one precomputed, gzip-compressed JSON document.
+
+The snapshot is rebuilt only when one of its input resource versions (see core/resource_versions.py)
+or the currency-rates day changes. The shared part is JSON-encoded once per build; the detected
+currency is the only per-visitor part, so each country gets its own encoded variant, built on
+first use and kept in memory until the next rebuild. The identity and gzip bodies of a variant
+carry distinct ETags.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EncodedBootstrap:
+    """One ready-to-send variant of the snapshot"""
+    etag: str
+    body: bytes
+    gzip_body: bytes
+
+    @property
+    def gzip_etag(self) -> str:
+        """The compressed body is a different byte sequence, so it gets its own strong ETag"""
+        return f'{self.etag[:-1]}-gzip"'
+
+
+@dataclass
+class BootstrapSnapshot:
+    key: Tuple
+    # Shared JSON object without its closing brace, so variants can append their own fields
+    prefix: bytes
+    built_at: float
+    variants: 'OrderedDict[str, EncodedBootstrap]' = field(default_factory=OrderedDict)
+
+
+class BootstrapCache:
+    """Builds the bootstrap snapshot when its inputs move and serves encoded variants from memory"""
+
+    def __init__(self, versions, inputs: Sequence[str], build: Callable[[], Awaitable[Dict[str, Any]]],
+                 max_variants: int = 64, compress_level: int = 6):
+        self.versions = versions
+        self.inputs = tuple(inputs)
+        self.build = build
+        self.max_variants = max_variants
+        self.compress_level = compress_level
+        self._snapshot: Optional[BootstrapSnapshot] = None
+        self._lock = asyncio.Lock()
+        self.builds = 0
+        self.build_failures = 0
+
+    async def _input_key(self) -> Tuple:
+        versions = [await self.versions.version(resource) for resource in self.inputs]
+        # Currency rates are refreshed daily, so the day is an input too
+        return tuple(versions) + (datetime.now(timezone.utc).strftime('%Y-%m-%d'),)
+
+    async def _snapshot_for(self, key: Tuple) -> BootstrapSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.key == key:
+            return snapshot
+
+        async with self._lock:
+            if self._snapshot is not None and self._snapshot.key == key:
+                return self._snapshot
+            try:
+                payload = await self.build()
+            except Exception as e:
+                self.build_failures += 1
+                if self._snapshot is None:
+                    raise
+                # Keep serving the last good snapshot rather than failing first page loads
+                logger.error(f"[BOOTSTRAP] Rebuild failed, serving previous snapshot: {e}")
+                return self._snapshot
+
+            encoded = json.dumps(payload, separators=(',', ':'), default=str).encode()
+            self._snapshot = BootstrapSnapshot(key=key, prefix=encoded[:-1], built_at=time.time())
+            self.builds += 1
+            logger.info(f"[BOOTSTRAP] Rebuilt snapshot ({len(encoded)} bytes) for inputs {key}")
+            return self._snapshot
+
+    async def get(self, variant: str, extra: Callable[[], Dict[str, Any]]) -> EncodedBootstrap:
+        """
+        Encoded snapshot for a variant (e.g. a country code).
+        extra() returns the variant-specific top-level fields and is only called on first use.
+        """
+        snapshot = await self._snapshot_for(await self._input_key())
+        encoded = snapshot.variants.get(variant)
+        if encoded is not None:
+            snapshot.variants.move_to_end(variant)
+            return encoded
+
+        fields = json.dumps(extra(), separators=(',', ':'), default=str).encode()
+        # Splice the variant fields into the shared object: {...shared...,"currency":{...}}
+        if len(fields) <= 2:
+            body = snapshot.prefix + b'}'
+        else:
+            body = snapshot.prefix + (b',' if len(snapshot.prefix) > 1 else b'') + fields[1:]
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        encoded = EncodedBootstrap(
+            etag=f'"{digest}"',
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=self.compress_level, mtime=0)
+        )
+        snapshot.variants[variant] = encoded
+        while len(snapshot.variants) > self.max_variants:
+            snapshot.variants.popitem(last=False)
+        return encoded
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            'builds': self.builds,
+            'build_failures': self.build_failures,
+            'inputs': dict(zip(self.inputs + ('currency_day',), snapshot.key)) if snapshot else None,
+            'built_at': datetime.fromtimestamp(snapshot.built_at, timezone.utc).isoformat() if snapshot else None,
+            'variants': len(snapshot.variants) if snapshot else 0,
+            'bytes': len(snapshot.prefix) + 1 if snapshot else 0
+        }
@@ -0,0 +1,172 @@
+"""
+Catalog Read-Through Cache
+Caches the public catalog lists (fabrics, souvenirs, boutique products, bulk/POD clothing items,
+categories) after they are read and post-processed, so a catalog request usually costs no query.
+
+Entries are keyed by resource, resource version (see core/resource_versions.py) and variant, so
+a version bump from any worker retires them. The backend is pluggable:
+- memory: per-worker TTL cache (default); other workers see a bump within the version check interval
+- redis: shared between workers; invalidate() also deletes the resource's keys, so every worker
+  misses and reloads straight away
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'catalog'
+
+
+def cache_key(resource: str, version: int, variant: str = '') -> str:
+    return f"{KEY_PREFIX}:{resource}:{version}:{variant}"
+
+
+class MemoryCatalogBackend:
+    """In-process backend; values are shared objects, so callers must not mutate them"""
+
+    name = 'memory'
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: int = 300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any):
+        self._cache[key] = value
+
+    async def delete_resource(self, resource: str):
+        prefix = f"{KEY_PREFIX}:{resource}:"
+        for key in [key for key in self._cache.keys() if key.startswith(prefix)]:
+            self._cache.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._cache)
+
+
+class RedisCatalogBackend:
+    """Shared backend storing JSON in Redis with a TTL"""
+
+    name = 'redis'
+
+    def __init__(self, client, ttl_seconds: int = 300):
+        self._client = client
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any):
+        await self._client.set(key, json.dumps(value, default=str), ex=self.ttl_seconds)
+
+    async def delete_resource(self, resource: str):
+        keys = [key async for key in self._client.scan_iter(match=f"{KEY_PREFIX}:{resource}:*")]
+        if keys:
+            await self._client.delete(*keys)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+def create_catalog_backend(backend: str = 'memory', redis_url: Optional[str] = None,
+                           maxsize: int = 256, ttl_seconds: int = 300):
+    """Backend named by CATALOG_CACHE_BACKEND; falls back to memory if Redis is unavailable"""
+    if backend == 'redis':
+        if not redis_url:
+            logger.warning("[CATALOG CACHE] Redis backend requested without a URL - using memory")
+        else:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                logger.warning("[CATALOG CACHE] redis package not installed - using memory")
+            else:
+                return RedisCatalogBackend(redis.from_url(redis_url), ttl_seconds=ttl_seconds)
+    return MemoryCatalogBackend(maxsize=maxsize, ttl_seconds=ttl_seconds)
+
+
+class CatalogCache:
+    """Read-through cache over a backend, versioned by ResourceVersions"""
+
+    def __init__(self, backend, versions):
+        self.backend = backend
+        self.versions = versions
+        # Loads in progress, so concurrent misses for one key run a single query
+        self._loading: Dict[str, asyncio.Future] = {}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.errors = 0
+
+    async def get_or_load(self, resource: str, loader: Callable[[], Awaitable[Any]], variant: str = '') -> Any:
+        """Cached value for resource/variant, calling loader() on a miss"""
+        key = cache_key(resource, await self.versions.version(resource), variant)
+
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            # A broken shared backend must not take the catalog down
+            self.errors += 1
+            logger.warning(f"[CATALOG CACHE] Backend read failed for {key}: {e}")
+            value = None
+        if value is not None:
+            self.hits[resource] = self.hits.get(resource, 0) + 1
+            return value
+
+        self.misses[resource] = self.misses.get(resource, 0) + 1
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+            future.set_result(value)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a load nobody else waited on does not log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._loading.pop(key, None)
+
+        try:
+            await self.backend.set(key, value)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"[CATALOG CACHE] Backend write failed for {key}: {e}")
+        return value
+
+    async def invalidate(self, *resources: str):
+        """Call after any write to a catalog collection; bumps the version and evicts its entries"""
+        await self.versions.bump(*resources)
+        for resource in resources:
+            try:
+                await self.backend.delete_resource(resource)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"[CATALOG CACHE] Backend eviction failed for {resource}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        resources = {}
+        for resource in sorted(set(self.hits) | set(self.misses)):
+            hits, misses = self.hits.get(resource, 0), self.misses.get(resource, 0)
+            resources[resource] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else 0.0
+            }
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return {
+            'backend': self.backend.name,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            'size': self.backend.size(),
+            'errors': self.errors,
+            'resources': resources
+        }
@@ -1,5 +1,15 @@
-"""Database connection and utilities"""
+"""Database connection and utilities
+
+One shared Motor client per process, built from environment-configured pool settings and
+instrumented with a connection pool listener. Both server.py and the modular main.py use it.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference, monitoring
 from .config import MONGO_URL, DB_NAME
 import logging
 
@@ -9,15 +19,182 @@ logger = logging.getLogger(__name__)
 client = None
 db = None
 
+_READ_PREFERENCES = {
+    'primary': ReadPreference.PRIMARY,
+    'primarypreferred': ReadPreference.PRIMARY_PREFERRED,
+    'secondary': ReadPreference.SECONDARY,
+    'secondarypreferred': ReadPreference.SECONDARY_PREFERRED,
+    'nearest': ReadPreference.NEAREST,
+}
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool listener tracking checkouts in use and how long checkouts wait.
+    Motor checks connections out on its worker threads, and pymongo publishes the
+    "started" and "checked out" events on the thread doing the checkout, so the wait is
+    measured with a thread-local start time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.pool_clears = 0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.monotonic()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, 'started', None)
+        wait_ms = (time.monotonic() - started) * 1000 if started is not None else 0.0
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    # Remaining events are not tracked
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'open_connections': self.connections_created - self.connections_closed,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'avg_wait_ms': round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.wait_ms_max, 3),
+                'pool_clears': self.pool_clears
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def client_options(mongo_url: str) -> Dict[str, Any]:
+    """
+    Client options from the environment (read at call time so .env files loaded later apply).
+
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS, MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS
+    """
+    options = {
+        'serverSelectionTimeoutMS': _env_int('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000),
+        'connectTimeoutMS': _env_int('MONGO_CONNECT_TIMEOUT_MS', 10000),
+        'socketTimeoutMS': _env_int('MONGO_SOCKET_TIMEOUT_MS', 45000),
+        'maxPoolSize': _env_int('MONGO_MAX_POOL_SIZE', 50),
+        'minPoolSize': _env_int('MONGO_MIN_POOL_SIZE', 10),
+        'maxIdleTimeMS': _env_int('MONGO_MAX_IDLE_TIME_MS', 300000),
+        # Fail a checkout instead of queueing forever when the pool is exhausted
+        'waitQueueTimeoutMS': _env_int('MONGO_WAIT_QUEUE_TIMEOUT_MS', 10000),
+        'retryWrites': True,
+        'retryReads': True,
+        'event_listeners': [pool_metrics],
+    }
+
+    # Add SSL/TLS settings for Atlas (if not in connection string)
+    if 'mongodb+srv://' in mongo_url or 'ssl=true' in mongo_url.lower():
+        options['tls'] = True
+        options['tlsAllowInvalidCertificates'] = False
+    return options
+
+
+def get_client() -> AsyncIOMotorClient:
+    """Return the process-wide client, creating it on first use"""
+    global client
+    if client is None:
+        mongo_url = os.environ.get('MONGO_URL') or MONGO_URL
+        client = AsyncIOMotorClient(mongo_url, **client_options(mongo_url))
+    return client
+
+
+def get_database(name: Optional[str] = None):
+    """Database handle on the shared client (DB_NAME by default)"""
+    return get_client()[name or os.environ.get('DB_NAME') or DB_NAME]
+
+
+def analytics_read_preference():
+    """Read preference for dashboard aggregations (MONGO_ANALYTICS_READ_PREFERENCE, default secondaryPreferred)"""
+    name = os.environ.get('MONGO_ANALYTICS_READ_PREFERENCE', 'secondaryPreferred').lower()
+    if name not in _READ_PREFERENCES:
+        logger.warning(f"Unknown MONGO_ANALYTICS_READ_PREFERENCE '{name}', using secondaryPreferred")
+        name = 'secondarypreferred'
+    return _READ_PREFERENCES[name]
+
+
+def get_analytics_database(name: Optional[str] = None):
+    """
+    Database handle for heavy analytics reads.
+    Routed to secondaries where the deployment has them, so dashboards don't compete with
+    checkout traffic on the primary. Pass allowDiskUse=True to aggregations run through it.
+    """
+    return get_database(name).with_options(read_preference=analytics_read_preference())
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Pool metrics plus the configured limits"""
+    options = get_client().options.pool_options
+    return {
+        **pool_metrics.stats(),
+        'max_pool_size': options.max_pool_size,
+        'min_pool_size': options.min_pool_size,
+        'wait_queue_timeout_ms': int(options.wait_queue_timeout * 1000) if options.wait_queue_timeout else None
+    }
+
+
 async def connect_db():
     """Initialize database connection"""
-    global client, db
+    global db
     try:
-        client = AsyncIOMotorClient(MONGO_URL)
-        db = client[DB_NAME]
+        db = get_database()
         # Test connection
-        await client.admin.command('ping')
-        logger.info(f"Successfully connected to MongoDB: {DB_NAME}")
+        await get_client().admin.command('ping')
+        logger.info(f"Successfully connected to MongoDB: {db.name}")
         return db
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {str(e)}")
@@ -28,6 +205,7 @@ async def close_db():
     global client
     if client:
         client.close()
+        client = None
         logger.info("MongoDB connection closed")
 
 def get_db():
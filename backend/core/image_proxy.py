@@ -0,0 +1,301 @@
+"""
+Image Proxy Cache
+Serves remote catalog images (Unsplash, Supabase storage, placeholders) from our own origin so
+the POD canvas can draw them without CORS taint, without fetching them upstream on every render.
+
+Fetched images are kept on disk under root/<xx>/<sha256(url)>: a .json metadata file (content type,
+upstream ETag/Last-Modified, fetch time) pointing at a versioned data file. Entries younger than
+fresh_seconds are served straight from disk; older ones are revalidated upstream with
+If-None-Match/If-Modified-Since, so an unchanged image costs a 304 rather than a download. When
+the total size passes max_bytes, the least recently served entries are evicted (a hit touches the
+metadata file, so its mtime is the LRU clock and works across workers sharing the directory).
+
+Concurrent misses for one URL share a single upstream fetch, all fetches go through one pooled
+keep-alive client, and responses stream from the cache file in chunks.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from core.resource_versions import etag_matches
+from core.uploads import UPLOAD_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+META_SUFFIX = '.json'
+
+# Eviction trims the cache to this fraction of max_bytes, so it does not run on every fetch
+EVICT_TO_RATIO = 0.9
+
+
+def _cache_key(url: str) -> str:
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def _write_meta(path: Path, meta: Dict[str, Any]):
+    partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+    partial.write_text(json.dumps(meta))
+    os.replace(partial, path)
+
+
+def _write_chunk(handle: BinaryIO, chunk: bytes):
+    handle.write(chunk)
+
+
+async def _iter_file(handle: BinaryIO, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    try:
+        while chunk := await run_in_threadpool(handle.read, chunk_size):
+            yield chunk
+    finally:
+        handle.close()
+
+
+class ImageProxyCache:
+    """Disk LRU cache in front of a shared httpx client"""
+
+    def __init__(self, root: Path, max_bytes: int, fresh_seconds: int = 3600,
+                 max_object_size: int = 20 * 1024 * 1024, timeout: float = 10.0, max_connections: int = 20):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.max_object_size = max_object_size
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        # Fetches in progress, so concurrent misses for one URL make a single upstream request
+        self._fetching: Dict[str, asyncio.Future] = {}
+        # This worker's view of the cache size; eviction rescans the directory for the real figure
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{META_SUFFIX}"
+
+    def _read_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._meta_path(key).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _open_entry(self, key: str, meta: Dict[str, Any]) -> Optional[BinaryIO]:
+        """Open an entry's data file and mark it recently used; None if it was evicted meanwhile"""
+        try:
+            handle = open(self._meta_path(key).with_name(meta['data_file']), 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(self._meta_path(key))
+        except FileNotFoundError:
+            pass
+        return handle
+
+    async def open(self, url: str) -> Tuple[Dict[str, Any], BinaryIO]:
+        """Metadata and an open data file for url, fetching or revalidating it first if needed"""
+        key = _cache_key(url)
+        meta = await run_in_threadpool(self._read_meta, key)
+        if meta is not None and meta['fetched_at'] + self.fresh_seconds > time.time():
+            handle = await run_in_threadpool(self._open_entry, key, meta)
+            if handle is not None:
+                self.hits += 1
+                return meta, handle
+
+        meta = await self._fetch_once(key, url, meta)
+        handle = await run_in_threadpool(self._open_entry, key, meta)
+        if handle is None:
+            # Evicted between the fetch and the open (tiny cache, or another worker); fetch for ourselves
+            meta = await self._refresh(key, url, None)
+            handle = await run_in_threadpool(self._open_entry, key, meta)
+            if handle is None:
+                raise HTTPException(status_code=500, detail="Failed to fetch image")
+        return meta, handle
+
+    async def _fetch_once(self, key: str, url: str, cached: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        pending = self._fetching.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._fetching[key] = future
+        try:
+            meta = await self._refresh(key, url, cached)
+            future.set_result(meta)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a fetch nobody else waited on does not log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._fetching.pop(key, None)
+        return meta
+
+    async def _refresh(self, key: str, url: str, cached: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Revalidate a cached entry, or download the image; a stale entry is served if upstream fails"""
+        headers = {}
+        if cached is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        try:
+            async with self.client.stream('GET', url, headers=headers) as response:
+                if response.status_code == 304 and cached is not None:
+                    cached['fetched_at'] = time.time()
+                    await run_in_threadpool(_write_meta, self._meta_path(key), cached)
+                    self.revalidated += 1
+                    return cached
+                response.raise_for_status()
+                self.misses += 1
+                return await self._store(key, url, response, cached)
+        except (httpx.HTTPError, OSError) as e:
+            self.errors += 1
+            if cached is not None:
+                self.stale_served += 1
+                logger.warning(f"[IMAGE PROXY] Revalidating {url} failed, serving cached copy: {e}")
+                return cached
+            logger.error(f"Image proxy error: {str(e)}")
+            raise HTTPException(status_code=500, detail="Failed to fetch image")
+
+    async def _store(self, key: str, url: str, response: httpx.Response,
+                     previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        declared = int(response.headers.get('content-length') or 0)
+        if declared > self.max_object_size:
+            raise HTTPException(status_code=413, detail="Image too large to proxy")
+
+        meta_path = self._meta_path(key)
+        data_file = f"{key}.{uuid.uuid4().hex}"
+        data_path = meta_path.with_name(data_file)
+        await run_in_threadpool(meta_path.parent.mkdir, parents=True, exist_ok=True)
+
+        size = 0
+        handle = await run_in_threadpool(open, data_path, 'wb')
+        try:
+            async for chunk in response.aiter_bytes(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > self.max_object_size:
+                    raise HTTPException(status_code=413, detail="Image too large to proxy")
+                await run_in_threadpool(_write_chunk, handle, chunk)
+        except BaseException:
+            handle.close()
+            data_path.unlink(missing_ok=True)
+            raise
+        await run_in_threadpool(handle.close)
+
+        meta = {
+            'url': url,
+            'data_file': data_file,
+            'content_type': response.headers.get('content-type', 'image/png'),
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'size': size,
+            'fetched_at': time.time()
+        }
+        await run_in_threadpool(_write_meta, meta_path, meta)
+        if previous is not None and previous.get('data_file') != data_file:
+            # Readers that already opened the old version keep their handle
+            await run_in_threadpool(meta_path.with_name(previous['data_file']).unlink, True)
+
+        if self._total_bytes is None:
+            self._total_bytes = await run_in_threadpool(self._scan_size)
+        else:
+            self._total_bytes += size - (previous or {}).get('size', 0)
+        if self._total_bytes > self.max_bytes:
+            await self.evict()
+        return meta
+
+    def _scan_size(self) -> int:
+        return sum(path.stat().st_size for path in self.root.rglob('*') if path.is_file())
+
+    async def evict(self) -> int:
+        """Remove least recently served entries until the cache is under EVICT_TO_RATIO of max_bytes"""
+        def _evict() -> Tuple[int, int]:
+            entries = []
+            total = 0
+            for meta_path in self.root.glob(f"*/*{META_SUFFIX}"):
+                try:
+                    meta = json.loads(meta_path.read_text())
+                    used = meta_path.stat().st_mtime
+                except (FileNotFoundError, ValueError):
+                    continue
+                entries.append((used, meta_path, meta))
+                total += meta.get('size', 0)
+
+            target = int(self.max_bytes * EVICT_TO_RATIO)
+            removed = 0
+            for _, meta_path, meta in sorted(entries, key=lambda entry: entry[0]):
+                if total <= target:
+                    break
+                meta_path.unlink(missing_ok=True)
+                meta_path.with_name(meta['data_file']).unlink(missing_ok=True)
+                total -= meta.get('size', 0)
+                removed += 1
+            return total, removed
+
+        self._total_bytes, removed = await run_in_threadpool(_evict)
+        self.evictions += removed
+        if removed:
+            logger.info(f"[IMAGE PROXY] Evicted {removed} cached image(s), {self._total_bytes} bytes left")
+        return removed
+
+    async def response(self, url: str, if_none_match: Optional[str] = None,
+                       headers: Optional[Dict[str, str]] = None) -> Response:
+        """Streaming response for url from the cache; 304 when the client's copy is current"""
+        meta, handle = await self.open(url)
+        etag = f'"{meta["data_file"].rsplit(".", 1)[-1]}"'
+        headers = {**(headers or {}), 'ETag': etag}
+        if etag_matches(if_none_match, etag):
+            handle.close()
+            return Response(status_code=304, headers=headers)
+        headers['Content-Length'] = str(meta['size'])
+        return StreamingResponse(_iter_file(handle), media_type=meta['content_type'], headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.revalidated
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'coalesced': self.coalesced,
+            'stale_served': self.stale_served,
+            'hit_ratio': round((self.hits + self.revalidated) / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'errors': self.errors,
+            'size_bytes': self._total_bytes,
+            'max_bytes': self.max_bytes
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,165 @@
+"""
+Image Processing
+Pillow work that runs in worker processes (see services/image_derivatives.py): decoding a
+print-size PNG takes long enough that it must not run on the event loop, and it is CPU-bound, so
+threads would serialise on the GIL.
+
+Functions here take and return plain values (paths, bytes, dicts) so they can cross the process
+boundary, and import Pillow (and NumPy) lazily so the app still starts without them.
+"""
+import io
+import math
+from typing import Any, Dict, Optional, Tuple
+
+# Derivative name -> longest side in pixels
+DERIVATIVE_SPECS: Dict[str, int] = {
+    'thumb': 320,
+    'preview': 1280
+}
+
+WEBP_QUALITY = 80
+
+
+def render_derivatives(source_path: str, specs: Dict[str, int],
+                       quality: int = WEBP_QUALITY) -> Tuple[Dict[str, Tuple[bytes, int, int]], Tuple[int, int]]:
+    """
+    Downscale an image to each spec and encode it as WebP.
+    Returns ({name: (webp_bytes, width, height)}, (source_width, source_height)). Images are never upscaled.
+    """
+    from PIL import Image, ImageOps
+
+    results = {}
+    with Image.open(source_path) as image:
+        source_size = _oriented_size(image)
+        largest = max(specs.values())
+        # JPEGs can decode straight at a reduced scale, which is much faster for large photos
+        image.draft('RGB', (largest, largest))
+        working = ImageOps.exif_transpose(image)
+        if working.mode not in ('RGB', 'RGBA'):
+            has_alpha = working.mode in ('LA', 'PA') or 'transparency' in working.info
+            working = working.convert('RGBA' if has_alpha else 'RGB')
+
+        # Largest first, each derivative downscaled from the previous one rather than the original
+        for name, max_side in sorted(specs.items(), key=lambda spec: -spec[1]):
+            resized = working.copy()
+            resized.thumbnail((max_side, max_side), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, 'WEBP', quality=quality, method=4)
+            results[name] = (buffer.getvalue(), resized.width, resized.height)
+            working = resized
+    return results, source_size
+
+
+def _oriented_size(image) -> Tuple[int, int]:
+    """Size as displayed: EXIF orientations 5-8 swap width and height"""
+    orientation = image.getexif().get(0x0112, 1)
+    return (image.height, image.width) if orientation in (5, 6, 7, 8) else (image.width, image.height)
+
+
+# ---------- mockups ----------
+
+# The POD designer's stage is MOCKUP_CANVAS_SIZE units square: print areas and design positions are
+# stored in these units, and the garment photo is stretched over the whole stage
+MOCKUP_CANVAS_SIZE = 500
+MOCKUP_PIXEL_RATIO = 2
+MOCKUP_QUALITY = 85
+
+
+def mockup_placement(design_size: Tuple[int, int], transform: Dict[str, Any],
+                     print_area: Dict[str, float], scale_factor: float) -> Dict[str, float]:
+    """
+    Box of the design on the stage: {'x', 'y', 'width', 'height', 'rotation'} in stage units.
+
+    Follows the designer page: scale is the placed width over the design's pixel width, (x, y) is
+    the top-left corner and rotation turns clockwise about it. A design whose transform was never
+    saved (scale 1 at the origin) is fitted inside print_area * scale_factor and centred, as the
+    page places a fresh upload.
+    """
+    width, height = design_size
+    scale = float(transform.get('scale') or 1.0)
+    x = float(transform.get('position_x') or 0)
+    y = float(transform.get('position_y') or 0)
+    rotation = float(transform.get('rotation') or 0)
+    if scale == 1.0 and x == 0 and y == 0 and rotation == 0:
+        # Never upscaled, like calculateDesignDimensions on the page
+        fit = min(1.0, print_area['width'] * scale_factor / width, print_area['height'] * scale_factor / height)
+        placed_width, placed_height = width * fit, height * fit
+        return {
+            'x': print_area['x'] + (print_area['width'] - placed_width) / 2,
+            'y': print_area['y'] + (print_area['height'] - placed_height) / 2,
+            'width': placed_width,
+            'height': placed_height,
+            'rotation': 0.0
+        }
+    return {'x': x, 'y': y, 'width': width * scale, 'height': height * scale, 'rotation': rotation}
+
+
+def _shade(layer, garment, strength: float):
+    """
+    Carry the garment's folds and highlights into the printed design: each design pixel is
+    brightened or darkened by how far the garment under it is from the garment's average
+    brightness under the whole print, so a print on dark fabric keeps its colours.
+    """
+    import numpy as np
+    from PIL import Image
+
+    pixels = np.asarray(layer, dtype=np.float32)
+    alpha = pixels[..., 3]
+    covered = alpha > 0
+    if not covered.any():
+        return layer
+    luminance = np.asarray(garment.convert('L'), dtype=np.float32)
+    relief = (luminance - luminance[covered].mean()) / 255.0
+    pixels[..., :3] *= (1.0 + strength * relief)[..., None]
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'RGBA')
+
+
+def composite_mockup(garment_path: str, design_path: str, design_size: Optional[Tuple[int, int]],
+                     transform: Dict[str, Any], print_area: Dict[str, float], scale_factor: float,
+                     canvas_size: int = MOCKUP_CANVAS_SIZE, pixel_ratio: float = MOCKUP_PIXEL_RATIO,
+                     shading: float = 0.0, quality: int = MOCKUP_QUALITY) -> Tuple[bytes, int, int]:
+    """
+    Render a design onto a garment photo as WebP. Returns (webp_bytes, width, height).
+
+    design_path may be a downscaled copy of the design; design_size is then the original's pixel
+    size, which the transform's scale refers to (None: design_path is the original).
+    """
+    from PIL import Image, ImageOps
+
+    output_size = round(canvas_size * pixel_ratio)
+    with Image.open(garment_path) as image:
+        image.draft('RGB', (output_size, output_size))
+        garment = ImageOps.exif_transpose(image).convert('RGBA').resize(
+            (output_size, output_size), Image.LANCZOS, reducing_gap=3.0
+        )
+
+    with Image.open(design_path) as image:
+        design = ImageOps.exif_transpose(image).convert('RGBA')
+    placement = mockup_placement(design_size or design.size, transform, print_area, scale_factor)
+
+    width = max(1, round(placement['width'] * pixel_ratio))
+    height = max(1, round(placement['height'] * pixel_ratio))
+    design = design.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+
+    left, top = placement['x'] * pixel_ratio, placement['y'] * pixel_ratio
+    if placement['rotation']:
+        # Clockwise on screen about the top-left corner; the expanded image's origin is the
+        # top-left of the rotated corners' bounding box
+        angle = math.radians(placement['rotation'])
+        cos, sin = math.cos(angle), math.sin(angle)
+        corners = [(0, 0), (width, 0), (0, height), (width, height)]
+        left += min(cx * cos - cy * sin for cx, cy in corners)
+        top += min(cx * sin + cy * cos for cx, cy in corners)
+        design = design.rotate(-placement['rotation'], resample=Image.BICUBIC, expand=True)
+
+    layer = Image.new('RGBA', garment.size, (0, 0, 0, 0))
+    # The layer is empty, so a plain paste copies alpha as-is; it clips a design hanging off the
+    # stage, as the canvas does
+    layer.paste(design, (round(left), round(top)))
+    if shading > 0:
+        layer = _shade(layer, garment, shading)
+
+    mockup = Image.alpha_composite(garment, layer).convert('RGB')
+    buffer = io.BytesIO()
+    mockup.save(buffer, 'WEBP', quality=quality, method=4)
+    return buffer.getvalue(), mockup.width, mockup.height
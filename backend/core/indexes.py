@@ -0,0 +1,403 @@
+"""
+MongoDB Index Manifest
+Declares every index the API relies on, per collection, and reconciles them at startup.
+Also provides an explain()-based coverage report for the query shapes used by the routes.
+"""
+import logging
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+def _counter_indexes() -> List[IndexModel]:
+    """Daily ID counters are upserted by day_key - a unique index stops racing upserts from duplicating them"""
+    return [IndexModel([('day_key', ASCENDING)], name='day_key_unique', unique=True)]
+
+
+# Collection name -> list of indexes. Names are explicit so reconciliation is idempotent.
+INDEX_MANIFEST: Dict[str, List[IndexModel]] = {
+    'orders': [
+        IndexModel([('id', ASCENDING)], name='id_unique', unique=True,
+                   partialFilterExpression={'id': {'$exists': True}}),
+        IndexModel([('order_id', ASCENDING)], name='order_id', sparse=True),
+        # Every accepted order code, normalized - see services/order_repository.py
+        IndexModel([('lookup_keys', ASCENDING)], name='lookup_keys'),
+        # (created_at, id) pairs back the keyset cursors in core/pagination.py
+        IndexModel([('created_at', DESCENDING), ('id', DESCENDING)], name='created_at_id_desc'),
+        IndexModel([('status', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)],
+                   name='status_created_at_id'),
+        IndexModel([('type', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)],
+                   name='type_created_at_id'),
+        IndexModel([('user_email', ASCENDING), ('created_at', DESCENDING)], name='user_email_created_at'),
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING)], name='user_id_created_at'),
+        IndexModel([('user_phone', ASCENDING)], name='user_phone', sparse=True),
+        IndexModel([('design_negotiation_status', ASCENDING), ('created_at', DESCENDING)],
+                   name='branded_negotiation_created_at',
+                   partialFilterExpression={'contains_branded_items': True}),
+        # Reference checks of the storage garbage collector - see services/storage_gc.py
+        IndexModel([('mockup_file_url', ASCENDING)], name='mockup_file_url', sparse=True),
+        IndexModel([('payment_receipt_url', ASCENDING)], name='payment_receipt_url', sparse=True),
+        IndexModel([('cart_items.mockup_file_url', ASCENDING)], name='cart_items_mockup_file_url', sparse=True),
+        IndexModel([('cart_items.image_url', ASCENDING)], name='cart_items_image_url', sparse=True),
+    ],
+    'pod_designs': [
+        IndexModel([('id', ASCENDING)], name='id_unique', unique=True),
+        IndexModel([('guest_id', ASCENDING), ('created_at', DESCENDING)], name='guest_id_created_at'),
+        IndexModel([('session_id', ASCENDING)], name='session_id', sparse=True),
+        IndexModel([('status', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)],
+                   name='status_created_at_id'),
+        IndexModel([('created_at', DESCENDING), ('id', DESCENDING)], name='created_at_id_desc'),
+        IndexModel([('mockup_file_url', ASCENDING)], name='mockup_file_url', sparse=True),
+        # One design per resumable upload, however often finalize is called
+        IndexModel([('resumable_upload_id', ASCENDING)], name='resumable_upload_id_unique', unique=True, sparse=True),
+    ],
+    # Admin file manager - see services/file_catalog.py
+    'file_catalog': [
+        IndexModel([('path', ASCENDING)], name='path_unique', unique=True),
+        IndexModel([('modified_at', DESCENDING), ('id', DESCENDING)], name='modified_at_id_desc'),
+        IndexModel([('type', ASCENDING), ('modified_at', DESCENDING), ('id', DESCENDING)],
+                   name='type_modified_at_id'),
+        IndexModel([('source', ASCENDING), ('modified_at', DESCENDING), ('id', DESCENDING)],
+                   name='source_modified_at_id'),
+        # Reconcilers compare one directory (or one backend) at a time
+        IndexModel([('source', ASCENDING), ('directory', ASCENDING)], name='source_directory'),
+        IndexModel([('source', ASCENDING), ('storage_type', ASCENDING)], name='source_storage_type'),
+        # Storage garbage collector walks one folder at a time, oldest cut-off first
+        IndexModel([('directory', ASCENDING), ('modified_at', DESCENDING), ('id', DESCENDING)],
+                   name='directory_modified_at_id'),
+    ],
+    # Server-rendered mockups, keyed by render inputs - see services/mockup_renderer.py
+    'mockup_renders': [
+        IndexModel([('public_url', ASCENDING)], name='public_url'),
+    ],
+    'pod_guest_contacts': [
+        IndexModel([('id', ASCENDING)], name='id_unique', unique=True),
+        IndexModel([('email', ASCENDING)], name='email'),
+        IndexModel([('created_at', DESCENDING), ('id', DESCENDING)], name='created_at_id_desc'),
+    ],
+    'user_sessions': [
+        IndexModel([('session_token', ASCENDING)], name='session_token', sparse=True),
+        IndexModel([('session_id', ASCENDING)], name='session_id', sparse=True),
+        # Sessions store expires_at as a BSON date - Mongo removes them once expired
+        IndexModel([('expires_at', ASCENDING)], name='expires_at_ttl', expireAfterSeconds=0),
+    ],
+    'users': [
+        IndexModel([('id', ASCENDING)], name='id', sparse=True),
+        IndexModel([('user_id', ASCENDING)], name='user_id', sparse=True),
+        IndexModel([('email', ASCENDING)], name='email'),
+        IndexModel([('username', ASCENDING)], name='username', sparse=True),
+    ],
+    'email_logs': [
+        IndexModel([('id', ASCENDING)], name='id_unique', unique=True),
+        IndexModel([('created_at', DESCENDING), ('id', DESCENDING)], name='created_at_id_desc'),
+        IndexModel([('status', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)],
+                   name='status_created_at_id'),
+        IndexModel([('campaign_id', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)],
+                   name='campaign_id_created_at_id',
+                   partialFilterExpression={'campaign_id': {'$type': 'string'}}),
+        IndexModel([('opened', ASCENDING)], name='opened', partialFilterExpression={'opened': True}),
+    ],
+    'email_subscribers': [
+        IndexModel([('id', ASCENDING)], name='id', sparse=True),
+        IndexModel([('email', ASCENDING)], name='email'),
+        IndexModel([('is_subscribed', ASCENDING), ('created_at', DESCENDING)], name='is_subscribed_created_at'),
+    ],
+    'email_tracking': [
+        IndexModel([('tracking_id', ASCENDING)], name='tracking_id'),
+    ],
+    'notifications': [
+        IndexModel([('id', ASCENDING)], name='id'),
+        IndexModel([('created_at', DESCENDING)], name='created_at_desc'),
+        IndexModel([('read', ASCENDING), ('created_at', DESCENDING)], name='read_created_at'),
+    ],
+    'payments': [
+        IndexModel([('tx_ref', ASCENDING)], name='tx_ref', sparse=True),
+    ],
+    'receipts': [
+        IndexModel([('created_at', DESCENDING)], name='created_at_desc'),
+    ],
+    'manual_quotes': [
+        IndexModel([('id', ASCENDING)], name='id'),
+        IndexModel([('created_at', DESCENDING)], name='created_at_desc'),
+        IndexModel([('status', ASCENDING), ('created_at', DESCENDING)], name='status_created_at'),
+        IndexModel([('receipt_url', ASCENDING)], name='receipt_url', sparse=True),
+    ],
+    'enquiries': [
+        IndexModel([('id', ASCENDING)], name='id'),
+        IndexModel([('enquiry_code', ASCENDING)], name='enquiry_code', sparse=True),
+        IndexModel([('created_at', DESCENDING)], name='created_at_desc'),
+        IndexModel([('enquiry_type', ASCENDING), ('created_at', DESCENDING)], name='enquiry_type_created_at'),
+    ],
+    'audit_logs': [
+        IndexModel([('timestamp', DESCENDING)], name='timestamp_desc'),
+        IndexModel([('entity_type', ASCENDING), ('timestamp', DESCENDING)], name='entity_type_timestamp'),
+    ],
+    'site_texts': [
+        IndexModel([('key', ASCENDING)], name='key'),
+        IndexModel([('page', ASCENDING), ('key', ASCENDING)], name='page_key'),
+    ],
+    'expenses': [
+        IndexModel([('id', ASCENDING)], name='id', sparse=True),
+        IndexModel([('date', DESCENDING), ('id', DESCENDING)], name='date_id_desc'),
+    ],
+    'token_revocations': [
+        IndexModel([('user_id', ASCENDING)], name='user_id_unique', unique=True),
+        IndexModel([('expires_at', ASCENDING)], name='expires_at_ttl', expireAfterSeconds=0),
+    ],
+    'system_config': [
+        # Same name/spec as the index initialize_system_config used to create, so existing deployments match
+        IndexModel([('key', ASCENDING)], name='key_1', unique=True),
+    ],
+    'order_counters': _counter_indexes(),
+    'quote_counters': _counter_indexes(),
+    'invoice_counters': _counter_indexes(),
+    'refund_counters': _counter_indexes(),
+    'procurement_counters': _counter_indexes(),
+    'expense_counters': _counter_indexes(),
+    'enquiry_counters': _counter_indexes(),
+    'custom_order_counters': _counter_indexes(),
+    'supplier_counters': _counter_indexes(),
+    'job_order_counters': _counter_indexes(),
+    'job_orders': [
+        # Anchored-prefix lookup used to seed job_order_counters for days numbered before it existed
+        IndexModel([('job_order_id', ASCENDING)], name='job_order_id', sparse=True),
+    ],
+}
+
+# Indexes replaced by a wider manifest entry (same prefix) - dropped during reconciliation
+# so deployments don't keep paying write cost for both.
+SUPERSEDED_INDEXES: Dict[str, List[str]] = {
+    'orders': ['created_at_desc', 'status_created_at', 'type_created_at'],
+    'pod_designs': ['created_at_desc', 'status_created_at'],
+    'pod_guest_contacts': ['created_at_desc'],
+    'email_logs': ['created_at_desc', 'status_created_at', 'campaign_id_created_at'],
+}
+
+
+# Query shapes issued by the routes - checked by the index coverage report.
+# Each entry: route label, collection, filter, optional sort.
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {'route': 'GET /orders/{order_id}', 'collection': 'orders', 'filter': {'lookup_keys': 'X'}},
+    {'route': 'GET /admin/orders', 'collection': 'orders', 'filter': {},
+     'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/orders?status=', 'collection': 'orders', 'filter': {'status': 'pending_payment'},
+     'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/orders?order_type=', 'collection': 'orders', 'filter': {'type': 'bulk'},
+     'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/orders?cursor=', 'collection': 'orders',
+     'filter': {'$or': [{'created_at': {'$lt': 'x'}}, {'created_at': 'x', 'id': {'$lt': 'x'}}]},
+     'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/financials/transactions (orders)', 'collection': 'orders',
+     'filter': {'status': 'completed'}, 'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/financials/transactions (expenses)', 'collection': 'expenses', 'filter': {},
+     'sort': [('date', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /orders/my-orders', 'collection': 'orders', 'filter': {'user_id': 'x'},
+     'sort': [('created_at', DESCENDING)]},
+    {'route': 'GET /admin/clients/{client_id}/orders', 'collection': 'orders', 'filter': {'user_email': 'x'},
+     'sort': [('created_at', DESCENDING)]},
+    {'route': 'GET /admin/branded-orders', 'collection': 'orders',
+     'filter': {'contains_branded_items': True, 'design_negotiation_status': 'quote_sent'},
+     'sort': [('created_at', DESCENDING)]},
+    {'route': 'GET /pod/design/{design_id}', 'collection': 'pod_designs', 'filter': {'id': 'x'}},
+    {'route': 'POST /pod/uploads/{upload_id}/finalize', 'collection': 'pod_designs',
+     'filter': {'resumable_upload_id': 'x'}},
+    {'route': 'GET /pod/guest/{guest_id}/designs', 'collection': 'pod_designs', 'filter': {'guest_id': 'x'},
+     'sort': [('created_at', DESCENDING)]},
+    {'route': 'POST /pod/guest-contact', 'collection': 'pod_designs',
+     'filter': {'session_id': 'x', 'guest_id': {'$exists': False}}},
+    {'route': 'GET /admin/pod/guest-designs', 'collection': 'pod_designs', 'filter': {'status': 'assigned'},
+     'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/pod/guest-contacts', 'collection': 'pod_guest_contacts', 'filter': {},
+     'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'POST /pod/link-design', 'collection': 'pod_guest_contacts', 'filter': {'email': 'x'}},
+    {'route': 'GET /admin/files', 'collection': 'file_catalog', 'filter': {},
+     'sort': [('modified_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/files?file_type=', 'collection': 'file_catalog', 'filter': {'type': 'image'},
+     'sort': [('modified_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/files?source=', 'collection': 'file_catalog', 'filter': {'source': 'local'},
+     'sort': [('modified_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/files?source=&file_type=', 'collection': 'file_catalog',
+     'filter': {'source': 'local', 'type': 'image'}, 'sort': [('modified_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'DELETE /admin/files', 'collection': 'file_catalog', 'filter': {'path': 'x'}},
+    {'route': 'storage GC (abandoned designs)', 'collection': 'pod_designs',
+     'filter': {'status': {'$in': ['unassigned', 'uploaded', None]}, 'created_at': {'$lt': 'x'},
+                'guest_id': None, 'contact_id': None, 'order_id': None},
+     'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'storage GC (folder)', 'collection': 'file_catalog',
+     'filter': {'directory': 'x', 'modified_at': {'$lt': 'x'}},
+     'sort': [('modified_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'storage GC (mockup references)', 'collection': 'orders', 'filter': {'mockup_file_url': {'$in': ['x']}}},
+    {'route': 'storage GC (cart mockup references)', 'collection': 'orders',
+     'filter': {'cart_items.mockup_file_url': {'$in': ['x']}}},
+    {'route': 'storage GC (receipt references)', 'collection': 'orders',
+     'filter': {'payment_receipt_url': {'$in': ['x']}}},
+    {'route': 'auth (session cookie)', 'collection': 'user_sessions', 'filter': {'session_token': 'x'}},
+    {'route': 'auth (session_id cookie)', 'collection': 'user_sessions', 'filter': {'session_id': 'x'}},
+    {'route': 'auth (user by id)', 'collection': 'users', 'filter': {'$or': [{'id': 'x'}, {'user_id': 'x'}]}},
+    {'route': 'auth (user by email)', 'collection': 'users', 'filter': {'email': 'x'}},
+    {'route': 'GET /admin/email/logs', 'collection': 'email_logs', 'filter': {},
+     'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/email/logs?status=', 'collection': 'email_logs', 'filter': {'status': 'sent'},
+     'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /admin/email/logs?campaign_id=', 'collection': 'email_logs', 'filter': {'campaign_id': 'x'},
+     'sort': [('created_at', DESCENDING), ('id', DESCENDING)]},
+    {'route': 'GET /email/track/{log_id}', 'collection': 'email_logs', 'filter': {'id': 'x'}},
+    {'route': 'GET /admin/notifications', 'collection': 'notifications', 'filter': {},
+     'sort': [('created_at', DESCENDING)]},
+    {'route': 'GET /admin/notifications/count', 'collection': 'notifications', 'filter': {'read': False}},
+    {'route': 'POST /payments/flutterwave/verify', 'collection': 'payments', 'filter': {'tx_ref': 'x'}},
+    {'route': 'GET /admin/quotes', 'collection': 'manual_quotes', 'filter': {},
+     'sort': [('created_at', DESCENDING)]},
+    {'route': 'GET /admin/enquiries', 'collection': 'enquiries', 'filter': {},
+     'sort': [('created_at', DESCENDING)]},
+    {'route': 'GET /design-lab/enquiry/{enquiry_code}', 'collection': 'enquiries', 'filter': {'enquiry_code': 'x'}},
+    {'route': 'GET /admin/audit-logs', 'collection': 'audit_logs', 'filter': {},
+     'sort': [('timestamp', DESCENDING)]},
+    {'route': 'GET /admin/site-texts', 'collection': 'site_texts', 'filter': {}, 'sort': [('key', ASCENDING)]},
+    {'route': 'GET /system-config', 'collection': 'system_config', 'filter': {'key': 'x'}},
+]
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """
+    Reconcile INDEX_MANIFEST against the database.
+    Safe to run on every startup: indexes that already exist by name are left alone, and a
+    failing index (e.g. a unique index over legacy duplicates) is logged without aborting the rest.
+
+    Returns:
+        dict with 'created', 'existing', 'dropped' and 'failed' lists of "collection.index_name"
+    """
+    summary = {'created': [], 'existing': [], 'dropped': [], 'failed': []}
+
+    for collection_name, indexes in INDEX_MANIFEST.items():
+        collection = db[collection_name]
+        try:
+            existing_names = set((await collection.index_information()).keys())
+        except OperationFailure:
+            existing_names = set()
+
+        for index in indexes:
+            name = index.document['name']
+            label = f"{collection_name}.{name}"
+            if name in existing_names:
+                summary['existing'].append(label)
+                continue
+            try:
+                await collection.create_indexes([index])
+                summary['created'].append(label)
+                logger.info(f"[INDEXES] Created index {label}")
+            except OperationFailure as e:
+                summary['failed'].append(label)
+                logger.warning(f"[INDEXES] Could not create index {label}: {e}")
+
+        # Only after the replacements exist, so the routes are never left without an index
+        for name in SUPERSEDED_INDEXES.get(collection_name, []):
+            if name not in existing_names:
+                continue
+            label = f"{collection_name}.{name}"
+            try:
+                await collection.drop_index(name)
+                summary['dropped'].append(label)
+                logger.info(f"[INDEXES] Dropped superseded index {label}")
+            except OperationFailure as e:
+                logger.warning(f"[INDEXES] Could not drop index {label}: {e}")
+
+    logger.info(
+        f"[INDEXES] Reconciled manifest: {len(summary['created'])} created, "
+        f"{len(summary['existing'])} existing, {len(summary['dropped'])} dropped, "
+        f"{len(summary['failed'])} failed"
+    )
+    return summary
+
+
+async def index_status(db) -> Dict[str, List[str]]:
+    """
+    Compare INDEX_MANIFEST with the database without changing anything.
+
+    Returns:
+        dict with 'existing', 'missing' and 'superseded' (still present, due to be dropped)
+        lists of "collection.index_name"
+    """
+    summary = {'existing': [], 'missing': [], 'superseded': []}
+
+    for collection_name, indexes in INDEX_MANIFEST.items():
+        try:
+            existing_names = set((await db[collection_name].index_information()).keys())
+        except OperationFailure:
+            existing_names = set()
+
+        for index in indexes:
+            name = index.document['name']
+            summary['existing' if name in existing_names else 'missing'].append(f"{collection_name}.{name}")
+        for name in SUPERSEDED_INDEXES.get(collection_name, []):
+            if name in existing_names:
+                summary['superseded'].append(f"{collection_name}.{name}")
+
+    return summary
+
+
+def _collect_stages(plan: Dict[str, Any]) -> List[str]:
+    """Flatten the stage names of an explain() plan tree"""
+    if not plan:
+        return []
+    # Slot-based engine wraps the classic plan tree in 'queryPlan'
+    if 'queryPlan' in plan:
+        plan = plan['queryPlan']
+
+    stages = [plan.get('stage', '')]
+    if 'inputStage' in plan:
+        stages.extend(_collect_stages(plan['inputStage']))
+    for child in plan.get('inputStages', []):
+        stages.extend(_collect_stages(child))
+    return stages
+
+
+def _collect_index_names(plan: Dict[str, Any]) -> List[str]:
+    """Collect the index names used by IXSCAN stages of an explain() plan tree"""
+    if not plan:
+        return []
+    if 'queryPlan' in plan:
+        plan = plan['queryPlan']
+
+    names = [plan['indexName']] if plan.get('indexName') else []
+    if 'inputStage' in plan:
+        names.extend(_collect_index_names(plan['inputStage']))
+    for child in plan.get('inputStages', []):
+        names.extend(_collect_index_names(child))
+    return names
+
+
+async def explain_query_shapes(db) -> List[Dict[str, Any]]:
+    """
+    Run explain() on every entry in QUERY_SHAPES and report the winning plan.
+
+    Returns:
+        List of dicts with route, collection, filter, stages, index_names and collscan flag
+    """
+    report = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape['collection']].find(shape['filter'])
+        if shape.get('sort'):
+            cursor = cursor.sort(shape['sort'])
+
+        entry = {
+            'route': shape['route'],
+            'collection': shape['collection'],
+            'filter': shape['filter'],
+            'sort': [list(s) for s in shape.get('sort', [])],
+        }
+        try:
+            explain = await cursor.explain()
+            winning_plan = explain.get('queryPlanner', {}).get('winningPlan', {})
+            stages = _collect_stages(winning_plan)
+            entry['stages'] = stages
+            entry['index_names'] = _collect_index_names(winning_plan)
+            entry['collscan'] = 'COLLSCAN' in stages
+        except OperationFailure as e:
+            entry['error'] = str(e)
+            entry['collscan'] = None
+        report.append(entry)
+    return report
@@ -0,0 +1,151 @@
+"""
+Keyset (Cursor) Pagination
+Opaque cursors over a compound sort such as (created_at desc, id desc). Each page resumes
+from the last row of the previous one with an index range scan, so page 1,000 costs the
+same as page 1 - unlike skip/limit, which walks and discards every skipped document.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from pymongo import DESCENDING
+
+# Default sort for admin lists - newest first, id breaks ties between equal timestamps
+CREATED_AT_SORT = [('created_at', DESCENDING), ('id', DESCENDING)]
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort-key values of the last row on a page into an opaque cursor"""
+    raw = json.dumps(list(values), separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: Sequence[Tuple[str, int]]) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor for the given sort.
+
+    Raises:
+        HTTPException 400 if the cursor is malformed or was issued for a different sort
+    """
+    values = _decode_raw(cursor)
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return values
+
+
+def _decode_raw(cursor: str) -> Any:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def cursor_values(doc: Dict[str, Any], sort: Sequence[Tuple[str, int]]) -> List[Any]:
+    """Sort-key values of a document, in sort order"""
+    return [doc.get(field) for field, _ in sort]
+
+
+def keyset_filter(sort: Sequence[Tuple[str, int]], values: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Filter matching every row strictly after `values` in `sort` order.
+
+    For (created_at desc, id desc) this is:
+        created_at < v0  OR  (created_at == v0 AND id < v1)
+    """
+    branches = []
+    for position, (field, direction) in enumerate(sort):
+        branch = {prev_field: values[i] for i, (prev_field, _) in enumerate(sort[:position])}
+        branch[field] = {'$lt' if direction == DESCENDING else '$gt': values[position]}
+        branches.append(branch)
+    return branches[0] if len(branches) == 1 else {'$or': branches}
+
+
+def apply_cursor(query: Dict[str, Any], sort: Sequence[Tuple[str, int]],
+                 cursor: Optional[str]) -> Dict[str, Any]:
+    """Combine a route's query with the keyset condition for a cursor (no-op for the first page)"""
+    if not cursor:
+        return query
+    condition = keyset_filter(sort, decode_cursor(cursor, sort))
+    return {'$and': [query, condition]} if query else condition
+
+
+async def fetch_keyset_page(collection, query: Dict[str, Any], projection: Optional[Dict[str, Any]],
+                            limit: int, cursor: Optional[str] = None,
+                            sort: Sequence[Tuple[str, int]] = CREATED_AT_SORT
+                            ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page in keyset order.
+
+    Args:
+        collection: Motor collection
+        query: Route filter
+        projection: Mongo projection - must not exclude the sort fields
+        limit: Page size (capped at MAX_PAGE_SIZE)
+        cursor: Cursor from the previous page, or None/'' for the first page
+        sort: Compound sort; the last field must be unique (usually 'id')
+
+    Returns:
+        (documents, next_cursor) - next_cursor is None on the last page
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # One extra row tells us whether another page exists without a count
+    docs = await collection.find(apply_cursor(query, sort, cursor), projection) \
+        .sort(list(sort)).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(cursor_values(docs[-1], sort))
+    return docs, next_cursor
+
+
+async def fetch_merged_keyset_page(sources: Sequence[Tuple[Any, Dict[str, Any], Optional[Dict[str, Any]],
+                                                           Sequence[Tuple[str, int]]]],
+                                   limit: int, cursor: Optional[str] = None
+                                   ) -> Tuple[List[Tuple[int, Dict[str, Any]]], Optional[str]]:
+    """
+    Fetch one page from several collections interleaved newest-first, e.g. income and expenses.
+
+    Each source keeps its own keyset position inside the cursor, so a page never skips or
+    repeats rows from one collection because of how many rows the other contributed.
+
+    Args:
+        sources: (collection, query, projection, sort) per source; every sort must be descending
+        limit: Page size (capped at MAX_PAGE_SIZE)
+        cursor: Cursor from the previous page, or None/'' for the first page
+
+    Returns:
+        ([(source_index, document), ...], next_cursor)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    positions: List[Optional[List[Any]]] = [None] * len(sources)
+    if cursor:
+        positions = _decode_raw(cursor)
+        if not isinstance(positions, list) or len(positions) != len(sources):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+    candidates = []
+    for index, (collection, query, projection, sort) in enumerate(sources):
+        position = positions[index]
+        if position is not None:
+            if not isinstance(position, list) or len(position) != len(sort):
+                raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+            query = {'$and': [query, keyset_filter(sort, position)]} if query else keyset_filter(sort, position)
+        docs = await collection.find(query, projection).sort(list(sort)).limit(limit + 1).to_list(limit + 1)
+        candidates.extend((cursor_values(doc, sort), index, doc) for doc in docs)
+
+    # Interleave on the sort keys (missing values sort last)
+    candidates.sort(key=lambda item: tuple('' if v is None else str(v) for v in item[0]), reverse=True)
+    page = candidates[:limit]
+
+    for values, index, _ in page:
+        positions[index] = values
+
+    next_cursor = encode_cursor(positions) if len(candidates) > limit else None
+    return [(index, doc) for _, index, doc in page], next_cursor
@@ -0,0 +1,285 @@
+"""
+Bulk Price Book
+Compiled, immutable snapshot of everything calculate_bulk_price needs: base prices merged with
+defaults, per-item fabric prices, discount tiers sorted once and production costs.
+price_batch() prices many lines at once with NumPy, looking tiers up with searchsorted.
+
+The book is compiled from cms_settings, production_costs and fabric_qualities and kept in memory.
+Writes to those collections call invalidate(), which bumps a shared version counter so every
+worker recompiles; readers check the counter at most every check_interval seconds.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Default base prices (fallback if not in CMS)
+DEFAULT_BASE_PRICES = {
+    'T-Shirt': 1500,
+    'Hoodie': 4500,
+    'Joggers': 3500,
+    'Varsity Jacket': 8000,
+    'Polo': 2500,
+    'Polo Shirt': 2500,  # Alias
+    'Button-Down Shirt': 3000,
+    'Corporate Shirt': 3200,
+    'Coverall': 5000,
+    'Hospital Scrubs': 3500,
+    'Shorts': 2000,
+    'School Uniform': 2500,
+    'Security Uniform': 3000,
+    'Uniform': 3500,
+    'Dress': 4000,
+    # Nigerian Traditional Clothing
+    'Agbada': 12000,
+    'Senator Wear': 9000,
+    'Kaftan': 7500,
+    'Bubu Dress': 8500,
+    'Ankara Dress': 6500,
+    'Dashiki': 5000
+}
+
+DEFAULT_BASE_PRICE = 2000
+
+DEFAULT_DISCOUNTS = {
+    '500': 20,
+    '200': 15,
+    '100': 10,
+    '50': 5
+}
+
+DEFAULT_PRODUCTION_COSTS = {
+    'bulk_print_cost_per_piece': 500,
+    'bulk_embroidery_cost_per_piece': 1200
+}
+
+# Back printing costs 60% more than front only
+FRONT_BACK_MULTIPLIER = 1.6
+
+# Extra production days for quantities above each threshold (more than 20, 50, 100 pieces)
+PRODUCTION_BASE_DAYS = 3
+PRODUCTION_QUANTITY_THRESHOLDS = np.array([20, 50, 100])
+PRODUCTION_QUANTITY_DAYS = np.array([0, 3, 5, 7])
+PRODUCTION_PRINT_TYPE_DAYS = {'embroidery': 2, 'front_back': 1}
+
+# Document in cache_versions holding the shared price book version
+VERSION_KEY = 'price_book'
+
+
+@dataclass(frozen=True)
+class PriceBook:
+    """Read-only pricing tables; price() does no I/O"""
+    version: int
+    base_prices: Mapping[str, float]
+    # clothing item -> {lowercased quality name: price}; 'default' applies to every item
+    fabric_prices: Mapping[str, Mapping[str, float]]
+    # (min quantity, discount percent), highest minimum first
+    discount_tiers: Tuple[Tuple[int, float], ...]
+    print_cost: Any
+    embroidery_cost: Any
+    # Same tiers ascending, for searchsorted: minimums and their discount fractions
+    tier_minimums: np.ndarray
+    tier_discounts: np.ndarray
+
+    def fabric_cost(self, clothing_item: str, fabric_quality: Optional[str]) -> float:
+        name = (fabric_quality or 'standard').lower()
+        prices = self.fabric_prices.get(clothing_item) or self.fabric_prices.get('default', {})
+        return prices.get(name, 0)
+
+    def discount(self, quantity: int) -> float:
+        return float(self.discounts(np.array([quantity], dtype=np.int64))[0])
+
+    def print_type_cost(self, print_type: Optional[str]):
+        # PrintType is a str enum, so raw strings from form payloads compare equal too
+        if print_type in ('front', 'front_back'):
+            cost = self.print_cost
+            if print_type == 'front_back':
+                cost = cost * FRONT_BACK_MULTIPLIER
+            return cost
+        if print_type == 'embroidery':
+            return self.embroidery_cost
+        return 0
+
+    def price(self, clothing_item: str, quantity: int, print_type: Optional[str],
+              fabric_quality: Optional[str]) -> Dict[str, float]:
+        """Price breakdown for a bulk order line; one-line price_batch(), so both agree exactly"""
+        return self.price_batch([clothing_item], [quantity], [print_type], [fabric_quality])[0]
+
+    def discounts(self, quantities: np.ndarray) -> np.ndarray:
+        """discount() for an array of quantities"""
+        # Index of the highest tier minimum <= quantity, -1 below the lowest tier
+        tier = np.searchsorted(self.tier_minimums, quantities, side='right') - 1
+        if not len(self.tier_discounts):
+            return np.zeros(len(quantities))
+        return np.where(tier >= 0, self.tier_discounts[np.maximum(tier, 0)], 0.0)
+
+    def price_batch(self, clothing_items: Sequence[str], quantities: Sequence[int],
+                    print_types: Sequence[Optional[str]], fabric_qualities: Sequence[Optional[str]]) -> List[Dict[str, float]]:
+        """price() for many lines at once; returns the same breakdowns in input order"""
+        fabric_lookup = {
+            key: self.fabric_cost(*key) for key in set(zip(clothing_items, fabric_qualities))
+        }
+        print_lookup = {print_type: self.print_type_cost(print_type) for print_type in set(print_types)}
+
+        base = np.array([self.base_prices.get(item, DEFAULT_BASE_PRICE) for item in clothing_items], dtype=float)
+        fabric = np.array([fabric_lookup[key] for key in zip(clothing_items, fabric_qualities)], dtype=float)
+        printing = np.array([print_lookup[print_type] for print_type in print_types], dtype=float)
+        qty = np.asarray(quantities, dtype=np.int64)
+
+        discount = self.discounts(qty)
+        price_per_item = (base + fabric + printing) * (1 - discount)
+
+        return [
+            {
+                'base_price': row[0],
+                'fabric_cost': row[1],
+                'print_cost': row[2],
+                'discount_percentage': row[3],
+                'price_per_item': row[4],
+                'total_price': row[5]
+            }
+            for row in zip(
+                base.tolist(), fabric.tolist(), printing.tolist(), (discount * 100).tolist(),
+                price_per_item.tolist(), (price_per_item * qty).tolist()
+            )
+        ]
+
+
+def compile_price_book(settings: Optional[Dict[str, Any]], production_costs: Optional[Dict[str, Any]],
+                       fabric_qualities, version: int = 0) -> PriceBook:
+    """
+    Build a PriceBook from the raw pricing documents.
+
+    Args:
+        settings: cms_settings document (bulk_order_base_prices, bulk_order_discounts)
+        production_costs: production_costs document
+        fabric_qualities: fabric_qualities documents in natural order
+        version: Shared version the documents were read at
+    """
+    settings = settings or {}
+    production_costs = production_costs or DEFAULT_PRODUCTION_COSTS
+
+    base_prices = dict(DEFAULT_BASE_PRICES)
+    if 'bulk_order_base_prices' in settings:
+        base_prices.update(settings['bulk_order_base_prices'])
+
+    # A quality defined for an item and for 'default' resolves to whichever was stored first,
+    # as the per-request $or query did
+    by_item: Dict[str, list] = {}
+    for position, quality in enumerate(fabric_qualities):
+        by_item.setdefault(quality.get('clothing_item'), []).append((position, quality))
+    defaults = by_item.get('default', [])
+
+    fabric_prices = {}
+    for item, qualities in by_item.items():
+        merged = qualities if item == 'default' else sorted(qualities + defaults, key=lambda entry: entry[0])
+        prices = {}
+        for _, quality in merged:
+            prices.setdefault(quality['name'].lower(), quality['price'])
+        fabric_prices[item] = MappingProxyType(prices)
+
+    discount_tiers = []
+    for qty, disc in settings.get('bulk_order_discounts', DEFAULT_DISCOUNTS).items():
+        try:
+            discount_tiers.append((int(qty), disc))
+        except (TypeError, ValueError):
+            logger.warning(f"[PRICE BOOK] Ignoring discount tier with invalid quantity: {qty!r}")
+    discount_tiers.sort(key=lambda tier: tier[0], reverse=True)
+    ascending = discount_tiers[::-1]
+
+    return PriceBook(
+        version=version,
+        base_prices=MappingProxyType(base_prices),
+        fabric_prices=MappingProxyType(fabric_prices),
+        discount_tiers=tuple(discount_tiers),
+        print_cost=production_costs.get('bulk_print_cost_per_piece', 500),
+        embroidery_cost=production_costs.get('bulk_embroidery_cost_per_piece', 1200),
+        tier_minimums=np.array([min_qty for min_qty, _ in ascending], dtype=np.int64),
+        tier_discounts=np.array([disc / 100.0 for _, disc in ascending], dtype=float)
+    )
+
+
+def production_days(quantity: int, print_type: Optional[str]) -> int:
+    """Estimated production days for one bulk line"""
+    return int(production_days_batch([quantity], [print_type])[0])
+
+
+def production_days_batch(quantities: Sequence[int], print_types: Sequence[Optional[str]]) -> np.ndarray:
+    """Estimated production days for many lines"""
+    qty = np.asarray(quantities, dtype=np.int64)
+    # side='left' counts thresholds strictly below the quantity (quantity > 20, > 50, > 100)
+    days = PRODUCTION_BASE_DAYS + PRODUCTION_QUANTITY_DAYS[np.searchsorted(PRODUCTION_QUANTITY_THRESHOLDS, qty, side='left')]
+    # Enum members hash by name, so look print types up by their string value
+    extra = [PRODUCTION_PRINT_TYPE_DAYS.get(getattr(print_type, 'value', print_type), 0) for print_type in print_types]
+    return days + np.array(extra, dtype=np.int64)
+
+
+class PriceBookCache:
+    """Holds the current PriceBook and recompiles it when the shared version moves"""
+
+    def __init__(self, db, check_interval: float = 5.0):
+        self.db = db
+        self.check_interval = check_interval
+        self._book: Optional[PriceBook] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.compiles = 0
+
+    async def _shared_version(self) -> int:
+        doc = await self.db.cache_versions.find_one({'_id': VERSION_KEY})
+        return doc.get('version', 0) if doc else 0
+
+    async def _compile(self, version: int) -> PriceBook:
+        settings = await self.db.cms_settings.find_one(
+            {}, {'_id': 0, 'bulk_order_base_prices': 1, 'bulk_order_discounts': 1}
+        )
+        production_costs = await self.db.production_costs.find_one({}, {'_id': 0})
+        fabric_qualities = await self.db.fabric_qualities.find(
+            {}, {'_id': 0, 'clothing_item': 1, 'name': 1, 'price': 1}
+        ).to_list(None)
+
+        self.compiles += 1
+        logger.info(f"[PRICE BOOK] Compiled version {version}")
+        return compile_price_book(settings, production_costs, fabric_qualities, version)
+
+    async def get(self) -> PriceBook:
+        """Current price book, recompiled if another worker (or this one) changed pricing"""
+        book = self._book
+        if book is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return book
+
+        async with self._lock:
+            if self._book is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._book
+            version = await self._shared_version()
+            if self._book is None or self._book.version != version:
+                self._book = await self._compile(version)
+            self._checked_at = time.monotonic()
+            return self._book
+
+    async def invalidate(self):
+        """Call after any write to cms_settings, production_costs or fabric_qualities"""
+        doc = await self.db.cache_versions.find_one_and_update(
+            {'_id': VERSION_KEY},
+            {'$inc': {'version': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        async with self._lock:
+            self._book = None
+        logger.info(f"[PRICE BOOK] Invalidated, now version {doc.get('version') if doc else '?'}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'version': self._book.version if self._book else None,
+            'compiled': self._book is not None,
+            'compiles': self.compiles,
+            'check_interval_seconds': self.check_interval
+        }
@@ -0,0 +1,68 @@
+"""
+Authenticated Principal Cache
+Bounded LRU + TTL cache of resolved users, keyed by session token or JWT subject.
+Saves the user_sessions + users round-trips on every authenticated request.
+"""
+import time
+from typing import Any, Dict, Hashable, Optional
+
+from cachetools import TTLCache
+
+
+class PrincipalCache:
+    """In-process cache of authenticated user documents with explicit invalidation"""
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: int = 60):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached user, or None on miss / expired session"""
+        entry = self._cache.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user, session_expires_at = entry
+        # Never serve a principal past the expiry of the session it came from
+        if session_expires_at is not None and session_expires_at <= time.time():
+            self._cache.pop(key, None)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return dict(user)
+
+    def set(self, key: Hashable, user: Dict[str, Any], session_expires_at: Optional[float] = None):
+        """Cache a resolved user. session_expires_at is a unix timestamp for session-backed keys."""
+        self._cache[key] = (dict(user), session_expires_at)
+
+    def invalidate(self, key: Hashable):
+        """Drop a single cache key (e.g. a logged-out session token)"""
+        self._cache.pop(key, None)
+
+    def invalidate_user(self, *user_ids: str):
+        """Drop every cached entry for a user, matched on either 'id' or 'user_id'"""
+        targets = {uid for uid in user_ids if uid}
+        if not targets:
+            return
+        for key, (user, _) in list(self._cache.items()):
+            if user.get('id') in targets or user.get('user_id') in targets:
+                self._cache.pop(key, None)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            'size': len(self._cache),
+            'maxsize': self.maxsize,
+            'ttl_seconds': self.ttl_seconds
+        }
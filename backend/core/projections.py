@@ -0,0 +1,82 @@
+"""
+List Projections
+Per-resource "summary" projections for admin tables and the `fields=` query parameter.
+List endpoints return only what the tables show; detail routes keep returning full documents.
+"""
+import re
+from typing import Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+# Value of `fields` that asks for whole documents
+ALL_FIELDS = 'all'
+
+MAX_FIELDS = 50
+
+_FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$')
+
+# Keys needed to page, link and open the detail view - always returned
+_ALWAYS_INCLUDED = ('id', 'created_at')
+
+# Internal fields never sent to clients
+_HIDDEN_FIELDS: Dict[str, List[str]] = {
+    'orders': ['lookup_keys'],
+}
+
+SUMMARY_FIELDS: Dict[str, List[str]] = {
+    # No cart_items / price_breakdown / color_quantities / size_breakdown / design URLs
+    'orders': [
+        'order_id', 'type', 'status', 'payment_status', 'user_id', 'user_name', 'user_email', 'user_phone',
+        'clothing_item', 'print_size', 'quantity', 'total_price', 'contains_branded_items', 'updated_at'
+    ],
+    'enquiries': [
+        'order_id', 'enquiry_code', 'enquiry_type', 'status', 'customer_name', 'customer_email',
+        'customer_phone', 'quantity', 'total_quantity', 'quote', 'updated_at'
+    ],
+    'pod_designs': [
+        'guest_id', 'contact_id', 'guest_name', 'guest_email', 'guest_phone', 'product_id', 'item_type',
+        'print_size', 'status', 'original_file_url', 'mockup_file_url', 'file_size'
+    ],
+    'pod_guest_contacts': ['name', 'email', 'phone', 'designs'],
+    'email_logs': ['recipient_email', 'subject', 'status', 'opened', 'campaign_id', 'error_message'],
+}
+
+
+def list_projection(resource: str, fields: Optional[str] = None, required: Sequence[str] = ()) -> Dict[str, int]:
+    """
+    Build the Mongo projection for a list endpoint.
+
+    Args:
+        resource: Key in SUMMARY_FIELDS (collection name)
+        fields: Raw `fields` query value - None/'' for the summary, 'all' for full documents,
+                or a comma-separated list of (dotted) field names
+        required: Extra fields the endpoint itself needs (e.g. for enrichment)
+
+    Raises:
+        HTTPException 400 for malformed field lists
+    """
+    hidden = _HIDDEN_FIELDS.get(resource, [])
+
+    if fields and fields.strip() == ALL_FIELDS:
+        projection = {'_id': 0}
+        projection.update({field: 0 for field in hidden})
+        return projection
+
+    if fields:
+        requested = [field.strip() for field in fields.split(',') if field.strip()]
+        if len(requested) > MAX_FIELDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_FIELDS} fields can be requested")
+        invalid = [field for field in requested if not _FIELD_NAME.match(field)]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid field names: {', '.join(invalid)}")
+    else:
+        requested = SUMMARY_FIELDS[resource]
+
+    selected = [field for field in (*_ALWAYS_INCLUDED, *required, *requested)
+                if field.split('.')[0] not in hidden]
+    projection = {'_id': 0}
+    for field in selected:
+        # 'items' already covers 'items.size' - Mongo rejects the overlap as a path collision
+        if not any(field.startswith(other + '.') for other in selected):
+            projection[field] = 1
+    return projection
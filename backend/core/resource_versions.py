@@ -0,0 +1,122 @@
+"""
+Public Resource Versions
+Per-resource version counters behind the ETags of the public read endpoints (/pricing, /fabrics, ...).
+
+Each resource has a counter in cache_versions that admin writes bump. The ETag of a response is
+derived from the counter (plus a variant such as a query filter), so If-None-Match can be answered
+with a 304 from memory without reading the resource. Readers refresh the counters from Mongo at
+most every check_interval seconds, the same way PriceBookCache follows the price book version.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Resources served by public read endpoints; named after the collection they are read from
+RESOURCES = (
+    'cms_settings',
+    'site_texts',
+    'system_config',
+    'fabrics',
+    'souvenirs',
+    'boutique_products',
+    'bulk_clothing_items',
+    'pod_clothing_items',
+    'product_categories'
+)
+
+# cache_versions document ids are prefixed so they never collide with other shared versions
+VERSION_KEY_PREFIX = 'resource:'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored and '*' matches anything"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResourceVersions:
+    """In-memory copy of the shared resource versions, refreshed every check_interval seconds"""
+
+    def __init__(self, db, check_interval: float = 5.0):
+        self.db = db
+        self.check_interval = check_interval
+        self._versions: Dict[str, int] = {}
+        self._checked_at = 0.0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self.not_modified = 0
+        self.full_responses = 0
+
+    async def _refresh(self):
+        docs = await self.db.cache_versions.find(
+            {'_id': {'$in': [VERSION_KEY_PREFIX + resource for resource in RESOURCES]}}
+        ).to_list(len(RESOURCES))
+        versions = {resource: 0 for resource in RESOURCES}
+        for doc in docs:
+            versions[doc['_id'][len(VERSION_KEY_PREFIX):]] = doc.get('version', 0)
+        self._versions = versions
+        self._loaded = True
+        self._checked_at = time.monotonic()
+
+    async def version(self, resource: str) -> int:
+        if not self._loaded or time.monotonic() - self._checked_at >= self.check_interval:
+            async with self._lock:
+                if not self._loaded or time.monotonic() - self._checked_at >= self.check_interval:
+                    await self._refresh()
+        return self._versions.get(resource, 0)
+
+    async def etag(self, resource: str, variant: str = '') -> str:
+        """Strong ETag for one representation of a resource"""
+        version = await self.version(resource)
+        digest = hashlib.sha256(f"{resource}:{version}:{variant}".encode()).hexdigest()[:32]
+        return f'"{digest}"'
+
+    async def check(self, resource: str, if_none_match: Optional[str], variant: str = '') -> Tuple[str, bool]:
+        """(etag, not_modified) for a conditional read of a resource"""
+        etag = await self.etag(resource, variant)
+        not_modified = etag_matches(if_none_match, etag)
+        if not_modified:
+            self.not_modified += 1
+        else:
+            self.full_responses += 1
+        return etag, not_modified
+
+    async def bump(self, *resources: str):
+        """Call after any write to the collections behind these resources"""
+        for resource in resources:
+            if resource not in RESOURCES:
+                raise ValueError(f"Unknown resource: {resource}")
+            doc = await self.db.cache_versions.find_one_and_update(
+                {'_id': VERSION_KEY_PREFIX + resource},
+                {'$inc': {'version': 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            # This worker sees its own write immediately; others on their next refresh
+            self._versions[resource] = doc.get('version', 0) if doc else self._versions.get(resource, 0) + 1
+            logger.info(f"[RESOURCE VERSIONS] {resource} now version {self._versions[resource]}")
+
+    def stats(self) -> Dict[str, object]:
+        total = self.not_modified + self.full_responses
+        return {
+            'versions': dict(self._versions),
+            'not_modified': self.not_modified,
+            'full_responses': self.full_responses,
+            'not_modified_ratio': round(self.not_modified / total, 4) if total else 0.0,
+            'check_interval_seconds': self.check_interval
+        }
@@ -0,0 +1,255 @@
+"""
+Resumable Uploads
+Chunked upload sessions for large files (A3/A2 print files) on unreliable connections: the
+client creates a session with the total size, PUTs chunks at explicit byte offsets and finalizes
+once every byte has arrived. A dropped connection costs only the chunk in flight; the client asks
+for the current offset and carries on from there.
+
+Session state lives on disk (a state.json and the data file per session), so it survives restarts
+and is visible to every worker sharing the directory. The data file's size is the offset: a chunk
+cut off half-way leaves exactly the bytes that arrived, and the client resumes from there.
+Finalizing claims the session by renaming its data file, so of concurrent finalize calls in any
+worker exactly one goes ahead.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from core.uploads import UPLOAD_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+STATE_FILE = 'state.json'
+DATA_FILE = 'data'
+# The data file while a finalize call holds the session
+CLAIMED_FILE = 'data.finalizing'
+
+
+@dataclass
+class UploadSession:
+    upload_id: str
+    filename: str
+    content_type: str
+    size: int
+    created_at: float
+    expires_at: float
+    # Caller data needed at finalize (e.g. product_id), returned untouched
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    offset: int = 0
+
+    def to_response(self) -> Dict[str, Any]:
+        return {
+            'upload_id': self.upload_id,
+            'offset': self.offset,
+            'size': self.size,
+            'complete': self.offset == self.size,
+            'expires_at': self.expires_at
+        }
+
+
+def _write_state(directory: Path, session: UploadSession):
+    state = asdict(session)
+    state.pop('offset')
+    partial = directory / (STATE_FILE + '.part')
+    partial.write_text(json.dumps(state))
+    os.replace(partial, directory / STATE_FILE)
+
+
+def _append_chunk(path: Path, offset: int, chunk: bytes) -> int:
+    with open(path, 'r+b') as out:
+        out.seek(offset)
+        out.write(chunk)
+    return offset + len(chunk)
+
+
+def _hash_file(path: Path, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as source:
+        while chunk := source.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ResumableUploadStore:
+    """Upload sessions under root/<upload_id>/"""
+
+    def __init__(self, root: Path, max_size: int, max_chunk_size: int = 8 * 1024 * 1024,
+                 session_ttl_seconds: int = 24 * 3600):
+        self.root = Path(root)
+        self.max_size = max_size
+        self.max_chunk_size = max_chunk_size
+        self.session_ttl_seconds = session_ttl_seconds
+        # One writer per session in this worker; other workers are caught by the offset check
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _directory(self, upload_id: str) -> Path:
+        if not _UPLOAD_ID.match(upload_id or ''):
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return self.root / upload_id
+
+    def _load(self, upload_id: str) -> UploadSession:
+        directory = self._directory(upload_id)
+        try:
+            state = json.loads((directory / STATE_FILE).read_text())
+            offset = (directory / DATA_FILE).stat().st_size
+        except (FileNotFoundError, ValueError):
+            if (directory / CLAIMED_FILE).exists():
+                raise HTTPException(status_code=409, detail="Upload is being finalized")
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        session = UploadSession(**state, offset=offset)
+        if session.expires_at < time.time():
+            raise HTTPException(status_code=410, detail="Upload session expired")
+        return session
+
+    def data_path(self, upload_id: str) -> Path:
+        return self._directory(upload_id) / DATA_FILE
+
+    async def create(self, filename: str, content_type: str, size: int,
+                     metadata: Optional[Dict[str, Any]] = None) -> UploadSession:
+        if size <= 0:
+            raise HTTPException(status_code=400, detail="File is empty")
+        if size > self.max_size:
+            raise HTTPException(
+                status_code=400, detail=f"File too large. Maximum size: {self.max_size / (1024*1024):.1f}MB"
+            )
+        now = time.time()
+        session = UploadSession(
+            upload_id=uuid.uuid4().hex,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            created_at=now,
+            expires_at=now + self.session_ttl_seconds,
+            metadata=metadata or {}
+        )
+
+        def _create():
+            directory = self.root / session.upload_id
+            directory.mkdir(parents=True)
+            (directory / DATA_FILE).touch()
+            _write_state(directory, session)
+
+        await run_in_threadpool(_create)
+        logger.info(f"[RESUMABLE] Session {session.upload_id} created for {filename} ({size} bytes)")
+        return session
+
+    async def get(self, upload_id: str) -> UploadSession:
+        return await run_in_threadpool(self._load, upload_id)
+
+    async def append(self, upload_id: str, offset: int, body: AsyncIterator[bytes]) -> UploadSession:
+        """
+        Write a chunk starting at offset, which must equal the current offset (409 otherwise,
+        with the current offset so the client can resync).
+        """
+        lock = self._locks.setdefault(upload_id, asyncio.Lock())
+        async with lock:
+            session = await self.get(upload_id)
+            if offset != session.offset:
+                raise HTTPException(
+                    status_code=409,
+                    detail={'message': "Offset mismatch", 'offset': session.offset}
+                )
+            path = self.data_path(upload_id)
+            received = 0
+            buffer = bytearray()
+            async for piece in body:
+                received += len(piece)
+                if received > self.max_chunk_size:
+                    raise HTTPException(status_code=413, detail="Chunk too large")
+                if session.offset + len(buffer) + len(piece) > session.size:
+                    raise HTTPException(status_code=400, detail="Chunk runs past the declared file size")
+                buffer += piece
+                # Flush in UPLOAD_CHUNK_SIZE writes, so bytes that did arrive survive a dropped connection
+                if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                    session.offset = await run_in_threadpool(_append_chunk, path, session.offset, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                session.offset = await run_in_threadpool(_append_chunk, path, session.offset, bytes(buffer))
+        return session
+
+    async def complete(self, upload_id: str) -> UploadSession:
+        """The session, once every byte has arrived; 409 with the current offset otherwise"""
+        session = await self.get(upload_id)
+        if session.offset != session.size:
+            raise HTTPException(
+                status_code=409,
+                detail={'message': "Upload incomplete", 'offset': session.offset, 'size': session.size}
+            )
+        return session
+
+    def claimed_path(self, upload_id: str) -> Path:
+        return self._directory(upload_id) / CLAIMED_FILE
+
+    async def claim(self, upload_id: str) -> UploadSession:
+        """
+        complete(), and take the session for finalizing. The data file is renamed, which is atomic,
+        so only one caller gets the session; the others get a 409 until it is released or discarded.
+        """
+        session = await self.complete(upload_id)
+        try:
+            await run_in_threadpool(os.rename, self.data_path(upload_id), self.claimed_path(upload_id))
+        except FileNotFoundError:
+            raise HTTPException(status_code=409, detail="Upload is being finalized")
+        return session
+
+    async def release(self, upload_id: str) -> bool:
+        """
+        Undo claim() after a failed finalize, so the client can try again. Returns False when the
+        claimed data is gone (taken by a consuming store), in which case the session is discarded
+        rather than re-opened without its bytes.
+        """
+        try:
+            await run_in_threadpool(os.rename, self.claimed_path(upload_id), self.data_path(upload_id))
+        except FileNotFoundError:
+            await self.discard(upload_id)
+            return False
+        return True
+
+    async def sha256(self, upload_id: str, claimed: bool = False) -> str:
+        path = self.claimed_path(upload_id) if claimed else self.data_path(upload_id)
+        return await run_in_threadpool(_hash_file, path)
+
+    async def discard(self, upload_id: str):
+        directory = self._directory(upload_id)
+        await run_in_threadpool(shutil.rmtree, directory, True)
+        self._locks.pop(upload_id, None)
+
+    async def sweep_expired(self) -> int:
+        """Delete sessions past their expiry; scheduled periodically"""
+        def _sweep() -> List[str]:
+            removed = []
+            if not self.root.exists():
+                return removed
+            now = time.time()
+            for directory in self.root.iterdir():
+                try:
+                    state = json.loads((directory / STATE_FILE).read_text())
+                    expired = state['expires_at'] < now
+                except (FileNotFoundError, ValueError, KeyError):
+                    # Half-created session: judge by age
+                    expired = directory.stat().st_mtime + self.session_ttl_seconds < now
+                if expired:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    removed.append(directory.name)
+            return removed
+
+        removed = await run_in_threadpool(_sweep)
+        for upload_id in removed:
+            self._locks.pop(upload_id, None)
+        if removed:
+            logger.info(f"[RESUMABLE] Removed {len(removed)} expired upload session(s)")
+        return len(removed)
@@ -0,0 +1,158 @@
+"""
+Human-readable ID Sequences
+One allocator for every daily-numbered code (TM-, QT-, INV-, REF-, PRC-, EXP-, ENQ-, CUS-, SUP-, JOB-).
+
+Counters live in the existing *_counters collections, keyed by day_key. Each worker reserves a
+block of numbers with a single atomic $inc (hi/lo) and hands them out from memory, so most IDs
+cost no database round-trip. Blocks never overlap, so codes stay unique across workers; numbers
+left in a block when a worker stops are simply skipped.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SequenceSpec:
+    """
+    How one ID family is numbered and formatted.
+
+    day_key: counter key for a timestamp - a new key restarts numbering
+    format: builds the code from the timestamp and the number
+    seed: optional coroutine returning the highest number already issued for a day,
+          for families whose history predates their counter collection
+    """
+    name: str
+    collection: str
+    day_key: Callable[[datetime], str]
+    format: Callable[[datetime, int], str]
+    block_size: Optional[int] = None
+    seed: Optional[Callable[[object, datetime], Awaitable[int]]] = None
+
+
+def daily_code(name: str, prefix: str, collection: str) -> SequenceSpec:
+    """PREFIX-MMYY-DDXXXX codes (day of month + 4-digit daily counter)"""
+    return SequenceSpec(
+        name=name,
+        collection=collection,
+        day_key=lambda now: now.strftime('%Y%m%d'),
+        format=lambda now, n: f"{prefix}-{now.strftime('%m%y')}-{now.strftime('%d')}{str(n).zfill(4)}"
+    )
+
+
+def dated_code(name: str, prefix: str, collection: str, key_prefix: str, width: int,
+               seed: Optional[Callable[[object, datetime], Awaitable[int]]] = None) -> SequenceSpec:
+    """PREFIX-YYYYMMDD-NNN codes"""
+    return SequenceSpec(
+        name=name,
+        collection=collection,
+        day_key=lambda now: f"{key_prefix}_{now.strftime('%Y%m%d')}",
+        format=lambda now, n: f"{prefix}-{now.strftime('%Y%m%d')}-{str(n).zfill(width)}",
+        seed=seed
+    )
+
+
+class SequenceAllocator:
+    """Hands out sequence numbers from per-worker blocks reserved in Mongo"""
+
+    def __init__(self, db, block_size: int = 10):
+        self.db = db
+        self.block_size = max(1, block_size)
+        self._specs: Dict[str, SequenceSpec] = {}
+        # (name, day_key) -> [next number, last number in the reserved block]
+        self._blocks: Dict[Tuple[str, str], list] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._seeded: set = set()
+
+    def register(self, spec: SequenceSpec):
+        self._specs[spec.name] = spec
+        self._locks[spec.name] = asyncio.Lock()
+
+    async def next_id(self, name: str, now: Optional[datetime] = None) -> str:
+        """Allocate the next code of a registered family"""
+        spec = self._specs[name]
+        now = now or datetime.now(timezone.utc)
+        number = await self.next_number(spec, now)
+        return spec.format(now, number)
+
+    async def next_number(self, spec: SequenceSpec, now: datetime) -> int:
+        day_key = spec.day_key(now)
+        block_key = (spec.name, day_key)
+
+        async with self._locks[spec.name]:
+            block = self._blocks.get(block_key)
+            if block is None or block[0] > block[1]:
+                block = await self._reserve(spec, day_key, now)
+                # Blocks for earlier days are never used again
+                for key in [k for k in self._blocks if k[0] == spec.name and k != block_key]:
+                    del self._blocks[key]
+                self._blocks[block_key] = block
+
+            number = block[0]
+            block[0] += 1
+            return number
+
+    async def _reserve(self, spec: SequenceSpec, day_key: str, now: datetime) -> list:
+        collection = self.db[spec.collection]
+
+        if spec.seed is not None and (spec.name, day_key) not in self._seeded:
+            # $max is atomic, so concurrent workers seeding the same day agree
+            highest = await spec.seed(self.db, now)
+            if highest:
+                await collection.update_one({'day_key': day_key}, {'$max': {'counter': highest}}, upsert=True)
+            self._seeded.add((spec.name, day_key))
+
+        size = spec.block_size or self.block_size
+        counter_doc = await collection.find_one_and_update(
+            {'day_key': day_key},
+            {'$inc': {'counter': size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        last = counter_doc.get('counter', size) if counter_doc else size
+        logger.debug(f"[SEQUENCES] Reserved {spec.name} {day_key} #{last - size + 1}-{last}")
+        return [last - size + 1, last]
+
+
+async def _highest_job_order_number(db, now: datetime) -> int:
+    """Job orders were numbered by scanning job_orders before they had a counter"""
+    prefix = f"JOB-{now.strftime('%Y%m%d')}-"
+    latest = await db.job_orders.find_one(
+        {'job_order_id': {'$regex': f'^{prefix}'}},
+        {'_id': 0, 'job_order_id': 1},
+        sort=[('job_order_id', -1)]
+    )
+    if not latest:
+        return 0
+    try:
+        return int(latest['job_order_id'].split('-')[-1])
+    except ValueError:
+        return 0
+
+
+DEFAULT_SEQUENCES = [
+    daily_code('order', 'TM', 'order_counters'),
+    daily_code('quote', 'QT', 'quote_counters'),
+    daily_code('invoice', 'INV', 'invoice_counters'),
+    daily_code('refund', 'REF', 'refund_counters'),
+    daily_code('procurement', 'PRC', 'procurement_counters'),
+    daily_code('expense', 'EXP', 'expense_counters'),
+    daily_code('enquiry', 'ENQ', 'enquiry_counters'),
+    dated_code('custom_order', 'CUS', 'custom_order_counters', 'custom', 4),
+    dated_code('supplier', 'SUP', 'supplier_counters', 'supplier', 3),
+    dated_code('job_order', 'JOB', 'job_order_counters', 'job', 3, seed=_highest_job_order_number),
+]
+
+
+def create_sequence_allocator(db, block_size: int = 10) -> SequenceAllocator:
+    """Allocator with every ID family used by the API registered"""
+    allocator = SequenceAllocator(db, block_size=block_size)
+    for spec in DEFAULT_SEQUENCES:
+        allocator.register(spec)
+    return allocator
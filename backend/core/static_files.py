@@ -0,0 +1,163 @@
+"""
+Upload Static Files
+Serves /api/uploads with a cache policy that matches how each file is named.
+
+Content-hashed files - the content store's cas/xx/<sha256>.ext and uploads whose name carries a
+fingerprint (<id>.<first 16 hex of sha256>.ext, see core/uploads.py) - never change under their
+URL, so they are sent with a year-long immutable Cache-Control and browsers/CDNs never revalidate
+them. Anything else (legacy uuid names, receipts that are regenerated in place) is sent with
+no-cache and revalidated cheaply through ETag/Last-Modified.
+
+Single byte ranges are answered with 206 (Starlette 0.37's FileResponse always sends the whole
+file), honouring If-Range. With offload set to 'x-accel' (nginx) or 'x-sendfile' (Apache,
+lighttpd), the worker only answers the conditional checks and hands the file to the front proxy,
+which then streams the bytes and serves ranges itself.
+"""
+import os
+import re
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from core.uploads import FINGERPRINT_LENGTH, UPLOAD_CHUNK_SIZE
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+
+OFFLOAD_MODES = ('x-accel', 'x-sendfile')
+
+_CONTENT_HASHED = re.compile(
+    rf"(^|/)cas/[0-9a-f]{{2}}/[0-9a-f]{{64}}[^/]*$|\.[0-9a-f]{{{FINGERPRINT_LENGTH}}}(\.[^/]*)?$"
+)
+_SINGLE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_content_hashed(path: str) -> bool:
+    """True for upload paths whose bytes can never change (content store or fingerprinted names)"""
+    return _CONTENT_HASHED.search(path) is not None
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single 'bytes=' range; None when the header is absent or asks
+    for several ranges (answered with the whole file). Raises ValueError if unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _SINGLE_RANGE.match(header.strip())
+    if match is None:
+        if header.strip().startswith('bytes=') and ',' not in header:
+            raise ValueError(header)
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        raise ValueError(header)
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class FileRangeResponse(Response):
+    """206 Partial Content for bytes start..end (inclusive) of a file, streamed in chunks"""
+
+    def __init__(self, path: str, start: int, end: int, size: int, headers: Headers, media_type: Optional[str]):
+        super().__init__(status_code=206, media_type=media_type)
+        self.raw_headers = [
+            (key, value) for key, value in headers.raw if key not in (b'content-length', b'content-type')
+        ] + self.raw_headers
+        self.headers['content-range'] = f"bytes {start}-{end}/{size}"
+        self.headers['content-length'] = str(end - start + 1)
+        self.path = path
+        self.start = start
+        self.end = end
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        if scope['method'].upper() == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode='rb') as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us; close the body rather than leave the client waiting
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles for the uploads tree: per-file cache policy, byte ranges and optional proxy offload"""
+
+    def __init__(self, *, directory: str, offload: Optional[str] = None,
+                 offload_prefix: str = '/_uploads_internal/', **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        offload = (offload or '').lower() or None
+        if offload is not None and offload not in OFFLOAD_MODES:
+            raise ValueError(f"Unknown upload offload mode '{offload}' (expected one of {', '.join(OFFLOAD_MODES)})")
+        self.offload = offload
+        self.offload_prefix = '/' + offload_prefix.strip('/') + '/'
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        relative = os.path.relpath(full_path, self.directory).replace(os.sep, '/')
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers['cache-control'] = (
+            IMMUTABLE_CACHE_CONTROL if is_content_hashed(relative) else REVALIDATE_CACHE_CONTROL
+        )
+        response.headers['accept-ranges'] = 'bytes'
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        if self.offload is not None:
+            return self._offload_response(full_path, relative, response)
+
+        if status_code == 200 and self._range_applies(request_headers, response.headers):
+            size = stat_result.st_size
+            try:
+                byte_range = parse_range(request_headers.get('range'), size)
+            except ValueError:
+                return Response(status_code=416, headers={'content-range': f"bytes */{size}"})
+            if byte_range is not None:
+                return FileRangeResponse(
+                    str(full_path), *byte_range, size, headers=response.headers, media_type=response.media_type
+                )
+        return response
+
+    @staticmethod
+    def _range_applies(request_headers: Headers, response_headers) -> bool:
+        """A Range with If-Range only applies while the validator still matches the file"""
+        if 'range' not in request_headers:
+            return False
+        if_range = request_headers.get('if-range')
+        return if_range is None or if_range in (response_headers.get('etag'), response_headers.get('last-modified'))
+
+    def _offload_response(self, full_path, relative: str, file_response: FileResponse) -> Response:
+        headers = {
+            key: value for key, value in file_response.headers.items()
+            if key in ('etag', 'last-modified', 'cache-control', 'accept-ranges')
+        }
+        if self.offload == 'x-accel':
+            headers['x-accel-redirect'] = self.offload_prefix + quote(relative)
+        else:
+            headers['x-sendfile'] = os.path.abspath(full_path)
+        # The proxy swaps in the file body and its length
+        return Response(status_code=200, headers=headers, media_type=file_response.media_type)
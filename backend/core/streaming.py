@@ -0,0 +1,123 @@
+"""
+Streaming Responses
+Writes Motor cursors to the client incrementally as a JSON document, NDJSON or CSV,
+so large admin lists and exports use flat memory and are never truncated at a to_list() cap.
+"""
+import csv
+import io
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+# Documents pulled from Mongo per round-trip while streaming
+STREAM_BATCH_SIZE = 500
+
+Transform = Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(jsonable_encoder(value), separators=(',', ':'))
+
+
+def wants_ndjson(request: Request) -> bool:
+    """True when the client asked for newline-delimited JSON via the Accept header"""
+    return NDJSON_MEDIA_TYPE in request.headers.get('accept', '')
+
+
+async def _iter_docs(cursor, transform: Transform) -> AsyncIterator[Dict[str, Any]]:
+    async for doc in cursor.batch_size(STREAM_BATCH_SIZE):
+        if transform is not None:
+            doc = transform(doc)
+            if doc is None:
+                continue
+        yield doc
+
+
+def stream_json_response(cursor, key: Optional[str] = None, head: Optional[Dict[str, Any]] = None,
+                         tail: Optional[Callable[[], Dict[str, Any]]] = None,
+                         transform: Transform = None) -> StreamingResponse:
+    """
+    Stream a cursor as a JSON array, or as one array field of a JSON object.
+
+    Args:
+        cursor: Motor cursor (not yet iterated)
+        key: Field holding the array; None streams a bare array
+        head: Fields written before the array (e.g. tab counts)
+        tail: Called after the last document; its fields are written after the array,
+              so totals accumulated in `transform` can be reported
+        transform: Per-document hook; return None to drop the document
+    """
+    async def body():
+        if key is None:
+            yield '['
+        else:
+            prefix = _dumps(head or {})[:-1]
+            yield f"{prefix}{',' if head else ''}{_dumps(key)}:["
+
+        first = True
+        try:
+            async for doc in _iter_docs(cursor, transform):
+                yield ('' if first else ',') + _dumps(doc)
+                first = False
+        except Exception as e:
+            # Headers are already sent - the truncated body is the only signal left
+            logger.error(f"[STREAM] Cursor failed mid-response: {str(e)}")
+            raise
+
+        if key is None:
+            yield ']'
+        else:
+            trailer = _dumps(tail() if tail else {})[1:]
+            yield f"]{',' if trailer != '}' else ''}{trailer}"
+
+    return StreamingResponse(body(), media_type='application/json')
+
+
+def stream_ndjson_response(cursor, transform: Transform = None) -> StreamingResponse:
+    """Stream a cursor as newline-delimited JSON, one document per line"""
+    async def body():
+        async for doc in _iter_docs(cursor, transform):
+            yield _dumps(doc) + '\n'
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def stream_csv_response(cursor, columns: List[Tuple[str, Callable[[Dict[str, Any]], Any]]],
+                        filename: str, transform: Transform = None) -> StreamingResponse:
+    """
+    Stream a cursor as a CSV download.
+
+    Args:
+        cursor: Motor cursor
+        columns: (header, value getter) pairs
+        filename: Suggested download filename
+    """
+    async def body():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush() -> str:
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return chunk
+
+        writer.writerow([header for header, _ in columns])
+        yield flush()
+        async for doc in _iter_docs(cursor, transform):
+            writer.writerow(['' if value is None else value for value in (get(doc) for _, get in columns)])
+            yield flush()
+
+    return StreamingResponse(
+        body(),
+        media_type='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
@@ -0,0 +1,168 @@
+"""
+Streaming Uploads
+Copies an UploadFile to disk in fixed-size chunks, enforcing the size limit and computing the
+SHA-256 as bytes are copied, so an upload is never held in memory as a whole.
+
+The copy runs in a worker thread (one hop per file, not per chunk), so disk writes never block the
+event loop. Bytes land in a .part file that is renamed into place only once the upload is complete
+and valid.
+
+BodySizeLimitMiddleware caps multipart request bodies while they are still arriving, before
+Starlette spools them to a temporary file.
+"""
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Bytes copied per read/write
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Hex digits of the SHA-256 kept in a fingerprinted file name
+FINGERPRINT_LENGTH = 16
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class StreamedUpload:
+    path: Path
+    size: int
+    sha256: str
+
+
+def _copy_limited(source: BinaryIO, destination: Path, max_size: int, chunk_size: int) -> StreamedUpload:
+    partial = destination.with_name(destination.name + '.part')
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(partial, 'wb') as out:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge()
+                hasher.update(chunk)
+                out.write(chunk)
+        os.replace(partial, destination)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return StreamedUpload(path=destination, size=size, sha256=hasher.hexdigest())
+
+
+def fingerprinted_name(stem: str, sha256: str, ext: str) -> str:
+    """
+    <stem>.<hash prefix><ext> - a name that changes whenever the content does, so the file can be
+    served as immutable (see core/static_files.py)
+    """
+    return f"{stem}.{sha256[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def too_large_detail(max_size: int) -> str:
+    return f"File too large. Maximum size: {max_size / (1024*1024):.1f}MB"
+
+
+async def stream_upload_to_file(file: UploadFile, destination: Path, max_size: int,
+                                chunk_size: int = UPLOAD_CHUNK_SIZE, allow_empty: bool = False,
+                                too_large_message: Optional[str] = None) -> StreamedUpload:
+    """
+    Copy an upload to destination. Raises HTTPException(400) if it exceeds max_size or is empty;
+    nothing is left on disk in that case.
+    """
+    await file.seek(0)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        result = await run_in_threadpool(_copy_limited, file.file, destination, max_size, chunk_size)
+    except UploadTooLarge:
+        raise HTTPException(status_code=400, detail=too_large_message or too_large_detail(max_size))
+    finally:
+        await file.seek(0)
+
+    if result.size == 0 and not allow_empty:
+        await run_in_threadpool(destination.unlink, True)
+        raise HTTPException(status_code=400, detail="File is empty")
+    return result
+
+
+class BodyTooLarge(HTTPException):
+    """
+    Raised from receive() mid-body. It is an HTTPException so FastAPI re-raises it from form
+    parsing (instead of reporting a generic parse error) and the app answers with a 413.
+    """
+
+    def __init__(self, max_body_size: int):
+        super().__init__(status_code=413, detail=body_too_large_detail(max_body_size))
+
+
+def body_too_large_detail(max_body_size: int) -> str:
+    return f"Request body too large. Maximum size: {max_body_size / (1024*1024):.1f}MB"
+
+
+class BodySizeLimitMiddleware:
+    """
+    Rejects multipart requests whose body exceeds max_body_size with a 413, either up front from
+    Content-Length or as soon as a chunked body crosses the limit.
+    """
+
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get('headers') or [])
+        if not headers.get(b'content-type', b'').startswith(b'multipart/form-data'):
+            return await self.app(scope, receive, send)
+
+        content_length: Optional[bytes] = headers.get(b'content-length')
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            return await self._reject(send, scope)
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_body_size:
+                    raise BodyTooLarge(self.max_body_size)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except BodyTooLarge:
+            if not response_started:
+                await self._reject(send, scope)
+
+    async def _reject(self, send, scope):
+        logger.warning(f"[UPLOAD] Rejected oversized request body: {scope.get('path')}")
+        body = json.dumps({'detail': body_too_large_detail(self.max_body_size)}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -9,6 +9,7 @@ import logging
 import os
 
 from ..core import get_db
+from ..services.order_repository import update_order
 
 logger = logging.getLogger(__name__)
 
@@ -173,8 +174,8 @@ async def verify_flutterwave_payment(verify_request: FlutterwaveVerifyRequest):
             )
             
             # Update order status
-            await db.orders.update_one(
-                {'id': verify_request.order_id},
+            await update_order(
+                db, verify_request.order_id,
                 {'$set': {
                     'payment_status': 'paid',
                     'payment_reference': verify_request.tx_ref,
@@ -223,8 +224,8 @@ async def verify_flutterwave_payment(verify_request: FlutterwaveVerifyRequest):
         
         # Update order if successful
         if transaction_status == 'successful':
-            await db.orders.update_one(
-                {'id': verify_request.order_id},
+            await update_order(
+                db, verify_request.order_id,
                 {'$set': {
                     'payment_status': 'paid',
                     'payment_reference': verify_request.tx_ref,
@@ -387,8 +388,8 @@ async def flutterwave_webhook(request: Request):
                     order_id = payment.get('order_id') if payment else None
                 
                 if order_id:
-                    await db.orders.update_one(
-                        {'id': order_id},
+                    await update_order(
+                        db, order_id,
                         {'$set': {
                             'payment_status': 'paid',
                             'payment_reference': tx_ref,
@@ -1,15 +1,14 @@
 from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends, status, Request, Response, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 import asyncio
 from pathlib import Path
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import List, Optional, Dict, Any, Set
+from typing import List, Optional, Dict, Any, Set, Tuple
 import uuid
 from datetime import datetime, timezone, timedelta
 import bcrypt
@@ -23,6 +22,7 @@ from slowapi.errors import RateLimitExceeded
 from pythonjsonlogger import jsonlogger
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 import json
 # Flutterwave Configuration (replaces Stripe/Paystack)
 # Flutterwave routes are in routes/payments.py
@@ -33,7 +33,46 @@ from services.storage_service import (
     delete_file_from_supabase,
     extract_storage_path_from_url,
     is_supabase_url,
-    ensure_bucket_exists
+    ensure_bucket_exists,
+    storage_stats,
+    close_storage_backends,
+    validate_image_file,
+    set_file_catalog,
+    reconcile_remote_catalog
+)
+from services.content_store import ContentStore, sha256_from_url
+from services.image_derivatives import ImageDerivatives
+from services.file_catalog import FileCatalog
+from services.storage_gc import StorageGarbageCollector
+from services.mockup_renderer import MockupRenderer
+from core.database import get_client, get_database, get_analytics_database, pool_stats
+from core.indexes import ensure_indexes, explain_query_shapes, index_status
+from core.sequences import create_sequence_allocator
+from core.price_book import PriceBookCache, production_days, production_days_batch
+from core.resource_versions import RESOURCES, ResourceVersions, etag_matches
+from core.catalog_cache import CatalogCache, create_catalog_backend
+from core.bootstrap import BootstrapCache
+from core.uploads import BodySizeLimitMiddleware, fingerprinted_name, stream_upload_to_file
+from core.static_files import UploadStaticFiles
+from core.resumable_uploads import ResumableUploadStore
+from core.image_proxy import ImageProxyCache
+from core.principal_cache import PrincipalCache
+from core.access_tokens import ACCESS_TOKEN_TYPE, AccessTokenIssuer, TokenRevocationList
+from core.pagination import CREATED_AT_SORT, fetch_keyset_page, fetch_merged_keyset_page
+from core.projections import list_projection
+from core.streaming import stream_json_response, stream_ndjson_response, stream_csv_response, wants_ndjson
+from services.order_repository import (
+    find_order,
+    update_order,
+    insert_order,
+    order_key_filter,
+    migrate_order_lookup_keys,
+    strip_lookup_keys
+)
+from services.design_linking import (
+    get_or_create_design_contact,
+    assign_designs_to_contact,
+    link_session_designs
 )
 
 ROOT_DIR = Path(__file__).parent
@@ -69,28 +108,12 @@ order_logger = logging.getLogger('orders')
 payment_logger = logging.getLogger('payments')
 security_logger = logging.getLogger('security')
 
-# MongoDB connection
+# MongoDB connection - shared, instrumented client (pool settings come from MONGO_* env vars)
 mongo_url = os.environ['MONGO_URL']
-
-# Configure MongoDB client with Atlas-compatible options
-client_options = {
-    'serverSelectionTimeoutMS': 5000,  # 5 second timeout
-    'connectTimeoutMS': 10000,  # 10 second connection timeout
-    'socketTimeoutMS': 45000,  # 45 second socket timeout
-    'maxPoolSize': 50,  # Connection pool size
-    'minPoolSize': 10,
-    'retryWrites': True,  # Enable retryable writes
-    'retryReads': True,  # Enable retryable reads
-}
-
-# Add SSL/TLS settings for Atlas (if not in connection string)
-if 'mongodb+srv://' in mongo_url or 'ssl=true' in mongo_url.lower():
-    # Atlas connection or SSL enabled
-    client_options['tls'] = True
-    client_options['tlsAllowInvalidCertificates'] = False  # Enforce certificate validation
-
-client = AsyncIOMotorClient(mongo_url, **client_options)
-db = client[os.environ['DB_NAME']]
+client = get_client()
+db = get_database(os.environ['DB_NAME'])
+# Dashboard aggregations read from secondaries where available (MONGO_ANALYTICS_READ_PREFERENCE)
+analytics_db = get_analytics_database(os.environ['DB_NAME'])
 
 # Database operation wrapper for better error handling
 async def safe_db_operation(operation, *args, **kwargs):
@@ -115,6 +138,15 @@ JWT_SECRET = os.environ['JWT_SECRET']
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24
 
+# Short-lived admin access tokens (signed role claims) - refreshed via /auth/token/refresh
+ACCESS_TOKEN_EXPIRATION_MINUTES = int(os.environ.get('ACCESS_TOKEN_EXPIRATION_MINUTES', 15))
+
+# Authenticated principal cache (per worker) - invalidated on logout and admin changes
+principal_cache = PrincipalCache(
+    maxsize=int(os.environ.get('PRINCIPAL_CACHE_MAX_SIZE', 1024)),
+    ttl_seconds=int(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', 60))
+)
+
 # Flutterwave Configuration
 FLUTTERWAVE_SECRET_KEY = os.environ.get('FLUTTERWAVE_SECRET_KEY')
 FLUTTERWAVE_PUBLIC_KEY = os.environ.get('FLUTTERWAVE_PUBLIC_KEY')
@@ -144,6 +176,10 @@ PRINT_SIZES = {
 
 # File upload security settings
 MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+# Whole multipart body (enquiries take up to 6 files); larger bodies are cut off with a 413 as they arrive
+MAX_REQUEST_BODY_SIZE = int(os.environ.get('MAX_REQUEST_BODY_SIZE', 64 * 1024 * 1024))
+# Print files sent through the resumable /pod/uploads API (A2 PNGs run well past MAX_UPLOAD_SIZE)
+MAX_PRINT_FILE_SIZE = int(os.environ.get('MAX_PRINT_FILE_SIZE', 200 * 1024 * 1024))
 ALLOWED_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
 ALLOWED_DOCUMENT_EXTENSIONS = {'.pdf', '.txt'}
 ALLOWED_EXTENSIONS = ALLOWED_IMAGE_EXTENSIONS | ALLOWED_DOCUMENT_EXTENSIONS
@@ -303,9 +339,12 @@ class User(BaseModel):
     is_admin: bool = False
     created_at: datetime
 
+# Largest quantity priced or ordered in one line; quantities are priced as 64-bit integers
+MAX_ORDER_QUANTITY = 1_000_000
+
 class QuickQuoteRequest(BaseModel):
     clothing_item: str
-    quantity: int
+    quantity: int = Field(..., gt=0, le=MAX_ORDER_QUANTITY)
     print_type: PrintType
     fabric_quality: Optional[str] = "Standard"
 
@@ -314,9 +353,18 @@ class QuickQuoteResponse(BaseModel):
     estimated_days: int
     breakdown: Dict[str, float]
 
+MAX_BATCH_QUOTE_LINES = 500
+
+class QuickQuoteBatchRequest(BaseModel):
+    items: List[QuickQuoteRequest] = Field(..., min_length=1, max_length=MAX_BATCH_QUOTE_LINES)
+
+class QuickQuoteBatchResponse(BaseModel):
+    quotes: List[QuickQuoteResponse]
+    total_price: float
+
 class BulkOrderCreate(BaseModel):
     clothing_item: str
-    quantity: int
+    quantity: int = Field(..., gt=0, le=MAX_ORDER_QUANTITY)
     size_breakdown: Dict[str, int]
     print_type: PrintType
     fabric_quality: str
@@ -418,120 +466,112 @@ class AdminSettings(BaseModel):
     pod_clothing_items: List[Dict[str, Any]]
 
 # ==================== UTILITIES ====================
+# Daily-numbered codes come from per-worker blocks of SEQUENCE_BLOCK_SIZE numbers (see core/sequences.py)
+sequences = create_sequence_allocator(db, block_size=int(os.environ.get('SEQUENCE_BLOCK_SIZE', 10)))
+
+# Compiled bulk pricing (see core/price_book.py) - pricing writes must call price_books.invalidate()
+price_books = PriceBookCache(db, check_interval=float(os.environ.get('PRICE_BOOK_CHECK_INTERVAL_SECONDS', 5)))
+
+# ETags of public read endpoints (see core/resource_versions.py) - writes must call resource_versions.bump()
+resource_versions = ResourceVersions(db, check_interval=float(os.environ.get('RESOURCE_VERSION_CHECK_INTERVAL_SECONDS', 5)))
+PUBLIC_CACHE_CONTROL = 'public, no-cache'
+
+# Read-through cache for public catalog lists (see core/catalog_cache.py) - catalog writes must call catalog_cache.invalidate()
+catalog_cache = CatalogCache(
+    create_catalog_backend(
+        os.environ.get('CATALOG_CACHE_BACKEND', 'memory'),
+        redis_url=os.environ.get('CATALOG_CACHE_REDIS_URL'),
+        maxsize=int(os.environ.get('CATALOG_CACHE_MAX_SIZE', 256)),
+        ttl_seconds=int(os.environ.get('CATALOG_CACHE_TTL_SECONDS', 300))
+    ),
+    resource_versions
+)
+
+# WebP thumbnails/previews of uploaded images (see services/image_derivatives.py) - list endpoints attach them with image_derivatives.attach()
+image_derivatives = ImageDerivatives(db, max_workers=int(os.environ.get('IMAGE_DERIVATIVE_WORKERS', 2)))
+
+# Deduplicated customer uploads (see services/content_store.py) - deleting a record that holds an upload must call content_store.release()
+content_store = ContentStore(db, image_derivatives)
+
+# Catalog behind the admin file manager (see services/file_catalog.py) - code writing or deleting under UPLOAD_DIR itself must call file_catalog.record_local()/remove_local()
+file_catalog = FileCatalog(db, UPLOAD_DIR)
+set_file_catalog(file_catalog)
+
+# Sweeper for abandoned designs and unreferenced mockups, product images and receipts (see services/storage_gc.py) - new folders of replaceable files need an ORPHAN_SCOPES entry
+storage_gc = StorageGarbageCollector(
+    db,
+    content_store,
+    image_derivatives,
+    design_retention_days=float(os.environ.get('POD_DESIGN_RETENTION_DAYS', 30)),
+    file_retention_days=float(os.environ.get('STORAGE_GC_FILE_RETENTION_DAYS', 30)),
+    batch_size=int(os.environ.get('STORAGE_GC_BATCH_SIZE', 200))
+)
+
+# Resumable print-file uploads (see core/resumable_uploads.py); sessions sit next to the uploads tree so finalize is a rename
+resumable_uploads = ResumableUploadStore(
+    UPLOAD_DIR.parent / 'upload_sessions',
+    MAX_PRINT_FILE_SIZE,
+    max_chunk_size=int(os.environ.get('RESUMABLE_UPLOAD_MAX_CHUNK_SIZE', 8 * 1024 * 1024)),
+    session_ttl_seconds=int(os.environ.get('RESUMABLE_UPLOAD_TTL_SECONDS', 24 * 3600))
+)
+
+# Cached, pooled fetches behind /api/image-proxy (see core/image_proxy.py)
+image_proxy = ImageProxyCache(
+    UPLOAD_DIR.parent / 'image_proxy_cache',
+    max_bytes=int(os.environ.get('IMAGE_PROXY_CACHE_MAX_BYTES', 512 * 1024 * 1024)),
+    fresh_seconds=int(os.environ.get('IMAGE_PROXY_FRESH_SECONDS', 3600)),
+    max_object_size=int(os.environ.get('IMAGE_PROXY_MAX_OBJECT_SIZE', 20 * 1024 * 1024)),
+    max_connections=int(os.environ.get('IMAGE_PROXY_MAX_CONNECTIONS', 20))
+)
+
+# Server-side POD mockups (see services/mockup_renderer.py) - renders are cached by design content, garment and transform
+mockup_renderer = MockupRenderer(
+    db,
+    image_derivatives,
+    image_proxy,
+    UPLOAD_DIR,
+    PRINT_SIZES,
+    default_print_area={'x': 150, 'y': 80, 'width': 200, 'height': 250},
+    max_workers=int(os.environ.get('MOCKUP_RENDER_WORKERS', 2)),
+    shading=float(os.environ.get('MOCKUP_FABRIC_SHADING', 0.3))
+)
+
+async def load_with_derivatives(items_loader, url_field: str = 'image_url'):
+    """Catalog loader wrapper adding thumbnail_url/preview_url to each item"""
+    return await image_derivatives.attach(await items_loader, url_field)
+
+async def check_not_modified(request: Request, response: Response, resource: str, variant: str = '') -> Optional[Response]:
+    """Tag a public read with its ETag; returns the 304 to send instead if the client copy is current"""
+    etag, not_modified = await resource_versions.check(resource, request.headers.get('if-none-match'), variant)
+    if not_modified:
+        return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': PUBLIC_CACHE_CONTROL})
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = PUBLIC_CACHE_CONTROL
+    return None
+
 async def generate_order_id() -> str:
     """Generate unique order ID in format TM-MMYY-DDXXXX"""
-    now = datetime.now(timezone.utc)
-    month_year = now.strftime('%m%y')  # e.g., "0225" for Feb 2025
-    day = now.strftime('%d')  # e.g., "09" for 9th day
-    day_key = now.strftime('%Y%m%d')  # e.g., "20250209" for daily counter
-    
-    # Get or create counter for this specific day
-    counter_doc = await db.order_counters.find_one_and_update(
-        {'day_key': day_key},
-        {'$inc': {'counter': 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    counter = counter_doc.get('counter', 1) if counter_doc else 1
-    order_number = day + str(counter).zfill(4)  # Day + 4-digit counter
-    
-    return f"TM-{month_year}-{order_number}"
+    return await sequences.next_id('order')
 
 async def generate_quote_id() -> str:
     """Generate unique quote ID in format QT-MMYY-DDXXXX"""
-    now = datetime.now(timezone.utc)
-    month_year = now.strftime('%m%y')
-    day = now.strftime('%d')
-    day_key = now.strftime('%Y%m%d')
-    
-    counter_doc = await db.quote_counters.find_one_and_update(
-        {'day_key': day_key},
-        {'$inc': {'counter': 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    counter = counter_doc.get('counter', 1) if counter_doc else 1
-    quote_number = day + str(counter).zfill(4)
-    
-    return f"QT-{month_year}-{quote_number}"
+    return await sequences.next_id('quote')
 
 async def generate_invoice_id() -> str:
     """Generate unique invoice ID in format INV-MMYY-DDXXXX"""
-    now = datetime.now(timezone.utc)
-    month_year = now.strftime('%m%y')
-    day = now.strftime('%d')
-    day_key = now.strftime('%Y%m%d')
-    
-    counter_doc = await db.invoice_counters.find_one_and_update(
-        {'day_key': day_key},
-        {'$inc': {'counter': 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    counter = counter_doc.get('counter', 1) if counter_doc else 1
-    invoice_number = day + str(counter).zfill(4)
-    
-    return f"INV-{month_year}-{invoice_number}"
+    return await sequences.next_id('invoice')
 
 async def generate_refund_id() -> str:
     """Generate unique refund ID in format REF-MMYY-DDXXXX"""
-    now = datetime.now(timezone.utc)
-    month_year = now.strftime('%m%y')
-    day = now.strftime('%d')
-    day_key = now.strftime('%Y%m%d')
-    
-    counter_doc = await db.refund_counters.find_one_and_update(
-        {'day_key': day_key},
-        {'$inc': {'counter': 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    counter = counter_doc.get('counter', 1) if counter_doc else 1
-    refund_number = day + str(counter).zfill(4)
-    
-    return f"REF-{month_year}-{refund_number}"
+    return await sequences.next_id('refund')
 
 async def generate_procurement_id() -> str:
     """Generate unique procurement ID in format PRC-MMYY-DDXXXX"""
-    now = datetime.now(timezone.utc)
-    month_year = now.strftime('%m%y')
-    day = now.strftime('%d')
-    day_key = now.strftime('%Y%m%d')
-    
-    counter_doc = await db.procurement_counters.find_one_and_update(
-        {'day_key': day_key},
-        {'$inc': {'counter': 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    counter = counter_doc.get('counter', 1) if counter_doc else 1
-    procurement_number = day + str(counter).zfill(4)
-    
-    return f"PRC-{month_year}-{procurement_number}"
+    return await sequences.next_id('procurement')
 
 async def generate_expense_id() -> str:
     """Generate unique expense ID in format EXP-MMYY-DDXXXX"""
-    now = datetime.now(timezone.utc)
-    month_year = now.strftime('%m%y')
-    day = now.strftime('%d')
-    day_key = now.strftime('%Y%m%d')
-    
-    counter_doc = await db.expense_counters.find_one_and_update(
-        {'day_key': day_key},
-        {'$inc': {'counter': 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    counter = counter_doc.get('counter', 1) if counter_doc else 1
-    expense_number = day + str(counter).zfill(4)
-    
-    return f"EXP-{month_year}-{expense_number}"
+    return await sequences.next_id('expense')
 
 async def validate_file_upload(file: UploadFile, allowed_extensions: set = None) -> tuple[bool, str]:
     """Validate uploaded file for security"""
@@ -553,20 +593,7 @@ async def validate_file_upload(file: UploadFile, allowed_extensions: set = None)
     if file_ext not in allowed_extensions:
         return False, f"File type not allowed. Allowed types: {', '.join(allowed_extensions)}"
     
-    # Read file content to check size
-    contents = await file.read()
-    file_size = len(contents)
-    
-    # Validate size
-    if file_size > MAX_UPLOAD_SIZE:
-        return False, f"File too large. Maximum size: {MAX_UPLOAD_SIZE / (1024*1024):.1f}MB"
-    
-    if file_size == 0:
-        return False, "File is empty"
-    
-    # Reset file position for later reading
-    await file.seek(0)
-    
+    # Size (and emptiness) is enforced while the file is streamed to disk by save_upload_file
     return True, "Valid"
 
 async def sanitize_filename(filename: str) -> str:
@@ -581,7 +608,8 @@ async def sanitize_filename(filename: str) -> str:
         filename = name[:95] + ext
     return filename
 
-async def save_upload_file(file: UploadFile, allowed_extensions: set = None, module: str = "general") -> Dict[str, str]:
+async def save_upload_file(file: UploadFile, allowed_extensions: set = None, module: str = "general",
+                           deduplicate: bool = False) -> Dict[str, str]:
     """
     Unified file upload service with comprehensive logging.
     Used by all modules: bulk, pod, fabric, boutique, souvenir
@@ -590,6 +618,7 @@ async def save_upload_file(file: UploadFile, allowed_extensions: set = None, mod
         file: The uploaded file
         allowed_extensions: Set of allowed file extensions
         module: Module name for logging (bulk, pod, fabric, boutique, souvenir)
+        deduplicate: Store through the content store, so re-uploads of the same file share one copy
     
     Returns:
         Dict with file_name, file_path, original_name, file_size
@@ -602,33 +631,41 @@ async def save_upload_file(file: UploadFile, allowed_extensions: set = None, mod
         logger.error(f"[UPLOAD][{module}] Validation failed: {message}")
         raise HTTPException(status_code=400, detail=message)
     
+    safe_original_name = await sanitize_filename(file.filename)
+    
+    if deduplicate:
+        result = await content_store.put(file, MAX_UPLOAD_SIZE)
+        logger.info(f"[UPLOAD][{module}] Stored {'(duplicate) ' if result['deduplicated'] else ''}at {result['public_url']}")
+        return {
+            'file_name': result['file_name'],
+            'file_path': result['public_url'],
+            'original_name': safe_original_name,
+            'file_size': result['file_size'],
+            'sha256': result['sha256']
+        }
+    
     # Generate secure filename
     file_id = str(uuid.uuid4())
     file_ext = os.path.splitext(file.filename)[1].lower()
-    safe_original_name = await sanitize_filename(file.filename)
     filename = f"{file_id}{file_ext}"
     file_path = UPLOAD_DIR / filename
     
     logger.info(f"[UPLOAD][{module}] Generated filename: {filename}")
     logger.info(f"[UPLOAD][{module}] Save path: {file_path}")
     
-    # Ensure upload directory exists and is writable
-    UPLOAD_DIR.mkdir(exist_ok=True, parents=True)
-    
-    # Save file
+    # Save file in chunks off the event loop, enforcing MAX_UPLOAD_SIZE as bytes are copied
     try:
-        contents = await file.read()
-        with open(file_path, 'wb') as f:
-            f.write(contents)
-        
-        # Verify file was saved
-        if not file_path.exists():
-            logger.error(f"[UPLOAD][{module}] File not found after save: {file_path}")
-            raise HTTPException(status_code=500, detail="File save verification failed")
-        
-        saved_size = file_path.stat().st_size
-        logger.info(f"[UPLOAD][{module}] File saved successfully: {filename} ({saved_size} bytes)")
+        saved = await stream_upload_to_file(file, file_path, MAX_UPLOAD_SIZE)
+        # Fingerprint the name with the content hash so the URL can be served as immutable
+        filename = fingerprinted_name(file_id, saved.sha256, file_ext)
+        await asyncio.to_thread(os.replace, file_path, UPLOAD_DIR / filename)
+        file_path = UPLOAD_DIR / filename
+        await file_catalog.record_local(file_path)
+        logger.info(f"[UPLOAD][{module}] File saved successfully: {filename} ({saved.size} bytes)")
         
+    except HTTPException as e:
+        logger.error(f"[UPLOAD][{module}] Validation failed: {e.detail}")
+        raise
     except Exception as e:
         logger.error(f"[UPLOAD][{module}] File save error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to save file")
@@ -641,48 +678,18 @@ async def save_upload_file(file: UploadFile, allowed_extensions: set = None, mod
         'file_name': filename,
         'file_path': public_url,
         'original_name': safe_original_name,
-        'file_size': len(contents)
+        'file_size': saved.size,
+        'sha256': saved.sha256
     }
 
 
 async def generate_enquiry_code() -> str:
     """Generate unique enquiry code in format ENQ-MMYY-DDXXXX"""
-    now = datetime.now(timezone.utc)
-    month_year = now.strftime('%m%y')  # e.g., "0225" for Feb 2025
-    day = now.strftime('%d')  # e.g., "09" for 9th day
-    day_key = now.strftime('%Y%m%d')  # e.g., "20250209" for daily counter
-    
-    # Get or create counter for this specific day
-    counter_doc = await db.enquiry_counters.find_one_and_update(
-        {'day_key': day_key},
-        {'$inc': {'counter': 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    counter = counter_doc.get('counter', 1) if counter_doc else 1
-    enquiry_number = day + str(counter).zfill(4)  # Day + 4-digit counter
-    
-    return f"ENQ-{month_year}-{enquiry_number}"
+    return await sequences.next_id('enquiry')
 
 async def generate_custom_order_id() -> str:
     """Generate unique custom order ID in format CUS-YYYYMMDD-XXXX"""
-    now = datetime.now(timezone.utc)
-    date_part = now.strftime('%Y%m%d')  # e.g., "20260218"
-    day_key = f"custom_{date_part}"  # Unique key for daily counter
-    
-    # Get or create counter for this specific day
-    counter_doc = await db.custom_order_counters.find_one_and_update(
-        {'day_key': day_key},
-        {'$inc': {'counter': 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    counter = counter_doc.get('counter', 1) if counter_doc else 1
-    time_part = now.strftime('%H%M')  # HHMM format
-    
-    return f"CUS-{date_part}-{time_part}"
+    return await sequences.next_id('custom_order')
 
 # ==================== UTILITIES ====================
 def hash_password(password: str) -> str:
@@ -692,9 +699,12 @@ def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed.encode())
 
 def create_token(user_id: str) -> str:
+    now = datetime.now(timezone.utc)
     payload = {
         'user_id': user_id,
-        'exp': datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
+        # Checked against token_revocations when the login token is used to refresh
+        'iat': int(now.timestamp()),
+        'exp': now + timedelta(hours=JWT_EXPIRATION_HOURS)
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
@@ -714,7 +724,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         raise HTTPException(status_code=401, detail="Invalid token")
 
 async def get_current_user_from_cookie_or_header(request: Request) -> Dict:
-    """Get user from session_token cookie OR Authorization header (JWT or session)"""
+    """Get user from session_token cookie OR Authorization header (JWT or session).
+    Resolved users are served from principal_cache until TTL, logout or an admin change."""
     # Try cookie first (for Google OAuth sessions)
     session_token = request.cookies.get('session_token')
     
@@ -722,9 +733,15 @@ async def get_current_user_from_cookie_or_header(request: Request) -> Dict:
     auth_header = request.headers.get('Authorization')
     
     user_id = None
+    cache_key = None
+    session_expires_at = None
     
     # If we have a session cookie, use it
     if session_token:
+        cached_user = principal_cache.get(('session', session_token))
+        if cached_user:
+            return cached_user
+        
         session_doc = await db.user_sessions.find_one({'session_token': session_token}, {'_id': 0})
         if session_doc:
             # Check expiration
@@ -735,6 +752,8 @@ async def get_current_user_from_cookie_or_header(request: Request) -> Dict:
                 expires_at = expires_at.replace(tzinfo=timezone.utc)
             if expires_at >= datetime.now(timezone.utc):
                 user_id = session_doc['user_id']
+                cache_key = ('session', session_token)
+                session_expires_at = expires_at.timestamp()
     
     # If no valid session from cookie, try Authorization header
     if not user_id and auth_header and auth_header.startswith('Bearer '):
@@ -743,11 +762,22 @@ async def get_current_user_from_cookie_or_header(request: Request) -> Dict:
         # First, try to decode as JWT
         try:
             payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+            # Access tokens are only honoured by get_principal_from_access_token, which checks revocation
+            if payload.get('typ') == ACCESS_TOKEN_TYPE:
+                raise HTTPException(status_code=401, detail="Access token not accepted here")
             user_id = payload.get('user_id')
+            cache_key = ('jwt', user_id)
+            cached_user = principal_cache.get(cache_key)
+            if cached_user:
+                return cached_user
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=401, detail="Token expired")
         except jwt.InvalidTokenError:
             # If JWT decode fails, try as session token
+            cached_user = principal_cache.get(('session', token))
+            if cached_user:
+                return cached_user
+            
             session_doc = await db.user_sessions.find_one({'session_token': token}, {'_id': 0})
             if session_doc:
                 expires_at = session_doc['expires_at']
@@ -757,6 +787,8 @@ async def get_current_user_from_cookie_or_header(request: Request) -> Dict:
                     expires_at = expires_at.replace(tzinfo=timezone.utc)
                 if expires_at >= datetime.now(timezone.utc):
                     user_id = session_doc['user_id']
+                    cache_key = ('session', token)
+                    session_expires_at = expires_at.timestamp()
     
     if not user_id:
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -770,16 +802,47 @@ async def get_current_user_from_cookie_or_header(request: Request) -> Dict:
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     
+    principal_cache.set(cache_key, user, session_expires_at)
+    
     return user
 
+def login_token_claims(request: Request) -> Optional[Dict]:
+    """Claims of the login JWT in the Authorization header (with 'iat' filled in for older tokens), if any"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    try:
+        claims = jwt.decode(auth_header.split(' ')[1], JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.InvalidTokenError:
+        return None
+    if claims.get('typ') == ACCESS_TOKEN_TYPE or not claims.get('user_id'):
+        return None
+    if 'iat' not in claims:
+        # Login tokens minted before 'iat' was added: derive it from the fixed lifetime
+        claims['iat'] = int(claims['exp'] - JWT_EXPIRATION_HOURS * 3600)
+    return claims
+
+def get_principal_from_access_token(request: Request) -> Optional[Dict]:
+    """Authorize from a signed access token without touching the database.
+    Returns None when there is no usable access token - callers then take the database path."""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    
+    claims = access_tokens.decode(auth_header.split(' ')[1])
+    if not claims or token_revocations.is_revoked(claims['user_id'], claims['iat']):
+        return None
+    
+    return access_tokens.principal_from_claims(claims)
+
 async def get_admin_user(request: Request) -> Dict:
-    user = await get_current_user_from_cookie_or_header(request)
+    user = get_principal_from_access_token(request) or await get_current_user_from_cookie_or_header(request)
     if not user.get('is_admin') and not user.get('is_super_admin'):
         raise HTTPException(status_code=403, detail="Admin access required")
     return user
 
 async def get_super_admin_user(request: Request) -> Dict:
-    user = await get_current_user_from_cookie_or_header(request)
+    user = get_principal_from_access_token(request) or await get_current_user_from_cookie_or_header(request)
     if not user.get('is_super_admin'):
         raise HTTPException(status_code=403, detail="Super admin access required")
     return user
@@ -787,7 +850,10 @@ async def get_super_admin_user(request: Request) -> Dict:
 # Permission check helper for RBAC
 async def check_permission(request: Request, permission: str) -> Dict:
     """Check if the current user has a specific permission"""
-    user = await get_current_user_from_cookie_or_header(request)
+    user = get_principal_from_access_token(request)
+    # Permissions outside the catalogue are not in the token bitset - resolve those from the database
+    if user is None or (permission not in access_tokens.permission_keys and not user.get('is_super_admin')):
+        user = await get_current_user_from_cookie_or_header(request)
     
     # Super admins have all permissions
     if user.get('is_super_admin'):
@@ -930,6 +996,15 @@ AVAILABLE_PERMISSIONS = {
     },
 }
 
+access_tokens = AccessTokenIssuer(
+    JWT_SECRET,
+    JWT_ALGORITHM,
+    ACCESS_TOKEN_EXPIRATION_MINUTES,
+    [perm['key'] for group in AVAILABLE_PERMISSIONS.values() for perm in group['permissions']]
+)
+# Entries outlive login tokens too, since those are checked at refresh
+token_revocations = TokenRevocationList(max(ACCESS_TOKEN_EXPIRATION_MINUTES, JWT_EXPIRATION_HOURS * 60))
+
 # Product image upload endpoint (must be after get_admin_user is defined)
 @api_router.post("/admin/upload/product-image")
 async def upload_product_image_endpoint(
@@ -940,12 +1015,13 @@ async def upload_product_image_endpoint(
     """Admin: Upload product image for Fabrics, Souvenirs, or Boutique to Supabase Cloud Storage"""
     try:
         # Upload to Supabase
-        result = await upload_file_to_supabase(file, folder=folder)
+        result = await upload_file_to_supabase(file, folder=folder, derive=image_derivatives.create)
         return {
             'message': 'Image uploaded successfully',
             'image_url': result['public_url'],
             'file_name': result['file_name'],
-            'storage_path': result['storage_path']
+            'storage_path': result['storage_path'],
+            'derivatives': result['derivatives']
         }
     except HTTPException:
         raise
@@ -958,137 +1034,12 @@ async def send_email_mock(to: str, subject: str, body: str):
     logger.info(f"[MOCK EMAIL] To: {to}, Subject: {subject}, Body: {body[:100]}...")
 
 async def calculate_bulk_price(clothing_item: str, quantity: int, print_type: PrintType, fabric_quality: str) -> Dict[str, float]:
-    # Fetch dynamic pricing from CMS settings
-    settings = await db.cms_settings.find_one({}, {'_id': 0})
-    
-    # Get production costs
-    production_costs = await db.production_costs.find_one({}, {'_id': 0})
-    if not production_costs:
-        production_costs = {
-            'bulk_print_cost_per_piece': 500,
-            'bulk_embroidery_cost_per_piece': 1200
-        }
-    
-    # Default base prices (fallback if not in CMS)
-    default_base_prices = {
-        'T-Shirt': 1500,
-        'Hoodie': 4500,
-        'Joggers': 3500,
-        'Varsity Jacket': 8000,
-        'Polo': 2500,
-        'Polo Shirt': 2500,  # Alias
-        'Button-Down Shirt': 3000,
-        'Corporate Shirt': 3200,
-        'Coverall': 5000,
-        'Hospital Scrubs': 3500,
-        'Shorts': 2000,
-        'School Uniform': 2500,
-        'Security Uniform': 3000,
-        'Uniform': 3500,
-        'Dress': 4000,
-        # Nigerian Traditional Clothing
-        'Agbada': 12000,
-        'Senator Wear': 9000,
-        'Kaftan': 7500,
-        'Bubu Dress': 8500,
-        'Ankara Dress': 6500,
-        'Dashiki': 5000
-    }
-    
-    # Get base prices from CMS or use defaults
-    if settings and 'bulk_order_base_prices' in settings:
-        base_prices = settings['bulk_order_base_prices']
-        # Merge with defaults for items not in CMS
-        for key, value in default_base_prices.items():
-            if key not in base_prices:
-                base_prices[key] = value
-    else:
-        base_prices = default_base_prices
-    
-    base_price = base_prices.get(clothing_item, 2000)
-    
-    # Get fabric quality price (clothing-specific)
-    fabric_cost = 0
-    fabric_qualities = await db.fabric_qualities.find({
-        '$or': [
-            {'clothing_item': clothing_item},
-            {'clothing_item': 'default'}
-        ]
-    }, {'_id': 0}).to_list(100)
-    
-    # Find matching fabric quality
-    fabric_quality_str = fabric_quality or 'standard'
-    for fq in fabric_qualities:
-        if fq['name'].lower() == fabric_quality_str.lower():
-            fabric_cost = fq['price']
-            break
-    
-    # Get quantity discounts from CMS or use defaults
-    default_discounts = {
-        '500': 20,
-        '200': 15,
-        '100': 10,
-        '50': 5
-    }
-    
-    if settings and 'bulk_order_discounts' in settings:
-        discount_settings = settings['bulk_order_discounts']
-    else:
-        discount_settings = default_discounts
-    
-    # Apply quantity discount
-    discount = 0
-    # Sort by quantity descending to apply highest applicable discount
-    sorted_discounts = sorted(
-        [(int(qty), disc) for qty, disc in discount_settings.items()],
-        key=lambda x: x[0],
-        reverse=True
-    )
-    
-    for min_qty, disc_percent in sorted_discounts:
-        if quantity >= min_qty:
-            discount = disc_percent / 100.0
-            break
-    
-    # Print type cost - use production costs
-    print_cost = 0
-    if print_type == PrintType.FRONT or print_type == PrintType.FRONT_BACK:
-        print_cost = production_costs.get('bulk_print_cost_per_piece', 500)
-        if print_type == PrintType.FRONT_BACK:
-            print_cost = print_cost * 1.6  # 60% more for back printing
-    elif print_type == PrintType.EMBROIDERY:
-        print_cost = production_costs.get('bulk_embroidery_cost_per_piece', 1200)
-    
-    # Calculate item price: base + fabric + print
-    item_price = base_price + fabric_cost + print_cost
-    discounted_price = item_price * (1 - discount)
-    total = discounted_price * quantity
-    
-    return {
-        'base_price': base_price,
-        'fabric_cost': fabric_cost,
-        'print_cost': print_cost,
-        'discount_percentage': discount * 100,
-        'price_per_item': discounted_price,
-        'total_price': total
-    }
+    """Price a bulk order line from the compiled price book (no per-call pricing queries)"""
+    book = await price_books.get()
+    return book.price(clothing_item, quantity, print_type, fabric_quality)
 
 def calculate_production_time(quantity: int, print_type: PrintType) -> int:
-    base_days = 3
-    
-    if quantity > 100:
-        base_days += 7
-    elif quantity > 50:
-        base_days += 5
-    elif quantity > 20:
-        base_days += 3
-    
-    if print_type == PrintType.EMBROIDERY:
-        base_days += 2
-    elif print_type == PrintType.FRONT_BACK:
-        base_days += 1
-    
-    return base_days
+    return production_days(quantity, print_type)
 
 # ==================== AUTH ROUTES ====================
 @api_router.post("/auth/register")
@@ -1219,6 +1170,8 @@ async def login(request: Request, credentials: UserLogin, response: Response):
     return {
         'token': token,
         'session_token': session_token,
+        'access_token': access_tokens.create(user),
+        'access_token_expires_in': ACCESS_TOKEN_EXPIRATION_MINUTES * 60,
         'user': {
             'id': user_id,
             'name': user['name'],
@@ -1265,6 +1218,7 @@ async def update_profile(request: Request, data: Dict[str, Any]):
     }
     
     await db.users.update_one({'id': user['id']}, {'$set': update_data})
+    principal_cache.invalidate_user(user.get('id'), user.get('user_id'))
     
     return {'message': 'Profile updated successfully'}
 
@@ -1340,10 +1294,7 @@ async def get_order_detail(order_id: str, request: Request):
     """Get single order details"""
     user = await get_current_user_from_cookie_or_header(request)
     
-    order = await db.orders.find_one(
-        {'id': order_id, 'customer_details.email': user['email']},
-        {'_id': 0}
-    )
+    order = await find_order(db, order_id, extra_filter={'customer_details.email': user['email']})
     
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -1499,7 +1450,12 @@ async def google_session(request: Request, response: Response):
         # Get complete user data
         user = await db.users.find_one({'user_id': user_id}, {'_id': 0, 'password': 0})
         
-        return {'user': user, 'session_token': session_token}
+        return {
+            'user': user,
+            'session_token': session_token,
+            'access_token': access_tokens.create(user),
+            'access_token_expires_in': ACCESS_TOKEN_EXPIRATION_MINUTES * 60
+        }
     
     except httpx.RequestError as e:
         logger.error(f"Emergent Auth API error: {str(e)}")
@@ -1508,6 +1464,21 @@ async def google_session(request: Request, response: Response):
         logger.error(f"Google session error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/auth/token/refresh")
+async def refresh_access_token(request: Request):
+    """Issue a fresh access token from the session cookie or long-lived login token.
+    Always reloads the user from the database so role changes are picked up.
+    Access tokens cannot refresh themselves, and login tokens issued before a revocation are refused."""
+    if not request.cookies.get('session_token'):
+        claims = login_token_claims(request)
+        if claims and token_revocations.is_revoked(claims['user_id'], claims['iat']):
+            raise HTTPException(status_code=401, detail="Token revoked, please log in again")
+    user = await get_current_user_from_cookie_or_header(request)
+    return {
+        'access_token': access_tokens.create(user),
+        'access_token_expires_in': ACCESS_TOKEN_EXPIRATION_MINUTES * 60
+    }
+
 @api_router.post("/auth/logout")
 async def logout(request: Request, response: Response):
     """Logout user and clear session"""
@@ -1517,6 +1488,7 @@ async def logout(request: Request, response: Response):
         if session_token:
             # Delete session from database
             await db.user_sessions.delete_one({'session_token': session_token})
+            principal_cache.invalidate(('session', session_token))
         
         # Clear cookie
         response.delete_cookie(
@@ -1540,6 +1512,7 @@ async def update_address(address: str, request: Request):
         {'user_id': user['user_id']},
         {'$set': {'address': address}}
     )
+    principal_cache.invalidate_user(user.get('id'), user.get('user_id'))
     
     return {'message': 'Address updated successfully'}
 
@@ -1561,6 +1534,26 @@ async def calculate_quote(quote_request: QuickQuoteRequest):
         breakdown=breakdown
     )
 
+@api_router.post("/quote/calculate-batch", response_model=QuickQuoteBatchResponse)
+@limiter.limit("60/minute")
+async def calculate_quote_batch(request: Request, batch: QuickQuoteBatchRequest):
+    """Price up to MAX_BATCH_QUOTE_LINES quote lines (multi-line quotes, price grids) in one call"""
+    items = batch.items
+    book = await price_books.get()
+    breakdowns = book.price_batch(
+        [item.clothing_item for item in items],
+        [item.quantity for item in items],
+        [item.print_type for item in items],
+        [item.fabric_quality for item in items]
+    )
+    days = production_days_batch([item.quantity for item in items], [item.print_type for item in items]).tolist()
+
+    quotes = [
+        QuickQuoteResponse(estimated_price=breakdown['total_price'], estimated_days=line_days, breakdown=breakdown)
+        for breakdown, line_days in zip(breakdowns, days)
+    ]
+    return QuickQuoteBatchResponse(quotes=quotes, total_price=sum(quote.estimated_price for quote in quotes))
+
 # ==================== BULK ORDERS ====================
 @api_router.post("/orders/bulk")
 @limiter.limit("20/hour")
@@ -1579,12 +1572,14 @@ async def create_bulk_order(
     # Validate minimum quantity for bulk orders
     if order_dict.get('quantity', 0) < 50:
         raise HTTPException(status_code=400, detail="Minimum bulk order quantity is 50")
+    if order_dict['quantity'] > MAX_ORDER_QUANTITY:
+        raise HTTPException(status_code=400, detail=f"Maximum bulk order quantity is {MAX_ORDER_QUANTITY}")
     
     order_id = await generate_order_id()
     design_url = None
     
     if design_file:
-        file_data = await save_upload_file(design_file, ALLOWED_IMAGE_EXTENSIONS)
+        file_data = await save_upload_file(design_file, ALLOWED_IMAGE_EXTENSIONS, module="bulk", deduplicate=True)
         design_url = file_data['file_path']
     
     # Calculate price based on new structure
@@ -1637,7 +1632,7 @@ async def create_bulk_order(
         'created_at': datetime.now(timezone.utc).isoformat()
     }
     
-    await db.orders.insert_one(bulk_order)
+    await insert_order(db, bulk_order)
     
     # Create admin notification
     variant_label = product_variant.capitalize()
@@ -1654,8 +1649,7 @@ async def create_bulk_order(
     except Exception as e:
         logger.error(f"Failed to send push notification for bulk order: {e}")
     
-    del bulk_order['_id']
-    return bulk_order
+    return strip_lookup_keys(bulk_order)
 
 # ==================== POD ORDERS ====================
 @api_router.post("/orders/pod")
@@ -1713,7 +1707,7 @@ async def create_pod_order(
         'created_at': datetime.now(timezone.utc).isoformat()
     }
     
-    await db.orders.insert_one(pod_order)
+    await insert_order(db, pod_order)
     
     # Update the design record with the order_id if design_id exists
     if design_id:
@@ -1736,8 +1730,7 @@ async def create_pod_order(
     except Exception as e:
         logger.error(f"Failed to send push notification for POD order: {e}")
     
-    del pod_order['_id']
-    return pod_order
+    return strip_lookup_keys(pod_order)
 
 # ==================== POD DESIGN UPLOAD (Dual File Storage) ====================
 @api_router.get("/pod/print-sizes")
@@ -1834,25 +1827,7 @@ async def create_or_get_guest_contact(data: Dict[str, Any]):
         
         # Link any unlinked designs from this session to the contact
         if session_id:
-            unlinked_designs = await db.pod_designs.find({
-                'session_id': session_id,
-                'guest_id': {'$exists': False}
-            }).to_list(100)
-            
-            for design in unlinked_designs:
-                await db.pod_designs.update_one(
-                    {'id': design['id']},
-                    {'$set': {
-                        'guest_id': guest_id,
-                        'guest_email': email,
-                        'updated_at': datetime.now(timezone.utc).isoformat()
-                    }}
-                )
-                await db.pod_guest_contacts.update_one(
-                    {'id': guest_id},
-                    {'$push': {'designs': design['id']}}
-                )
-                logger.info(f"[POD] Linked design {design['id']} to guest {guest_id}")
+            await link_session_designs(db, session_id, guest_id, email)
         
         return existing
         
@@ -1860,48 +1835,22 @@ async def create_or_get_guest_contact(data: Dict[str, Any]):
         logger.error(f"[POD] Guest contact creation failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create guest contact")
 
-@api_router.post("/pod/upload-design")
-async def upload_pod_design(
-    design_file: UploadFile = File(...),
-    product_id: str = Form(...),
-    item_type: str = Form("")
-):
-    """
-    Upload POD design - STATELESS implementation using Supabase storage.
-    Immediately saves design with status='unassigned'.
-    Returns temp_design_id for frontend to store in localStorage.
-    
-    Does NOT require cookies, sessions, or contact info.
-    Contact linking happens separately via /pod/link-design endpoint.
-    
-    Returns: temp_design_id, original_file_url
-    """
-    logger.info(f"[POD DESIGN] Stateless upload started: product={product_id}")
-    
+def unassigned_design_response(design: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'temp_design_id': design['id'],
+        'design_id': design['id'],
+        'original_file_url': design['original_file_url'],
+        'status': design['status'],
+        'message': 'Design uploaded successfully. Store temp_design_id in localStorage.'
+    }
+
+async def create_unassigned_design(result: Dict[str, Any], product_id: str, item_type: str,
+                                   original_filename: Optional[str],
+                                   extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Create the design record for a stored original (content_store result) with status='unassigned'"""
     # Generate unique temp_design_id (UUID-based, primary key)
     temp_design_id = f"design_{uuid.uuid4().hex}"
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    
-    try:
-        # Upload to Supabase with custom filename
-        custom_filename = f"{product_id}_{timestamp}_{temp_design_id}"
-        result = await upload_file_to_supabase(
-            design_file, 
-            folder="pod-designs/original",
-            custom_filename=custom_filename
-        )
-        
-        original_url = result['public_url']
-        file_size = result['file_size']
-        storage_type = result['storage_type']
-        storage_path = result.get('storage_path', '')
-        
-        logger.info(f"[POD DESIGN] Original saved via {storage_type}: {result['file_name']} ({file_size} bytes)")
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"[POD DESIGN] Save failed: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to save design file")
+    original_url = result['public_url']
     
     # Create design record with status='unassigned' (STATELESS - no contact required)
     design_record = {
@@ -1916,9 +1865,10 @@ async def upload_pod_design(
         'product_id': product_id,
         'item_type': item_type or product_id,
         'original_file_url': original_url,
-        'original_filename': design_file.filename,
-        'storage_path': storage_path,  # For Supabase deletion
-        'storage_type': storage_type,
+        'original_filename': original_filename,
+        'storage_path': result.get('storage_path', ''),  # For Supabase deletion
+        'storage_type': result['storage_type'],
+        'content_sha256': result['sha256'],  # Reference held in the content store
         'mockup_file_url': None,
         'mockup_filename': None,
         'print_size': 'a4',
@@ -1926,26 +1876,162 @@ async def upload_pod_design(
         'position_x': 0,
         'position_y': 0,
         'rotation': 0,
-        'file_size': file_size,
+        'file_size': result['file_size'],
         'status': 'unassigned',  # Key: starts as unassigned
         'created_at': datetime.now(timezone.utc).isoformat(),
-        'updated_at': datetime.now(timezone.utc).isoformat()
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+        **(extra or {})
     }
     
     result_db = await db.pod_designs.insert_one(design_record)
     if not result_db.inserted_id:
         logger.error(f"[POD DESIGN] DB insert failed for design {temp_design_id}")
+        await content_store.release(result['sha256'])
         raise HTTPException(status_code=500, detail="Failed to save design record")
     
     logger.info(f"[POD DESIGN] Stateless upload complete: {temp_design_id} (status=unassigned)")
     
-    return {
-        'temp_design_id': temp_design_id,
-        'design_id': temp_design_id,
-        'original_file_url': original_url,
-        'status': 'unassigned',
-        'message': 'Design uploaded successfully. Store temp_design_id in localStorage.'
-    }
+    return unassigned_design_response(design_record)
+
+@api_router.post("/pod/upload-design")
+async def upload_pod_design(
+    design_file: UploadFile = File(...),
+    product_id: str = Form(...),
+    item_type: str = Form("")
+):
+    """
+    Upload POD design - STATELESS implementation using Supabase storage.
+    Immediately saves design with status='unassigned'.
+    Returns temp_design_id for frontend to store in localStorage.
+    
+    Does NOT require cookies, sessions, or contact info.
+    Contact linking happens separately via /pod/link-design endpoint.
+    Large print files should use the resumable /pod/uploads API instead.
+    
+    Returns: temp_design_id, original_file_url
+    """
+    logger.info(f"[POD DESIGN] Stateless upload started: product={product_id}")
+    
+    is_valid, error_msg = validate_image_file(design_file)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    try:
+        # Content-addressed, so a customer re-uploading the same artwork reuses the stored copy
+        result = await content_store.put(design_file)
+        
+        logger.info(f"[POD DESIGN] Original saved via {result['storage_type']}: {result['file_name']} ({result['file_size']} bytes, duplicate={result['deduplicated']})")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"[POD DESIGN] Save failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to save design file")
+    
+    return await create_unassigned_design(result, product_id, item_type, design_file.filename)
+
+# ==================== POD RESUMABLE UPLOADS ====================
+# create session -> PUT chunks with Upload-Offset -> finalize (see core/resumable_uploads.py)
+
+class ResumableUploadCreate(BaseModel):
+    filename: str
+    content_type: str
+    size: int
+    product_id: str
+    item_type: str = ""
+
+def resumable_upload_response(session, status_code: int = 200) -> JSONResponse:
+    """Session state as JSON, with the offset also in the Upload-Offset header"""
+    return JSONResponse(
+        session.to_response(),
+        status_code=status_code,
+        headers={'Upload-Offset': str(session.offset), 'Cache-Control': 'no-store'}
+    )
+
+@api_router.post("/pod/uploads")
+@limiter.limit("30/hour")
+async def create_resumable_upload(request: Request, data: ResumableUploadCreate):
+    """Public: Start a resumable upload of a POD design (for large print files)"""
+    ext = os.path.splitext(data.filename)[1].lower()
+    if ext not in ALLOWED_IMAGE_EXTENSIONS or not data.content_type.startswith('image/'):
+        raise HTTPException(status_code=400, detail=f"Invalid file type. Allowed: {', '.join(sorted(ALLOWED_IMAGE_EXTENSIONS))}")
+    
+    session = await resumable_uploads.create(
+        await sanitize_filename(data.filename),
+        data.content_type,
+        data.size,
+        metadata={'product_id': data.product_id, 'item_type': data.item_type}
+    )
+    response = resumable_upload_response(session, status_code=201)
+    response.headers['Location'] = f"/api/pod/uploads/{session.upload_id}"
+    response.headers['Upload-Chunk-Size'] = str(resumable_uploads.max_chunk_size)
+    return response
+
+@api_router.get("/pod/uploads/{upload_id}")
+async def get_resumable_upload(upload_id: str):
+    """Public: Current offset of an upload session - where the client resumes from"""
+    return resumable_upload_response(await resumable_uploads.get(upload_id))
+
+@api_router.put("/pod/uploads/{upload_id}")
+async def put_resumable_upload_chunk(upload_id: str, request: Request):
+    """
+    Public: Append the request body at the Upload-Offset header's byte offset.
+    A stale offset gets a 409 carrying the current one.
+    """
+    offset = request.headers.get('upload-offset')
+    if offset is None or not offset.isdigit():
+        raise HTTPException(status_code=400, detail="Upload-Offset header is required")
+    session = await resumable_uploads.append(upload_id, int(offset), request.stream())
+    return resumable_upload_response(session)
+
+@api_router.post("/pod/uploads/{upload_id}/finalize")
+async def finalize_resumable_upload(upload_id: str):
+    """
+    Public: Turn a completed upload into an unassigned design, like /pod/upload-design.
+    Repeating the call returns the design the first call created.
+    """
+    existing = await db.pod_designs.find_one(
+        {'resumable_upload_id': upload_id}, {'_id': 0, 'id': 1, 'original_file_url': 1, 'status': 1}
+    )
+    if existing:
+        return unassigned_design_response(existing)
+    
+    # Atomic across workers: a concurrent finalize of the same upload gets a 409
+    session = await resumable_uploads.claim(upload_id)
+    logger.info(f"[POD DESIGN] Resumable upload {upload_id} complete: product={session.metadata.get('product_id')}")
+    
+    try:
+        result = await content_store.put_path(
+            resumable_uploads.claimed_path(upload_id),
+            await resumable_uploads.sha256(upload_id, claimed=True),
+            session.size,
+            session.filename,
+            session.content_type,
+            consume=True
+        )
+    except Exception as e:
+        await resumable_uploads.release(upload_id)
+        logger.error(f"[POD DESIGN] Save failed for resumable upload {upload_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to save design file")
+    
+    try:
+        design = await create_unassigned_design(
+            result, session.metadata.get('product_id'), session.metadata.get('item_type', ''), session.filename,
+            extra={'resumable_upload_id': upload_id}
+        )
+    except Exception:
+        # Drop the reference put_path took; the session only re-opens if its data is still on disk
+        await content_store.release(result['sha256'])
+        await resumable_uploads.release(upload_id)
+        raise
+    await resumable_uploads.discard(upload_id)
+    return design
+
+@api_router.delete("/pod/uploads/{upload_id}")
+async def abort_resumable_upload(upload_id: str):
+    """Public: Abandon an upload session and free its disk space"""
+    await resumable_uploads.get(upload_id)
+    await resumable_uploads.discard(upload_id)
+    return {'message': 'Upload cancelled'}
 
 @api_router.post("/pod/link-design")
 async def link_design_to_contact(data: Dict[str, Any]):
@@ -1990,76 +2076,8 @@ async def link_design_to_contact(data: Dict[str, Any]):
         }
     
     try:
-        # Get or create guest contact
-        existing_contact = await db.pod_guest_contacts.find_one({'email': email})
-        
-        if existing_contact:
-            contact_id = existing_contact['id']
-            # Update contact info
-            await db.pod_guest_contacts.update_one(
-                {'id': contact_id},
-                {'$set': {
-                    'name': name,
-                    'phone': phone,
-                    'updated_at': datetime.now(timezone.utc).isoformat()
-                }}
-            )
-            logger.info(f"[POD LINK] Updated existing contact: {contact_id}")
-        else:
-            # Create new contact
-            contact_id = f"contact_{uuid.uuid4().hex[:12]}"
-            contact_record = {
-                'id': contact_id,
-                'contact_id': contact_id,
-                'name': name,
-                'email': email,
-                'phone': phone,
-                'designs': [],
-                'created_at': datetime.now(timezone.utc).isoformat(),
-                'updated_at': datetime.now(timezone.utc).isoformat()
-            }
-            await db.pod_guest_contacts.insert_one(contact_record)
-            
-            # Also create client record for admin visibility
-            client_id = f"client_{uuid.uuid4().hex[:12]}"
-            await db.clients.insert_one({
-                'id': client_id,
-                'client_id': client_id,
-                'name': name,
-                'email': email,
-                'phone': phone,
-                'type': 'pod_guest',
-                'source': 'print_on_demand',
-                'pod_contact_id': contact_id,
-                'total_orders': 0,
-                'total_spent': 0,
-                'created_at': datetime.now(timezone.utc).isoformat(),
-                'updated_at': datetime.now(timezone.utc).isoformat()
-            })
-            logger.info(f"[POD LINK] Created new contact + client: {contact_id}")
-        
-        # Update design record - link to contact
-        await db.pod_designs.update_one(
-            {'id': temp_design_id},
-            {'$set': {
-                'contact_id': contact_id,
-                'guest_id': contact_id,
-                'guest_email': email,
-                'guest_name': name,
-                'guest_phone': phone,
-                'status': 'assigned',
-                'updated_at': datetime.now(timezone.utc).isoformat()
-            }}
-        )
-        
-        # Add design to contact's designs list
-        await db.pod_guest_contacts.update_one(
-            {'id': contact_id},
-            {
-                '$addToSet': {'designs': temp_design_id},
-                '$set': {'updated_at': datetime.now(timezone.utc).isoformat()}
-            }
-        )
+        contact_id = await get_or_create_design_contact(db, name, email, phone)
+        await assign_designs_to_contact(db, [temp_design_id], contact_id, name, email, phone)
         
         logger.info(f"[POD LINK] Successfully linked design {temp_design_id} to contact {contact_id}")
         
@@ -2092,19 +2110,23 @@ async def link_multiple_designs_to_contact(data: Dict[str, Any]):
     if not email or not name or not phone:
         raise HTTPException(status_code=400, detail="Name, email, and phone are required")
     
-    linked_count = 0
-    for design_id in design_ids:
-        try:
-            result = await link_design_to_contact({
-                'temp_design_id': design_id,
-                'name': name,
-                'email': email,
-                'phone': phone
-            })
-            if result.get('status') == 'assigned':
-                linked_count += 1
-        except Exception as e:
-            logger.error(f"[POD LINK] Failed to link design {design_id}: {str(e)}")
+    # Nothing to link: refuse before a contact and client are created for it
+    if not await db.pod_designs.count_documents({'id': {'$in': design_ids}}, limit=1):
+        raise HTTPException(status_code=404, detail="Designs not found")
+    
+    # One contact lookup and one batched update, however many designs there are
+    try:
+        contact_id = await get_or_create_design_contact(db, name, email, phone)
+        result = await assign_designs_to_contact(db, design_ids, contact_id, name, email, phone)
+    except Exception as e:
+        logger.error(f"[POD LINK] Failed to link designs to {email}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to link designs to contact")
+    
+    if result['not_found']:
+        logger.warning(f"[POD LINK] Designs not found: {result['not_found']}")
+    
+    # Designs that were already assigned count as linked, as before
+    linked_count = len(result['linked']) + len(result['already_assigned'])
     
     return {
         'message': f'Linked {linked_count} of {len(design_ids)} designs',
@@ -2135,7 +2157,8 @@ async def upload_pod_mockup(
         result = await upload_file_to_supabase(
             mockup_file,
             folder="pod-designs/mockups",
-            custom_filename=custom_filename
+            custom_filename=custom_filename,
+            derive=image_derivatives.create
         )
         
         mockup_url = result['public_url']
@@ -2157,7 +2180,8 @@ async def upload_pod_mockup(
                 'mockup_file_url': mockup_url,
                 'mockup_storage_path': mockup_storage_path,
                 'updated_at': datetime.now(timezone.utc).isoformat()
-            }
+            },
+            '$unset': {'mockup_render_key': ''}
         }
     )
     
@@ -2169,6 +2193,41 @@ async def upload_pod_mockup(
         'message': 'Mockup uploaded successfully'
     }
 
+@api_router.post("/pod/design/{design_id}/render-mockup")
+async def render_pod_mockup(design_id: str):
+    """
+    Render the mockup of a POD design on the server from its saved transform.
+    An identical mockup rendered before is reused without rendering or uploading again;
+    503 means the client should generate and upload the mockup itself.
+    """
+    design = await db.pod_designs.find_one({'id': design_id}, {'_id': 0})
+    if not design:
+        raise HTTPException(status_code=404, detail="Design not found")
+    
+    rendered = await mockup_renderer.render(design)
+    
+    # Rendered files can be shared between designs, so the design keeps no storage path of its own
+    await db.pod_designs.update_one(
+        {'id': design_id},
+        {
+            '$set': {
+                'mockup_file_url': rendered['public_url'],
+                'mockup_render_key': rendered['key'],
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            },
+            '$unset': {'mockup_storage_path': ''}
+        }
+    )
+    
+    logger.info(f"[POD MOCKUP] {'Reused' if rendered['cached'] else 'Rendered'} mockup for design {design_id}")
+    
+    return {
+        'design_id': design_id,
+        'mockup_file_url': rendered['public_url'],
+        'cached': rendered['cached'],
+        'message': 'Mockup rendered successfully'
+    }
+
 @api_router.put("/pod/design/{design_id}/transform")
 async def update_pod_design_transform(design_id: str, data: Dict[str, Any]):
     """
@@ -2233,12 +2292,7 @@ async def get_my_orders(request: Request):
 @api_router.get("/orders/{order_id}")
 async def get_order(order_id: str):
     # Public endpoint - anyone can view order with order ID
-    order = await db.orders.find_one({
-        '$or': [
-            {'id': order_id},
-            {'order_id': order_id}
-        ]
-    }, {'_id': 0})
+    order = await find_order(db, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
@@ -2289,7 +2343,7 @@ async def create_boutique_order(
         'created_at': datetime.now(timezone.utc).isoformat()
     }
     
-    await db.orders.insert_one(boutique_order)
+    await insert_order(db, boutique_order)
     
     # Create admin notification
     await db.notifications.insert_one({
@@ -2301,8 +2355,7 @@ async def create_boutique_order(
         'created_at': datetime.now(timezone.utc).isoformat()
     })
     
-    del boutique_order['_id']
-    return boutique_order
+    return strip_lookup_keys(boutique_order)
 
 @api_router.post("/orders/{order_id}/payment-proof")
 async def upload_payment_proof(
@@ -2314,12 +2367,7 @@ async def upload_payment_proof(
     """Customer uploads payment proof - no authentication required"""
     
     # Find order
-    order = await db.orders.find_one({
-        '$or': [
-            {'id': order_id},
-            {'order_id': order_id}
-        ]
-    }, {'_id': 0})
+    order = await find_order(db, order_id)
     
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -2338,10 +2386,7 @@ async def upload_payment_proof(
         'payment_status': 'payment_submitted'
     }
     
-    result = await db.orders.update_one(
-        {'$or': [{'id': order_id}, {'order_id': order_id}]},
-        {'$set': update_data}
-    )
+    result = await update_order(db, order_id, {'$set': update_data})
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -2367,12 +2412,7 @@ async def admin_upload_receipt(
     """Admin manually uploads payment receipt for an order"""
     
     # Find order
-    order = await db.orders.find_one({
-        '$or': [
-            {'id': order_id},
-            {'order_id': order_id}
-        ]
-    }, {'_id': 0})
+    order = await find_order(db, order_id)
     
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -2388,10 +2428,7 @@ async def admin_upload_receipt(
         'payment_receipt_uploaded_at': datetime.now(timezone.utc).isoformat()
     }
     
-    result = await db.orders.update_one(
-        {'$or': [{'id': order_id}, {'order_id': order_id}]},
-        {'$set': update_data}
-    )
+    result = await update_order(db, order_id, {'$set': update_data})
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -2417,13 +2454,20 @@ async def get_bank_details():
 
 # ==================== BOUTIQUE ====================
 @api_router.get("/boutique/products")
-async def get_boutique_products(category: Optional[str] = None):
+async def get_boutique_products(request: Request, response: Response, category: Optional[str] = None):
+    not_modified = await check_not_modified(request, response, 'boutique_products', category or '')
+    if not_modified:
+        return not_modified
+    
     query = {}
     if category:
         query['category'] = category
     
-    products = await db.boutique_products.find(query, {'_id': 0}).to_list(100)
-    return products
+    return await catalog_cache.get_or_load(
+        'boutique_products',
+        lambda: load_with_derivatives(db.boutique_products.find(query, {'_id': 0}).to_list(100)),
+        variant=category or ''
+    )
 
 @api_router.get("/boutique/products/{product_id}")
 async def get_product(product_id: str):
@@ -2485,6 +2529,7 @@ async def create_boutique_product(product: NewBoutiqueProduct, request: Request)
     
     # Insert into database
     await db.boutique_products.insert_one(product_data)
+    await catalog_cache.invalidate('boutique_products')
     
     return {
         'message': 'Product created successfully',
@@ -2510,12 +2555,13 @@ async def upload_boutique_product_image(file: UploadFile = File(...), request: R
     
     try:
         # Upload to Supabase
-        result = await upload_file_to_supabase(file, folder="boutique")
+        result = await upload_file_to_supabase(file, folder="boutique", derive=image_derivatives.create)
         return {
             'message': 'Image uploaded successfully',
             'image_url': result['public_url'],
             'filename': result['file_name'],
-            'storage_path': result['storage_path']
+            'storage_path': result['storage_path'],
+            'derivatives': result['derivatives']
         }
     except HTTPException:
         raise
@@ -2526,10 +2572,14 @@ async def upload_boutique_product_image(file: UploadFile = File(...), request: R
 
 # ==================== FABRICS ====================
 @api_router.get("/fabrics")
-async def get_fabrics():
+async def get_fabrics(request: Request, response: Response):
     """Get all active fabrics"""
-    fabrics = await db.fabrics.find({'is_active': True}, {'_id': 0}).to_list(100)
-    return fabrics
+    not_modified = await check_not_modified(request, response, 'fabrics')
+    if not_modified:
+        return not_modified
+    return await catalog_cache.get_or_load(
+        'fabrics', lambda: load_with_derivatives(db.fabrics.find({'is_active': True}, {'_id': 0}).to_list(100))
+    )
 
 # Admin Fabrics Management
 @api_router.post("/admin/fabrics")
@@ -2553,6 +2603,7 @@ async def create_fabric(fabric_data: Dict[str, Any], admin_user: Dict = Depends(
         'created_at': datetime.now(timezone.utc).isoformat()
     }
     await db.fabrics.insert_one(fabric)
+    await catalog_cache.invalidate('fabrics')
     return {'message': 'Fabric created', 'id': fabric['id']}
 
 @api_router.put("/admin/fabrics/{fabric_id}")
@@ -2572,6 +2623,7 @@ async def update_fabric(fabric_id: str, fabric_data: Dict[str, Any], admin_user:
     result = await db.fabrics.update_one({'id': fabric_id}, {'$set': update_data})
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Fabric not found")
+    await catalog_cache.invalidate('fabrics')
     return {'message': 'Fabric updated'}
 
 @api_router.delete("/admin/fabrics/{fabric_id}")
@@ -2598,11 +2650,15 @@ async def delete_fabric(fabric_id: str, admin_user: Dict = Depends(get_admin_use
             if file_path.exists():
                 try:
                     os.remove(file_path)
+                    await file_catalog.remove_local(file_path)
                     logger.info(f"Deleted fabric image: {filename}")
                 except Exception as e:
                     logger.error(f"Failed to delete fabric image: {e}")
+        # Thumbnails/previews stored next to the image go with it
+        await image_derivatives.delete(image_url)
     
     result = await db.fabrics.delete_one({'id': fabric_id})
+    await catalog_cache.invalidate('fabrics')
     return {'message': 'Fabric deleted'}
 
 @api_router.post("/orders/fabric")
@@ -2625,7 +2681,7 @@ async def create_fabric_order(order_data: Dict[str, Any]):
         'updated_at': datetime.now(timezone.utc).isoformat()
     }
     
-    await db.orders.insert_one(order)
+    await insert_order(db, order)
     
     # Send order confirmation email
     try:
@@ -2646,15 +2702,19 @@ async def create_fabric_order(order_data: Dict[str, Any]):
     return {
         'message': 'Fabric order created successfully',
         'order_id': order_id,
-        'order': {k: v for k, v in order.items() if k != '_id'}
+        'order': strip_lookup_keys(order)
     }
 
 # ==================== SOUVENIRS ====================
 @api_router.get("/souvenirs")
-async def get_souvenirs():
+async def get_souvenirs(request: Request, response: Response):
     """Get all active souvenirs"""
-    souvenirs = await db.souvenirs.find({'is_active': True}, {'_id': 0}).to_list(100)
-    return souvenirs
+    not_modified = await check_not_modified(request, response, 'souvenirs')
+    if not_modified:
+        return not_modified
+    return await catalog_cache.get_or_load(
+        'souvenirs', lambda: load_with_derivatives(db.souvenirs.find({'is_active': True}, {'_id': 0}).to_list(100))
+    )
 
 # Admin Souvenirs Management
 @api_router.post("/admin/souvenirs")
@@ -2679,6 +2739,7 @@ async def create_souvenir(souvenir_data: Dict[str, Any], admin_user: Dict = Depe
         'created_at': datetime.now(timezone.utc).isoformat()
     }
     await db.souvenirs.insert_one(souvenir)
+    await catalog_cache.invalidate('souvenirs')
     return {'message': 'Souvenir created', 'id': souvenir['id']}
 
 @api_router.put("/admin/souvenirs/{souvenir_id}")
@@ -2698,6 +2759,7 @@ async def update_souvenir(souvenir_id: str, souvenir_data: Dict[str, Any], admin
     result = await db.souvenirs.update_one({'id': souvenir_id}, {'$set': update_data})
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Souvenir not found")
+    await catalog_cache.invalidate('souvenirs')
     return {'message': 'Souvenir updated'}
 
 @api_router.delete("/admin/souvenirs/{souvenir_id}")
@@ -2724,11 +2786,15 @@ async def delete_souvenir(souvenir_id: str, admin_user: Dict = Depends(get_admin
             if file_path.exists():
                 try:
                     os.remove(file_path)
+                    await file_catalog.remove_local(file_path)
                     logger.info(f"Deleted souvenir image: {filename}")
                 except Exception as e:
                     logger.error(f"Failed to delete souvenir image: {e}")
+        # Thumbnails/previews stored next to the image go with it
+        await image_derivatives.delete(image_url)
     
     result = await db.souvenirs.delete_one({'id': souvenir_id})
+    await catalog_cache.invalidate('souvenirs')
     return {'message': 'Souvenir deleted'}
 
 @api_router.post("/orders/souvenir")
@@ -2773,7 +2839,7 @@ async def create_souvenir_order(order_data: Dict[str, Any]):
         'updated_at': datetime.now(timezone.utc).isoformat()
     }
     
-    await db.orders.insert_one(order)
+    await insert_order(db, order)
     
     # Send order confirmation email
     try:
@@ -2863,11 +2929,13 @@ async def create_souvenir_order(order_data: Dict[str, Any]):
     return {
         'message': 'Souvenir order created successfully',
         'order_id': order_id,
-        'order': {k: v for k, v in order.items() if k != '_id'},
+        'order': strip_lookup_keys(order),
         'requires_design_quote': design_negotiation_status == 'pending_design_quote'
     }
 
 # ==================== BRANDING DESIGN ENDPOINTS ====================
+BRANDING_MAX_UPLOAD_SIZE = 2 * 1024 * 1024  # 2MB
+
 @api_router.post("/branding/upload-design")
 async def upload_branding_design(file: UploadFile = File(...)):
     """Upload a branding design file for souvenir orders (JPG/PNG, max 2MB)"""
@@ -2876,38 +2944,11 @@ async def upload_branding_design(file: UploadFile = File(...)):
     if file.content_type not in allowed_types:
         raise HTTPException(status_code=400, detail="Only JPG and PNG files are allowed")
     
-    # Read file and check size (max 2MB)
-    contents = await file.read()
-    if len(contents) > 2 * 1024 * 1024:  # 2MB
-        raise HTTPException(status_code=400, detail="File size must be less than 2MB")
-    
-    # Generate unique filename
-    ext = file.filename.split('.')[-1] if '.' in file.filename else 'png'
-    unique_filename = f"branding_{uuid.uuid4()}.{ext}"
-    
-    # Try to upload to Supabase first
-    try:
-        supabase_url = await upload_file_to_supabase(
-            file_content=contents,
-            filename=unique_filename,
-            folder="branding-designs",
-            content_type=file.content_type
-        )
-        if supabase_url:
-            return {'url': supabase_url, 'storage': 'supabase'}
-    except Exception as e:
-        logger.error(f"Supabase upload failed for branding design: {e}")
-    
-    # Fallback to local storage
-    branding_dir = Path(UPLOAD_DIR) / "branding"
-    branding_dir.mkdir(parents=True, exist_ok=True)
-    
-    file_path = branding_dir / unique_filename
-    with open(file_path, 'wb') as f:
-        f.write(contents)
-    
-    local_url = f"/api/uploads/branding/{unique_filename}"
-    return {'url': local_url, 'storage': 'local'}
+    # Content-addressed, so the same logo uploaded for every order is stored once
+    result = await content_store.put(
+        file, BRANDING_MAX_UPLOAD_SIZE, too_large_message="File size must be less than 2MB"
+    )
+    return {'url': result['public_url'], 'storage': result['storage_type']}
 
 @api_router.get("/admin/branded-orders")
 async def get_branded_orders(
@@ -2939,7 +2980,7 @@ async def update_design_fee(
     admin_user: Dict = Depends(get_admin_user)
 ):
     """Admin: Set design fee for TEMARUCO design orders and notify customer"""
-    order = await db.orders.find_one({'order_id': order_id, 'contains_branded_items': True})
+    order = await find_order(db, order_id, extra_filter={'contains_branded_items': True})
     if not order:
         raise HTTPException(status_code=404, detail="Branded order not found")
     
@@ -2949,8 +2990,8 @@ async def update_design_fee(
     
     notes = data.get('notes', '')
     
-    await db.orders.update_one(
-        {'order_id': order_id},
+    await update_order(
+        db, order_id,
         {
             '$set': {
                 'design_fee': design_fee,
@@ -3017,7 +3058,7 @@ async def update_branded_order_status(
     if new_status not in valid_statuses:
         raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
     
-    order = await db.orders.find_one({'order_id': order_id})
+    order = await find_order(db, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -3030,7 +3071,7 @@ async def update_branded_order_status(
         update_data['design_fee_approved'] = True
         update_data['design_approved_at'] = datetime.now(timezone.utc).isoformat()
     
-    await db.orders.update_one({'order_id': order_id}, {'$set': update_data})
+    await update_order(db, order_id, {'$set': update_data})
     
     return {'message': f'Order status updated to {new_status}'}
 
@@ -3093,6 +3134,7 @@ async def create_category(data: Dict[str, Any], admin_user: Dict = Depends(get_a
     }
     
     await db.product_categories.insert_one(category)
+    await catalog_cache.invalidate('product_categories')
     
     return {
         'message': 'Category created successfully',
@@ -3131,11 +3173,15 @@ async def update_category(category_id: str, data: Dict[str, Any], admin_user: Di
         cat_type = existing['type']
         if cat_type == 'boutique':
             await db.boutique_products.update_many({'category': old_name}, {'$set': {'category': name}})
+            await catalog_cache.invalidate('boutique_products')
         elif cat_type == 'fabric':
             await db.fabrics.update_many({'category': old_name}, {'$set': {'category': name}})
+            await catalog_cache.invalidate('fabrics')
         elif cat_type == 'souvenir':
             await db.souvenirs.update_many({'category': old_name}, {'$set': {'category': name}})
+            await catalog_cache.invalidate('souvenirs')
     
+    await catalog_cache.invalidate('product_categories')
     return {'message': 'Category updated successfully'}
 
 @api_router.delete("/admin/categories/{category_id}")
@@ -3165,22 +3211,31 @@ async def delete_category(category_id: str, request: Request):
         )
     
     await db.product_categories.delete_one({'id': category_id})
+    await catalog_cache.invalidate('product_categories')
     
     return {'message': 'Category deleted successfully'}
 
+async def load_public_categories(category_type: str):
+    """Active categories of one type for the public dropdowns (cached by get_public_categories)"""
+    return await db.product_categories.find(
+        {'type': category_type, 'is_active': True},
+        {'_id': 0, 'id': 1, 'name': 1}
+    ).sort('name', 1).to_list(50)
+
 # Get categories for public dropdown (without auth)
 @api_router.get("/categories/{category_type}")
-async def get_public_categories(category_type: str):
+async def get_public_categories(category_type: str, request: Request, response: Response):
     """Public: Get active categories for a type"""
     if category_type not in ['boutique', 'fabric', 'souvenir']:
         raise HTTPException(status_code=400, detail="Invalid category type")
     
-    categories = await db.product_categories.find(
-        {'type': category_type, 'is_active': True},
-        {'_id': 0, 'id': 1, 'name': 1}
-    ).sort('name', 1).to_list(50)
+    not_modified = await check_not_modified(request, response, 'product_categories', category_type)
+    if not_modified:
+        return not_modified
     
-    return categories
+    return await catalog_cache.get_or_load(
+        'product_categories', lambda: load_public_categories(category_type), variant=category_type
+    )
 
 # ==================== UNIFIED PRODUCTS ADMIN ====================
 @api_router.get("/admin/all-products")
@@ -3276,14 +3331,18 @@ async def delete_any_product(product_type: str, product_id: str, admin_user: Dic
                 if file_path.exists():
                     try:
                         os.remove(file_path)
+                        await file_catalog.remove_local(file_path)
                         logger.info(f"Deleted {product_type} image: {filename}")
                     except Exception as e:
                         logger.error(f"Failed to delete {product_type} image: {e}")
+            # Thumbnails/previews stored next to the image go with it
+            await image_derivatives.delete(image_url)
     
     result = await collection.delete_one({'id': product_id})
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await catalog_cache.invalidate(collection_map[product_type])
     
     logger.info(f"[ADMIN] Deleted {product_type} product {product_id} by {admin_user.get('email')}")
     
@@ -3324,8 +3383,8 @@ async def create_design_inquiry(
                 filename = f"{uuid.uuid4()}.{file_ext}"
                 file_path = UPLOAD_DIR / filename
                 
-                with open(file_path, 'wb') as f:
-                    shutil.copyfileobj(file.file, f)
+                await stream_upload_to_file(file, file_path, MAX_UPLOAD_SIZE)
+                await file_catalog.record_local(file_path)
                 
                 uploaded_files.append(f"/api/uploads/design_references/{filename}")
     
@@ -3481,8 +3540,8 @@ async def create_design_request(
                 filename = f"{uuid.uuid4()}.{file_ext}"
                 file_path = UPLOAD_DIR / filename
                 
-                with open(file_path, 'wb') as f:
-                    shutil.copyfileobj(file.file, f)
+                await stream_upload_to_file(file, file_path, MAX_UPLOAD_SIZE)
+                await file_catalog.record_local(file_path)
                 
                 uploaded_files.append(f"/api/uploads/design_references/{filename}")
     
@@ -4234,7 +4293,7 @@ async def add_email_subscriber(data: Dict[str, Any], admin_user: Dict = Depends(
         email=email,
         name=data.get('name', ''),
         phone=data.get('phone', ''),
-        source='manual_admin'
+        source=data.get('source') or 'manual_admin'
     )
     
     return {'message': 'Subscriber added', 'id': subscriber_id}
@@ -4261,19 +4320,19 @@ async def delete_subscriber(subscriber_id: str, admin_user: Dict = Depends(get_a
 
 @api_router.get("/admin/email/subscribers/export")
 async def export_subscribers(admin_user: Dict = Depends(get_admin_user)):
-    """Admin: Export subscribers as CSV"""
-    subscribers = await db.email_subscribers.find({'is_subscribed': True}, {'_id': 0}).to_list(10000)
-    
-    csv_content = "Email,Name,Phone,Source,Created At\n"
-    for sub in subscribers:
-        sources = ','.join(sub.get('sources', []))
-        csv_content += f"{sub.get('email')},{sub.get('name','')},{sub.get('phone','')},{sources},{sub.get('created_at','')}\n"
-    
-    return Response(
-        content=csv_content,
-        media_type='text/csv',
-        headers={'Content-Disposition': 'attachment; filename=subscribers.csv'}
+    """Admin: Export subscribers as CSV (streamed, no row cap)"""
+    cursor = db.email_subscribers.find(
+        {'is_subscribed': True},
+        {'_id': 0, 'email': 1, 'name': 1, 'phone': 1, 'sources': 1, 'created_at': 1}
     )
+    
+    return stream_csv_response(cursor, [
+        ('Email', lambda sub: sub.get('email')),
+        ('Name', lambda sub: sub.get('name', '')),
+        ('Phone', lambda sub: sub.get('phone', '')),
+        ('Source', lambda sub: ','.join(sub.get('sources', []))),
+        ('Created At', lambda sub: sub.get('created_at', '')),
+    ], filename='subscribers.csv')
 
 # ==================== EMAIL CAMPAIGNS API ====================
 
@@ -4300,7 +4359,7 @@ async def create_email_campaign(data: Dict[str, Any], admin_user: Dict = Depends
         'subject': data.get('subject'),
         'template_key': data.get('template_key'),
         'html_content': data.get('html_content', ''),
-        'audience': data.get('audience', 'all'),  # all, new, active
+        'audience': data.get('audience', 'all'),  # all, new, active, or source:<name> for one signup source
         'scheduled_time': data.get('scheduled_time'),
         'status': 'draft',
         'sent_count': 0,
@@ -4338,36 +4397,13 @@ async def update_email_campaign(campaign_id: str, data: Dict[str, Any], admin_us
     
     return {'message': 'Campaign updated'}
 
-@api_router.post("/admin/email/campaigns/{campaign_id}/send")
-async def send_email_campaign(campaign_id: str, admin_user: Dict = Depends(get_admin_user)):
-    """Admin: Send campaign immediately or schedule"""
-    campaign = await db.email_campaigns.find_one({'id': campaign_id}, {'_id': 0})
-    if not campaign:
-        raise HTTPException(status_code=404, detail="Campaign not found")
-    
-    if campaign.get('status') == 'sent':
-        raise HTTPException(status_code=400, detail="Campaign already sent")
-    
-    # Get subscribers based on audience
-    query = {'is_subscribed': True}
-    subscribers = await db.email_subscribers.find(query, {'_id': 0}).to_list(10000)
-    
-    if not subscribers:
-        raise HTTPException(status_code=400, detail="No subscribers to send to")
-    
-    # Update campaign status
-    await db.email_campaigns.update_one(
-        {'id': campaign_id},
-        {'$set': {
-            'status': 'sending',
-            'started_at': datetime.now(timezone.utc).isoformat()
-        }}
-    )
-    
-    # Send emails
-    sent_count = 0
-    failed_count = 0
-    
+# Subscribers fetched per query while a campaign is sent
+EMAIL_CAMPAIGN_BATCH_SIZE = int(os.environ.get('EMAIL_CAMPAIGN_BATCH_SIZE', 500))
+
+async def send_campaign_batch(campaign: Dict[str, Any], subscribers: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """Send a campaign to one batch of subscribers; returns (sent, failed)"""
+    sent = 0
+    failed = 0
     for subscriber in subscribers:
         # Render template with subscriber data
         variables = {
@@ -4391,13 +4427,60 @@ async def send_email_campaign(campaign_id: str, admin_user: Dict = Depends(get_a
             to_email=subscriber['email'],
             subject=subject,
             html_content=html_content,
-            campaign_id=campaign_id
+            campaign_id=campaign['id']
         )
         
         if success:
-            sent_count += 1
+            sent += 1
         else:
-            failed_count += 1
+            failed += 1
+    return sent, failed
+
+@api_router.post("/admin/email/campaigns/{campaign_id}/send")
+async def send_email_campaign(campaign_id: str, admin_user: Dict = Depends(get_admin_user)):
+    """Admin: Send campaign immediately or schedule"""
+    campaign = await db.email_campaigns.find_one({'id': campaign_id}, {'_id': 0})
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    if campaign.get('status') == 'sent':
+        raise HTTPException(status_code=400, detail="Campaign already sent")
+    
+    # Get subscribers based on audience
+    query = {'is_subscribed': True}
+    audience = campaign.get('audience') or 'all'
+    if audience.startswith('source:'):
+        query['sources'] = audience[len('source:'):]
+    if not await db.email_subscribers.find_one(query, {'_id': 1}):
+        raise HTTPException(status_code=400, detail="No subscribers to send to")
+    
+    # Update campaign status
+    await db.email_campaigns.update_one(
+        {'id': campaign_id},
+        {'$set': {
+            'status': 'sending',
+            'started_at': datetime.now(timezone.utc).isoformat()
+        }}
+    )
+    
+    # Send emails
+    sent_count = 0
+    failed_count = 0
+    
+    # Page through subscribers by _id rather than holding one cursor open while emails go out -
+    # a send can outlast the server's idle-cursor timeout; no cap on audience size
+    last_id = None
+    while True:
+        page_query = {**query, '_id': {'$gt': last_id}} if last_id is not None else query
+        subscribers = await db.email_subscribers.find(
+            page_query, {'_id': 1, 'email': 1, 'name': 1}
+        ).sort('_id', 1).limit(EMAIL_CAMPAIGN_BATCH_SIZE).to_list(EMAIL_CAMPAIGN_BATCH_SIZE)
+        if not subscribers:
+            break
+        last_id = subscribers[-1]['_id']
+        sent, failed = await send_campaign_batch(campaign, subscribers)
+        sent_count += sent
+        failed_count += failed
     
     # Update campaign with results
     await db.email_campaigns.update_one(
@@ -4430,18 +4513,25 @@ async def get_email_logs(
     limit: int = 50,
     status: Optional[str] = None,
     campaign_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     admin_user: Dict = Depends(get_admin_user)
 ):
-    """Admin: Get email logs"""
+    """Admin: Get email logs. Pass `cursor` (empty for the first page) for keyset paging."""
     query = {}
     if status:
         query['status'] = status
     if campaign_id:
         query['campaign_id'] = campaign_id
     
+    projection = list_projection('email_logs', fields)
+    if cursor is not None:
+        logs, next_cursor = await fetch_keyset_page(db.email_logs, query, projection, limit, cursor)
+        return {'logs': logs, 'next_cursor': next_cursor, 'limit': limit}
+    
     skip = (page - 1) * limit
     
-    logs = await db.email_logs.find(query, {'_id': 0}).sort('created_at', -1).skip(skip).limit(limit).to_list(limit)
+    logs = await db.email_logs.find(query, projection).sort(CREATED_AT_SORT).skip(skip).limit(limit).to_list(limit)
     total = await db.email_logs.count_documents(query)
     
     return {
@@ -4455,18 +4545,18 @@ async def get_email_logs(
 async def get_email_analytics(admin_user: Dict = Depends(get_admin_user)):
     """Admin: Get email analytics"""
     # Count by status
-    total_sent = await db.email_logs.count_documents({'status': 'sent'})
-    total_mocked = await db.email_logs.count_documents({'status': 'mocked'})
-    total_failed = await db.email_logs.count_documents({'status': 'failed'})
-    total_opened = await db.email_logs.count_documents({'opened': True})
+    total_sent = await analytics_db.email_logs.count_documents({'status': 'sent'})
+    total_mocked = await analytics_db.email_logs.count_documents({'status': 'mocked'})
+    total_failed = await analytics_db.email_logs.count_documents({'status': 'failed'})
+    total_opened = await analytics_db.email_logs.count_documents({'opened': True})
     
     # Subscriber stats
-    total_subscribers = await db.email_subscribers.count_documents({'is_subscribed': True})
-    total_unsubscribed = await db.email_subscribers.count_documents({'is_subscribed': False})
+    total_subscribers = await analytics_db.email_subscribers.count_documents({'is_subscribed': True})
+    total_unsubscribed = await analytics_db.email_subscribers.count_documents({'is_subscribed': False})
     
     # Campaign stats
-    total_campaigns = await db.email_campaigns.count_documents({})
-    sent_campaigns = await db.email_campaigns.count_documents({'status': 'sent'})
+    total_campaigns = await analytics_db.email_campaigns.count_documents({})
+    sent_campaigns = await analytics_db.email_campaigns.count_documents({'status': 'sent'})
     
     return {
         'emails': {
@@ -4866,7 +4956,7 @@ async def verify_flutterwave_payment(verify_request: dict):
         
         if payment_record and payment_record.get('is_mock'):
             await db.payments.update_one({'tx_ref': tx_ref}, {'$set': {'status': 'successful', 'verified_at': datetime.now(timezone.utc).isoformat()}})
-            await db.orders.update_one({'id': order_id}, {'$set': {'payment_status': 'paid', 'payment_reference': tx_ref, 'payment_provider': 'flutterwave', 'status': OrderStatus.PAYMENT_VERIFIED}})
+            await update_order(db, order_id, {'$set': {'payment_status': 'paid', 'payment_reference': tx_ref, 'payment_provider': 'flutterwave', 'status': OrderStatus.PAYMENT_VERIFIED}})
             return {'status': True, 'message': 'Payment verified (MOCK)', 'data': {'status': 'successful'}}
         
         if not FLUTTERWAVE_SECRET_KEY:
@@ -4895,13 +4985,13 @@ async def verify_flutterwave_payment(verify_request: dict):
         )
         
         if transaction_status == 'successful':
-            await db.orders.update_one(
-                {'id': order_id},
+            await update_order(
+                db, order_id,
                 {'$set': {'payment_status': 'paid', 'payment_reference': tx_ref, 'payment_provider': 'flutterwave', 'status': OrderStatus.PAYMENT_VERIFIED}}
             )
             
             # Auto-generate receipt for the order
-            order = await db.orders.find_one({'id': order_id}, {'_id': 0})
+            order = await find_order(db, order_id)
             if order and not order.get('receipt_id'):
                 receipt_id = await generate_invoice_id()
                 order_details = {
@@ -4932,7 +5022,7 @@ async def verify_flutterwave_payment(verify_request: dict):
                     'issued_by': 'system'
                 }
                 await db.receipts.insert_one(receipt_data)
-                await db.orders.update_one({'id': order_id}, {'$set': {'receipt_id': receipt_id}})
+                await update_order(db, order_id, {'$set': {'receipt_id': receipt_id}})
                 logger.info(f"Receipt {receipt_id} created for order {order_id}")
             
             # Create notification
@@ -5032,8 +5122,8 @@ async def flutterwave_webhook(request: Request):
                     order_id = payment.get('order_id') if payment else None
                 
                 if order_id:
-                    await db.orders.update_one(
-                        {'id': order_id},
+                    await update_order(
+                        db, order_id,
                         {'$set': {'payment_status': 'paid', 'payment_reference': tx_ref, 'payment_provider': 'flutterwave', 'status': OrderStatus.PAYMENT_VERIFIED}}
                     )
                     logger.info(f"Order {order_id} payment verified via Flutterwave webhook")
@@ -5098,7 +5188,7 @@ async def get_revenue_analytics(
     start_date = end_date - timedelta(days=days)
     
     # Get all orders in the period
-    orders = await db.orders.find({
+    orders = await analytics_db.orders.find({
         'created_at': {'$gte': start_date.isoformat()}
     }, {'_id': 0}).to_list(10000)
     
@@ -5193,7 +5283,7 @@ async def get_product_analytics(
     start_date = end_date - timedelta(days=days)
     
     # Get orders with items
-    orders = await db.orders.find({
+    orders = await analytics_db.orders.find({
         'created_at': {'$gte': start_date.isoformat()}
     }, {'_id': 0, 'items': 1, 'type': 1}).to_list(5000)
     
@@ -5236,8 +5326,8 @@ async def get_advanced_analytics(
     start_date = now - timedelta(days=days)
     
     # Customer Analytics
-    total_customers = await db.clients.count_documents({})
-    new_customers = await db.clients.count_documents({
+    total_customers = await analytics_db.clients.count_documents({})
+    new_customers = await analytics_db.clients.count_documents({
         'created_at': {'$gte': start_date.isoformat()}
     })
     
@@ -5248,18 +5338,18 @@ async def get_advanced_analytics(
         {'$match': {'order_count': {'$gt': 1}}},
         {'$count': 'repeat_customers'}
     ]
-    repeat_result = await db.orders.aggregate(repeat_customer_pipeline).to_list(1)
+    repeat_result = await analytics_db.orders.aggregate(repeat_customer_pipeline, allowDiskUse=True).to_list(1)
     repeat_customers = repeat_result[0]['repeat_customers'] if repeat_result else 0
     
     # Order Conversion Metrics
-    total_orders = await db.orders.count_documents({
+    total_orders = await analytics_db.orders.count_documents({
         'created_at': {'$gte': start_date.isoformat()}
     })
-    completed_orders = await db.orders.count_documents({
+    completed_orders = await analytics_db.orders.count_documents({
         'status': {'$in': ['completed', 'delivered']},
         'created_at': {'$gte': start_date.isoformat()}
     })
-    cancelled_orders = await db.orders.count_documents({
+    cancelled_orders = await analytics_db.orders.count_documents({
         'status': 'cancelled',
         'created_at': {'$gte': start_date.isoformat()}
     })
@@ -5283,7 +5373,7 @@ async def get_advanced_analytics(
         }},
         {'$sort': {'_id': 1}}
     ]
-    hourly_data = await db.orders.aggregate(hourly_pipeline).to_list(24)
+    hourly_data = await analytics_db.orders.aggregate(hourly_pipeline, allowDiskUse=True).to_list(24)
     hourly_breakdown = [{'hour': h['_id'], 'orders': h['orders'], 'revenue': h['revenue']} for h in hourly_data]
     
     # Revenue by Day of Week
@@ -5302,7 +5392,7 @@ async def get_advanced_analytics(
         }},
         {'$sort': {'_id': 1}}
     ]
-    weekday_data = await db.orders.aggregate(weekday_pipeline).to_list(7)
+    weekday_data = await analytics_db.orders.aggregate(weekday_pipeline, allowDiskUse=True).to_list(7)
     days_map = {1: 'Sun', 2: 'Mon', 3: 'Tue', 4: 'Wed', 5: 'Thu', 6: 'Fri', 7: 'Sat'}
     weekday_breakdown = [{'day': days_map.get(d['_id'], 'Unknown'), 'orders': d['orders'], 'revenue': d['revenue']} for d in weekday_data]
     
@@ -5318,21 +5408,21 @@ async def get_advanced_analytics(
         {'$sort': {'orders': -1}},
         {'$limit': 10}
     ]
-    location_data = await db.orders.aggregate(location_pipeline).to_list(10)
+    location_data = await analytics_db.orders.aggregate(location_pipeline, allowDiskUse=True).to_list(10)
     top_locations = [{'location': l['_id'], 'orders': l['orders'], 'revenue': l['revenue']} for l in location_data]
     
     # Quote Conversion (quotes to orders)
-    total_quotes = await db.manual_quotes.count_documents({
+    total_quotes = await analytics_db.manual_quotes.count_documents({
         'created_at': {'$gte': start_date.isoformat()}
     })
-    paid_quotes = await db.manual_quotes.count_documents({
+    paid_quotes = await analytics_db.manual_quotes.count_documents({
         'status': 'paid',
         'created_at': {'$gte': start_date.isoformat()}
     })
     quote_conversion = (paid_quotes / total_quotes * 100) if total_quotes > 0 else 0
     
     # Average Time to Complete Order
-    completed_orders_data = await db.orders.find({
+    completed_orders_data = await analytics_db.orders.find({
         'status': {'$in': ['completed', 'delivered']},
         'created_at': {'$gte': start_date.isoformat()}
     }, {'_id': 0, 'created_at': 1, 'completed_at': 1, 'delivered_at': 1}).to_list(500)
@@ -5378,18 +5468,30 @@ async def get_all_orders(
     status: Optional[OrderStatus] = None,
     admin_user: Dict = Depends(get_admin_user),
     limit: int = 100,
-    skip: int = 0
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
+    """Admin: List orders, newest first.
+    Returns the table summary of each order unless `fields` names the fields wanted
+    (`fields=all` for whole documents; GET /admin/orders/lookup/{code} has the detail).
+    Pass `cursor` (empty for the first page) to page by keyset instead of skip - the response
+    is then {'orders': [...], 'next_cursor': ...}."""
     query = {}
     if order_type:
         query['type'] = order_type
     if status:
         query['status'] = status
+    projection = list_projection('orders', fields)
+    
+    if cursor is not None:
+        orders, next_cursor = await fetch_keyset_page(db.orders, query, projection, limit, cursor)
+        return {'orders': orders, 'next_cursor': next_cursor}
     
     # Limit max results to prevent abuse
     limit = min(limit, 500)
     
-    orders = await db.orders.find(query, {'_id': 0}).sort('created_at', -1).limit(limit).skip(skip).to_list(limit)
+    orders = await db.orders.find(query, projection).sort(CREATED_AT_SORT).limit(limit).skip(skip).to_list(limit)
     return orders
 
 @api_router.get("/admin/orders/search")
@@ -5397,17 +5499,17 @@ async def search_orders(
     order_id: Optional[str] = None,
     email: Optional[str] = None,
     phone: Optional[str] = None,
+    fields: Optional[str] = None,
     request: Request = None
 ):
-    """Admin: Search orders by Order ID, email, or phone"""
+    """Admin: Search orders by Order ID, email, or phone (summary fields unless `fields` is given)"""
     admin_user = await get_admin_user(request)
     
     query = {}
     if order_id:
         # Search by TM-MMYY-XXXXXX format or UUID
         query['$or'] = [
-            {'id': order_id},
-            {'order_id': order_id},
+            order_key_filter(order_id),
             {'order_id': {'$regex': order_id, '$options': 'i'}}
         ]
     elif email:
@@ -5418,7 +5520,7 @@ async def search_orders(
             {'delivery_phone': {'$regex': phone, '$options': 'i'}}
         ]
     
-    orders = await db.orders.find(query, {'_id': 0}).sort('created_at', -1).limit(50).to_list(50)
+    orders = await db.orders.find(query, list_projection('orders', fields)).sort('created_at', -1).limit(50).to_list(50)
     return orders
 
 @api_router.get("/admin/production/dashboard")
@@ -5467,7 +5569,7 @@ async def verify_payment(
     admin_user = await get_admin_user(request)
     
     # Get order details first
-    order = await db.orders.find_one({'$or': [{'id': order_id}, {'order_id': order_id}]}, {'_id': 0})
+    order = await find_order(db, order_id)
     
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -5481,10 +5583,7 @@ async def verify_payment(
         'updated_at': datetime.now(timezone.utc).isoformat()
     }
     
-    result = await db.orders.update_one(
-        {'$or': [{'id': order_id}, {'order_id': order_id}]},
-        {'$set': update_data}
-    )
+    result = await update_order(db, order_id, {'$set': update_data})
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -5557,10 +5656,7 @@ async def assign_tailor(
         'updated_at': datetime.now(timezone.utc).isoformat()
     }
     
-    result = await db.orders.update_one(
-        {'$or': [{'id': order_id}, {'order_id': order_id}]},
-        {'$set': update_data}
-    )
+    result = await update_order(db, order_id, {'$set': update_data})
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -5593,14 +5689,14 @@ async def update_order_status(
     if notes:
         update_data['admin_notes'] = notes
     
-    result = await db.orders.update_one({'id': order_id}, {'$set': update_data})
+    result = await update_order(db, order_id, {'$set': update_data})
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Order not found")
     
     # Auto-generate receipt if payment received or completed
     if status in ['payment_verified', 'in_production', 'ready_for_delivery', 'completed', 'delivered']:
-        order = await db.orders.find_one({'id': order_id}, {'_id': 0})
+        order = await find_order(db, order_id)
         if order and not order.get('receipt_id'):
             # Generate receipt with full order details
             receipt_id = await generate_invoice_id()
@@ -5649,13 +5745,10 @@ async def update_order_status(
             await db.receipts.insert_one(receipt_data)
             
             # Update order with receipt_id
-            await db.orders.update_one(
-                {'id': order_id},
-                {'$set': {'receipt_id': receipt_id}}
-            )
+            await update_order(db, order_id, {'$set': {'receipt_id': receipt_id}})
     
     # Create notification for status change
-    order = await db.orders.find_one({'id': order_id}, {'_id': 0})
+    order = await find_order(db, order_id)
     if order:
         await db.notifications.insert_one({
             'id': str(uuid.uuid4()),
@@ -5693,6 +5786,7 @@ async def create_product(product: AdminProductCreate, admin_user: Dict = Depends
     }
     
     await db.boutique_products.insert_one(product_data)
+    await catalog_cache.invalidate('boutique_products')
     
     del product_data['_id']
     return product_data
@@ -5720,9 +5814,8 @@ async def get_cms_content_by_key(key: str):
         raise HTTPException(status_code=404, detail="Content not found")
     return content
 
-@api_router.get("/cms/settings")
-async def get_public_cms_settings():
-    """Public endpoint for CMS settings (logo, company info - no sensitive data)"""
+async def load_public_cms_settings():
+    """Public CMS settings (logo, company info - no sensitive data)"""
     settings = await db.cms_settings.find_one({}, {'_id': 0})
     
     if not settings:
@@ -5745,6 +5838,15 @@ async def get_public_cms_settings():
         'address': settings.get('address', 'Lagos, Nigeria')
     }
 
+@api_router.get("/cms/settings")
+async def get_public_cms_settings(request: Request, response: Response):
+    """Public endpoint for CMS settings (logo, company info - no sensitive data)"""
+    not_modified = await check_not_modified(request, response, 'cms_settings', 'public')
+    if not_modified:
+        return not_modified
+    
+    return await load_public_cms_settings()
+
 @api_router.post("/admin/cms/content")
 async def update_cms_content(content: CMSContent, request: Request):
     """Super Admin Only: Update CMS content"""
@@ -5815,9 +5917,8 @@ async def get_cms_settings(admin_user: Dict = Depends(get_admin_user)):
         }
     return settings
 
-@api_router.get("/pricing")
-async def get_public_pricing():
-    """Public endpoint for pricing information"""
+async def load_public_pricing():
+    """Public pricing information from CMS settings"""
     settings = await db.cms_settings.find_one({}, {'_id': 0})
     
     if not settings:
@@ -5845,6 +5946,15 @@ async def get_public_pricing():
         })
     }
 
+@api_router.get("/pricing")
+async def get_public_pricing(request: Request, response: Response):
+    """Public endpoint for pricing information"""
+    not_modified = await check_not_modified(request, response, 'cms_settings', 'pricing')
+    if not_modified:
+        return not_modified
+    
+    return await load_public_pricing()
+
 @api_router.post("/admin/cms/settings")
 async def update_cms_settings(settings: Dict[str, Any], request: Request):
     """Admin with CMS role OR Super Admin: Update CMS settings including pricing"""
@@ -5872,6 +5982,8 @@ async def update_cms_settings(settings: Dict[str, Any], request: Request):
     settings['updated_by'] = user['email']
     
     await db.cms_settings.update_one({}, {'$set': settings}, upsert=True)
+    await price_books.invalidate()
+    await resource_versions.bump('cms_settings')
     return {'message': 'Settings updated successfully'}
 
 
@@ -5893,10 +6005,7 @@ async def lookup_order_by_code(code: str, admin_user: Dict = Depends(get_admin_u
             }
     
     # Check if it's an order ID (TM-MMYY-XXXXXX)
-    order = await db.orders.find_one(
-        {'$or': [{'order_id': code}, {'id': code}]},
-        {'_id': 0}
-    )
+    order = await find_order(db, code)
     if order:
         return {
             'type': 'order',
@@ -5938,7 +6047,7 @@ async def create_walk_in_order(
         'created_at': datetime.now(timezone.utc).isoformat()
     }
     
-    await db.orders.insert_one(walk_in_order)
+    await insert_order(db, walk_in_order)
     
     # Create notification
     await db.notifications.insert_one({
@@ -5950,8 +6059,7 @@ async def create_walk_in_order(
         'created_at': datetime.now(timezone.utc).isoformat()
     })
     
-    del walk_in_order['_id']
-    return walk_in_order
+    return strip_lookup_keys(walk_in_order)
 
 
 # ==================== MANUAL QUOTES/INVOICES ====================
@@ -6500,7 +6608,7 @@ async def mark_quote_as_paid(quote_id: str, admin_user: Dict = Depends(get_admin
         'created_from_quote': True
     }
     
-    await db.orders.insert_one(order)
+    await insert_order(db, order)
     
     # Update quote status to paid with receipt URL
     await db.manual_quotes.update_one(
@@ -6540,12 +6648,11 @@ async def mark_quote_as_paid(quote_id: str, admin_user: Dict = Depends(get_admin
         order_id=order_id
     )
     
-    del order['_id']
     return {
         'message': 'Quote marked as paid, receipt generated and emailed',
         'order_id': order_id,
         'receipt_url': receipt_url,
-        'order': order
+        'order': strip_lookup_keys(order)
     }
 
 
@@ -6723,8 +6830,8 @@ async def create_custom_order_request(
         filename = f"{request_id}_reference.{file_ext}"
         file_path = UPLOAD_DIR / filename
         
-        with open(file_path, 'wb') as f:
-            shutil.copyfileobj(reference_image.file, f)
+        await stream_upload_to_file(reference_image, file_path, MAX_UPLOAD_SIZE)
+        await file_catalog.record_local(file_path)
         
         reference_url = f"/api/uploads/{filename}"
     
@@ -6860,13 +6967,15 @@ async def create_enquiry(
     # Save design images
     design_image_urls = []
     for image in design_images[:5]:  # Max 5 images
-        file_data = await save_upload_file(image, ALLOWED_IMAGE_EXTENSIONS)
+        file_data = await save_upload_file(image, ALLOWED_IMAGE_EXTENSIONS, module="enquiry", deduplicate=True)
         design_image_urls.append(file_data['file_path'])
     
     # Save measurement file
     measurement_file_url = None
     if measurement_file:
-        file_data = await save_upload_file(measurement_file, ALLOWED_IMAGE_EXTENSIONS | ALLOWED_DOCUMENT_EXTENSIONS)
+        file_data = await save_upload_file(
+            measurement_file, ALLOWED_IMAGE_EXTENSIONS | ALLOWED_DOCUMENT_EXTENSIONS, module="enquiry", deduplicate=True
+        )
         measurement_file_url = file_data['file_path']
     
     # Calculate total quantity from sizes if available
@@ -7071,9 +7180,11 @@ async def get_all_enquiries(
     request: Request,
     search: Optional[str] = None,
     enquiry_type: Optional[str] = None,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    fields: Optional[str] = None
 ):
-    """Admin: Get all custom order enquiries with search and filtering"""
+    """Admin: Get all custom order enquiries with search and filtering.
+    Summary fields only unless `fields` is given - GET /admin/enquiries/{id} has the full form."""
     admin_user = await get_admin_user(request)
     
     # Build query
@@ -7104,21 +7215,23 @@ async def get_all_enquiries(
             {'customer_email': search_regex}
         ]
     
-    enquiries = await db.enquiries.find(query, {'_id': 0}).sort('created_at', -1).to_list(1000)
+    enquiries = db.enquiries.find(query, list_projection('enquiries', fields)).sort('created_at', -1)
+    if wants_ndjson(request):
+        return stream_ndjson_response(enquiries)
     
     # Get counts for tabs
     all_count = await db.enquiries.count_documents({})
     custom_count = await db.enquiries.count_documents({'enquiry_type': 'custom_order'})
     general_count = all_count - custom_count
     
-    return {
-        'enquiries': enquiries,
+    # Streamed so the full list is returned without holding it in memory
+    return stream_json_response(enquiries, key='enquiries', head={
         'counts': {
             'all': all_count,
             'custom_order': custom_count,
             'general': general_count
         }
-    }
+    })
 
 @api_router.get("/admin/enquiries/{enquiry_id}")
 async def get_enquiry_details(enquiry_id: str, request: Request):
@@ -7436,7 +7549,7 @@ async def upload_admin_image(
         folder = folder_map.get(module, 'products')
         
         # Upload to Supabase (with local fallback)
-        result = await upload_file_to_supabase(image, folder=folder)
+        result = await upload_file_to_supabase(image, folder=folder, derive=image_derivatives.create)
         
         logger.info(f"[UPLOAD][{module}] Upload complete via {result['storage_type']}. URL: {result['public_url']}")
         
@@ -7446,7 +7559,8 @@ async def upload_admin_image(
             'message': 'Image uploaded successfully',
             'file_name': result['file_name'],
             'file_size': result['file_size'],
-            'storage_type': result['storage_type']
+            'storage_type': result['storage_type'],
+            'derivatives': result['derivatives']
         }
     except HTTPException:
         raise
@@ -7474,6 +7588,7 @@ async def get_fabric_qualities_public(clothing_item: Optional[str] = None):
         try:
             # Insert defaults
             await db.fabric_qualities.insert_many(default_qualities)
+            await price_books.invalidate()
         except Exception as e:
             logger.error(f"Failed to insert default fabric qualities: {e}")
         qualities = default_qualities
@@ -7504,6 +7619,7 @@ async def create_fabric_quality(quality_data: dict, request: Request):
     }
     
     await db.fabric_qualities.insert_one(quality)
+    await price_books.invalidate()
     
     return {'message': 'Fabric quality created successfully', 'id': quality_id}
 
@@ -7526,6 +7642,7 @@ async def update_fabric_quality(quality_id: str, quality_data: dict, request: Re
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Fabric quality not found")
+    await price_books.invalidate()
     
     return {'message': 'Fabric quality updated successfully'}
 
@@ -7538,6 +7655,7 @@ async def delete_fabric_quality(quality_id: str, request: Request):
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Fabric quality not found")
+    await price_books.invalidate()
     
     return {'message': 'Fabric quality deleted successfully'}
 
@@ -7560,6 +7678,7 @@ async def get_production_costs(request: Request):
             'created_at': datetime.now(timezone.utc).isoformat()
         }
         await db.production_costs.insert_one(costs)
+        await price_books.invalidate()
     
     return costs
 
@@ -7578,6 +7697,7 @@ async def update_production_costs(costs_data: dict, request: Request):
     }
     
     await db.production_costs.update_one({}, {'$set': update_data}, upsert=True)
+    await price_books.invalidate()
     
     return {'message': 'Production costs updated successfully'}
 
@@ -7794,6 +7914,9 @@ async def update_admin_role(admin_id: str, role_data: dict, request: Request):
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Admin not found or no changes made")
     
+    principal_cache.invalidate_user(admin_id, target_admin.get('id'), target_admin.get('user_id'))
+    await token_revocations.revoke(db, admin_id, target_admin.get('id'), target_admin.get('user_id'))
+    
     # Log action
     await db.admin_actions.insert_one({
         'action': 'promote_to_super_admin' if promote_to_super_admin else 'update_admin_role',
@@ -7837,6 +7960,8 @@ async def demote_super_admin(admin_id: str, request: Request):
         {'$or': [{'id': admin_id}, {'user_id': admin_id}]},
         {'$set': {'is_super_admin': False}}
     )
+    principal_cache.invalidate_user(admin_id, target_admin.get('id'), target_admin.get('user_id'))
+    await token_revocations.revoke(db, admin_id, target_admin.get('id'), target_admin.get('user_id'))
     
     # Log action
     await db.admin_actions.insert_one({
@@ -7874,6 +7999,9 @@ async def delete_admin(user_id: str, request: Request):
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Admin not found")
     
+    principal_cache.invalidate_user(user_id, target_user.get('id'))
+    await token_revocations.revoke(db, user_id, target_user.get('id'))
+    
     # Log action
     await db.admin_actions.insert_one({
         'action': 'remove_admin',
@@ -7911,6 +8039,8 @@ async def change_admin_password(admin_id: str, new_password: str = Form(...), re
         {'id': admin_id},
         {'$set': {'password': hashed}}
     )
+    principal_cache.invalidate_user(admin_id, admin.get('user_id'))
+    await token_revocations.revoke(db, admin_id, admin.get('user_id'))
     
     return {'message': 'Password changed successfully'}
 
@@ -8113,9 +8243,8 @@ COUNTRY_CURRENCY = {
     'NL': 'EUR', 'BE': 'EUR', 'AT': 'EUR', 'IE': 'EUR', 'PT': 'EUR',
 }
 
-@api_router.get("/currency/detect")
-async def detect_currency(request: Request):
-    """Detect user's currency - Nigeria sees Naira, everyone else sees USD"""
+def detect_country_code(request: Request) -> str:
+    """Visitor country from the Cloudflare header, falling back to Accept-Language ('' if unknown)"""
     # Try to get country from Cloudflare header
     country_code = request.headers.get('CF-IPCountry', '').upper()
     
@@ -8128,6 +8257,9 @@ async def detect_currency(request: Request):
             if len(parts) > 1:
                 country_code = parts[1].upper()
     
+    return country_code
+
+def currency_for_country(country_code: str) -> Dict[str, Any]:
     # Simple logic: Nigeria = NGN, everyone else = USD
     is_nigeria = country_code == 'NG'
     
@@ -8148,6 +8280,11 @@ async def detect_currency(request: Request):
             'exchange_rate': 0.00063  # 1 NGN = 0.00063 USD (approx)
         }
 
+@api_router.get("/currency/detect")
+async def detect_currency(request: Request):
+    """Detect user's currency - Nigeria sees Naira, everyone else sees USD"""
+    return currency_for_country(detect_country_code(request))
+
 @api_router.get("/currency/rates")
 async def get_currency_rates():
     """Get all supported currency rates - fetches live rates daily"""
@@ -8231,13 +8368,7 @@ async def track_order_public(code: str):
     
     # Try to find order by various ID formats
     # Supports: TM-, FAB-, POD-, BULK-, SOU-, BOU- prefixes and order_id field
-    order = await db.orders.find_one(
-        {'$or': [
-            {'order_id': code},
-            {'id': code}
-        ]}, 
-        {'_id': 0}
-    )
+    order = await find_order(db, code)
     
     if order:
         return {
@@ -8506,8 +8637,8 @@ async def delete_client(client_id: str, request: Request):
     return {'message': 'Client deleted successfully'}
 
 @api_router.get("/admin/clients/{client_id}/orders")
-async def get_client_orders(client_id: str, request: Request):
-    """Admin: Get all orders for a specific client"""
+async def get_client_orders(client_id: str, request: Request, fields: Optional[str] = None):
+    """Admin: Get all orders for a specific client (summary fields unless `fields` is given)"""
     session_id = request.cookies.get('session_id')
     if not session_id:
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -8536,17 +8667,20 @@ async def get_client_orders(client_id: str, request: Request):
         return {'client': client, 'orders': [], 'total_orders': 0, 'total_spent': 0}
     
     # Get all orders for this client
-    orders = await db.orders.find(query, {'_id': 0}).sort('created_at', -1).to_list(1000)
+    orders = db.orders.find(query, list_projection('orders', fields, required=['total_price'])).sort('created_at', -1)
+    if wants_ndjson(request):
+        return stream_ndjson_response(orders)
     
-    # Calculate stats
-    total_spent = sum(order.get('total_price', 0) for order in orders)
+    # Stats are accumulated while the orders stream out
+    stats = {'total_orders': 0, 'total_spent': 0}
     
-    return {
-        'client': client,
-        'orders': orders,
-        'total_orders': len(orders),
-        'total_spent': total_spent
-    }
+    def count_order(order):
+        stats['total_orders'] += 1
+        stats['total_spent'] += order.get('total_price', 0) or 0
+        return order
+    
+    return stream_json_response(orders, key='orders', head={'client': client},
+                                tail=lambda: stats, transform=count_order)
 
 
 # ==================== FINANCIAL MANAGEMENT ====================
@@ -8557,6 +8691,9 @@ class Expense(BaseModel):
     date: str
     category: Optional[str] = None  # For fixed overheads: rent/salaries/utilities/etc
 
+# Keyset order for expense listings (see core/pagination.py)
+EXPENSE_DATE_SORT = [('date', -1), ('id', -1)]
+
 @api_router.get("/admin/financials/summary")
 async def get_financial_summary(request: Request):
     """Admin with role OR Super Admin: Get financial summary"""
@@ -8588,7 +8725,7 @@ async def get_financial_summary(request: Request):
             'count': {'$sum': 1}
         }}
     ]
-    income_result = await db.orders.aggregate(income_pipeline).to_list(1)
+    income_result = await analytics_db.orders.aggregate(income_pipeline, allowDiskUse=True).to_list(1)
     total_income = income_result[0]['total'] if income_result else 0
     completed_orders_count = income_result[0]['count'] if income_result else 0
     
@@ -8601,7 +8738,7 @@ async def get_financial_summary(request: Request):
             'count': {'$sum': 1}
         }}
     ]
-    procurement_result = await db.procurement.aggregate(procurement_pipeline).to_list(1)
+    procurement_result = await analytics_db.procurement.aggregate(procurement_pipeline, allowDiskUse=True).to_list(1)
     procurement = procurement_result[0]['total'] if procurement_result else 0
     procurement_count = procurement_result[0]['count'] if procurement_result else 0
     
@@ -8613,7 +8750,7 @@ async def get_financial_summary(request: Request):
             'count': {'$sum': 1}
         }}
     ]
-    expenses_result = await db.expenses.aggregate(expenses_pipeline).to_list(20)
+    expenses_result = await analytics_db.expenses.aggregate(expenses_pipeline, allowDiskUse=True).to_list(20)
     
     running_costs = next((e['total'] for e in expenses_result if e['_id'] == 'running_cost'), 0)
     other_expenses = next((e['total'] for e in expenses_result if e['_id'] == 'other'), 0)
@@ -8632,7 +8769,7 @@ async def get_financial_summary(request: Request):
             'count': {'$sum': 1}
         }}
     ]
-    refunds_result = await db.refunds.aggregate(refunds_pipeline).to_list(1)
+    refunds_result = await analytics_db.refunds.aggregate(refunds_pipeline, allowDiskUse=True).to_list(1)
     total_refunds = refunds_result[0]['total'] if refunds_result else 0
     refunds_count = refunds_result[0]['count'] if refunds_result else 0
     
@@ -8654,8 +8791,10 @@ async def get_financial_summary(request: Request):
     }
 
 @api_router.get("/admin/financials/transactions")
-async def get_transactions(request: Request, limit: int = 100, skip: int = 0):
-    """Admin with role OR Super Admin: Get transactions with pagination"""
+async def get_transactions(request: Request, limit: int = 100, skip: int = 0, cursor: Optional[str] = None):
+    """Admin with role OR Super Admin: Get transactions with pagination.
+    Pass `cursor` (empty for the first page) for keyset paging - the response is then
+    {'transactions': [...], 'next_cursor': ...}."""
     session_id = request.cookies.get('session_id')
     if not session_id:
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -8678,42 +8817,52 @@ async def get_transactions(request: Request, limit: int = 100, skip: int = 0):
     # Limit max results to prevent abuse
     limit = min(limit, 500)
     
-    transactions = []
+    # Completed orders are income, expenses are outgoings - both newest first
+    order_source = (
+        db.orders, {'status': 'completed'},
+        {'_id': 0, 'id': 1, 'order_id': 1, 'type': 1, 'total_price': 1, 'updated_at': 1, 'created_at': 1},
+        CREATED_AT_SORT
+    )
+    expense_source = (
+        db.expenses, {},
+        {'_id': 0, 'id': 1, 'type': 1, 'description': 1, 'amount': 1, 'date': 1},
+        EXPENSE_DATE_SORT
+    )
     
-    # Add completed orders as income (with limit)
-    completed_orders = await db.orders.find(
-        {'status': 'completed'}, 
-        {'_id': 0, 'order_id': 1, 'type': 1, 'total_price': 1, 'updated_at': 1, 'created_at': 1}
-    ).sort('created_at', -1).limit(limit).skip(skip).to_list(limit)
-    
-    for order in completed_orders:
-        transactions.append({
-            'type': 'income',
-            'description': f"Order {order['order_id']} - {order['type'].upper()}",
-            'amount': order.get('total_price', 0),
-            'date': order.get('updated_at', order.get('created_at'))
-        })
+    if cursor is not None:
+        rows, next_cursor = await fetch_merged_keyset_page([order_source, expense_source], limit, cursor)
+    else:
+        # Offset over the merged list: the newest skip + limit rows of each collection are
+        # enough to cut the window (skipping each collection separately drops rows)
+        rows = []
+        for source_index, (collection, query, projection, sort) in enumerate([order_source, expense_source]):
+            docs = await collection.find(query, projection).sort(sort).limit(skip + limit).to_list(skip + limit)
+            rows.extend((source_index, doc) for doc in docs)
     
-    # Add expenses (with limit)
-    expenses = await db.expenses.find(
-        {}, 
-        {'_id': 0, 'type': 1, 'description': 1, 'amount': 1, 'date': 1}
-    ).sort('date', -1).limit(limit).skip(skip).to_list(limit)
-    
-    for expense in expenses:
-        transactions.append({
-            'type': 'expense',
-            'category': expense['type'],
-            'description': expense['description'],
-            'amount': expense['amount'],
-            'date': expense['date']
-        })
+    transactions = []
+    for source_index, row in rows:
+        if source_index == 0:
+            transactions.append({
+                'type': 'income',
+                'description': f"Order {row['order_id']} - {row['type'].upper()}",
+                'amount': row.get('total_price', 0),
+                'date': row.get('updated_at', row.get('created_at'))
+            })
+        else:
+            transactions.append({
+                'type': 'expense',
+                'category': row['type'],
+                'description': row['description'],
+                'amount': row['amount'],
+                'date': row['date']
+            })
+    
+    if cursor is not None:
+        return {'transactions': transactions, 'next_cursor': next_cursor}
     
     # Sort by date descending
     transactions.sort(key=lambda x: x['date'], reverse=True)
-    
-    # Return limited results
-    return transactions[:limit]
+    return transactions[skip:skip + limit]
 
 @api_router.post("/admin/financials/expense")
 async def add_expense(expense: Expense, request: Request):
@@ -9554,6 +9703,7 @@ async def update_product_stock(
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await catalog_cache.invalidate(collection.name)
     
     # Log stock change
     await db.stock_history.insert_one({
@@ -9742,13 +9892,8 @@ def get_variant_price(item: dict, variant: str) -> float:
     else:
         return item.get('standard_price', item.get('base_price', 0))
 
-@api_router.get("/pod/clothing-items")
-async def get_pod_clothing_items():
-    """Public: Get all active POD clothing items from database.
-    
-    All POD items are stored in database. Defaults are seeded on first startup.
-    This endpoint ONLY reads from database - no hardcoded defaults.
-    """
+async def load_active_pod_clothing_items():
+    """Active POD clothing items with legacy fields filled in (cached by get_pod_clothing_items)"""
     items = await db.pod_clothing_items.find({'is_active': True}, {'_id': 0}).sort('name', 1).to_list(100)
     
     if not items:
@@ -9773,7 +9918,20 @@ async def get_pod_clothing_items():
         if 'print_area' not in item:
             item['print_area'] = {'x': 150, 'y': 80, 'width': 200, 'height': 250, 'rotation': 0}
     
-    return items
+    return await image_derivatives.attach(items, 'image_url')
+
+@api_router.get("/pod/clothing-items")
+async def get_pod_clothing_items(request: Request, response: Response):
+    """Public: Get all active POD clothing items from database.
+    
+    All POD items are stored in database. Defaults are seeded on first startup.
+    This endpoint ONLY reads from database - no hardcoded defaults.
+    """
+    not_modified = await check_not_modified(request, response, 'pod_clothing_items')
+    if not_modified:
+        return not_modified
+    
+    return await catalog_cache.get_or_load('pod_clothing_items', load_active_pod_clothing_items)
 
 @api_router.get("/admin/pod/clothing-items")
 async def get_all_pod_clothing_items(admin_user: Dict = Depends(get_admin_user)):
@@ -9822,6 +9980,7 @@ async def create_pod_clothing_item(item: BulkClothingItem, admin_user: Dict = De
     }
     
     await db.pod_clothing_items.insert_one(item_doc)
+    await catalog_cache.invalidate('pod_clothing_items')
     
     # Remove MongoDB _id field for JSON serialization
     if '_id' in item_doc:
@@ -9868,6 +10027,7 @@ async def update_pod_clothing_item(
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Clothing item not found")
+    await catalog_cache.invalidate('pod_clothing_items')
     
     return {'message': 'POD clothing item updated successfully'}
 
@@ -9902,6 +10062,7 @@ async def update_pod_print_area(
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Clothing item not found")
+    await catalog_cache.invalidate('pod_clothing_items')
     
     return {'message': 'Print area updated successfully'}
 
@@ -9926,24 +10087,25 @@ async def delete_pod_clothing_item(item_id: str, admin_user: Dict = Depends(get_
                 if file_path.exists():
                     try:
                         os.remove(file_path)
+                        await file_catalog.remove_local(file_path)
                         logger.info(f"Deleted POD clothing item image: {filename}")
                     except Exception as e:
                         logger.error(f"Failed to delete POD clothing item image: {e}")
+            # Thumbnails/previews stored next to the image go with it
+            await image_derivatives.delete(image_url)
     
     result = await db.pod_clothing_items.delete_one({'id': item_id})
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Clothing item not found")
+    await catalog_cache.invalidate('pod_clothing_items')
     
     return {'message': 'POD clothing item deleted successfully'}
 
 # ==================== IMAGE PROXY FOR CORS ====================
 @api_router.get("/image-proxy")
-async def proxy_image(url: str):
+async def proxy_image(url: str, request: Request):
     """Proxy external images to avoid CORS issues on canvas"""
-    import httpx
-    from fastapi.responses import Response
-    
     if not url:
         raise HTTPException(status_code=400, detail="URL parameter required")
     
@@ -9961,24 +10123,14 @@ async def proxy_image(url: str):
     if parsed.netloc not in allowed_domains:
         raise HTTPException(status_code=403, detail="Domain not allowed for proxying")
     
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=10.0, follow_redirects=True)
-            response.raise_for_status()
-            
-            content_type = response.headers.get('content-type', 'image/png')
-            
-            return Response(
-                content=response.content,
-                media_type=content_type,
-                headers={
-                    'Access-Control-Allow-Origin': '*',
-                    'Cache-Control': 'public, max-age=86400'
-                }
-            )
-    except Exception as e:
-        logger.error(f"Image proxy error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to fetch image")
+    return await image_proxy.response(
+        url,
+        if_none_match=request.headers.get('if-none-match'),
+        headers={
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'public, max-age=86400'
+        }
+    )
 
 # ==================== SITE TEXT CMS MANAGEMENT ====================
 # Default site texts - used for initialization and reset
@@ -10087,9 +10239,8 @@ DEFAULT_SITE_TEXTS = {
 
 # ==================== SYSTEM CONFIG / FEATURE FLAGS API ====================
 
-@api_router.get("/system-config")
-async def get_public_system_config():
-    """Public: Get public system configuration (feature flags for frontend)"""
+async def load_public_system_config():
+    """Public system configuration (feature flags for frontend) as a key-value map"""
     configs = await db.system_config.find(
         {'category': {'$in': ['features', 'localization', 'pricing']}},
         {'_id': 0, 'key': 1, 'value': 1, 'category': 1}
@@ -10097,6 +10248,15 @@ async def get_public_system_config():
     
     return {key_val['key']: key_val['value'] for key_val in configs}
 
+@api_router.get("/system-config")
+async def get_public_system_config(request: Request, response: Response):
+    """Public: Get public system configuration (feature flags for frontend)"""
+    not_modified = await check_not_modified(request, response, 'system_config')
+    if not_modified:
+        return not_modified
+    
+    return await load_public_system_config()
+
 @api_router.get("/admin/system-config")
 async def get_all_system_config(admin_user: Dict = Depends(get_admin_user)):
     """Admin: Get all system configuration"""
@@ -10135,6 +10295,7 @@ async def update_system_config(config_key: str, data: Dict[str, Any], request: R
             'updated_by': admin_user.get('email')
         }}
     )
+    await resource_versions.bump('system_config')
     
     # Log the change
     await log_audit_event(
@@ -10173,6 +10334,7 @@ async def create_system_config(data: Dict[str, Any], request: Request):
     }
     
     await db.system_config.insert_one(config)
+    await resource_versions.bump('system_config')
     
     await log_audit_event(
         action='create',
@@ -10213,13 +10375,66 @@ async def get_audit_logs(
         'pages': (total + limit - 1) // limit
     }
 
-@api_router.get("/site-texts")
-async def get_all_site_texts():
-    """
-    Public endpoint: Get all site texts for frontend.
-    Returns a simple key-value map for efficient frontend usage.
-    No authentication required for reading.
-    """
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats(admin_user: Dict = Depends(get_super_admin_user)):
+    """Super Admin: Hit/miss counters for the in-process caches of this worker"""
+    return {
+        'principal': principal_cache.stats(),
+        'price_book': price_books.stats(),
+        'resource_versions': resource_versions.stats(),
+        'catalog': catalog_cache.stats(),
+        'bootstrap': bootstrap_cache.stats()
+    }
+
+@api_router.get("/admin/db/pool-stats")
+async def get_db_pool_stats(admin_user: Dict = Depends(get_super_admin_user)):
+    """Super Admin: Connection pool usage and checkout wait times for this worker"""
+    return {
+        'pool': pool_stats(),
+        'analytics_read_preference': analytics_db.read_preference.name
+    }
+
+@api_router.get("/admin/storage/stats")
+async def get_storage_stats(admin_user: Dict = Depends(get_super_admin_user)):
+    """Super Admin: Storage backend in use and its call/retry counters for this worker"""
+    return {
+        **storage_stats(),
+        'content_store': await content_store.stats(),
+        'derivatives': image_derivatives.stats(),
+        'image_proxy': image_proxy.stats(),
+        'garbage_collector': storage_gc.stats(),
+        'mockups': mockup_renderer.stats()
+    }
+
+@api_router.get("/admin/db/index-coverage")
+async def get_index_coverage(admin_user: Dict = Depends(get_super_admin_user)):
+    """Super Admin: Compare the index manifest with the database and explain() every route query shape, flagging collection scans"""
+    status = await index_status(db)
+    report = await explain_query_shapes(db)
+    collscans = [entry for entry in report if entry.get('collscan')]
+    
+    return {
+        'indexes': status,
+        'query_shapes': report,
+        'collscan_count': len(collscans),
+        'collscan_routes': [entry['route'] for entry in collscans]
+    }
+
+@api_router.post("/admin/db/indexes/reconcile")
+async def reconcile_indexes(admin_user: Dict = Depends(get_super_admin_user)):
+    """Super Admin: Create missing manifest indexes and drop superseded ones, as startup does"""
+    summary = await ensure_indexes(db)
+    await log_audit_event(
+        action='reconcile',
+        entity_type='indexes',
+        entity_id='manifest',
+        user_email=admin_user.get('email'),
+        changes={key: summary[key] for key in ('created', 'dropped', 'failed')}
+    )
+    return summary
+
+async def load_site_texts():
+    """All site texts as a key-value map, with defaults filled in for missing keys"""
     try:
         texts = await db.site_texts.find({}, {'_id': 0, 'key': 1, 'value': 1}).to_list(1000)
         
@@ -10245,15 +10460,30 @@ async def get_all_site_texts():
             'cache_ttl': 60
         }
 
+@api_router.get("/site-texts")
+async def get_all_site_texts(request: Request, response: Response):
+    """
+    Public endpoint: Get all site texts for frontend.
+    Returns a simple key-value map for efficient frontend usage.
+    No authentication required for reading.
+    """
+    not_modified = await check_not_modified(request, response, 'site_texts')
+    if not_modified:
+        return not_modified
+    
+    return await load_site_texts()
+
 @api_router.get("/admin/site-texts")
 async def admin_get_site_texts(
     request: Request,
     page: int = 1,
     limit: int = 50,
     search: str = "",
-    filter_page: str = ""
+    filter_page: str = "",
+    cursor: Optional[str] = None
 ):
-    """Admin: Get all site texts with full metadata for management."""
+    """Admin: Get all site texts with full metadata for management.
+    Pass `cursor` (empty for the first page) to page by key instead of page number."""
     admin_user = await get_admin_user(request)
     
     skip = (page - 1) * limit
@@ -10269,13 +10499,25 @@ async def admin_get_site_texts(
     if filter_page:
         query['page'] = filter_page
     
+    # Get unique pages for filter dropdown
+    all_pages = await db.site_texts.distinct('page')
+    
+    if cursor is not None:
+        # Keys are unique, so the key alone is a stable cursor
+        texts, next_cursor = await fetch_keyset_page(
+            db.site_texts, query, {'_id': 0}, limit, cursor, sort=[('key', 1)]
+        )
+        return {
+            'texts': texts,
+            'next_cursor': next_cursor,
+            'limit': limit,
+            'available_pages': sorted(all_pages)
+        }
+    
     # Get texts from DB
     texts = await db.site_texts.find(query, {'_id': 0}).sort('key', 1).skip(skip).limit(limit).to_list(limit)
     total = await db.site_texts.count_documents(query)
     
-    # Get unique pages for filter dropdown
-    all_pages = await db.site_texts.distinct('page')
-    
     return {
         'texts': texts,
         'total': total,
@@ -10321,6 +10563,7 @@ async def admin_update_site_text(key: str, data: Dict[str, Any], request: Reques
         },
         upsert=True
     )
+    await resource_versions.bump('site_texts')
     
     logger.info(f"[CMS] Site text '{key}' updated by {admin_user['email']}")
     
@@ -10353,6 +10596,7 @@ async def admin_reset_site_text(key: str, request: Request):
         },
         upsert=True
     )
+    await resource_versions.bump('site_texts')
     
     logger.info(f"[CMS] Site text '{key}' reset to default by {admin_user['email']}")
     
@@ -10387,6 +10631,8 @@ async def admin_seed_site_texts(request: Request):
                 'updated_by': 'system'
             })
             seeded += 1
+    if seeded:
+        await resource_versions.bump('site_texts')
     
     logger.info(f"[CMS] Seeded {seeded} site texts by {admin_user['email']}")
     
@@ -10417,10 +10663,13 @@ async def get_all_guest_designs(
     page: int = 1,
     limit: int = 50,
     search: str = "",
-    status: str = ""  # Filter: 'assigned', 'unassigned', or '' for all
+    status: str = "",  # Filter: 'assigned', 'unassigned', or '' for all
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
     """Admin: Get all guest designs with contact info for dashboard.
-    Supports filtering by status (assigned/unassigned)."""
+    Supports filtering by status (assigned/unassigned), and keyset paging via `cursor`
+    (empty for the first page)."""
     admin_user = await get_admin_user(request)
     
     skip = (page - 1) * limit
@@ -10441,13 +10690,24 @@ async def get_all_guest_designs(
         query['status'] = {'$in': ['unassigned', 'uploaded', None]}
     
     # Get designs with pagination
-    designs = await db.pod_designs.find(query, {'_id': 0}).sort('created_at', -1).skip(skip).limit(limit).to_list(limit)
-    total = await db.pod_designs.count_documents(query)
+    projection = list_projection(
+        'pod_designs', fields, required=['status', 'contact_id', 'guest_id', 'guest_name', 'guest_email', 'guest_phone']
+    )
+    next_cursor = None
+    if cursor is not None:
+        designs, next_cursor = await fetch_keyset_page(db.pod_designs, query, projection, limit, cursor)
+    else:
+        designs = await db.pod_designs.find(query, projection).sort(CREATED_AT_SORT).skip(skip).limit(limit).to_list(limit)
+        total = await db.pod_designs.count_documents(query)
     
     # Count by status
     assigned_count = await db.pod_designs.count_documents({'status': 'assigned'})
     unassigned_count = await db.pod_designs.count_documents({'status': {'$in': ['unassigned', 'uploaded', None]}})
     
+    # Thumbnails instead of print-size originals for the gallery
+    await image_derivatives.attach(designs, 'original_file_url')
+    await image_derivatives.attach(designs, 'mockup_file_url', prefix='mockup_')
+    
     # Enrich with guest contact info
     enriched_designs = []
     for design in designs:
@@ -10469,6 +10729,15 @@ async def get_all_guest_designs(
             'is_assigned': design.get('status') == 'assigned'
         })
     
+    if cursor is not None:
+        return {
+            'designs': enriched_designs,
+            'next_cursor': next_cursor,
+            'assigned_count': assigned_count,
+            'unassigned_count': unassigned_count,
+            'limit': limit
+        }
+    
     return {
         'designs': enriched_designs,
         'total': total,
@@ -10484,9 +10753,11 @@ async def get_all_guest_contacts(
     request: Request,
     page: int = 1,
     limit: int = 50,
-    search: str = ""
+    search: str = "",
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
-    """Admin: Get all guest contacts with their designs"""
+    """Admin: Get all guest contacts with their designs. Pass `cursor` (empty for the first page) for keyset paging."""
     admin_user = await get_admin_user(request)
     
     skip = (page - 1) * limit
@@ -10503,8 +10774,13 @@ async def get_all_guest_contacts(
         }
     
     # Get contacts with pagination
-    contacts = await db.pod_guest_contacts.find(query, {'_id': 0}).sort('created_at', -1).skip(skip).limit(limit).to_list(limit)
-    total = await db.pod_guest_contacts.count_documents(query)
+    projection = list_projection('pod_guest_contacts', fields, required=['designs'])
+    next_cursor = None
+    if cursor is not None:
+        contacts, next_cursor = await fetch_keyset_page(db.pod_guest_contacts, query, projection, limit, cursor)
+    else:
+        contacts = await db.pod_guest_contacts.find(query, projection).sort(CREATED_AT_SORT).skip(skip).limit(limit).to_list(limit)
+        total = await db.pod_guest_contacts.count_documents(query)
     
     # Enrich with design count and latest design
     enriched_contacts = []
@@ -10515,7 +10791,7 @@ async def get_all_guest_contacts(
         if design_count > 0:
             latest = await db.pod_designs.find_one(
                 {'guest_id': contact['id']},
-                {'_id': 0}
+                list_projection('pod_designs')
             )
             if latest:
                 latest_design = latest
@@ -10526,6 +10802,9 @@ async def get_all_guest_contacts(
             'latest_design': latest_design
         })
     
+    if cursor is not None:
+        return {'contacts': enriched_contacts, 'next_cursor': next_cursor, 'limit': limit}
+    
     return {
         'contacts': enriched_contacts,
         'total': total,
@@ -10604,7 +10883,8 @@ async def delete_design_admin(design_id: str, request: Request):
     # Delete design record
     await db.pod_designs.delete_one({'id': design_id})
     
-    # Optionally delete files (keeping them for now for audit)
+    # The original is shared with any other design of the same file; the bytes go with the last one
+    await content_store.release(design.get('content_sha256'))
     logger.info(f"[ADMIN] Deleted design {design_id} by {admin_user['email']}")
     
     return {'message': 'Design deleted successfully'}
@@ -10704,10 +10984,70 @@ async def download_mockup_design(design_id: str, request: Request):
         }
     )
 
+# ==================== STOREFRONT BOOTSTRAP ====================
+# Resource versions the bootstrap snapshot is built from; a bump to any of them triggers a rebuild
+BOOTSTRAP_INPUTS = ('site_texts', 'cms_settings', 'system_config', 'product_categories', 'bulk_clothing_items', 'pod_clothing_items')
+
+async def build_bootstrap_payload() -> Dict[str, Any]:
+    """Everything the storefront loads on first paint, minus the per-visitor currency"""
+    (site_texts, cms_settings, pricing, system_config, currency_rates,
+     boutique_categories, fabric_categories, souvenir_categories,
+     bulk_clothing_items, pod_clothing_items) = await asyncio.gather(
+        load_site_texts(),
+        load_public_cms_settings(),
+        load_public_pricing(),
+        load_public_system_config(),
+        get_currency_rates(),
+        catalog_cache.get_or_load('product_categories', lambda: load_public_categories('boutique'), variant='boutique'),
+        catalog_cache.get_or_load('product_categories', lambda: load_public_categories('fabric'), variant='fabric'),
+        catalog_cache.get_or_load('product_categories', lambda: load_public_categories('souvenir'), variant='souvenir'),
+        catalog_cache.get_or_load('bulk_clothing_items', load_active_bulk_clothing_items),
+        catalog_cache.get_or_load('pod_clothing_items', load_active_pod_clothing_items)
+    )
+    return {
+        'site_texts': site_texts,
+        'cms_settings': cms_settings,
+        'pricing': pricing,
+        'system_config': system_config,
+        'currency_rates': currency_rates,
+        'categories': {
+            'boutique': boutique_categories,
+            'fabric': fabric_categories,
+            'souvenir': souvenir_categories
+        },
+        'bulk_clothing_items': bulk_clothing_items,
+        'pod_clothing_items': pod_clothing_items,
+        'built_at': datetime.now(timezone.utc).isoformat()
+    }
+
+bootstrap_cache = BootstrapCache(resource_versions, BOOTSTRAP_INPUTS, build_bootstrap_payload)
+
+@api_router.get("/bootstrap")
+async def get_bootstrap(request: Request):
+    """Public: Site texts, CMS settings, pricing, system config, currency, categories and clothing items in one response"""
+    country_code = detect_country_code(request)
+    # Only real ISO country codes get their own variant, so junk headers cannot churn the variant cache
+    if not (len(country_code) == 2 and country_code.isalpha()):
+        country_code = ''
+    
+    snapshot = await bootstrap_cache.get(country_code, lambda: {'currency': currency_for_country(country_code)})
+    gzipped = 'gzip' in request.headers.get('accept-encoding', '').lower()
+    etag = snapshot.gzip_etag if gzipped else snapshot.etag
+    headers = {
+        'ETag': etag,
+        'Cache-Control': PUBLIC_CACHE_CONTROL,
+        'Vary': 'Accept-Encoding, CF-IPCountry, Accept-Language'
+    }
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    
+    if gzipped:
+        return Response(content=snapshot.gzip_body, media_type='application/json', headers={**headers, 'Content-Encoding': 'gzip'})
+    return Response(content=snapshot.body, media_type='application/json', headers=headers)
+
 # ==================== BULK ORDER CLOTHING ITEMS MANAGEMENT ====================
-@api_router.get("/bulk/clothing-items")
-async def get_bulk_clothing_items():
-    """Public: Get all active bulk order clothing items with variant pricing"""
+async def load_active_bulk_clothing_items():
+    """Active bulk clothing items with variant pricing filled in (cached by get_bulk_clothing_items)"""
     items = await db.bulk_clothing_items.find({'is_active': True}, {'_id': 0}).sort('name', 1).to_list(100)
     
     # If no items exist, return default items with variant pricing
@@ -10779,7 +11119,16 @@ async def get_bulk_clothing_items():
             item['premium_price'] = int(base * 1.5)
             item['luxury_price'] = int(base * 2)
     
-    return items
+    return await image_derivatives.attach(items, 'image_url')
+
+@api_router.get("/bulk/clothing-items")
+async def get_bulk_clothing_items(request: Request, response: Response):
+    """Public: Get all active bulk order clothing items with variant pricing"""
+    not_modified = await check_not_modified(request, response, 'bulk_clothing_items')
+    if not_modified:
+        return not_modified
+    
+    return await catalog_cache.get_or_load('bulk_clothing_items', load_active_bulk_clothing_items)
 
 @api_router.get("/admin/bulk/clothing-items")
 async def get_all_bulk_clothing_items(admin_user: Dict = Depends(get_admin_user)):
@@ -10824,6 +11173,7 @@ async def create_bulk_clothing_item(item: BulkClothingItem, admin_user: Dict = D
     }
     
     await db.bulk_clothing_items.insert_one(item_doc)
+    await catalog_cache.invalidate('bulk_clothing_items')
     
     # Remove MongoDB _id field for JSON serialization
     if '_id' in item_doc:
@@ -10863,6 +11213,7 @@ async def update_bulk_clothing_item(
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Clothing item not found")
+    await catalog_cache.invalidate('bulk_clothing_items')
     
     return {'message': 'Bulk order clothing item updated successfully'}
 
@@ -10887,14 +11238,18 @@ async def delete_bulk_clothing_item(item_id: str, admin_user: Dict = Depends(get
                 if file_path.exists():
                     try:
                         os.remove(file_path)
+                        await file_catalog.remove_local(file_path)
                         logger.info(f"Deleted bulk clothing item image: {filename}")
                     except Exception as e:
                         logger.error(f"Failed to delete bulk clothing item image: {e}")
+            # Thumbnails/previews stored next to the image go with it
+            await image_derivatives.delete(image_url)
     
     result = await db.bulk_clothing_items.delete_one({'id': item_id})
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Clothing item not found")
+    await catalog_cache.invalidate('bulk_clothing_items')
     
     return {'message': 'Bulk order clothing item deleted successfully'}
 
@@ -11532,6 +11887,7 @@ async def update_product_inventory(request: Request, product_id: str, inventory_
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await catalog_cache.invalidate('boutique_products')
     
     return {'message': 'Inventory updated successfully'}
 
@@ -11588,6 +11944,7 @@ async def record_restock(request: Request, restock_data: dict):
             {'product_id': restock_data.get('product_id')},
             {'$set': {'inventory': inventory}}
         )
+        await catalog_cache.invalidate('boutique_products')
     
     return {'message': 'Restock recorded successfully', 'id': restock_id}
 
@@ -11734,7 +12091,7 @@ async def get_visitor_stats(
         }
     ]
     
-    daily_stats_list = await db.page_visits.aggregate(pipeline).to_list(days + 1)
+    daily_stats_list = await analytics_db.page_visits.aggregate(pipeline, allowDiskUse=True).to_list(days + 1)
     
     # Convert to dictionary format
     daily_stats = {stat['date']: stat for stat in daily_stats_list}
@@ -11803,19 +12160,7 @@ async def get_receipt(receipt_id: str):
 
 async def generate_supplier_id() -> str:
     """Generate unique supplier ID in format SUP-YYYYMMDD-XXX"""
-    now = datetime.now(timezone.utc)
-    date_part = now.strftime('%Y%m%d')
-    day_key = f"supplier_{date_part}"
-    
-    counter_doc = await db.supplier_counters.find_one_and_update(
-        {'day_key': day_key},
-        {'$inc': {'counter': 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    counter = counter_doc.get('counter', 1) if counter_doc else 1
-    return f"SUP-{date_part}-{str(counter).zfill(3)}"
+    return await sequences.next_id('supplier')
 
 class SouvenirSupplierCreate(BaseModel):
     company_name: str
@@ -11958,124 +12303,43 @@ async def get_all_files(
     file_type: Optional[str] = None,
     source: Optional[str] = None,
     search: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
     admin_user: Dict = Depends(get_admin_user)
 ):
-    """Get all uploaded files from local storage and database references"""
-    files = []
-    
-    # Get files from uploads directory
-    uploads_base = Path("/app/backend/uploads")
-    if uploads_base.exists():
-        for folder in ['designs', 'products', 'images', 'enquiries', 'mockups']:
-            folder_path = uploads_base / folder
-            if folder_path.exists():
-                for file_path in folder_path.rglob('*'):
-                    if file_path.is_file():
-                        stat = file_path.stat()
-                        ext = file_path.suffix.lower()
-                        file_type_detected = 'image' if ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'] else 'document'
-                        
-                        files.append({
-                            'id': str(hash(str(file_path))),
-                            'name': file_path.name,
-                            'path': f"/uploads/{file_path.relative_to(uploads_base)}",
-                            'folder': folder,
-                            'size': stat.st_size,
-                            'size_formatted': f"{stat.st_size / 1024:.1f} KB" if stat.st_size < 1024*1024 else f"{stat.st_size / (1024*1024):.2f} MB",
-                            'type': file_type_detected,
-                            'extension': ext,
-                            'source': 'local',
-                            'created_at': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                            'modified_at': datetime.fromtimestamp(stat.st_mtime).isoformat()
-                        })
-    
-    # Get Supabase files from database references
-    collections_to_check = [
-        ('fabrics', 'image', 'fabrics'),
-        ('souvenirs', 'image', 'souvenirs'),
-        ('boutique_products', 'images', 'boutique'),
-        ('pod_designs', 'original_file_url', 'pod-designs'),
-        ('pod_designs', 'mockup_url', 'pod-mockups'),
-        ('bulk_clothing_items', 'image_url', 'bulk-products'),
-        ('pod_clothing_items', 'image_url', 'pod-products')
-    ]
+    """Get uploaded files (local and cloud) from the file catalog, newest first; pass next_cursor back for the next page"""
+    files, next_cursor = await file_catalog.page(limit, cursor, file_type, source, search)
     
-    supabase_files = set()
-    for collection, field, category in collections_to_check:
-        try:
-            docs = await db[collection].find({}, {field: 1}).to_list(500)
-            for doc in docs:
-                url = doc.get(field)
-                if url and isinstance(url, str) and 'supabase' in url:
-                    if url not in supabase_files:
-                        supabase_files.add(url)
-                        files.append({
-                            'id': str(hash(url)),
-                            'name': url.split('/')[-1] if '/' in url else url,
-                            'path': url,
-                            'folder': category,
-                            'size': 0,
-                            'size_formatted': 'N/A',
-                            'type': 'image',
-                            'extension': '.' + url.split('.')[-1] if '.' in url else '',
-                            'source': 'supabase',
-                            'created_at': None,
-                            'modified_at': None
-                        })
-                elif url and isinstance(url, list):
-                    for u in url:
-                        if u and 'supabase' in str(u) and u not in supabase_files:
-                            supabase_files.add(u)
-                            files.append({
-                                'id': str(hash(u)),
-                                'name': u.split('/')[-1] if '/' in u else u,
-                                'path': u,
-                                'folder': category,
-                                'size': 0,
-                                'size_formatted': 'N/A',
-                                'type': 'image',
-                                'extension': '.' + u.split('.')[-1] if '.' in u else '',
-                                'source': 'supabase',
-                                'created_at': None,
-                                'modified_at': None
-                            })
-        except Exception:
-            pass
-    
-    # Apply filters
-    if file_type and file_type != 'all':
-        files = [f for f in files if f['type'] == file_type]
-    
-    if source and source != 'all':
-        files = [f for f in files if f['source'] == source]
-    
-    if search:
-        search_lower = search.lower()
-        files = [f for f in files if search_lower in f['name'].lower() or search_lower in f.get('folder', '').lower()]
-    
-    # Sort by modified date (newest first)
-    files.sort(key=lambda x: x.get('modified_at') or x.get('created_at') or '', reverse=True)
-    
-    # Calculate stats
-    total_size = sum(f['size'] for f in files)
-    local_count = len([f for f in files if f['source'] == 'local'])
-    supabase_count = len([f for f in files if f['source'] == 'supabase'])
-    image_count = len([f for f in files if f['type'] == 'image'])
-    document_count = len([f for f in files if f['type'] == 'document'])
+    # Thumbnails for the grid (local paths are recorded under their /api/uploads URL)
+    derivatives = await image_derivatives.lookup(
+        f"/api{f['path']}" if f['source'] == 'local' else f['path'] for f in files
+    )
+    for f in files:
+        found = derivatives.get(f"/api{f['path']}" if f['source'] == 'local' else f['path'], {})
+        f['thumbnail_url'] = found.get('thumb')
     
     return {
         'files': files,
-        'stats': {
-            'total': len(files),
-            'total_size': total_size,
-            'total_size_formatted': f"{total_size / (1024*1024):.2f} MB" if total_size > 0 else '0 MB',
-            'local': local_count,
-            'supabase': supabase_count,
-            'images': image_count,
-            'documents': document_count
-        }
+        'next_cursor': next_cursor,
+        'stats': await file_catalog.stats(file_type, source, search)
     }
 
+@api_router.post("/admin/files/reconcile")
+async def reconcile_files(admin_user: Dict = Depends(get_super_admin_user)):
+    """Super Admin: Bring the file catalog in line with the uploads directory and remote storage now"""
+    return {
+        'local': await file_catalog.reconcile_local(),
+        'remote': await reconcile_remote_catalog()
+    }
+
+@api_router.post("/admin/storage/gc")
+async def run_storage_gc(dry_run: bool = True, admin_user: Dict = Depends(get_super_admin_user)):
+    """Super Admin: Sweep abandoned designs and unreferenced files; dry_run (the default) only reports them"""
+    report = await storage_gc.run(dry_run=dry_run)
+    if not dry_run:
+        logger.info(f"[STORAGE GC] Manual sweep by {admin_user['email']}")
+    return report
+
 @api_router.delete("/admin/files")
 async def delete_file(file_path: str, admin_user: Dict = Depends(get_admin_user)):
     """Delete a file from local storage"""
@@ -12091,6 +12355,11 @@ async def delete_file(file_path: str, admin_user: Dict = Depends(get_admin_user)
     
     try:
         full_path.unlink()
+        await file_catalog.remove_local(full_path)
+        sha256 = sha256_from_url(file_path)
+        if sha256:
+            # Removed by hand, so the content store must not hand out its URL again
+            await content_store.forget(sha256)
         return {'message': 'File deleted successfully'}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete file: {str(e)}")
@@ -12098,26 +12367,9 @@ async def delete_file(file_path: str, admin_user: Dict = Depends(get_admin_user)
 
 # ==================== JOB ORDERS MODULE ====================
 
-async def generate_job_order_id():
-    """Generate unique job order ID: JOB-YYYYMMDD-XXX"""
-    today = datetime.now(timezone.utc).strftime('%Y%m%d')
-    prefix = f"JOB-{today}-"
-    
-    # Find highest number for today
-    latest = await db.job_orders.find_one(
-        {'job_order_id': {'$regex': f'^{prefix}'}},
-        sort=[('job_order_id', -1)]
-    )
-    
-    if latest:
-        try:
-            num = int(latest['job_order_id'].split('-')[-1]) + 1
-        except:
-            num = 1
-    else:
-        num = 1
-    
-    return f"{prefix}{num:03d}"
+async def generate_job_order_id() -> str:
+    """Generate unique job order ID in format JOB-YYYYMMDD-XXX"""
+    return await sequences.next_id('job_order')
 
 
 @api_router.get("/admin/job-orders")
@@ -12398,6 +12650,8 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 # Add CORS BEFORE including router
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=MAX_REQUEST_BODY_SIZE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -12410,8 +12664,16 @@ app.add_middleware(
 app.include_router(api_router)
 
 # Mount static files for uploads - use /api/uploads for ingress routing
-from fastapi.staticfiles import StaticFiles
-app.mount("/api/uploads", StaticFiles(directory="/app/backend/uploads"), name="uploads")
+# Content-hashed files are served immutable, others revalidated (see core/static_files.py); UPLOADS_OFFLOAD=x-accel|x-sendfile hands the bytes to the front proxy
+app.mount(
+    "/api/uploads",
+    UploadStaticFiles(
+        directory="/app/backend/uploads",
+        offload=os.environ.get('UPLOADS_OFFLOAD'),
+        offload_prefix=os.environ.get('UPLOADS_OFFLOAD_PREFIX', '/_uploads_internal/')
+    ),
+    name="uploads"
+)
 
 # Initialize scheduler for automated tasks
 scheduler = AsyncIOScheduler()
@@ -12542,6 +12804,9 @@ async def startup_db_client():
         await client.admin.command('ping')
         logger.info(f"Successfully connected to MongoDB: {os.environ.get('DB_NAME', 'unknown')}")
         
+        # Reconcile the declared index manifest (idempotent)
+        await ensure_indexes(db)
+        
         # Initialize Supabase storage bucket
         try:
             bucket_ready = await ensure_bucket_exists()
@@ -12552,12 +12817,40 @@ async def startup_db_client():
         except Exception as e:
             logger.warning(f"Supabase initialization skipped: {str(e)}")
         
+        # Load access-token revocations and keep them in sync with other workers
+        await token_revocations.refresh(db)
+        scheduler.add_job(token_revocations.refresh, IntervalTrigger(seconds=30), args=[db], id='token_revocations_refresh', replace_existing=True)
+        
+        # Backfill order lookup keys on legacy orders in the background
+        asyncio.create_task(migrate_order_lookup_keys(db))
+        
         # Initialize system configuration and seed defaults
         await initialize_system_config()
         await seed_database_defaults()
         
+        # Response shapes and seeded defaults can change with a deploy, so retire every issued ETag
+        await resource_versions.bump(*RESOURCES)
+        
         # Start the scheduler for automated reminders (runs daily at 9 AM)
         scheduler.add_job(send_quote_reminder_emails, CronTrigger(hour=9, minute=0), id='quote_reminders', replace_existing=True)
+        scheduler.add_job(resumable_uploads.sweep_expired, IntervalTrigger(hours=1), id='resumable_upload_sweep', replace_existing=True)
+        scheduler.add_job(
+            file_catalog.reconcile_local,
+            IntervalTrigger(minutes=int(os.environ.get('FILE_CATALOG_RECONCILE_MINUTES', 5))),
+            id='file_catalog_reconcile_local', replace_existing=True, next_run_time=datetime.now(timezone.utc)
+        )
+        scheduler.add_job(
+            reconcile_remote_catalog,
+            IntervalTrigger(minutes=int(os.environ.get('FILE_CATALOG_REMOTE_RECONCILE_MINUTES', 60))),
+            id='file_catalog_reconcile_remote', replace_existing=True
+        )
+        # Scheduled sweeps only report unless deleting is switched on with STORAGE_GC_DELETE=1
+        scheduler.add_job(
+            storage_gc.run,
+            IntervalTrigger(hours=float(os.environ.get('STORAGE_GC_INTERVAL_HOURS', 24))),
+            kwargs={'dry_run': os.environ.get('STORAGE_GC_DELETE') != '1'},
+            id='storage_gc', replace_existing=True
+        )
         scheduler.start()
         logger.info("Quote reminder scheduler started - runs daily at 9 AM")
     except Exception as e:
@@ -12603,8 +12896,6 @@ async def initialize_system_config():
             await db.system_config.insert_one(config)
             logger.info(f"Initialized system config: {config['key']}")
     
-    # Create index on key field
-    await db.system_config.create_index('key', unique=True)
     logger.info("System configuration initialized")
 
 
@@ -12809,5 +13100,9 @@ async def log_audit_event(action: str, entity_type: str, entity_id: str, user_em
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    close_storage_backends()
+    image_derivatives.close()
+    mockup_renderer.close()
+    await image_proxy.close()
     client.close()
     logger.info("MongoDB connection closed")
@@ -8,11 +8,17 @@ from .email_service import (
 )
 from .storage_service import (
     get_supabase_client,
+    get_storage_backend,
+    get_local_backend,
+    storage_stats,
     ensure_bucket_exists,
     validate_image_file,
     upload_file_to_supabase,
     delete_file_from_supabase,
     delete_files_from_supabase,
+    upload_bytes,
+    store_file,
+    delete_stored_files,
     get_public_url,
     extract_storage_path_from_url,
     is_supabase_url
@@ -0,0 +1,236 @@
+"""
+Content-Addressed Upload Store
+Stores customer uploads (POD designs, branding logos, bulk order and enquiry images) once per
+distinct content, keyed by SHA-256.
+
+Each stored blob has a document in upload_blobs (_id = hash) with a reference count. Uploading
+content that is already stored skips the storage write and returns the existing URL with the count
+incremented; release() decrements it and removes the bytes only when no reference is left.
+A release that reaches zero marks the record 'deleting', deletes the bytes and only then removes
+the record; put() never references a record in that state and waits for it to go before storing
+the same content (at the same path) again, so a delete can never take a new upload's bytes.
+The hash is computed while the upload streams to disk (see core/uploads.py), so deduplication
+costs one indexed lookup.
+"""
+import asyncio
+import logging
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, UploadFile
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from core.uploads import stream_upload_to_file
+from services.storage_service import INCOMING_DIR, MAX_FILE_SIZE, store_file, delete_stored_files
+from services.image_derivatives import derivative_path
+
+logger = logging.getLogger(__name__)
+
+# Folder content-addressed files are stored under, in every backend
+CONTENT_PREFIX = 'cas'
+
+# A 'deleting' mark older than this was left by a release that died part way
+RELEASE_STALE_SECONDS = 300
+
+# Attempts at recording a new blob that keep colliding with a release of the same content
+MAX_PUT_ATTEMPTS = 3
+
+_CONTENT_URL = re.compile(rf"/{CONTENT_PREFIX}/[0-9a-f]{{2}}/([0-9a-f]{{64}})")
+
+
+def content_storage_path(sha256: str, ext: str) -> str:
+    """cas/ab/abcdef....png - fanned out by the first byte so no directory grows huge"""
+    return f"{CONTENT_PREFIX}/{sha256[:2]}/{sha256}{ext}"
+
+
+def sha256_from_url(url: Optional[str]) -> Optional[str]:
+    """Content hash of a content-addressed URL, or None for any other URL"""
+    match = _CONTENT_URL.search(url or '')
+    return match.group(1) if match else None
+
+
+class ContentStore:
+    """Deduplicating upload store over the storage backends, with refcounts in Mongo"""
+
+    def __init__(self, db, derivatives=None, collection: str = 'upload_blobs'):
+        self.collection = db[collection]
+        # ImageDerivatives; thumbnails are rendered once per blob, not per upload
+        self.derivatives = derivatives
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def _result(blob: Dict[str, Any], original_name: Optional[str], deduplicated: bool) -> Dict[str, Any]:
+        return {
+            'file_name': blob['storage_path'].rsplit('/', 1)[-1],
+            'public_url': blob['public_url'],
+            'storage_path': blob['storage_path'],
+            'storage_type': blob['storage_type'],
+            'file_size': blob['size'],
+            'sha256': blob['_id'],
+            'original_name': original_name,
+            'derivatives': blob.get('derivatives', {}),
+            'deduplicated': deduplicated
+        }
+
+    async def put(self, file: UploadFile, max_size: int = MAX_FILE_SIZE,
+                  too_large_message: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store an upload (validated by the caller) and take a reference to it.
+        Returns the same fields as upload_file_to_supabase plus 'deduplicated'.
+        """
+        ext = os.path.splitext(file.filename or '')[1].lower()
+        incoming_path = INCOMING_DIR / f"{uuid.uuid4()}{ext}"
+        try:
+            saved = await stream_upload_to_file(file, incoming_path, max_size, too_large_message=too_large_message)
+            return await self.put_path(
+                incoming_path, saved.sha256, saved.size, file.filename, file.content_type, consume=True
+            )
+        finally:
+            incoming_path.unlink(missing_ok=True)
+
+    async def put_path(self, path: Path, sha256: str, size: int, filename: Optional[str],
+                       content_type: Optional[str], consume: bool = False) -> Dict[str, Any]:
+        """
+        put() for a file already on local disk (e.g. a finished resumable upload).
+        consume=True lets local storage take the file by renaming it.
+        """
+        ext = os.path.splitext(filename or '')[1].lower()
+        storage_path = content_storage_path(sha256, ext)
+        derive = self.derivatives is not None and (content_type or '').startswith('image/')
+        live = {'_id': sha256, 'deleting': {'$exists': False}}
+
+        for _ in range(MAX_PUT_ATTEMPTS):
+            now = datetime.now(timezone.utc).isoformat()
+            blob = await self.collection.find_one_and_update(
+                live,
+                {'$inc': {'refcount': 1}, '$set': {'last_referenced_at': now}},
+                return_document=ReturnDocument.AFTER
+            )
+            if blob is not None:
+                self.hits += 1
+                self.bytes_saved += size
+                logger.info(f"[CONTENT STORE] Duplicate upload {sha256[:12]} -> {blob['public_url']} (refs={blob['refcount']})")
+                return self._result(blob, filename, deduplicated=True)
+
+            await self._wait_for_release(sha256)
+            if not path.exists():
+                # Local storage took the file on an attempt whose bytes a release then deleted
+                break
+            public_url, storage_type = await store_file(
+                storage_path, path, content_type or 'application/octet-stream', consume=consume and not derive
+            )
+            derivatives = {}
+            if derive:
+                derivatives = await self.derivatives.create(path, storage_path, public_url, storage_type=storage_type)
+            try:
+                blob = await self.collection.find_one_and_update(
+                    live,
+                    {
+                        '$setOnInsert': {
+                            'public_url': public_url,
+                            'storage_path': storage_path,
+                            'storage_type': storage_type,
+                            'size': size,
+                            'content_type': content_type,
+                            'derivatives': derivatives,
+                            'created_at': now
+                        },
+                        '$inc': {'refcount': 1},
+                        '$set': {'last_referenced_at': now}
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # A release of this content began while it was stored; its delete covers the path
+                # just written, so store again once it is done
+                continue
+            if (blob['storage_path'], blob['storage_type']) != (storage_path, storage_type):
+                # A concurrent upload of the same content was recorded first, somewhere else
+                paths = [storage_path] + [derivative_path(storage_path, name) for name in derivatives]
+                await delete_stored_files(paths, storage_type)
+            self.misses += 1
+            return self._result(blob, filename, deduplicated=False)
+
+        logger.warning(f"[CONTENT STORE] Upload {sha256[:12]} kept colliding with its release")
+        raise HTTPException(status_code=503, detail="Upload conflicted with a concurrent delete, please retry")
+
+    async def _wait_for_release(self, sha256: str):
+        """Wait until no release() is deleting this content, so it cannot delete bytes stored after it"""
+        delay = 0.05
+        while True:
+            blob = await self.collection.find_one({'_id': sha256, 'deleting': {'$exists': True}}, {'deleting': 1})
+            if blob is None:
+                return
+            started = datetime.fromisoformat(blob['deleting'])
+            if (datetime.now(timezone.utc) - started).total_seconds() > RELEASE_STALE_SECONDS:
+                await self.collection.delete_one({'_id': sha256, 'deleting': blob['deleting']})
+                logger.warning(f"[CONTENT STORE] Dropped stale release of {sha256[:12]}")
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    async def release(self, sha256: Optional[str]) -> bool:
+        """Drop one reference; deletes the bytes when it was the last. Returns True if they were deleted."""
+        if not sha256:
+            return False
+        blob = await self.collection.find_one_and_update(
+            {'_id': sha256, 'refcount': {'$gt': 0}},
+            {'$inc': {'refcount': -1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob is None or blob['refcount'] > 0:
+            return False
+
+        # Claim the delete unless somebody took a new reference in the meantime; from here on put()
+        # neither references this record nor stores the content again until it is gone
+        marked = datetime.now(timezone.utc).isoformat()
+        blob = await self.collection.find_one_and_update(
+            {'_id': sha256, 'refcount': {'$lte': 0}, 'deleting': {'$exists': False}},
+            {'$set': {'deleting': marked}},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob is None:
+            return False
+        paths = [blob['storage_path']]
+        paths += [derivative_path(blob['storage_path'], name) for name in blob.get('derivatives') or {}]
+        try:
+            await delete_stored_files(paths, blob['storage_type'])
+            if self.derivatives is not None and blob.get('derivatives'):
+                await self.derivatives.forget(blob['public_url'])
+        finally:
+            # Bytes first, record last: the record going is what lets put() store the content again
+            await self.collection.delete_one({'_id': sha256, 'deleting': marked})
+        logger.info(f"[CONTENT STORE] Deleted unreferenced blob {sha256[:12]} ({blob['storage_path']})")
+        return True
+
+    async def release_url(self, url: Optional[str]) -> bool:
+        """release() for the blob behind a content-addressed URL; other URLs are ignored"""
+        return await self.release(sha256_from_url(url))
+
+    async def forget(self, sha256: str):
+        """Drop the record of a blob whose bytes were removed outside the store"""
+        await self.collection.delete_one({'_id': sha256})
+
+    async def stats(self) -> Dict[str, Any]:
+        totals = await self.collection.aggregate([
+            {'$group': {'_id': None, 'blobs': {'$sum': 1}, 'bytes': {'$sum': '$size'}, 'references': {'$sum': '$refcount'}}}
+        ]).to_list(1)
+        totals = totals[0] if totals else {'blobs': 0, 'bytes': 0, 'references': 0}
+        lookups = self.hits + self.misses
+        return {
+            'blobs': totals['blobs'],
+            'stored_bytes': totals['bytes'],
+            'references': totals['references'],
+            'hits': self.hits,
+            'misses': self.misses,
+            'dedup_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'bytes_saved': self.bytes_saved
+        }
@@ -0,0 +1,146 @@
+"""
+POD Design Linking
+Links guest-uploaded designs to a contact in a fixed number of round-trips: the contact is
+resolved once, designs are updated with one update_many, and the contact's design list is
+extended with a single $addToSet/$each - however many designs the guest uploaded.
+"""
+
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+async def get_or_create_design_contact(db, name: str, email: str, phone: str) -> str:
+    """
+    Find the contact for an email (refreshing name/phone) or create it with its client record.
+
+    Returns:
+        contact_id
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    existing_contact = await db.pod_guest_contacts.find_one({'email': email}, {'_id': 0, 'id': 1})
+
+    if existing_contact:
+        contact_id = existing_contact['id']
+        await db.pod_guest_contacts.update_one(
+            {'id': contact_id},
+            {'$set': {'name': name, 'phone': phone, 'updated_at': now}}
+        )
+        logger.info(f"[POD LINK] Updated existing contact: {contact_id}")
+        return contact_id
+
+    contact_id = f"contact_{uuid.uuid4().hex[:12]}"
+    await db.pod_guest_contacts.insert_one({
+        'id': contact_id,
+        'contact_id': contact_id,
+        'name': name,
+        'email': email,
+        'phone': phone,
+        'designs': [],
+        'created_at': now,
+        'updated_at': now
+    })
+
+    # Also create client record for admin visibility
+    client_id = f"client_{uuid.uuid4().hex[:12]}"
+    await db.clients.insert_one({
+        'id': client_id,
+        'client_id': client_id,
+        'name': name,
+        'email': email,
+        'phone': phone,
+        'type': 'pod_guest',
+        'source': 'print_on_demand',
+        'pod_contact_id': contact_id,
+        'total_orders': 0,
+        'total_spent': 0,
+        'created_at': now,
+        'updated_at': now
+    })
+    logger.info(f"[POD LINK] Created new contact + client: {contact_id}")
+    return contact_id
+
+
+async def assign_designs_to_contact(db, design_ids: List[str], contact_id: str,
+                                    name: str, email: str, phone: str) -> Dict[str, List[str]]:
+    """
+    Mark designs as assigned to a contact.
+
+    Designs already assigned to a contact are left untouched; ids that don't exist are reported.
+
+    Returns:
+        dict with 'linked', 'already_assigned' and 'not_found' design id lists
+    """
+    design_ids = list(dict.fromkeys(design_ids))
+    designs = await db.pod_designs.find(
+        {'id': {'$in': design_ids}},
+        {'_id': 0, 'id': 1, 'status': 1, 'contact_id': 1}
+    ).to_list(len(design_ids))
+
+    found = {design['id']: design for design in designs}
+    already_assigned = [
+        design_id for design_id, design in found.items()
+        if design.get('status') == 'assigned' and design.get('contact_id')
+    ]
+    to_link = [design_id for design_id in design_ids if design_id in found and design_id not in already_assigned]
+    not_found = [design_id for design_id in design_ids if design_id not in found]
+
+    if to_link:
+        now = datetime.now(timezone.utc).isoformat()
+        await db.pod_designs.update_many(
+            {'id': {'$in': to_link}},
+            {'$set': {
+                'contact_id': contact_id,
+                'guest_id': contact_id,
+                'guest_email': email,
+                'guest_name': name,
+                'guest_phone': phone,
+                'status': 'assigned',
+                'updated_at': now
+            }}
+        )
+        await db.pod_guest_contacts.update_one(
+            {'id': contact_id},
+            {
+                '$addToSet': {'designs': {'$each': to_link}},
+                '$set': {'updated_at': now}
+            }
+        )
+        logger.info(f"[POD LINK] Linked {len(to_link)} designs to contact {contact_id}")
+
+    return {'linked': to_link, 'already_assigned': already_assigned, 'not_found': not_found}
+
+
+async def link_session_designs(db, session_id: str, guest_id: str, email: str) -> List[str]:
+    """
+    Attach every design uploaded in a session that has no guest yet to the guest contact.
+
+    Returns:
+        Ids of the designs linked
+    """
+    designs = await db.pod_designs.find(
+        {'session_id': session_id, 'guest_id': {'$exists': False}},
+        {'_id': 0, 'id': 1}
+    ).to_list(None)
+    design_ids = [design['id'] for design in designs]
+    if not design_ids:
+        return []
+
+    await db.pod_designs.update_many(
+        # Re-check guest_id so a concurrent link isn't overwritten
+        {'id': {'$in': design_ids}, 'guest_id': {'$exists': False}},
+        {'$set': {
+            'guest_id': guest_id,
+            'guest_email': email,
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }}
+    )
+    await db.pod_guest_contacts.update_one(
+        {'id': guest_id},
+        {'$addToSet': {'designs': {'$each': design_ids}}}
+    )
+    logger.info(f"[POD] Linked {len(design_ids)} session designs to guest {guest_id}")
+    return design_ids
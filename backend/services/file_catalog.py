@@ -0,0 +1,416 @@
+"""
+File Catalog
+One document per uploaded file (local or in remote storage) in file_catalog, so the admin file
+manager is an indexed, paginated query instead of a walk over the uploads tree plus a scan of every
+collection that may hold a storage URL.
+
+The upload and delete paths keep it current: storage_service records every file it stores or
+deletes, and the few routes that write to the uploads directory themselves call record_local() /
+remove_local(). Per-source/per-type counts and byte totals are kept in file_catalog_stats with $inc
+as entries come and go, so the page header needs no aggregation.
+
+Anything that changes behind the API's back (files copied in by hand, objects removed in the
+Supabase dashboard) is picked up by the reconcilers. The local one is incremental: a directory's
+mtime changes whenever an entry is added, removed or renamed in it, so only directories whose
+mtime moved since the last pass have their files stat()ed and compared. The remote one lists the
+bucket and applies the difference; it runs less often. Both recompute the totals when done.
+
+'source' is 'local' or 'supabase' (any remote backend - the file manager labels it cloud);
+'storage_type' names the actual backend.
+"""
+import hashlib
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import DESCENDING, DeleteOne, ReplaceOne, ReturnDocument
+from starlette.concurrency import run_in_threadpool
+
+from core.pagination import fetch_keyset_page
+from services.image_derivatives import is_derivative_name
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'}
+
+# Newest first; id breaks ties (see core/pagination.py)
+FILE_SORT = [('modified_at', DESCENDING), ('id', DESCENDING)]
+
+# Fields kept for bookkeeping only
+_INTERNAL_FIELDS = {'_id': 0, 'directory': 0, 'recorded_by': 0}
+
+STATS_ID = 'totals'
+LOCAL_STATE_ID = 'local'
+
+BULK_WRITE_BATCH = 500
+
+
+def file_type_for(name: str) -> str:
+    return 'image' if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS else 'document'
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024:.1f} KB" if size < 1024 * 1024 else f"{size / (1024 * 1024):.2f} MB"
+
+
+def _is_catalogued(name: str) -> bool:
+    """Derivatives are shown through their originals; partial writes are not files yet"""
+    return not (name.startswith('.') or name.endswith('.part') or is_derivative_name(name))
+
+
+def _timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+def _entry(path: str, size: int, source: str, storage_type: str, directory: str,
+           modified_at: Optional[str], created_at: Optional[str] = None,
+           recorded_by: str = 'upload') -> Dict[str, Any]:
+    name = path.rsplit('/', 1)[-1]
+    folder = directory.split('/', 1)[0] if directory else ('uploads' if source == 'local' else storage_type)
+    return {
+        'id': hashlib.sha256(path.encode('utf-8')).hexdigest()[:24],
+        'name': name,
+        'path': path,
+        'folder': folder,
+        'directory': directory,
+        'size': size,
+        'type': file_type_for(name),
+        'extension': os.path.splitext(name)[1].lower(),
+        'source': source,
+        'storage_type': storage_type,
+        'created_at': created_at or modified_at,
+        'modified_at': modified_at,
+        'recorded_by': recorded_by
+    }
+
+
+class FileCatalog:
+    """Catalog of uploaded files under uploads_root and in remote storage"""
+
+    def __init__(self, db, uploads_root: Path, collection: str = 'file_catalog'):
+        self.collection = db[collection]
+        self.totals = db[f"{collection}_stats"]
+        self.state = db[f"{collection}_state"]
+        self.uploads_root = Path(uploads_root)
+        self.last_reconcile: Dict[str, Dict[str, Any]] = {}
+
+    # ---------- maintenance from the upload/delete paths ----------
+
+    def local_path(self, path: Path) -> Optional[str]:
+        """Catalog path (/uploads/...) of a file in the uploads tree, or None if it is outside it"""
+        try:
+            relative = Path(path).resolve().relative_to(self.uploads_root.resolve())
+        except ValueError:
+            return None
+        return f"/uploads/{relative.as_posix()}"
+
+    async def _count(self, entry: Dict[str, Any], count: int, size: int):
+        cell = f"{entry['source']}.{entry['type']}"
+        await self.totals.update_one(
+            {'_id': STATS_ID}, {'$inc': {f"count.{cell}": count, f"bytes.{cell}": size}}, upsert=True
+        )
+
+    async def record(self, path: str, size: int, storage_type: str, directory: str,
+                     modified_at: Optional[str] = None):
+        """
+        Add or update the entry for a stored file.
+        path is /uploads/... for local files and the public URL otherwise; directory is the
+        folder part of the storage path.
+        """
+        if not _is_catalogued(path.rsplit('/', 1)[-1]):
+            return
+        source = 'local' if storage_type == 'local' else 'supabase'
+        entry = _entry(path, size, source, storage_type, directory,
+                       modified_at or datetime.now(timezone.utc).isoformat())
+        previous = await self.collection.find_one_and_update(
+            {'path': path},
+            {'$set': {k: v for k, v in entry.items() if k != 'created_at'},
+             '$setOnInsert': {'created_at': entry['created_at']}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+            projection={'size': 1}
+        )
+        if previous is None:
+            await self._count(entry, 1, size)
+        elif previous.get('size', 0) != size:
+            # Same path, so same source and type: only the byte total moves
+            await self._count(entry, 0, size - previous.get('size', 0))
+
+    async def record_local(self, file_path: Path):
+        """Record a file the caller wrote into the uploads tree itself"""
+        path = self.local_path(file_path)
+        if path is None:
+            return
+        try:
+            stat = await run_in_threadpool(os.stat, file_path)
+        except FileNotFoundError:
+            return
+        directory = path[len('/uploads/'):].rpartition('/')[0]
+        await self.record(path, stat.st_size, 'local', directory, _timestamp(stat.st_mtime))
+
+    async def remove(self, paths: Sequence[str]):
+        # Derivatives are deleted alongside their originals but never had entries
+        for path in (p for p in paths if _is_catalogued(p.rsplit('/', 1)[-1])):
+            entry = await self.collection.find_one_and_delete({'path': path}, projection={'_id': 0})
+            if entry is not None:
+                await self._count(entry, -1, -entry['size'])
+
+    async def remove_local(self, file_path: Path):
+        path = self.local_path(file_path)
+        if path is not None:
+            await self.remove([path])
+
+    # ---------- reconciliation ----------
+
+    def _scan_local(self, known: Dict[str, int]) -> Tuple[Dict[str, Dict[str, Tuple[int, float]]], Dict[str, int]]:
+        """
+        Walk the uploads tree; stat files only in directories whose mtime differs from `known`.
+        Returns ({changed directory: {name: (size, mtime)}}, {directory: mtime_ns} for every directory).
+        """
+        changed: Dict[str, Dict[str, Tuple[int, float]]] = {}
+        seen: Dict[str, int] = {}
+        pending = ['']
+        while pending:
+            directory = pending.pop()
+            full = self.uploads_root / directory if directory else self.uploads_root
+            try:
+                mtime_ns = full.stat().st_mtime_ns
+                entries = list(os.scandir(full))
+            except FileNotFoundError:
+                continue
+            seen[directory] = mtime_ns
+            dirty = known.get(directory) != mtime_ns
+            files = {}
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(f"{directory}/{entry.name}" if directory else entry.name)
+                elif dirty and entry.is_file(follow_symlinks=False) and _is_catalogued(entry.name):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files[entry.name] = (stat.st_size, stat.st_mtime)
+            if dirty:
+                changed[directory] = files
+        return changed, seen
+
+    async def _apply(self, operations: List[Any]) -> int:
+        applied = 0
+        for start in range(0, len(operations), BULK_WRITE_BATCH):
+            batch = operations[start:start + BULK_WRITE_BATCH]
+            await self.collection.bulk_write(batch, ordered=False)
+            applied += len(batch)
+        return applied
+
+    async def reconcile_local(self) -> Dict[str, Any]:
+        """Bring local entries in line with the uploads tree, looking only at directories that changed"""
+        state = await self.state.find_one({'_id': LOCAL_STATE_ID}) or {}
+        known = {directory: mtime for directory, mtime in state.get('directories', [])}
+        # Entries recorded after this by the upload path may be missing from the scan; they are left alone
+        started = datetime.now(timezone.utc).isoformat()
+        changed, seen = await run_in_threadpool(self._scan_local, known)
+
+        operations = []
+        removed_directories = [directory for directory in known if directory not in seen]
+        if removed_directories:
+            operations += [
+                DeleteOne({'_id': doc['_id']})
+                async for doc in self.collection.find(
+                    {'source': 'local', 'directory': {'$in': removed_directories}, 'modified_at': {'$lt': started}},
+                    {'_id': 1}
+                )
+            ]
+
+        added, updated, deleted = 0, 0, len(operations)
+        for directory, files in changed.items():
+            existing = {
+                doc['name']: doc async for doc in self.collection.find(
+                    {'source': 'local', 'directory': directory},
+                    {'name': 1, 'size': 1, 'created_at': 1, 'modified_at': 1}
+                )
+            }
+            for name, (size, mtime) in files.items():
+                doc = existing.pop(name, None)
+                # Size only: entries recorded at upload carry the upload time, not the file mtime
+                if doc is not None and doc.get('size') == size:
+                    continue
+                path = f"/uploads/{directory}/{name}" if directory else f"/uploads/{name}"
+                entry = _entry(path, size, 'local', 'local', directory, _timestamp(mtime),
+                               created_at=doc.get('created_at') if doc else None, recorded_by='reconcile')
+                operations.append(ReplaceOne({'path': path}, entry, upsert=True))
+                if doc is None:
+                    added += 1
+                else:
+                    updated += 1
+            for doc in existing.values():
+                if (doc.get('modified_at') or '') >= started:
+                    continue
+                operations.append(DeleteOne({'_id': doc['_id']}))
+                deleted += 1
+
+        await self._apply(operations)
+        await self.state.replace_one(
+            {'_id': LOCAL_STATE_ID},
+            {'directories': [[directory, mtime] for directory, mtime in seen.items()],
+             'reconciled_at': datetime.now(timezone.utc).isoformat()},
+            upsert=True
+        )
+        if operations:
+            await self.recount()
+        report = {
+            'directories': len(seen),
+            'directories_scanned': len(changed),
+            'added': added,
+            'updated': updated,
+            'deleted': deleted,
+            'reconciled_at': datetime.now(timezone.utc).isoformat()
+        }
+        self.last_reconcile['local'] = report
+        if operations:
+            logger.info(f"[FILE CATALOG] Local reconcile: +{added} ~{updated} -{deleted} ({len(changed)} directories scanned)")
+        return report
+
+    async def reconcile_remote(self, backend) -> Dict[str, Any]:
+        """Bring entries for a remote backend in line with a listing of its bucket"""
+        started = datetime.now(timezone.utc).isoformat()
+        listed = {}
+        for item in await backend.list_files():
+            if _is_catalogued(item['path'].rsplit('/', 1)[-1]):
+                listed[backend.public_url(item['path'])] = item
+
+        existing = {
+            doc['path']: doc async for doc in self.collection.find(
+                {'source': 'supabase', 'storage_type': backend.name},
+                {'path': 1, 'size': 1, 'created_at': 1, 'modified_at': 1}
+            )
+        }
+        operations = []
+        added = updated = 0
+        for url, item in listed.items():
+            doc = existing.pop(url, None)
+            # Entries without modified_at (from earlier reconciles) are rewritten so the keyset cursor can pass them
+            if doc is not None and doc.get('size') == item['size'] and doc.get('modified_at'):
+                continue
+            directory = item['path'].rpartition('/')[0]
+            created_at = doc.get('created_at') if doc else None
+            # Some backends list objects without a timestamp; the first scan that saw the file stands in
+            modified_at = item['modified_at'] or created_at or started
+            entry = _entry(url, item['size'], 'supabase', backend.name, directory, modified_at,
+                           created_at=created_at, recorded_by='reconcile')
+            operations.append(ReplaceOne({'path': url}, entry, upsert=True))
+            if doc is None:
+                added += 1
+            else:
+                updated += 1
+        stale = [doc for doc in existing.values() if (doc.get('modified_at') or '') < started]
+        operations += [DeleteOne({'_id': doc['_id']}) for doc in stale]
+
+        await self._apply(operations)
+        if operations:
+            await self.recount()
+        report = {
+            'backend': backend.name,
+            'objects': len(listed),
+            'added': added,
+            'updated': updated,
+            'deleted': len(stale),
+            'reconciled_at': datetime.now(timezone.utc).isoformat()
+        }
+        self.last_reconcile[backend.name] = report
+        if operations:
+            logger.info(f"[FILE CATALOG] {backend.name} reconcile: +{added} ~{updated} -{len(stale)}")
+        return report
+
+    async def recount(self):
+        """Recompute the totals from the entries (after reconciling, or to repair drift)"""
+        counts, sizes = {}, {}
+        async for group in self.collection.aggregate([
+            {'$group': {'_id': {'source': '$source', 'type': '$type'}, 'count': {'$sum': 1}, 'bytes': {'$sum': '$size'}}}
+        ]):
+            cell = f"{group['_id']['source']}.{group['_id']['type']}"
+            counts[cell] = group['count']
+            sizes[cell] = group['bytes']
+        await self.totals.replace_one(
+            {'_id': STATS_ID},
+            {'count': _nest(counts), 'bytes': _nest(sizes)},
+            upsert=True
+        )
+
+    # ---------- queries ----------
+
+    @staticmethod
+    def query(file_type: Optional[str] = None, source: Optional[str] = None,
+              search: Optional[str] = None) -> Dict[str, Any]:
+        query: Dict[str, Any] = {}
+        if file_type and file_type != 'all':
+            query['type'] = file_type
+        if source and source != 'all':
+            query['source'] = source
+        if search:
+            pattern = {'$regex': re.escape(search), '$options': 'i'}
+            query['$or'] = [{'name': pattern}, {'folder': pattern}]
+        return query
+
+    async def page(self, limit: int, cursor: Optional[str] = None, file_type: Optional[str] = None,
+                   source: Optional[str] = None, search: Optional[str] = None
+                   ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        files, next_cursor = await fetch_keyset_page(
+            self.collection, self.query(file_type, source, search), _INTERNAL_FIELDS, limit, cursor, sort=FILE_SORT
+        )
+        for f in files:
+            f['size_formatted'] = format_size(f['size']) if f['source'] == 'local' or f['size'] else 'N/A'
+        return files, next_cursor
+
+    async def stats(self, file_type: Optional[str] = None, source: Optional[str] = None,
+                    search: Optional[str] = None) -> Dict[str, Any]:
+        """Counts and total size for a filter; from the running totals unless a search narrows it"""
+        cells: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        if search:
+            async for group in self.collection.aggregate([
+                {'$match': self.query(file_type, source, search)},
+                {'$group': {'_id': {'source': '$source', 'type': '$type'}, 'count': {'$sum': 1}, 'bytes': {'$sum': '$size'}}}
+            ]):
+                cells[(group['_id']['source'], group['_id']['type'])] = (group['count'], group['bytes'])
+        else:
+            totals = await self.totals.find_one({'_id': STATS_ID}) or {}
+            for cell_source, types in (totals.get('count') or {}).items():
+                for cell_type, count in types.items():
+                    size = ((totals.get('bytes') or {}).get(cell_source) or {}).get(cell_type, 0)
+                    cells[(cell_source, cell_type)] = (count, size)
+
+        def total(match_source: Optional[str] = None, match_type: Optional[str] = None) -> Tuple[int, int]:
+            count = size = 0
+            for (cell_source, cell_type), (cell_count, cell_size) in cells.items():
+                if source and source != 'all' and cell_source != source:
+                    continue
+                if file_type and file_type != 'all' and cell_type != file_type:
+                    continue
+                if match_source and cell_source != match_source:
+                    continue
+                if match_type and cell_type != match_type:
+                    continue
+                count += cell_count
+                size += cell_size
+            return count, size
+
+        count, total_size = total()
+        return {
+            'total': count,
+            'total_size': total_size,
+            'total_size_formatted': f"{total_size / (1024*1024):.2f} MB" if total_size > 0 else '0 MB',
+            'local': total(match_source='local')[0],
+            'supabase': total(match_source='supabase')[0],
+            'images': total(match_type='image')[0],
+            'documents': total(match_type='document')[0]
+        }
+
+
+def _nest(cells: Dict[str, int]) -> Dict[str, Dict[str, int]]:
+    nested: Dict[str, Dict[str, int]] = {}
+    for cell, value in cells.items():
+        source, file_type = cell.split('.', 1)
+        nested.setdefault(source, {})[file_type] = value
+    return nested
@@ -0,0 +1,180 @@
+"""
+Image Derivatives
+Fixed-size WebP thumbnails and previews of uploaded images, generated once at upload time so
+galleries and catalog lists never send full-resolution originals to the browser.
+
+Rendering (core/imaging.py) runs in a process pool. Derivatives are stored next to the original
+(products/abc.jpg -> products/abc.thumb.webp) on the same backend, and recorded in
+image_derivatives keyed by the original's URL, so list endpoints can attach them to any document
+holding that URL with one query.
+"""
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.imaging import DERIVATIVE_SPECS, WEBP_QUALITY, render_derivatives
+from services.storage_service import delete_files_from_supabase, delete_stored_files, store_file
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_CONTENT_TYPE = 'image/webp'
+
+LOCAL_URL_PREFIX = '/api/uploads/'
+
+# Response field each derivative is returned under by attach()
+DERIVATIVE_FIELDS = {
+    'thumb': 'thumbnail_url',
+    'preview': 'preview_url'
+}
+
+
+def derivative_path(storage_path: str, name: str) -> str:
+    """Storage path of a derivative, next to its original"""
+    stem, _ = os.path.splitext(storage_path)
+    return f"{stem}.{name}.webp"
+
+
+def is_derivative_name(file_name: str) -> bool:
+    return any(file_name.endswith(f".{name}.webp") for name in DERIVATIVE_SPECS)
+
+
+def _first_url(value: Any) -> Optional[str]:
+    if isinstance(value, list):
+        value = next((item for item in value if isinstance(item, str) and item), None)
+    return value if isinstance(value, str) and value else None
+
+
+class ImageDerivatives:
+    """Generates, stores and looks up derivatives of uploaded images"""
+
+    def __init__(self, db, max_workers: int = 2, specs: Dict[str, int] = DERIVATIVE_SPECS,
+                 quality: int = WEBP_QUALITY, collection: str = 'image_derivatives'):
+        self.collection = db[collection]
+        self.max_workers = max_workers
+        self.specs = dict(specs)
+        self.quality = quality
+        self.enabled = importlib.util.find_spec('PIL') is not None
+        if not self.enabled:
+            logger.warning("[DERIVATIVES] Pillow not installed - originals will be served without thumbnails")
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.generated = 0
+        self.failures = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the app process holds Mongo client threads that must not be copied
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    async def create(self, source_path: Path, storage_path: str, original_url: str,
+                     storage_type: Optional[str] = None) -> Dict[str, str]:
+        """
+        Render and store the derivatives of a local image file.
+        Returns {name: url}; empty if the file is not an image Pillow can read.
+        """
+        if not self.enabled:
+            return {}
+        try:
+            rendered, (width, height) = await asyncio.get_running_loop().run_in_executor(
+                self._pool(), render_derivatives, str(source_path), self.specs, self.quality
+            )
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"[DERIVATIVES] Could not render {storage_path}: {e}")
+            return {}
+
+        urls = {}
+        for name, (content, _, _) in rendered.items():
+            urls[name], _ = await store_file(
+                derivative_path(storage_path, name), content, DERIVATIVE_CONTENT_TYPE, storage_type=storage_type
+            )
+        await self.collection.update_one(
+            {'_id': original_url},
+            {'$set': {
+                'derivatives': urls,
+                'storage_path': storage_path,
+                # Pixel size of the original, for callers working from a derivative (mockup renders).
+                # Records written before original_width/height held a derivative's size in width/height
+                'original_width': width,
+                'original_height': height,
+                'created_at': datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+        self.generated += 1
+        return urls
+
+    async def lookup(self, urls: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """Derivatives of each original URL that has them"""
+        urls = list({url for url in urls if url})
+        if not urls:
+            return {}
+        docs = await self.collection.find({'_id': {'$in': urls}}, {'derivatives': 1}).to_list(len(urls))
+        return {doc['_id']: doc.get('derivatives', {}) for doc in docs}
+
+    async def get(self, original_url: str) -> Optional[Dict[str, Any]]:
+        """The derivatives record of one original ({'derivatives', 'original_width', 'original_height', ...}), if any"""
+        return await self.collection.find_one({'_id': original_url}, {'_id': 0})
+
+    async def attach(self, items: List[Dict[str, Any]], url_field: str, prefix: str = '') -> List[Dict[str, Any]]:
+        """
+        Add thumbnail_url/preview_url (with prefix) to each item, from the image in url_field.
+        Items without derivatives get the original URL, so clients can always use the fields.
+        """
+        found = await self.lookup(_first_url(item.get(url_field)) for item in items)
+        for item in items:
+            original = _first_url(item.get(url_field))
+            if not original:
+                continue
+            derivatives = found.get(original, {})
+            for name, field in DERIVATIVE_FIELDS.items():
+                item[f"{prefix}{field}"] = derivatives.get(name, original)
+        return items
+
+    async def forget(self, original_url: str):
+        await self.collection.delete_one({'_id': original_url})
+
+    async def forget_many(self, original_urls: Iterable[str]):
+        urls = list({url for url in original_urls if url})
+        if urls:
+            await self.collection.delete_many({'_id': {'$in': urls}})
+
+    async def delete(self, original_url: str) -> int:
+        """Delete the stored derivatives of an original that is being deleted, and their record"""
+        record = await self.collection.find_one_and_delete(
+            {'_id': original_url}, {'storage_path': 1, 'derivatives': 1}
+        )
+        if not record or not record.get('storage_path'):
+            return 0
+        local_paths, remote_paths = [], []
+        for name, url in (record.get('derivatives') or {}).items():
+            # A derivative lands in local storage when the remote backend refused it
+            paths = local_paths if url.startswith(LOCAL_URL_PREFIX) else remote_paths
+            paths.append(derivative_path(record['storage_path'], name))
+        deleted = 0
+        if local_paths:
+            deleted += await delete_stored_files(local_paths, 'local')
+        if remote_paths:
+            deleted += await delete_files_from_supabase(remote_paths)
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'workers': self.max_workers,
+            'specs': self.specs,
+            'generated': self.generated,
+            'failures': self.failures
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
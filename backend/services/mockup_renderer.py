@@ -0,0 +1,244 @@
+"""
+Mockup Renderer
+Composites a POD design onto its garment photo on the server, so the designer page no longer
+rasterises its canvas and uploads a full-size PNG from the customer's phone.
+
+The design's saved transform (scale, position_x/y, rotation, print_size) and the garment's print
+area are applied by core/imaging.composite_mockup in a process pool. Designs are read from their
+preview derivative when they have one (it is larger than the design can appear on the stage) and
+garment photos likewise; local files are opened in place and remote ones come through the image
+proxy's disk cache.
+
+Every render is keyed by what it depends on - design content hash, garment photo and print area,
+normalised transform and output settings - and recorded in mockup_renders. A repeat of the same
+mockup, for this design or any other with the same content, returns the stored URL without
+rendering or uploading anything. Rendered files are content-named (immutable) and may be shared
+by several designs, so designs point at them with mockup_render_key rather than a storage path of
+their own; the storage garbage collector removes them once no design or order holds their URL.
+"""
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+from core.imaging import MOCKUP_CANVAS_SIZE, MOCKUP_PIXEL_RATIO, MOCKUP_QUALITY, composite_mockup
+from core.uploads import fingerprinted_name
+from services.content_store import sha256_from_url
+from services.storage_service import store_file
+
+logger = logging.getLogger(__name__)
+
+# Bump when composite_mockup changes its output, so earlier renders are not reused
+# (2: designs placed from a preview were sized from the thumbnail's width instead of the original's)
+RENDER_VERSION = 2
+
+MOCKUP_CONTENT_TYPE = 'image/webp'
+MOCKUP_FOLDER = 'pod-designs/mockups'
+
+LOCAL_URL_PREFIX = '/api/uploads/'
+
+
+def _garment_image_url(item: Dict[str, Any]) -> Optional[str]:
+    """The photo the designer page draws under the design"""
+    return item.get('base_image_url') or item.get('image_url') or item.get('image') or None
+
+
+def normalise_transform(design: Dict[str, Any]) -> Dict[str, Any]:
+    """The transform fields that affect a render, rounded so float noise does not defeat the cache"""
+    return {
+        'scale': round(float(design.get('scale') or 1.0), 4),
+        'position_x': round(float(design.get('position_x') or 0), 1),
+        'position_y': round(float(design.get('position_y') or 0), 1),
+        'rotation': round(float(design.get('rotation') or 0), 1) % 360,
+        'print_size': design.get('print_size') or 'a4'
+    }
+
+
+class MockupRenderer:
+    """Renders, stores and caches POD mockups"""
+
+    def __init__(self, db, derivatives, image_proxy, uploads_root: Path, print_sizes: Dict[str, Dict[str, Any]],
+                 default_print_area: Dict[str, float], max_workers: int = 2, shading: float = 0.0,
+                 quality: int = MOCKUP_QUALITY, collection: str = 'mockup_renders'):
+        self.collection = db[collection]
+        self.garments = db.pod_clothing_items
+        self.derivatives = derivatives
+        self.image_proxy = image_proxy
+        self.uploads_root = Path(uploads_root)
+        self.print_sizes = print_sizes
+        self.default_print_area = default_print_area
+        self.max_workers = max_workers
+        self.shading = shading
+        self.quality = quality
+        self.enabled = all(importlib.util.find_spec(name) is not None for name in ('PIL', 'numpy'))
+        if not self.enabled:
+            logger.warning("[MOCKUPS] Pillow/NumPy not installed - mockups must be uploaded by the client")
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Renders in progress, so concurrent requests for one mockup render it once
+        self._rendering: Dict[str, asyncio.Future] = {}
+        self.rendered = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the app process holds Mongo client threads that must not be copied
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def render_key(self, design_hash: str, garment_url: str, print_area: Dict[str, float],
+                   transform: Dict[str, Any]) -> str:
+        inputs = {
+            'version': RENDER_VERSION,
+            'design': design_hash,
+            'garment': garment_url,
+            'print_area': {k: print_area.get(k) for k in ('x', 'y', 'width', 'height')},
+            'transform': transform,
+            'output': [MOCKUP_CANVAS_SIZE, MOCKUP_PIXEL_RATIO, self.shading, self.quality]
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+    async def render(self, design: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The mockup of a pod_designs record with its current transform, rendering it if no
+        identical mockup exists yet. Returns {'key', 'public_url', 'cached'}.
+        """
+        if not self.enabled:
+            raise HTTPException(status_code=503, detail="Server-side mockup rendering is not available")
+
+        garment = await self.garments.find_one(
+            {'id': design.get('product_id')}, {'_id': 0, 'print_area': 1, 'base_image_url': 1, 'image_url': 1, 'image': 1}
+        )
+        garment_url = _garment_image_url(garment or {})
+        if not garment_url:
+            raise HTTPException(status_code=422, detail="Garment has no image to render on")
+        print_area = (garment or {}).get('print_area') or self.default_print_area
+        transform = normalise_transform(design)
+        design_url = design.get('original_file_url')
+        if not design_url:
+            raise HTTPException(status_code=422, detail="Design has no original file")
+        design_hash = design.get('content_sha256') or sha256_from_url(design_url) \
+            or hashlib.sha256(design_url.encode('utf-8')).hexdigest()
+
+        key = self.render_key(design_hash, garment_url, print_area, transform)
+        cached = await self.collection.find_one({'_id': key}, {'public_url': 1})
+        if cached is not None:
+            self.cache_hits += 1
+            return {'key': key, 'public_url': cached['public_url'], 'cached': True}
+
+        pending = self._rendering.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return {**await asyncio.shield(pending), 'cached': True}
+
+        future = asyncio.get_running_loop().create_future()
+        self._rendering[key] = future
+        try:
+            public_url = await self._render(key, design_hash, design_url, garment_url, print_area, transform)
+            result = {'key': key, 'public_url': public_url}
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a render nobody else waited on does not log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._rendering.pop(key, None)
+        return {**result, 'cached': False}
+
+    async def _render(self, key: str, design_hash: str, design_url: str, garment_url: str,
+                      print_area: Dict[str, float], transform: Dict[str, Any]) -> str:
+        design_source, design_size = await self._render_source(design_url)
+        garment_source, _ = await self._render_source(garment_url)
+        handles: List[Any] = []
+        try:
+            design_path = await self._local_file(design_source, handles)
+            garment_path = await self._local_file(garment_source, handles)
+            scale_factor = self.print_sizes.get(transform['print_size'], {}).get('scale_factor', 0.5)
+            content, width, height = await asyncio.get_running_loop().run_in_executor(
+                self._pool(), composite_mockup, str(garment_path), str(design_path), design_size,
+                transform, print_area, scale_factor, MOCKUP_CANVAS_SIZE, MOCKUP_PIXEL_RATIO,
+                self.shading, self.quality
+            )
+        except HTTPException:
+            self.failures += 1
+            raise
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"[MOCKUPS] Render {key[:12]} failed: {e}")
+            raise HTTPException(status_code=500, detail="Failed to render mockup")
+        finally:
+            for handle in handles:
+                handle.close()
+
+        storage_path = f"{MOCKUP_FOLDER}/{fingerprinted_name('mockup', key, '.webp')}"
+        public_url, storage_type = await store_file(storage_path, content, MOCKUP_CONTENT_TYPE)
+        try:
+            await self.collection.insert_one({
+                '_id': key,
+                'public_url': public_url,
+                'storage_path': storage_path,
+                'storage_type': storage_type,
+                'size': len(content),
+                'width': width,
+                'height': height,
+                'design_sha256': design_hash,
+                'garment_url': garment_url,
+                'transform': transform,
+                'created_at': datetime.now(timezone.utc).isoformat()
+            })
+        except DuplicateKeyError:
+            # Another worker rendered the same mockup to the same path first
+            pass
+        self.rendered += 1
+        logger.info(f"[MOCKUPS] Rendered {storage_path} ({len(content)} bytes, {width}x{height})")
+        return public_url
+
+    async def _render_source(self, url: str) -> Tuple[str, Optional[Tuple[int, int]]]:
+        """URL to render from (the preview derivative if there is one) and the original's pixel size"""
+        record = await self.derivatives.get(url) if self.derivatives is not None else None
+        preview = (record or {}).get('derivatives', {}).get('preview')
+        if preview and record.get('original_width') and record.get('original_height'):
+            return preview, (record['original_width'], record['original_height'])
+        return url, None
+
+    async def _local_file(self, url: str, handles: List[Any]) -> Path:
+        """A local path holding the image at url; remote images are fetched into the proxy cache"""
+        if url.startswith(LOCAL_URL_PREFIX):
+            path = (self.uploads_root / url[len(LOCAL_URL_PREFIX):]).resolve()
+            if not path.is_relative_to(self.uploads_root.resolve()) or not path.is_file():
+                raise HTTPException(status_code=422, detail="Image file for the mockup is missing")
+            return path
+        if not url.startswith(('http://', 'https://')):
+            raise HTTPException(status_code=422, detail="Image for the mockup is not stored by the API")
+        _, handle = await self.image_proxy.open(url)
+        # Held open until the render is done; the path is what crosses to the worker process
+        handles.append(handle)
+        return Path(handle.name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'workers': self.max_workers,
+            'shading': self.shading,
+            'rendered': self.rendered,
+            'cache_hits': self.cache_hits,
+            'coalesced': self.coalesced,
+            'failures': self.failures
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
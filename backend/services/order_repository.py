@@ -0,0 +1,128 @@
+"""
+Order Repository
+Single lookup path for orders. Every accepted order code (TM-, FAB-, SOU-, CUS- codes,
+legacy UUID ids) is normalized into the indexed `lookup_keys` array, so reads and writes
+are one index point-lookup instead of `$or: [{id}, {order_id}]` scans.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_FIELD = 'lookup_keys'
+
+# Set once every legacy order has been backfilled with lookup_keys
+_migration_complete = False
+
+
+def normalize_order_code(code: Any) -> str:
+    """Normalize an order code the way the public tracker does (trimmed, upper-case)"""
+    if code is None:
+        return ''
+    return str(code).strip().upper()
+
+
+def order_lookup_keys(order: Dict[str, Any]) -> List[str]:
+    """
+    Build the lookup keys for an order document.
+
+    Orders carry their code in `order_id` and/or `id`. Legacy orders used a UUID for `id`
+    and the human-readable code for `order_id`; souvenir and fabric orders store the
+    SOU-/FAB- code in both. All variants resolve to the same document.
+    """
+    keys = []
+    for field in ('order_id', 'id'):
+        key = normalize_order_code(order.get(field))
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def order_key_filter(code: str) -> Dict[str, Any]:
+    """Mongo filter that resolves any accepted order code"""
+    if _migration_complete:
+        return {LOOKUP_FIELD: normalize_order_code(code)}
+    # Until the backfill finishes, legacy documents may not have lookup_keys yet
+    return {'$or': [
+        {LOOKUP_FIELD: normalize_order_code(code)},
+        {'id': code},
+        {'order_id': code}
+    ]}
+
+
+async def insert_order(db, order: Dict[str, Any]):
+    """Insert a new order with its lookup keys populated"""
+    order[LOOKUP_FIELD] = order_lookup_keys(order)
+    return await db.orders.insert_one(order)
+
+
+async def find_order(db, code: str, projection: Optional[Dict[str, Any]] = None,
+                     extra_filter: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Find one order by any accepted code.
+
+    Args:
+        db: Database instance
+        code: Order code or legacy id
+        projection: Mongo projection (defaults to hiding _id and lookup_keys)
+        extra_filter: Additional conditions, e.g. {'contains_branded_items': True}
+    """
+    query = order_key_filter(code)
+    if extra_filter:
+        query = {**query, **extra_filter}
+    if projection is None:
+        projection = {'_id': 0, LOOKUP_FIELD: 0}
+    return await db.orders.find_one(query, projection)
+
+
+async def update_order(db, code: str, update: Dict[str, Any]):
+    """Apply an update document to the order identified by any accepted code"""
+    return await db.orders.update_one(order_key_filter(code), update)
+
+
+async def migrate_order_lookup_keys(db, batch_size: int = 500) -> int:
+    """
+    Backfill lookup_keys on legacy orders in batches.
+    Runs in the background at startup; once done, lookups drop the `$or` fallback.
+
+    Returns:
+        Number of orders updated
+    """
+    global _migration_complete
+
+    updated = 0
+    try:
+        while True:
+            legacy_orders = await db.orders.find(
+                {LOOKUP_FIELD: {'$exists': False}},
+                {'_id': 1, 'id': 1, 'order_id': 1}
+            ).limit(batch_size).to_list(batch_size)
+
+            if not legacy_orders:
+                break
+
+            operations = [
+                UpdateOne({'_id': order['_id']}, {'$set': {LOOKUP_FIELD: order_lookup_keys(order)}})
+                for order in legacy_orders
+            ]
+            result = await db.orders.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+
+            # Yield between batches so request handling is not starved
+            await asyncio.sleep(0)
+
+        _migration_complete = True
+        logger.info(f"[ORDERS] lookup_keys migration complete - {updated} legacy orders updated")
+    except Exception as e:
+        logger.error(f"[ORDERS] lookup_keys migration failed after {updated} orders: {str(e)}")
+
+    return updated
+
+
+def strip_lookup_keys(order: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop internal fields before returning an order to a client"""
+    return {k: v for k, v in order.items() if k not in ('_id', LOOKUP_FIELD)}
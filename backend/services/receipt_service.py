@@ -5,7 +5,6 @@ Generates professional payment receipts for quotes marked as paid.
 
 import io
 import logging
-from pathlib import Path
 from datetime import datetime, timezone
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -310,7 +309,7 @@ def generate_receipt_pdf(quote_data: dict, order_id: str = None) -> bytes:
 
 async def upload_receipt_to_supabase(pdf_bytes: bytes, quote_id: str) -> str:
     """
-    Upload receipt PDF to Supabase storage.
+    Upload receipt PDF to the storage backend (Supabase by default), or local storage as fallback.
     
     Args:
         pdf_bytes: PDF file content as bytes
@@ -319,54 +318,10 @@ async def upload_receipt_to_supabase(pdf_bytes: bytes, quote_id: str) -> str:
     Returns:
         str: Public URL of uploaded receipt
     """
-    from services.storage_service import get_supabase_client, get_supabase_config
+    from services.storage_service import upload_bytes
     
-    client = get_supabase_client()
+    filename = f"receipts/receipt-{quote_id}.pdf"
+    public_url = await upload_bytes(filename, pdf_bytes, "application/pdf")
     
-    if client is None:
-        # Fallback to local storage
-        local_dir = Path('/app/backend/uploads/receipts')
-        local_dir.mkdir(exist_ok=True, parents=True)
-        
-        filename = f"receipt-{quote_id}.pdf"
-        filepath = local_dir / filename
-        
-        with open(filepath, 'wb') as f:
-            f.write(pdf_bytes)
-        
-        return f"/uploads/receipts/{filename}"
-    
-    try:
-        config = get_supabase_config()
-        bucket = config['bucket']
-        
-        filename = f"receipts/receipt-{quote_id}.pdf"
-        
-        # Upload to Supabase
-        response = client.storage.from_(bucket).upload(
-            filename,
-            pdf_bytes,
-            file_options={"content-type": "application/pdf", "upsert": "true"}
-        )
-        
-        # Get public URL
-        public_url = client.storage.from_(bucket).get_public_url(filename)
-        
-        logger.info(f"Receipt uploaded to Supabase: {filename}")
-        return public_url
-        
-    except Exception as e:
-        logger.error(f"Failed to upload receipt to Supabase: {e}")
-        
-        # Fallback to local storage
-        from pathlib import Path
-        local_dir = Path('/app/backend/uploads/receipts')
-        local_dir.mkdir(exist_ok=True, parents=True)
-        
-        filename = f"receipt-{quote_id}.pdf"
-        filepath = local_dir / filename
-        
-        with open(filepath, 'wb') as f:
-            f.write(pdf_bytes)
-        
-        return f"/uploads/receipts/{filename}"
+    logger.info(f"Receipt uploaded: {public_url}")
+    return public_url
@@ -0,0 +1,417 @@
+"""
+Storage Backends
+One async interface over the places uploaded files live: local disk, Supabase Storage and any
+S3-compatible bucket, plus an in-memory fake for tests.
+
+The Supabase and S3 SDKs are synchronous, so every call runs on the backend's own bounded thread
+pool and never blocks the event loop. The pool size is the backend's concurrency limit: a burst of
+uploads queues on the pool instead of opening unbounded connections to the provider. Transient
+failures are retried with exponential backoff and jitter; errors that will not go away on retry
+(bad credentials, missing object, payload too large) are raised straight away.
+"""
+import asyncio
+import functools
+import logging
+import os
+import random
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# A local file to stream from, or the content itself
+UploadSource = Union[Path, bytes]
+
+# Supabase/S3 error fragments that retrying cannot fix
+PERMANENT_ERROR_MARKERS = (
+    'unauthorized', 'signature verification failed', 'forbidden', 'not found',
+    'already exists', 'payload too large', 'invalid key', 'accessdenied', 'nosuchbucket'
+)
+
+
+def _batches(items: Sequence[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield list(items[start:start + size])
+
+
+class StorageBackend:
+    """
+    Base class: runs blocking SDK calls on a bounded executor with retries.
+    Subclasses implement the _sync_* methods and public_url/path_from_url.
+    """
+
+    name = 'base'
+    # Largest number of paths one delete call may carry
+    delete_batch_size = 100
+
+    def __init__(self, max_concurrency: int = 4, max_retries: int = 3, backoff_seconds: float = 0.5):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"storage-{self.name}")
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+
+    def is_retryable(self, error: Exception) -> bool:
+        message = str(error).lower()
+        return not any(marker in message for marker in PERMANENT_ERROR_MARKERS)
+
+    async def _call(self, operation: str, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        self.calls += 1
+        attempt = 0
+        while True:
+            self.in_flight += 1
+            try:
+                return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+            except Exception as e:
+                if attempt >= self.max_retries or not self.is_retryable(e):
+                    self.failures += 1
+                    raise
+                # Exponential backoff with jitter, so retries from many requests do not line up
+                delay = self.backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"[STORAGE:{self.name}] {operation} failed (attempt {attempt}), retrying in {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+            finally:
+                self.in_flight -= 1
+
+    async def upload(self, storage_path: str, source: UploadSource, content_type: str,
+                     consume: bool = False) -> str:
+        """
+        Store source at storage_path and return its public URL.
+        consume=True means the caller is done with a source file, so a backend may move it.
+        """
+        await self._call('upload', self._sync_upload, storage_path, source, content_type, consume)
+        return self.public_url(storage_path)
+
+    async def delete(self, storage_paths: Sequence[str]) -> int:
+        """Delete paths in as few calls as the backend allows; returns how many were deleted"""
+        deleted = 0
+        for batch in _batches([path for path in storage_paths if path], self.delete_batch_size):
+            deleted += await self._call('delete', self._sync_delete, batch)
+        return deleted
+
+    async def list_files(self) -> List[Dict[str, Any]]:
+        """Every stored object as {'path', 'size', 'modified_at'} (ISO string or None); used by reconcilers"""
+        return await self._call('list', self._sync_list)
+
+    async def ensure_ready(self) -> bool:
+        """Check (and if needed create) the bucket; False means the backend is unusable"""
+        try:
+            return await self._call('ensure_ready', self._sync_ensure_ready)
+        except Exception as e:
+            logger.error(f"[STORAGE:{self.name}] Not ready: {e}")
+            return False
+
+    def public_url(self, storage_path: str) -> str:
+        raise NotImplementedError
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        """Storage path for a public URL of this backend, or None if the URL is not ours"""
+        raise NotImplementedError
+
+    def _sync_upload(self, storage_path: str, source: UploadSource, content_type: str, consume: bool):
+        raise NotImplementedError
+
+    def _sync_delete(self, storage_paths: List[str]) -> int:
+        raise NotImplementedError
+
+    def _sync_list(self) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _sync_ensure_ready(self) -> bool:
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'calls': self.calls,
+            'retries': self.retries,
+            'failures': self.failures
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+class LocalStorageBackend(StorageBackend):
+    """Files under a local directory served at url_prefix (the /api/uploads static mount)"""
+
+    name = 'local'
+    delete_batch_size = 1000
+
+    def __init__(self, root: Path, url_prefix: str = '/api/uploads', **kwargs):
+        kwargs.setdefault('max_retries', 0)
+        super().__init__(**kwargs)
+        self.root = Path(root)
+        self.url_prefix = url_prefix.rstrip('/')
+
+    def is_retryable(self, error: Exception) -> bool:
+        return False
+
+    def _resolve(self, storage_path: str) -> Path:
+        path = (self.root / storage_path.lstrip('/')).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Storage path escapes the upload directory: {storage_path}")
+        return path
+
+    def _sync_upload(self, storage_path: str, source: UploadSource, content_type: str, consume: bool):
+        destination = self._resolve(storage_path)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        partial = destination.with_name(destination.name + '.part')
+        try:
+            if isinstance(source, bytes):
+                partial.write_bytes(source)
+            elif consume:
+                os.replace(source, partial)
+            else:
+                shutil.copyfile(source, partial)
+            os.replace(partial, destination)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+    def _sync_delete(self, storage_paths: List[str]) -> int:
+        deleted = 0
+        for storage_path in storage_paths:
+            path = self._resolve(storage_path)
+            if path.is_file():
+                path.unlink()
+                deleted += 1
+        return deleted
+
+    def _sync_ensure_ready(self) -> bool:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return True
+
+    def public_url(self, storage_path: str) -> str:
+        return f"{self.url_prefix}/{storage_path.lstrip('/')}"
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        marker = f"{self.url_prefix}/"
+        if url and marker in url:
+            return url.split(marker, 1)[1]
+        return None
+
+
+class SupabaseStorageBackend(StorageBackend):
+    """A Supabase Storage bucket, through the synchronous supabase-py client"""
+
+    name = 'supabase'
+    list_page_size = 1000
+
+    def __init__(self, client, bucket: str, file_size_limit: Optional[int] = None,
+                 cache_control: str = '3600', **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.bucket = bucket
+        self.file_size_limit = file_size_limit
+        self.cache_control = cache_control
+
+    def _bucket(self):
+        return self.client.storage.from_(self.bucket)
+
+    def _sync_upload(self, storage_path: str, source: UploadSource, content_type: str, consume: bool):
+        # The SDK streams from a path itself; bytes are sent as they are
+        self._bucket().upload(
+            path=storage_path,
+            file=source if isinstance(source, bytes) else str(source),
+            file_options={'cache-control': self.cache_control, 'content-type': content_type, 'upsert': 'true'}
+        )
+
+    def _sync_delete(self, storage_paths: List[str]) -> int:
+        removed = self._bucket().remove(storage_paths)
+        return len(removed) if isinstance(removed, list) else len(storage_paths)
+
+    def _sync_list(self) -> List[Dict[str, Any]]:
+        files = []
+        folders = ['']
+        while folders:
+            folder = folders.pop()
+            offset = 0
+            while True:
+                # The Storage API lists one folder level per call, in pages
+                entries = self._bucket().list(folder, {'limit': self.list_page_size, 'offset': offset}) or []
+                for entry in entries:
+                    path = f"{folder}/{entry['name']}" if folder else entry['name']
+                    if entry.get('id') is None:
+                        folders.append(path)
+                        continue
+                    files.append({
+                        'path': path,
+                        'size': (entry.get('metadata') or {}).get('size', 0),
+                        'modified_at': entry.get('updated_at') or entry.get('created_at')
+                    })
+                if len(entries) < self.list_page_size:
+                    break
+                offset += self.list_page_size
+        return files
+
+    def _sync_ensure_ready(self) -> bool:
+        try:
+            self._bucket().list()
+            logger.info(f"Supabase bucket '{self.bucket}' is accessible")
+            return True
+        except Exception as e:
+            if 'not found' not in str(e).lower():
+                raise
+        options = {'public': True}
+        if self.file_size_limit:
+            options['file_size_limit'] = self.file_size_limit
+        self.client.storage.create_bucket(self.bucket, options=options)
+        logger.info(f"Created Supabase bucket: {self.bucket}")
+        return True
+
+    def public_url(self, storage_path: str) -> str:
+        # Built locally by the SDK, no request is made
+        return self._bucket().get_public_url(storage_path)
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        # https://xxx.supabase.co/storage/v1/object/public/bucket-name/folder/filename.ext
+        marker = f"/storage/v1/object/public/{self.bucket}/"
+        if url and marker in url:
+            return url.split(marker, 1)[1].split('?', 1)[0]
+        return None
+
+
+class S3StorageBackend(StorageBackend):
+    """Any S3-compatible bucket (AWS S3, R2, MinIO, Supabase's S3 endpoint) through boto3"""
+
+    name = 's3'
+    # DeleteObjects accepts up to 1000 keys
+    delete_batch_size = 1000
+
+    def __init__(self, client, bucket: str, public_base_url: str, cache_control: str = 'max-age=3600', **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.bucket = bucket
+        self.public_base_url = public_base_url.rstrip('/')
+        self.cache_control = cache_control
+
+    def is_retryable(self, error: Exception) -> bool:
+        response = getattr(error, 'response', None)
+        if isinstance(response, dict):
+            status = response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+            code = response.get('Error', {}).get('Code', '')
+            return status >= 500 or status == 429 or code in ('Throttling', 'SlowDown', 'RequestTimeout')
+        return super().is_retryable(error)
+
+    def _sync_upload(self, storage_path: str, source: UploadSource, content_type: str, consume: bool):
+        extra = {'ContentType': content_type, 'CacheControl': self.cache_control}
+        if isinstance(source, bytes):
+            self.client.put_object(Bucket=self.bucket, Key=storage_path, Body=source, **extra)
+        else:
+            # Multipart for large files, streamed from disk
+            self.client.upload_file(str(source), self.bucket, storage_path, ExtraArgs=extra)
+
+    def _sync_delete(self, storage_paths: List[str]) -> int:
+        response = self.client.delete_objects(
+            Bucket=self.bucket,
+            Delete={'Objects': [{'Key': path} for path in storage_paths], 'Quiet': True}
+        )
+        errors = response.get('Errors') or []
+        for error in errors:
+            logger.error(f"[STORAGE:s3] Delete failed for {error.get('Key')}: {error.get('Message')}")
+        return len(storage_paths) - len(errors)
+
+    def _sync_list(self) -> List[Dict[str, Any]]:
+        files = []
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket):
+            for item in page.get('Contents', []):
+                modified = item.get('LastModified')
+                files.append({
+                    'path': item['Key'],
+                    'size': item.get('Size', 0),
+                    'modified_at': modified.isoformat() if modified else None
+                })
+        return files
+
+    def _sync_ensure_ready(self) -> bool:
+        self.client.head_bucket(Bucket=self.bucket)
+        return True
+
+    def public_url(self, storage_path: str) -> str:
+        return f"{self.public_base_url}/{storage_path.lstrip('/')}"
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        prefix = f"{self.public_base_url}/"
+        if url and url.startswith(prefix):
+            return url[len(prefix):].split('?', 1)[0]
+        return None
+
+
+class MemoryStorageBackend(StorageBackend):
+    """
+    In-memory fake for tests. fail_next makes the next N calls raise fail_message (transient by
+    default), to exercise retries; latency_seconds slows every call down, and peak_active records
+    the most calls seen running at once, to exercise the concurrency limit.
+    """
+
+    name = 'memory'
+
+    def __init__(self, fail_next: int = 0, latency_seconds: float = 0.0,
+                 fail_message: str = "Simulated transient storage failure", **kwargs):
+        kwargs.setdefault('backoff_seconds', 0.01)
+        super().__init__(**kwargs)
+        self.objects: Dict[str, bytes] = {}
+        self.content_types: Dict[str, str] = {}
+        self.modified: Dict[str, str] = {}
+        self.fail_next = fail_next
+        self.fail_message = fail_message
+        self.latency_seconds = latency_seconds
+        self.active = 0
+        self.peak_active = 0
+        self._active_lock = threading.Lock()
+
+    def _maybe_fail(self):
+        with self._active_lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            if self.latency_seconds:
+                time.sleep(self.latency_seconds)
+            with self._active_lock:
+                failing = self.fail_next > 0
+                if failing:
+                    self.fail_next -= 1
+            if failing:
+                raise ConnectionError(self.fail_message)
+        finally:
+            with self._active_lock:
+                self.active -= 1
+
+    def _sync_upload(self, storage_path: str, source: UploadSource, content_type: str, consume: bool):
+        self._maybe_fail()
+        self.objects[storage_path] = source if isinstance(source, bytes) else Path(source).read_bytes()
+        self.content_types[storage_path] = content_type
+        self.modified[storage_path] = datetime.now(timezone.utc).isoformat()
+
+    def _sync_delete(self, storage_paths: List[str]) -> int:
+        self._maybe_fail()
+        return sum(1 for path in storage_paths if self.objects.pop(path, None) is not None)
+
+    def _sync_list(self) -> List[Dict[str, Any]]:
+        self._maybe_fail()
+        return [
+            {'path': path, 'size': len(content), 'modified_at': self.modified.get(path)}
+            for path, content in list(self.objects.items())
+        ]
+
+    def public_url(self, storage_path: str) -> str:
+        return f"memory://{storage_path}"
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        if url and url.startswith('memory://'):
+            return url[len('memory://'):]
+        return None
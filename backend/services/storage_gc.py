@@ -0,0 +1,266 @@
+"""
+Storage Garbage Collector
+Removes upload records and stored files that nothing refers to any more, so the uploads tree, the
+bucket and the file catalog stop growing with abandoned work.
+
+Two sweeps, each walking an indexed query in keyset batches:
+- Abandoned designs: pod_designs still unassigned (no guest, contact or order) after the design
+  retention. Each record is deleted and its original released in the content store, so an
+  original shared with a live design survives. Mockups rendered for it are deleted with it.
+- Orphaned files: file catalog entries (see services/file_catalog.py) in the folders that only
+  hold replaceable files - mockups, product images, receipt PDFs - that are older than the file
+  retention and whose URL is held by none of the fields that point into that folder. Each batch
+  is checked with one distinct() per referencing field. Folders not listed in ORPHAN_SCOPES
+  (content store, application documents, CMS images) are never swept.
+
+Storage deletes are issued once per batch through delete_files_from_supabase/delete_stored_files,
+which group the paths into as few backend calls as the backend allows. A dry run walks the same
+batches and reports what would go without changing anything; it is the default, so deleting
+always takes an explicit dry_run=False.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from core.imaging import DERIVATIVE_SPECS
+from core.pagination import CREATED_AT_SORT, fetch_keyset_page
+from services.file_catalog import FILE_SORT
+from services.image_derivatives import derivative_path
+from services.storage_service import delete_files_from_supabase, delete_stored_files
+
+logger = logging.getLogger(__name__)
+
+# Statuses a design has before it is linked to a guest or an order
+UNASSIGNED_STATUSES = ['unassigned', 'uploaded', None]
+
+PRODUCT_IMAGE_FIELDS = ('image_url', 'base_image_url', 'images')
+
+# Folders swept for orphaned files, and every field that may hold a URL of a file in them.
+# 'directories' are storage folders (remote, or under the local uploads tree); 'local_names'
+# matches files the local fallback stores flat in the uploads root; 'records' are bookkeeping
+# documents removed together with the file whose URL they hold.
+ORPHAN_SCOPES: List[Dict[str, Any]] = [
+    {
+        'name': 'mockups',
+        'directories': ['pod-designs/mockups'],
+        'local_names': r'_mockup\.[a-z0-9]+$',
+        'references': [
+            ('pod_designs', ('mockup_file_url',)),
+            # Boutique orders keep the cart as posted, POD items included
+            ('orders', ('mockup_file_url', 'cart_items.mockup_file_url', 'cart_items.preview_image')),
+        ],
+        # Server-rendered mockups (see services/mockup_renderer.py)
+        'records': [('mockup_renders', 'public_url')],
+    },
+    {
+        'name': 'product_images',
+        # Local fallback copies share the uploads root with other uploads and are left alone
+        'directories': ['products', 'fabrics', 'souvenirs', 'boutique', 'bulk-products', 'pod-products'],
+        'references': [
+            ('fabrics', PRODUCT_IMAGE_FIELDS),
+            ('souvenirs', PRODUCT_IMAGE_FIELDS),
+            ('boutique_products', PRODUCT_IMAGE_FIELDS),
+            ('bulk_clothing_items', PRODUCT_IMAGE_FIELDS),
+            ('pod_clothing_items', PRODUCT_IMAGE_FIELDS),
+            ('product_categories', ('image_url',)),
+            ('admin_settings', ('bulk_clothing_items.image_url', 'pod_clothing_items.image_url')),
+            # Cart items are copies of the product, image fields included
+            ('orders', ('cart_items.image_url', 'cart_items.image', 'cart_items.base_image_url', 'cart_items.images')),
+        ],
+    },
+    {
+        'name': 'receipts',
+        'directories': ['receipts'],
+        'references': [
+            ('manual_quotes', ('receipt_url',)),
+            ('orders', ('payment_receipt_url',)),
+        ],
+    },
+]
+
+# Entries listed in a report, per sweep
+SAMPLE_SIZE = 20
+
+
+def _cutoff(days: float) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+
+def _public_url(entry: Dict[str, Any]) -> str:
+    """URL documents hold for a catalogued file (local entries are catalogued as /uploads/...)"""
+    return f"/api{entry['path']}" if entry['source'] == 'local' else entry['path']
+
+
+def _storage_path(entry: Dict[str, Any]) -> str:
+    if entry['source'] == 'local':
+        return entry['path'][len('/uploads/'):]
+    return f"{entry['directory']}/{entry['name']}" if entry['directory'] else entry['name']
+
+
+def _with_derivatives(paths: Sequence[str]) -> List[str]:
+    """Paths plus any derivatives stored next to them (deleting one that never existed is a no-op)"""
+    return list(paths) + [derivative_path(path, name) for path in paths for name in DERIVATIVE_SPECS]
+
+
+def _new_report() -> Dict[str, Any]:
+    return {'scanned': 0, 'orphaned': 0, 'bytes': 0, 'deleted': 0, 'sample': []}
+
+
+def _add_sample(report: Dict[str, Any], items: Sequence[str]):
+    report['sample'].extend(items[:max(SAMPLE_SIZE - len(report['sample']), 0)])
+
+
+class StorageGarbageCollector:
+    """Finds and deletes abandoned designs and unreferenced files in batches"""
+
+    def __init__(self, db, content_store, derivatives=None, design_retention_days: float = 30,
+                 file_retention_days: float = 30, batch_size: int = 200,
+                 scopes: Sequence[Dict[str, Any]] = ORPHAN_SCOPES, catalog_collection: str = 'file_catalog'):
+        self.db = db
+        self.content_store = content_store
+        self.derivatives = derivatives
+        self.catalog = db[catalog_collection]
+        self.design_retention_days = design_retention_days
+        self.file_retention_days = file_retention_days
+        self.batch_size = batch_size
+        self.scopes = list(scopes)
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+
+    async def run(self, dry_run: bool = True) -> Dict[str, Any]:
+        """One pass of every sweep; returns what was (or, for a dry run, would be) removed"""
+        async with self._lock:
+            report = {
+                'dry_run': dry_run,
+                'started_at': datetime.now(timezone.utc).isoformat(),
+                'design_retention_days': self.design_retention_days,
+                'file_retention_days': self.file_retention_days,
+                'designs': await self.sweep_designs(dry_run),
+                'files': {scope['name']: await self.sweep_files(scope, dry_run) for scope in self.scopes},
+                'finished_at': None
+            }
+            report['finished_at'] = datetime.now(timezone.utc).isoformat()
+            # Kept for dry runs too, so the stats show what a scheduled report-only sweep found
+            self.last_report = report
+            if not dry_run:
+                removed = report['designs']['deleted'] + sum(r['deleted'] for r in report['files'].values())
+                if removed:
+                    logger.info(f"[STORAGE GC] Removed {report['designs']['deleted']} design(s) and "
+                                f"{removed - report['designs']['deleted']} file(s)")
+            return report
+
+    # ---------- abandoned designs ----------
+
+    def _abandoned_designs_query(self, cutoff: str) -> Dict[str, Any]:
+        return {
+            'status': {'$in': UNASSIGNED_STATUSES},
+            'created_at': {'$lt': cutoff},
+            'guest_id': None,
+            'contact_id': None,
+            'order_id': None
+        }
+
+    async def sweep_designs(self, dry_run: bool) -> Dict[str, Any]:
+        query = self._abandoned_designs_query(_cutoff(self.design_retention_days))
+        projection = {'_id': 0, 'id': 1, 'created_at': 1, 'content_sha256': 1, 'storage_path': 1,
+                      'file_size': 1, 'mockup_file_url': 1, 'mockup_storage_path': 1}
+        report = _new_report()
+        cursor = None
+        while True:
+            designs, cursor = await fetch_keyset_page(
+                self.db.pod_designs, query, projection, self.batch_size, cursor, sort=CREATED_AT_SORT
+            )
+            report['scanned'] += len(designs)
+            report['orphaned'] += len(designs)
+            report['bytes'] += sum(design.get('file_size') or 0 for design in designs)
+            _add_sample(report, [design['id'] for design in designs])
+            if designs and not dry_run:
+                report['deleted'] += await self._delete_designs(designs, query)
+            if cursor is None:
+                return report
+
+    async def _delete_designs(self, designs: List[Dict[str, Any]], query: Dict[str, Any]) -> int:
+        deleted = []
+        for design in designs:
+            # Re-checked on delete, so a design claimed since the batch was read is kept, and only
+            # the worker that actually removed the record releases its original
+            if await self.db.pod_designs.find_one_and_delete({**query, 'id': design['id']}, projection={'_id': 1}):
+                deleted.append(design)
+
+        legacy_paths = [d['storage_path'] for d in deleted if not d.get('content_sha256') and d.get('storage_path')]
+        mockup_paths = [d['mockup_storage_path'] for d in deleted if d.get('mockup_storage_path')]
+        if legacy_paths or mockup_paths:
+            await delete_files_from_supabase(_with_derivatives(legacy_paths + mockup_paths))
+        await self._forget_derivatives([d['mockup_file_url'] for d in deleted if d.get('mockup_file_url')])
+        for design in deleted:
+            await self.content_store.release(design.get('content_sha256'))
+        return len(deleted)
+
+    # ---------- orphaned files ----------
+
+    async def sweep_files(self, scope: Dict[str, Any], dry_run: bool) -> Dict[str, Any]:
+        cutoff = _cutoff(self.file_retention_days)
+        queries = [{'directory': directory, 'modified_at': {'$lt': cutoff}} for directory in scope['directories']]
+        if scope.get('local_names'):
+            queries.append({'directory': '', 'source': 'local', 'modified_at': {'$lt': cutoff},
+                            'name': {'$regex': scope['local_names']}})
+        projection = {'_id': 0, 'id': 1, 'path': 1, 'name': 1, 'directory': 1, 'size': 1,
+                      'source': 1, 'storage_type': 1, 'modified_at': 1}
+
+        report = _new_report()
+        for query in queries:
+            cursor = None
+            while True:
+                entries, cursor = await fetch_keyset_page(
+                    self.catalog, query, projection, self.batch_size, cursor, sort=FILE_SORT
+                )
+                report['scanned'] += len(entries)
+                referenced = await self._referenced_urls(scope, [_public_url(entry) for entry in entries])
+                orphans = [entry for entry in entries if _public_url(entry) not in referenced]
+                report['orphaned'] += len(orphans)
+                report['bytes'] += sum(entry.get('size') or 0 for entry in orphans)
+                _add_sample(report, [entry['path'] for entry in orphans])
+                if orphans and not dry_run:
+                    report['deleted'] += await self._delete_files(scope, orphans)
+                if cursor is None:
+                    break
+        return report
+
+    async def _referenced_urls(self, scope: Dict[str, Any], urls: List[str]) -> Set[str]:
+        """The subset of urls held by any referencing field (remote URLs may be stored with a trailing '?')"""
+        if not urls:
+            return set()
+        candidates = urls + [f"{url}?" for url in urls]
+        referenced = set()
+        for collection, fields in scope['references']:
+            for field in fields:
+                values = await self.db[collection].distinct(field, {field: {'$in': candidates}})
+                referenced.update(value.rstrip('?') for value in values if isinstance(value, str))
+        return referenced
+
+    async def _delete_files(self, scope: Dict[str, Any], entries: List[Dict[str, Any]]) -> int:
+        by_backend: Dict[str, List[str]] = {}
+        for entry in entries:
+            by_backend.setdefault(entry['storage_type'], []).append(_storage_path(entry))
+        for storage_type, paths in by_backend.items():
+            await delete_stored_files(_with_derivatives(paths), storage_type)
+        urls = [_public_url(entry) for entry in entries]
+        await self._forget_derivatives(urls)
+        for collection, field in scope.get('records', []):
+            await self.db[collection].delete_many({field: {'$in': urls}})
+        # delete_stored_files drops catalog entries only once the backend call went through
+        remaining = await self.catalog.count_documents({'path': {'$in': [entry['path'] for entry in entries]}})
+        return len(entries) - remaining
+
+    async def _forget_derivatives(self, urls: List[str]):
+        if self.derivatives is not None and urls:
+            await self.derivatives.forget_many(urls)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'design_retention_days': self.design_retention_days,
+            'file_retention_days': self.file_retention_days,
+            'batch_size': self.batch_size,
+            'last_run': self.last_report
+        }
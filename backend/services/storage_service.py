@@ -1,21 +1,32 @@
 """
-Supabase Cloud Storage Service with Local Fallback
+Cloud Storage Service with Local Fallback
 Handles file uploads, deletions, and public URL generation for product images.
-Falls back to local storage if Supabase is not configured or authentication fails.
+Files go to the backend named by STORAGE_BACKEND (Supabase by default, or any S3-compatible
+bucket) through services/storage_backends.py, so SDK calls never block the event loop.
+Falls back to local storage if the backend is not configured or authentication fails.
 """
 
 import os
 import uuid
 import logging
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Awaitable, Callable, Optional, Tuple
 from fastapi import UploadFile, HTTPException
 
+from core.uploads import fingerprinted_name, stream_upload_to_file
+from services.storage_backends import (
+    StorageBackend,
+    LocalStorageBackend,
+    SupabaseStorageBackend,
+    S3StorageBackend,
+    MemoryStorageBackend
+)
+
 logger = logging.getLogger(__name__)
 
 # Initialize Supabase client (lazy initialization)
 _supabase_client = None
-_supabase_available = None  # None = not checked, True/False = result
+_supabase_available = None  # None = not checked, True/False = result (of the remote backend)
 
 # Allowed image types
 ALLOWED_IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/webp', 'image/gif'}
@@ -26,6 +37,17 @@ MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 LOCAL_UPLOAD_DIR = Path('/app/backend/uploads')
 LOCAL_UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Uploads are streamed here first: outside the served /api/uploads tree, but on the same
+# filesystem so the local fallback is a rename
+INCOMING_DIR = LOCAL_UPLOAD_DIR.parent / 'upload_incoming'
+
+# Storage backends (see services/storage_backends.py), built on first use
+_storage_backend: Optional[StorageBackend] = None
+_local_backend: Optional[LocalStorageBackend] = None
+
+# File catalog (see services/file_catalog.py), registered by the app; told about every store and delete
+_file_catalog = None
+
 
 def get_supabase_config():
     """Get Supabase configuration from environment (lazy loading)"""
@@ -36,6 +58,21 @@ def get_supabase_config():
     }
 
 
+def get_storage_config():
+    """Backend selection and limits from environment"""
+    return {
+        # supabase | s3 | local | memory
+        'backend': os.environ.get('STORAGE_BACKEND', 'supabase').lower(),
+        'max_concurrency': int(os.environ.get('STORAGE_MAX_CONCURRENCY', 4)),
+        'max_retries': int(os.environ.get('STORAGE_MAX_RETRIES', 3)),
+        'backoff_seconds': float(os.environ.get('STORAGE_RETRY_BACKOFF_SECONDS', 0.5)),
+        's3_bucket': os.environ.get('S3_BUCKET'),
+        's3_endpoint_url': os.environ.get('S3_ENDPOINT_URL'),
+        's3_region': os.environ.get('S3_REGION'),
+        's3_public_url': os.environ.get('S3_PUBLIC_URL')
+    }
+
+
 def get_supabase_client():
     """Get or create Supabase client (lazy initialization)"""
     global _supabase_client, _supabase_available
@@ -62,57 +99,146 @@ def get_supabase_client():
     return _supabase_client
 
 
+def _create_s3_backend(config: dict, limits: dict) -> Optional[S3StorageBackend]:
+    if not config['s3_bucket']:
+        logger.warning("S3 storage selected without S3_BUCKET - using local storage")
+        return None
+    try:
+        import boto3
+    except ImportError:
+        logger.warning("boto3 not installed - using local storage")
+        return None
+    
+    client = boto3.client('s3', endpoint_url=config['s3_endpoint_url'], region_name=config['s3_region'])
+    public_url = config['s3_public_url']
+    if not public_url:
+        if config['s3_endpoint_url']:
+            public_url = f"{config['s3_endpoint_url'].rstrip('/')}/{config['s3_bucket']}"
+        else:
+            public_url = f"https://{config['s3_bucket']}.s3.{config['s3_region'] or 'us-east-1'}.amazonaws.com"
+    return S3StorageBackend(client, config['s3_bucket'], public_url, **limits)
+
+
+def get_local_backend() -> LocalStorageBackend:
+    """Backend for the local uploads directory; also the fallback when the remote one fails"""
+    global _local_backend
+    if _local_backend is None:
+        _local_backend = LocalStorageBackend(LOCAL_UPLOAD_DIR)
+    return _local_backend
+
+
+def get_storage_backend() -> StorageBackend:
+    """The configured primary backend (STORAGE_BACKEND), or local storage if it is not usable"""
+    global _storage_backend
+    if _storage_backend is not None:
+        return _storage_backend
+    
+    config = get_storage_config()
+    limits = {
+        'max_concurrency': config['max_concurrency'],
+        'max_retries': config['max_retries'],
+        'backoff_seconds': config['backoff_seconds']
+    }
+    backend = None
+    if config['backend'] == 'supabase':
+        client = get_supabase_client()
+        if client is not None:
+            backend = SupabaseStorageBackend(
+                client, get_supabase_config()['bucket'], file_size_limit=MAX_FILE_SIZE, **limits
+            )
+    elif config['backend'] == 's3':
+        backend = _create_s3_backend(config, limits)
+    elif config['backend'] == 'memory':
+        backend = MemoryStorageBackend(**limits)
+    
+    _storage_backend = backend or get_local_backend()
+    logger.info(f"[STORAGE] Using {_storage_backend.name} storage backend")
+    return _storage_backend
+
+
+def _remote_backend() -> Optional[StorageBackend]:
+    """The primary backend if it is remote and has not been found unusable"""
+    backend = get_storage_backend()
+    if backend.name == 'local' or _supabase_available is False:
+        return None
+    return backend
+
+
+def set_file_catalog(catalog):
+    """Register the FileCatalog that stores and deletes made here are recorded in"""
+    global _file_catalog
+    _file_catalog = catalog
+
+
+def _catalog_path(storage_path: str, storage_type: str) -> Optional[str]:
+    if storage_type == 'local':
+        return f"/uploads/{storage_path.lstrip('/')}"
+    remote = _remote_backend()
+    return remote.public_url(storage_path) if remote is not None and remote.name == storage_type else None
+
+
+async def _catalog_stored(storage_path: str, storage_type: str, size: int):
+    if _file_catalog is None:
+        return
+    try:
+        path = _catalog_path(storage_path, storage_type)
+        if path:
+            await _file_catalog.record(path, size, storage_type, storage_path.lstrip('/').rpartition('/')[0])
+    except Exception as e:
+        # The reconciler picks it up later; never fail an upload over the catalog
+        logger.warning(f"[FILE CATALOG] Could not record {storage_path}: {e}")
+
+
+async def _catalog_deleted(storage_paths: list, storage_type: str):
+    if _file_catalog is None or not storage_paths:
+        return
+    try:
+        await _file_catalog.remove([path for path in (_catalog_path(p, storage_type) for p in storage_paths) if path])
+    except Exception as e:
+        logger.warning(f"[FILE CATALOG] Could not remove {len(storage_paths)} deleted file(s): {e}")
+
+
+async def reconcile_remote_catalog() -> Optional[dict]:
+    """Reconcile the file catalog against a listing of the remote backend; None if none is in use"""
+    remote = _remote_backend()
+    if _file_catalog is None or remote is None:
+        return None
+    return await _file_catalog.reconcile_remote(remote)
+
+
+def storage_stats() -> dict:
+    """Call counters of the backends in use on this worker"""
+    backends = {'local': get_local_backend().stats()}
+    backend = get_storage_backend()
+    if backend.name != 'local':
+        backends[backend.name] = backend.stats()
+    return {
+        'primary': backend.name,
+        'remote_available': _supabase_available is not False and backend.name != 'local',
+        'backends': backends
+    }
+
+
+def close_storage_backends():
+    """Shut down the backend thread pools (on app shutdown)"""
+    for backend in {id(b): b for b in (_storage_backend, _local_backend) if b is not None}.values():
+        backend.close()
+
+
 async def ensure_bucket_exists() -> bool:
     """Ensure the storage bucket exists - skip if using local storage"""
     global _supabase_available
     
-    client = get_supabase_client()
-    if client is None:
+    backend = get_storage_backend()
+    if backend.name == 'local':
         logger.info("Using local storage - skipping bucket check")
-        return True
+        return await get_local_backend().ensure_ready()
     
-    try:
-        config = get_supabase_config()
-        bucket_name = config['bucket']
-        
-        # Try a simple operation to verify authentication
-        # Try to get bucket info instead of listing all buckets
-        try:
-            result = client.storage.from_(bucket_name).list()
-            logger.info(f"Supabase bucket '{bucket_name}' is accessible")
-            _supabase_available = True
-            return True
-        except Exception as list_error:
-            # Bucket might not exist or auth failed
-            error_msg = str(list_error)
-            if 'signature verification failed' in error_msg.lower() or 'unauthorized' in error_msg.lower():
-                logger.warning(f"Supabase authentication failed: {error_msg}")
-                logger.warning("Falling back to local storage. Please verify your Supabase service role key.")
-                _supabase_available = False
-                return True  # Return true to not fail startup, will use local storage
-            elif 'not found' in error_msg.lower():
-                # Try to create the bucket
-                try:
-                    client.storage.create_bucket(
-                        bucket_name,
-                        options={'public': True, 'file_size_limit': MAX_FILE_SIZE}
-                    )
-                    logger.info(f"Created Supabase bucket: {bucket_name}")
-                    _supabase_available = True
-                    return True
-                except Exception as create_error:
-                    logger.error(f"Failed to create bucket: {create_error}")
-                    _supabase_available = False
-                    return True
-            else:
-                logger.error(f"Supabase error: {error_msg}")
-                _supabase_available = False
-                return True
-                
-    except Exception as e:
-        logger.error(f"Error checking bucket: {str(e)}")
-        _supabase_available = False
-        return True  # Don't fail startup
+    # The check runs on the backend's executor, so a slow provider does not stall startup's event loop
+    _supabase_available = await backend.ensure_ready()
+    if not _supabase_available:
+        logger.warning(f"{backend.name} storage is not usable - falling back to local storage")
+    return True  # Don't fail startup, local storage takes over
 
 
 def validate_image_file(file: UploadFile) -> Tuple[bool, str]:
@@ -135,103 +261,116 @@ def validate_image_file(file: UploadFile) -> Tuple[bool, str]:
     return True, ""
 
 
+async def _derive_quietly(derive: Optional[Callable[..., Awaitable[dict]]], *args, **kwargs) -> dict:
+    """Derivatives are optional: a failure is logged and the stored original is kept without them"""
+    if derive is None:
+        return {}
+    try:
+        return await derive(*args, **kwargs)
+    except Exception as e:
+        logger.warning(f"[DERIVATIVES] Could not derive {args[1] if len(args) > 1 else ''}: {e}")
+        return {}
+
+
 async def upload_file_to_supabase(
     file: UploadFile,
     folder: str = "products",
-    custom_filename: Optional[str] = None
+    custom_filename: Optional[str] = None,
+    max_size: int = MAX_FILE_SIZE,
+    derive: Optional[Callable[..., Awaitable[dict]]] = None
 ) -> dict:
     """
     Upload a file to Supabase Storage (or local storage as fallback).
+    The file is streamed to a temporary file first, so it is never held in memory whole.
     
     Args:
         file: FastAPI UploadFile object
         folder: Folder path within the bucket (e.g., "products", "fabrics", "souvenirs")
-        custom_filename: Optional custom filename (without extension)
+        custom_filename: Optional custom filename (without extension); otherwise the name is a uuid
+            plus a content fingerprint, so the URL can be cached as immutable
+        max_size: Maximum size in bytes, enforced while streaming
+        derive: Optional ImageDerivatives.create, called with the local copy once the file is stored
     
     Returns:
-        dict with file_name, public_url, storage_path, file_size
+        dict with file_name, public_url, storage_path, file_size, sha256 (and derivatives)
     """
     # Validate file
     is_valid, error_msg = validate_image_file(file)
     if not is_valid:
         raise HTTPException(status_code=400, detail=error_msg)
     
+    ext = os.path.splitext(file.filename)[1].lower()
+    
+    incoming_path = INCOMING_DIR / f"{uuid.uuid4()}{ext}"
     try:
-        # Read file content
-        contents = await file.read()
-        file_size = len(contents)
-        
-        # Check file size
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
-            )
+        # Stream to disk, enforcing the size limit as bytes are copied
+        saved = await stream_upload_to_file(
+            file, incoming_path, max_size,
+            too_large_message=f"File too large. Maximum size: {max_size // (1024*1024)}MB"
+        )
+        file_size = saved.size
         
         # Generate unique filename
-        ext = os.path.splitext(file.filename)[1].lower()
         if custom_filename:
             unique_filename = f"{custom_filename}{ext}"
         else:
-            unique_filename = f"{uuid.uuid4()}{ext}"
+            unique_filename = fingerprinted_name(str(uuid.uuid4()), saved.sha256, ext)
         
-        # Try Supabase upload first
-        client = get_supabase_client()
-        if client is not None and _supabase_available is not False:
+        content_type = file.content_type or "image/jpeg"
+        
+        # Try the remote backend first
+        remote = _remote_backend()
+        if remote is not None:
+            storage_path = f"{folder}/{unique_filename}"
+            public_url = None
             try:
-                config = get_supabase_config()
-                bucket_name = config['bucket']
-                storage_path = f"{folder}/{unique_filename}"
-                
-                logger.info(f"[SUPABASE] Uploading file to: {storage_path}")
-                
-                # Upload to Supabase
-                response = client.storage.from_(bucket_name).upload(
-                    path=storage_path,
-                    file=contents,
-                    file_options={
-                        "cache-control": "3600",
-                        "content-type": file.content_type or "image/jpeg",
-                        "upsert": "true"
-                    }
-                )
+                logger.info(f"[{remote.name.upper()}] Uploading file to: {storage_path}")
                 
-                # Get public URL
-                public_url = client.storage.from_(bucket_name).get_public_url(storage_path)
+                # Runs on the backend's executor; the SDK streams from the file path
+                public_url = await remote.upload(storage_path, incoming_path, content_type)
                 
-                logger.info(f"[SUPABASE] File uploaded successfully: {storage_path}")
+                logger.info(f"[{remote.name.upper()}] File uploaded successfully: {storage_path}")
+                await _catalog_stored(storage_path, remote.name, file_size)
+            except Exception as remote_error:
+                logger.warning(f"[{remote.name.upper()}] Upload failed, falling back to local: {remote_error}")
+                public_url = None
+            
+            if public_url is not None:
+                # Derived outside the upload's try, so a derivative failure never re-uploads the original
+                derivatives = await _derive_quietly(derive, incoming_path, storage_path, public_url)
                 
                 return {
                     'file_name': unique_filename,
                     'public_url': public_url,
                     'storage_path': storage_path,
                     'file_size': file_size,
+                    'sha256': saved.sha256,
                     'original_name': file.filename,
-                    'storage_type': 'supabase'
+                    'storage_type': remote.name,
+                    'derivatives': derivatives
                 }
-            except Exception as supabase_error:
-                logger.warning(f"[SUPABASE] Upload failed, falling back to local: {supabase_error}")
-                # Fall through to local storage
+            # Fall through to local storage
         
         # Fallback to local storage
         logger.info(f"[LOCAL] Uploading file locally: {unique_filename}")
         
+        public_url = await get_local_backend().upload(unique_filename, incoming_path, content_type, consume=True)
         file_path = LOCAL_UPLOAD_DIR / unique_filename
-        with open(file_path, 'wb') as f:
-            f.write(contents)
-        
-        # Generate local URL
-        public_url = f"/api/uploads/{unique_filename}"
         
         logger.info(f"[LOCAL] File saved successfully: {file_path}")
+        await _catalog_stored(unique_filename, 'local', file_size)
+        
+        derivatives = await _derive_quietly(derive, file_path, unique_filename, public_url, storage_type='local')
         
         return {
             'file_name': unique_filename,
             'public_url': public_url,
             'storage_path': str(file_path),
             'file_size': file_size,
+            'sha256': saved.sha256,
             'original_name': file.filename,
-            'storage_type': 'local'
+            'storage_type': 'local',
+            'derivatives': derivatives
         }
         
     except HTTPException:
@@ -240,13 +379,72 @@ async def upload_file_to_supabase(
         logger.error(f"Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
     finally:
+        # The backend has the bytes (or the local fallback moved the file); drop the temporary copy
+        incoming_path.unlink(missing_ok=True)
         # Reset file position for potential re-reads
         await file.seek(0)
 
 
+async def store_file(storage_path: str, source, content_type: str, consume: bool = False,
+                     storage_type: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Store a local file (or bytes) at storage_path on the remote backend, falling back to the
+    same path in local storage. storage_type='local' skips the remote backend (e.g. to keep
+    derived files next to a locally stored original).
+    
+    Returns:
+        (public_url, storage_type)
+    """
+    size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+    remote = _remote_backend() if storage_type != 'local' else None
+    if remote is not None:
+        try:
+            public_url = await remote.upload(storage_path, source, content_type)
+            await _catalog_stored(storage_path, remote.name, size)
+            return public_url, remote.name
+        except Exception as e:
+            logger.error(f"[{remote.name.upper()}] Failed to upload {storage_path}, storing locally: {e}")
+    public_url = await get_local_backend().upload(storage_path, source, content_type, consume=consume)
+    await _catalog_stored(storage_path, 'local', size)
+    return public_url, 'local'
+
+
+async def delete_stored_files(storage_paths: list, storage_type: str) -> int:
+    """Delete files stored by store_file, from the backend named by storage_type"""
+    if storage_type == 'local':
+        deleted = await get_local_backend().delete(storage_paths)
+    else:
+        remote = _remote_backend()
+        if remote is None or remote.name != storage_type:
+            logger.warning(f"[STORAGE] Cannot delete {len(storage_paths)} file(s) from unavailable {storage_type} storage")
+            return 0
+        deleted = await remote.delete(storage_paths)
+    await _catalog_deleted(storage_paths, storage_type)
+    return deleted
+
+
+async def upload_bytes(storage_path: str, content: bytes, content_type: str) -> str:
+    """
+    Store generated content (e.g. a receipt PDF) at storage_path, falling back to local storage.
+    
+    Returns:
+        Public URL of the stored file
+    """
+    public_url, _ = await store_file(storage_path, content, content_type)
+    return public_url
+
+
+def _is_local_storage_path(storage_path: str) -> bool:
+    return storage_path.startswith(str(LOCAL_UPLOAD_DIR) + '/') or '/' not in storage_path
+
+
+def _local_relative_path(storage_path: str) -> str:
+    return storage_path.split('/')[-1] if '/' in storage_path else storage_path
+
+
 async def delete_file_from_supabase(storage_path: str) -> bool:
     """
-    Delete a file from Supabase Storage (or local storage).
+    Delete a file from the storage backend (or local storage).
     
     Args:
         storage_path: Full path within the bucket (e.g., "products/uuid.jpg") or local path
@@ -260,24 +458,18 @@ async def delete_file_from_supabase(storage_path: str) -> bool:
     
     try:
         # Check if it's a local file
-        if storage_path.startswith('/app/backend/uploads/') or not '/' in storage_path:
-            # Local file
-            filename = storage_path.split('/')[-1] if '/' in storage_path else storage_path
-            file_path = LOCAL_UPLOAD_DIR / filename
-            if file_path.exists():
-                os.remove(file_path)
-                logger.info(f"[LOCAL] Deleted file: {file_path}")
+        if _is_local_storage_path(storage_path):
+            await get_local_backend().delete([_local_relative_path(storage_path)])
+            await _catalog_deleted([_local_relative_path(storage_path)], 'local')
+            logger.info(f"[LOCAL] Deleted file: {storage_path}")
             return True
         
-        # Try Supabase deletion
-        client = get_supabase_client()
-        if client is not None and _supabase_available is not False:
-            config = get_supabase_config()
-            bucket_name = config['bucket']
-            
-            logger.info(f"[SUPABASE] Deleting file: {storage_path}")
-            response = client.storage.from_(bucket_name).remove([storage_path])
-            logger.info(f"[SUPABASE] File deleted successfully: {storage_path}")
+        remote = _remote_backend()
+        if remote is not None:
+            logger.info(f"[{remote.name.upper()}] Deleting file: {storage_path}")
+            await remote.delete([storage_path])
+            await _catalog_deleted([storage_path], remote.name)
+            logger.info(f"[{remote.name.upper()}] File deleted successfully: {storage_path}")
             return True
         
         return False
@@ -289,10 +481,10 @@ async def delete_file_from_supabase(storage_path: str) -> bool:
 
 async def delete_files_from_supabase(storage_paths: list) -> int:
     """
-    Delete multiple files from Supabase Storage.
+    Delete multiple files, in as few backend calls as the backend allows.
     
     Args:
-        storage_paths: List of full paths within the bucket
+        storage_paths: List of full paths within the bucket (or local paths)
     
     Returns:
         Number of files successfully deleted
@@ -300,17 +492,31 @@ async def delete_files_from_supabase(storage_paths: list) -> int:
     if not storage_paths:
         return 0
     
+    local_paths = [_local_relative_path(path) for path in storage_paths if path and _is_local_storage_path(path)]
+    remote_paths = [path for path in storage_paths if path and not _is_local_storage_path(path)]
+    
     deleted_count = 0
-    for path in storage_paths:
-        if await delete_file_from_supabase(path):
-            deleted_count += 1
+    if local_paths:
+        try:
+            deleted_count += await get_local_backend().delete(local_paths)
+            await _catalog_deleted(local_paths, 'local')
+        except Exception as e:
+            logger.error(f"[LOCAL] Bulk delete error: {str(e)}")
+    
+    remote = _remote_backend()
+    if remote_paths and remote is not None:
+        try:
+            deleted_count += await remote.delete(remote_paths)
+            await _catalog_deleted(remote_paths, remote.name)
+        except Exception as e:
+            logger.error(f"[{remote.name.upper()}] Bulk delete error: {str(e)}")
     
     return deleted_count
 
 
 def get_public_url(storage_path: str) -> str:
     """
-    Get the public URL for a file in Supabase Storage.
+    Get the public URL for a file in the storage backend.
     
     Args:
         storage_path: Full path within the bucket
@@ -327,10 +533,9 @@ def get_public_url(storage_path: str) -> str:
         return f"/api/uploads/{filename}"
     
     try:
-        client = get_supabase_client()
-        if client is not None and _supabase_available is not False:
-            config = get_supabase_config()
-            return client.storage.from_(config['bucket']).get_public_url(storage_path)
+        remote = _remote_backend()
+        if remote is not None:
+            return remote.public_url(storage_path)
     except Exception as e:
         logger.error(f"Error getting public URL: {str(e)}")
     
@@ -354,29 +559,25 @@ def extract_storage_path_from_url(url: str) -> Optional[str]:
     if '/api/uploads/' in url:
         return url.split('/api/uploads/')[-1]
     
-    config = get_supabase_config()
-    if not config['url']:
-        return None
-    
     try:
         # Supabase URLs look like:
         # https://xxx.supabase.co/storage/v1/object/public/bucket-name/folder/filename.ext
-        if '/storage/v1/object/public/' in url:
-            parts = url.split(f'/storage/v1/object/public/{config["bucket"]}/')
-            if len(parts) == 2:
-                return parts[1]
-        
-        return None
+        remote = _remote_backend()
+        return remote.path_from_url(url) if remote is not None else None
     except Exception as e:
         logger.error(f"Error extracting storage path: {str(e)}")
         return None
 
 
 def is_supabase_url(url: str) -> bool:
-    """Check if a URL is a Supabase storage URL"""
+    """Check if a URL points at the remote storage backend (Supabase or S3)"""
     if not url:
         return False
     
+    remote = _remote_backend()
+    if remote is not None and remote.name != 'supabase':
+        return remote.path_from_url(url) is not None
+    
     config = get_supabase_config()
     if not config['url']:
         return False
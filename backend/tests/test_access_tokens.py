@@ -0,0 +1,83 @@
+"""
+Test Short-lived Admin Access Tokens
+Tests: access token issued at login, admin routes authorized from token claims, refresh flow
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+
+@pytest.fixture(scope="module")
+def login_data():
+    """Login once and keep the full response"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping access token tests")
+    return response.json()
+
+
+class TestAccessTokens:
+    """Test access token issuance and use"""
+
+    def test_login_returns_access_token(self, login_data):
+        """POST /api/auth/login should include a short-lived access token"""
+        assert "access_token" in login_data, "Login response should contain 'access_token'"
+        assert login_data["access_token_expires_in"] > 0
+        # Legacy token is still returned for existing clients
+        assert "token" in login_data
+        print(f"✓ Access token issued, expires in {login_data['access_token_expires_in']}s")
+
+    def test_admin_route_with_access_token(self, login_data):
+        """Admin and super admin routes accept the access token"""
+        headers = {"Authorization": f"Bearer {login_data['access_token']}"}
+
+        response = requests.get(f"{BASE_URL}/api/admin/orders?limit=1", headers=headers)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+
+        response = requests.get(f"{BASE_URL}/api/super-admin/permissions", headers=headers)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        print("✓ Admin routes authorized from access token")
+
+    def test_refresh_access_token(self, login_data):
+        """POST /api/auth/token/refresh issues a new access token from the login token"""
+        headers = {"Authorization": f"Bearer {login_data['token']}"}
+        response = requests.post(f"{BASE_URL}/api/auth/token/refresh", headers=headers)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        assert response.json().get("access_token")
+        print("✓ Access token refreshed")
+
+    def test_access_token_cannot_refresh_itself(self, login_data):
+        """Refresh only accepts the session cookie or the login token"""
+        headers = {"Authorization": f"Bearer {login_data['access_token']}"}
+        response = requests.post(f"{BASE_URL}/api/auth/token/refresh", headers=headers)
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+
+        response = requests.get(f"{BASE_URL}/api/auth/me", headers=headers)
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("✓ Access token refused at refresh")
+
+    def test_refresh_requires_credentials(self):
+        """Refresh without any credentials is rejected"""
+        response = requests.post(f"{BASE_URL}/api/auth/token/refresh")
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("✓ Anonymous refresh rejected")
+
+    def test_tampered_access_token_rejected(self, login_data):
+        """A modified token must not grant admin access"""
+        token = login_data["access_token"]
+        tampered = token[:-4] + ("AAAA" if not token.endswith("AAAA") else "BBBB")
+        response = requests.get(
+            f"{BASE_URL}/api/admin/orders?limit=1",
+            headers={"Authorization": f"Bearer {tampered}"}
+        )
+        assert response.status_code in [401, 403], f"Expected 401/403, got {response.status_code}"
+        print("✓ Tampered token rejected")
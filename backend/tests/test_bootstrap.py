@@ -0,0 +1,80 @@
+"""
+Test Storefront Bootstrap
+Tests: /api/bootstrap returns every first-load section, revalidates with its ETag,
+and matches the individual endpoints it replaces
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+SECTIONS = (
+    "site_texts", "cms_settings", "pricing", "system_config", "currency_rates",
+    "currency", "categories", "bulk_clothing_items", "pod_clothing_items"
+)
+
+
+class TestBootstrap:
+    """Test GET /api/bootstrap"""
+
+    def test_bootstrap_sections(self):
+        """Every first-load section is present"""
+        response = requests.get(f"{BASE_URL}/api/bootstrap")
+        assert response.status_code == 200
+        data = response.json()
+        for section in SECTIONS:
+            assert section in data, f"Missing {section}"
+        assert set(data["categories"]) == {"boutique", "fabric", "souvenir"}
+        print(f"✓ Bootstrap sections: {', '.join(data)}")
+
+    def test_bootstrap_is_compressed(self):
+        """Clients that accept gzip get the precompressed body"""
+        response = requests.get(f"{BASE_URL}/api/bootstrap", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers.get("Content-Encoding") == "gzip"
+        print("✓ Bootstrap served gzip-compressed")
+
+    def test_bootstrap_etag_round_trip(self):
+        """A repeat request with the returned ETag gets a 304"""
+        response = requests.get(f"{BASE_URL}/api/bootstrap")
+        etag = response.headers.get("ETag")
+        assert etag
+
+        cached = requests.get(f"{BASE_URL}/api/bootstrap", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        print("✓ Bootstrap revalidated with 304")
+
+    def test_bootstrap_etag_per_encoding(self):
+        """The gzip and identity bodies carry different ETags, and each revalidates"""
+        plain = requests.get(f"{BASE_URL}/api/bootstrap", headers={"Accept-Encoding": "identity"})
+        gzipped = requests.get(f"{BASE_URL}/api/bootstrap", headers={"Accept-Encoding": "gzip"})
+        assert plain.headers["ETag"] != gzipped.headers["ETag"]
+        for response in (plain, gzipped):
+            assert "Accept-Encoding" in response.headers["Vary"]
+
+        encoding = {"Accept-Encoding": "identity"}
+        assert requests.get(f"{BASE_URL}/api/bootstrap",
+                            headers={**encoding, "If-None-Match": plain.headers["ETag"]}).status_code == 304
+        assert requests.get(f"{BASE_URL}/api/bootstrap",
+                            headers={**encoding, "If-None-Match": gzipped.headers["ETag"]}).status_code == 200
+        print(f"✓ ETags per encoding: {plain.headers['ETag']} / {gzipped.headers['ETag']}")
+
+    @pytest.mark.parametrize("country,currency_code", [("NG", "NGN"), ("GB", "USD")])
+    def test_bootstrap_currency_per_country(self, country, currency_code):
+        """The currency section follows the visitor's country like /currency/detect"""
+        response = requests.get(f"{BASE_URL}/api/bootstrap", headers={"CF-IPCountry": country})
+        assert response.status_code == 200
+        currency = response.json()["currency"]
+        assert currency["currency_code"] == currency_code
+        assert currency == requests.get(f"{BASE_URL}/api/currency/detect", headers={"CF-IPCountry": country}).json()
+        print(f"✓ {country} visitors get {currency_code}")
+
+    def test_bootstrap_matches_individual_endpoints(self):
+        """Bootstrap sections carry the same data as the endpoints they replace"""
+        data = requests.get(f"{BASE_URL}/api/bootstrap").json()
+        assert data["pricing"] == requests.get(f"{BASE_URL}/api/pricing").json()
+        assert data["system_config"] == requests.get(f"{BASE_URL}/api/system-config").json()
+        assert data["cms_settings"] == requests.get(f"{BASE_URL}/api/cms/settings").json()
+        assert data["categories"]["boutique"] == requests.get(f"{BASE_URL}/api/categories/boutique").json()
+        print("✓ Bootstrap matches individual endpoints")
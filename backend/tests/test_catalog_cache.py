@@ -0,0 +1,68 @@
+"""
+Test Catalog Read-Through Cache
+Tests: catalog lists are served from the cache, and admin writes show up on the next read
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping catalog cache tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+class TestCatalogCache:
+    """Test cached catalog reads against admin writes"""
+
+    def test_repeat_reads_hit_cache(self, auth_headers):
+        """A second read of the same list counts as a cache hit"""
+        requests.get(f"{BASE_URL}/api/souvenirs")
+        before = requests.get(f"{BASE_URL}/api/admin/cache-stats", headers=auth_headers).json()["catalog"]
+        response = requests.get(f"{BASE_URL}/api/souvenirs")
+        assert response.status_code == 200
+        after = requests.get(f"{BASE_URL}/api/admin/cache-stats", headers=auth_headers).json()["catalog"]
+
+        assert after["hits"] >= before["hits"] + 1
+        assert "souvenirs" in after["resources"]
+        print(f"✓ Catalog hit ratio: {after['hit_ratio']}")
+
+    def test_fabric_write_invalidates_list(self, auth_headers):
+        """Creating, updating and deleting a fabric is visible on the very next read"""
+        requests.get(f"{BASE_URL}/api/fabrics")
+
+        created = requests.post(f"{BASE_URL}/api/admin/fabrics", json={
+            "name": "TEST_cached_fabric",
+            "price": 1000,
+            "is_active": True
+        }, headers=auth_headers)
+        assert created.status_code == 200
+        fabric_id = created.json()["id"]
+
+        try:
+            fabrics = requests.get(f"{BASE_URL}/api/fabrics").json()
+            assert any(fabric["id"] == fabric_id for fabric in fabrics), "New fabric missing from cached list"
+
+            updated = requests.put(f"{BASE_URL}/api/admin/fabrics/{fabric_id}", json={"price": 1500}, headers=auth_headers)
+            assert updated.status_code == 200
+            fabrics = requests.get(f"{BASE_URL}/api/fabrics").json()
+            assert next(fabric for fabric in fabrics if fabric["id"] == fabric_id)["price"] == 1500
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/fabrics/{fabric_id}", headers=auth_headers)
+
+        fabrics = requests.get(f"{BASE_URL}/api/fabrics").json()
+        assert all(fabric["id"] != fabric_id for fabric in fabrics), "Deleted fabric still cached"
+        print("✓ Fabric writes invalidated the catalog cache")
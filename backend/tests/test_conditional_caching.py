@@ -0,0 +1,97 @@
+"""
+Test Conditional Caching on Public Reads
+Tests: public read endpoints send ETags, answer a matching If-None-Match with 304,
+and admin writes change the ETag
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+PUBLIC_ENDPOINTS = [
+    "/api/pricing",
+    "/api/cms/settings",
+    "/api/site-texts",
+    "/api/system-config",
+    "/api/fabrics",
+    "/api/souvenirs",
+    "/api/boutique/products",
+    "/api/bulk/clothing-items",
+    "/api/pod/clothing-items",
+    "/api/categories/boutique"
+]
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping conditional caching tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+class TestConditionalCaching:
+    """Test ETag / If-None-Match handling on public reads"""
+
+    @pytest.mark.parametrize("path", PUBLIC_ENDPOINTS)
+    def test_etag_round_trip(self, path):
+        """A repeat request with the returned ETag gets an empty 304"""
+        response = requests.get(f"{BASE_URL}{path}")
+        assert response.status_code == 200
+        etag = response.headers.get("ETag")
+        assert etag, f"{path} sent no ETag"
+
+        cached = requests.get(f"{BASE_URL}{path}", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers.get("ETag") == etag
+        assert cached.content == b""
+        print(f"✓ {path} revalidated with 304")
+
+    def test_stale_etag_gets_full_response(self):
+        """An unknown ETag gets a full 200"""
+        response = requests.get(f"{BASE_URL}/api/pricing", headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+        assert response.json()
+        print("✓ Stale ETag served in full")
+
+    def test_query_variants_have_distinct_etags(self):
+        """Filtered and unfiltered boutique listings are cached separately"""
+        everything = requests.get(f"{BASE_URL}/api/boutique/products")
+        filtered = requests.get(f"{BASE_URL}/api/boutique/products", params={"category": "TEST_category"})
+        assert everything.headers.get("ETag") != filtered.headers.get("ETag")
+        print("✓ Query variants tagged separately")
+
+    def test_system_config_write_changes_etag(self, auth_headers):
+        """Updating a feature flag invalidates the /system-config ETag"""
+        before = requests.get(f"{BASE_URL}/api/system-config")
+        assert before.status_code == 200
+        etag = before.headers.get("ETag")
+        value = before.json().get("default_currency", "NGN")
+
+        response = requests.put(
+            f"{BASE_URL}/api/admin/system-config/default_currency",
+            json={"value": value},
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+
+        after = requests.get(f"{BASE_URL}/api/system-config", headers={"If-None-Match": etag})
+        assert after.status_code == 200
+        assert after.headers.get("ETag") != etag
+        print("✓ Admin write retired the old ETag")
+
+    def test_cache_stats_report_resource_versions(self, auth_headers):
+        """Cache stats include the resource version counters"""
+        response = requests.get(f"{BASE_URL}/api/admin/cache-stats", headers=auth_headers)
+        assert response.status_code == 200
+        assert "resource_versions" in response.json()
+        print("✓ Resource version stats reported")
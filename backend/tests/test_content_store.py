@@ -0,0 +1,75 @@
+"""
+Test Content-Addressed Upload Store
+Tests: re-uploading the same file returns the stored copy instead of writing a new one,
+and different files still get their own URLs
+"""
+import pytest
+import requests
+import os
+import io
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping content store tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+def upload_branding(content: bytes) -> str:
+    files = {'file': ('logo.png', io.BytesIO(content), 'image/png')}
+    response = requests.post(f"{BASE_URL}/api/branding/upload-design", files=files)
+    assert response.status_code == 200, response.text
+    return response.json()['url']
+
+
+class TestContentStore:
+    """Test deduplicated uploads"""
+
+    def test_same_content_same_url(self, auth_headers):
+        """The second upload of a file reuses the first copy"""
+        content = PNG_HEADER + uuid.uuid4().bytes
+        before = requests.get(f"{BASE_URL}/api/admin/storage/stats", headers=auth_headers).json()["content_store"]
+
+        first = upload_branding(content)
+        second = upload_branding(content)
+        assert first == second
+        assert "/cas/" in first
+
+        after = requests.get(f"{BASE_URL}/api/admin/storage/stats", headers=auth_headers).json()["content_store"]
+        assert after["hits"] >= before["hits"] + 1
+        print(f"✓ Duplicate upload reused {first}")
+
+    def test_different_content_different_url(self):
+        """Different files are stored separately"""
+        first = upload_branding(PNG_HEADER + uuid.uuid4().bytes)
+        second = upload_branding(PNG_HEADER + uuid.uuid4().bytes)
+        assert first != second
+        print("✓ Distinct uploads stored separately")
+
+    def test_pod_design_dedup(self):
+        """Two POD designs from the same file share the stored original"""
+        content = PNG_HEADER + uuid.uuid4().bytes
+        urls = []
+        for _ in range(2):
+            files = {'design_file': ('design.png', io.BytesIO(content), 'image/png')}
+            response = requests.post(f"{BASE_URL}/api/pod/upload-design", files=files,
+                                     data={'product_id': 'TEST_dedup'})
+            assert response.status_code == 200, response.text
+            urls.append(response.json()['original_file_url'])
+        assert urls[0] == urls[1]
+        print("✓ POD designs share one stored original")
@@ -0,0 +1,74 @@
+"""
+Test Keyset (Cursor) Pagination
+Tests: cursor mode on admin list endpoints, next_cursor chaining, invalid cursor rejection
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+
+@pytest.fixture(scope="module")
+def authenticated_client():
+    """Session with super admin auth header"""
+    session = requests.Session()
+    response = session.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping pagination tests")
+    session.headers.update({"Authorization": f"Bearer {response.json().get('token')}"})
+    return session
+
+
+class TestCursorPagination:
+    """Test ?cursor= paging on admin lists"""
+
+    @pytest.mark.parametrize("path,items_key", [
+        ("/api/admin/orders", "orders"),
+        ("/api/admin/email/logs", "logs"),
+        ("/api/admin/site-texts", "texts"),
+        ("/api/admin/pod/guest-designs", "designs"),
+        ("/api/admin/pod/guest-contacts", "contacts"),
+    ])
+    def test_first_page_returns_next_cursor(self, authenticated_client, path, items_key):
+        """An empty cursor selects cursor mode and returns next_cursor"""
+        response = authenticated_client.get(f"{BASE_URL}{path}?cursor=&limit=2")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert items_key in data
+        assert "next_cursor" in data
+        assert len(data[items_key]) <= 2
+        print(f"✓ {path} cursor mode: {len(data[items_key])} items, next_cursor={data['next_cursor']!r}")
+
+    def test_orders_pages_do_not_overlap(self, authenticated_client):
+        """Following next_cursor never repeats an order"""
+        first = authenticated_client.get(f"{BASE_URL}/api/admin/orders?cursor=&limit=5").json()
+        if not first["next_cursor"]:
+            pytest.skip("Not enough orders for a second page")
+
+        second = authenticated_client.get(
+            f"{BASE_URL}/api/admin/orders", params={"cursor": first["next_cursor"], "limit": 5}
+        ).json()
+        first_ids = {o["id"] for o in first["orders"]}
+        assert not first_ids & {o["id"] for o in second["orders"]}, "Pages overlap"
+        print("✓ Order pages chain without overlap")
+
+    def test_legacy_list_shape_unchanged(self, authenticated_client):
+        """Without a cursor, /admin/orders still returns a plain list"""
+        response = authenticated_client.get(f"{BASE_URL}/api/admin/orders?limit=2")
+        assert response.status_code == 200
+        assert isinstance(response.json(), list)
+        print("✓ skip/limit mode unchanged")
+
+    def test_invalid_cursor_rejected(self, authenticated_client):
+        """A garbage cursor is a 400, not a server error"""
+        response = authenticated_client.get(f"{BASE_URL}/api/admin/orders?cursor=not-a-cursor")
+        assert response.status_code == 400, f"Expected 400, got {response.status_code}"
+        print("✓ Invalid cursor rejected")
@@ -0,0 +1,98 @@
+"""
+Test Email Campaign Sending
+Tests: a campaign goes to every subscribed address in its audience, paged through the subscriber
+list in batches, and the send is recorded on the campaign and in the email logs. Campaigns here
+are addressed to a source only the fixture subscribers have, so real subscribers get nothing
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping email campaign tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+@pytest.fixture(scope="module")
+def test_source():
+    """Signup source shared only by this run's subscribers"""
+    return f"campaign-test-{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture(scope="module")
+def subscriber_emails(auth_headers, test_source):
+    """A few fresh subscribers from the test source, removed again afterwards"""
+    emails, ids = [], []
+    for n in range(3):
+        email = f"{test_source}-{n}@example.com"
+        response = requests.post(f"{BASE_URL}/api/admin/email/subscribers",
+                                 json={"email": email, "name": f"Test {n}", "source": test_source},
+                                 headers=auth_headers)
+        assert response.status_code == 200
+        emails.append(email)
+        ids.append(response.json()["id"])
+    yield emails
+    for subscriber_id in ids:
+        requests.delete(f"{BASE_URL}/api/admin/email/subscribers/{subscriber_id}", headers=auth_headers)
+
+
+class TestEmailCampaignSend:
+    """Test /api/admin/email/campaigns/{id}/send"""
+
+    def test_send_reaches_every_subscriber(self, auth_headers, subscriber_emails, test_source):
+        """sent + failed covers the whole audience, and nobody outside it"""
+        response = requests.post(f"{BASE_URL}/api/admin/email/campaigns", json={
+            "title": "Batched send test",
+            "subject": "Hello {{name}}",
+            "html_content": "<p>Hi {{name}}</p>",
+            "audience": f"source:{test_source}"
+        }, headers=auth_headers)
+        assert response.status_code == 200
+        campaign_id = response.json()["campaign"]["id"]
+
+        response = requests.post(f"{BASE_URL}/api/admin/email/campaigns/{campaign_id}/send",
+                                 headers=auth_headers, timeout=600)
+        assert response.status_code == 200
+        result = response.json()
+        assert result["sent_count"] + result["failed_count"] == len(subscriber_emails)
+
+        logs = requests.get(f"{BASE_URL}/api/admin/email/logs",
+                            params={"campaign_id": campaign_id, "limit": 500, "cursor": ""},
+                            headers=auth_headers).json()["logs"]
+        assert {log["recipient_email"] for log in logs} == set(subscriber_emails)
+
+        campaigns = requests.get(f"{BASE_URL}/api/admin/email/campaigns",
+                                 params={"status": "sent"}, headers=auth_headers).json()["campaigns"]
+        assert any(campaign["id"] == campaign_id for campaign in campaigns)
+        requests.delete(f"{BASE_URL}/api/admin/email/campaigns/{campaign_id}", headers=auth_headers)
+        print(f"✓ Campaign sent to its {len(subscriber_emails)} subscriber(s): {result}")
+
+    def test_send_twice_refused(self, auth_headers, subscriber_emails, test_source):
+        """A sent campaign cannot be sent again"""
+        response = requests.post(f"{BASE_URL}/api/admin/email/campaigns", json={
+            "title": "Resend test", "subject": "Once", "html_content": "<p>Once</p>",
+            "audience": f"source:{test_source}"
+        }, headers=auth_headers)
+        campaign_id = response.json()["campaign"]["id"]
+        first = requests.post(f"{BASE_URL}/api/admin/email/campaigns/{campaign_id}/send",
+                              headers=auth_headers, timeout=600)
+        assert first.status_code == 200
+        second = requests.post(f"{BASE_URL}/api/admin/email/campaigns/{campaign_id}/send", headers=auth_headers)
+        assert second.status_code == 400
+        requests.delete(f"{BASE_URL}/api/admin/email/campaigns/{campaign_id}", headers=auth_headers)
+        print("✓ Second send refused")
@@ -0,0 +1,117 @@
+"""
+Test File Catalog
+Tests: uploads appear in /api/admin/files straight away with the totals updated, the list
+pages with keyset cursors, deletes drop the entry, and the reconciler reports its pass
+"""
+import pytest
+import requests
+import os
+import io
+from PIL import Image
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Catalog path of the file uploaded by test_upload_is_listed
+uploaded = {}
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping file catalog tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+def make_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.effect_noise((64, 64), 64).convert('RGB').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def catalog_path(public_url: str) -> str:
+    # Local files are listed under /uploads/..., cloud files under their URL
+    return public_url[len('/api'):] if public_url.startswith('/api/uploads/') else public_url
+
+
+def list_files(auth_headers, **params) -> dict:
+    response = requests.get(f"{BASE_URL}/api/admin/files", params=params, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+class TestFileCatalog:
+    """Test the catalog-backed file manager"""
+
+    def test_upload_is_listed(self, auth_headers):
+        """A fresh upload is the newest entry and counted in the totals"""
+        before = list_files(auth_headers, limit=1)["stats"]["total"]
+
+        files = {'image': ('catalog.png', io.BytesIO(make_png()), 'image/png')}
+        response = requests.post(f"{BASE_URL}/api/admin/upload-image", files=files,
+                                 data={'module': 'fabric'}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        path = catalog_path(response.json()["image_url"])
+        uploaded["path"] = path
+
+        data = list_files(auth_headers, limit=20)
+        assert path in [f["path"] for f in data["files"]]
+        assert data["stats"]["total"] == before + 1
+        entry = next(f for f in data["files"] if f["path"] == path)
+        assert entry["type"] == "image"
+        assert entry["size"] > 0
+        print(f"✓ Upload listed: {entry['name']} ({entry['size_formatted']})")
+
+    def test_keyset_pages(self, auth_headers):
+        """Pages follow next_cursor without repeating entries"""
+        first = list_files(auth_headers, limit=2)
+        if not first["next_cursor"]:
+            pytest.skip("Not enough files for a second page")
+        second = list_files(auth_headers, limit=2, cursor=first["next_cursor"])
+        first_ids = {f["id"] for f in first["files"]}
+        assert not first_ids & {f["id"] for f in second["files"]}
+        print("✓ Second page continues after the first")
+
+    def test_invalid_cursor(self, auth_headers):
+        """A malformed cursor is a 400"""
+        response = requests.get(f"{BASE_URL}/api/admin/files", params={"cursor": "not-a-cursor"},
+                                headers=auth_headers)
+        assert response.status_code == 400
+        print("✓ Malformed cursor rejected")
+
+    def test_filtered_stats(self, auth_headers):
+        """Stats follow the type/source filters"""
+        everything = list_files(auth_headers, limit=1)["stats"]
+        images = list_files(auth_headers, limit=1, file_type="image")["stats"]
+        assert images["total"] == everything["images"]
+        assert images["documents"] == 0
+        print(f"✓ {images['total']} images of {everything['total']} files")
+
+    def test_delete_removes_entry(self, auth_headers):
+        """Deleting the uploaded file (when stored locally) removes it from the catalog"""
+        path = uploaded.get("path")
+        if not path or not path.startswith("/uploads/"):
+            pytest.skip("Test upload went to cloud storage - file manager deletes local files only")
+        response = requests.delete(f"{BASE_URL}/api/admin/files", params={"file_path": path},
+                                   headers=auth_headers)
+        assert response.status_code == 200
+        remaining = list_files(auth_headers, limit=50, source="local")["files"]
+        assert path not in [f["path"] for f in remaining]
+        print(f"✓ Deleted {path} from the catalog")
+
+    def test_reconcile(self, auth_headers):
+        """The reconciler reports what it scanned; a second pass finds nothing to change"""
+        response = requests.post(f"{BASE_URL}/api/admin/files/reconcile", headers=auth_headers)
+        assert response.status_code == 200
+        again = requests.post(f"{BASE_URL}/api/admin/files/reconcile", headers=auth_headers).json()
+        local = again["local"]
+        assert local["added"] == local["updated"] == local["deleted"] == 0
+        print(f"✓ Reconciled {local['directories']} directories, {local['directories_scanned']} rescanned")
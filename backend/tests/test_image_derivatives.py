@@ -0,0 +1,78 @@
+"""
+Test Image Derivatives
+Tests: image uploads produce WebP thumbnails and previews, and list endpoints
+return derivative URLs instead of only the full-size originals
+"""
+import pytest
+import requests
+import os
+import io
+from PIL import Image
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping derivative tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+def make_png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color=(200, 40, 90)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def absolute(url: str) -> str:
+    return f"{BASE_URL}{url}" if url.startswith('/') else url
+
+
+class TestImageDerivatives:
+    """Test thumbnail and preview generation"""
+
+    def test_upload_returns_derivatives(self, auth_headers):
+        """A large upload gets a 320px WebP thumbnail and a 1280px preview"""
+        files = {'image': ('large.png', io.BytesIO(make_png(2400, 1600)), 'image/png')}
+        response = requests.post(f"{BASE_URL}/api/admin/upload-image", files=files,
+                                 data={'module': 'fabric'}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        derivatives = response.json()["derivatives"]
+        assert set(derivatives) == {"thumb", "preview"}
+
+        thumb = Image.open(io.BytesIO(requests.get(absolute(derivatives["thumb"])).content))
+        assert thumb.format == "WEBP"
+        assert max(thumb.size) == 320
+
+        preview = Image.open(io.BytesIO(requests.get(absolute(derivatives["preview"])).content))
+        assert max(preview.size) == 1280
+        print(f"✓ Derivatives: thumb {thumb.size}, preview {preview.size}")
+
+    def test_catalog_lists_carry_thumbnails(self):
+        """Catalog items expose thumbnail_url and preview_url next to image_url"""
+        response = requests.get(f"{BASE_URL}/api/pod/clothing-items")
+        assert response.status_code == 200
+        items = [item for item in response.json() if item.get("image_url")]
+        for item in items:
+            assert item.get("thumbnail_url")
+            assert item.get("preview_url")
+        print(f"✓ {len(items)} clothing items with thumbnail URLs")
+
+    def test_guest_designs_carry_thumbnails(self, auth_headers):
+        """The admin design gallery gets thumbnails for originals"""
+        response = requests.get(f"{BASE_URL}/api/admin/pod/guest-designs", headers=auth_headers)
+        assert response.status_code == 200
+        designs = [d for d in response.json()["designs"] if d.get("original_file_url")]
+        for design in designs:
+            assert design.get("thumbnail_url")
+        print(f"✓ {len(designs)} designs with thumbnail URLs")
@@ -0,0 +1,97 @@
+"""
+Test Image Proxy Cache
+Tests: proxied images stream back with CORS headers, repeat requests are served from the
+disk cache, concurrent misses share one upstream fetch, and non-allowlisted hosts are refused
+"""
+import pytest
+import requests
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping image proxy tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+def placeholder_url() -> str:
+    # A text nobody else requested, so the first fetch is a guaranteed miss
+    return f"https://placehold.co/64x64/png?text={uuid.uuid4().hex[:8]}"
+
+
+def proxy(url: str, headers: dict = None) -> requests.Response:
+    return requests.get(f"{BASE_URL}/api/image-proxy", params={"url": url}, headers=headers or {}, timeout=30)
+
+
+def proxy_stats(auth_headers) -> dict:
+    response = requests.get(f"{BASE_URL}/api/admin/storage/stats", headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()["image_proxy"]
+
+
+class TestImageProxy:
+    """Test /api/image-proxy caching"""
+
+    def test_repeat_request_hits_cache(self, auth_headers):
+        """The second request for a URL is served from disk"""
+        url = placeholder_url()
+        first = proxy(url)
+        if first.status_code == 500:
+            pytest.skip("Upstream placeholder host unreachable")
+        assert first.status_code == 200
+        assert first.headers["Access-Control-Allow-Origin"] == "*"
+        assert first.headers["Content-Type"].startswith("image/")
+
+        before = proxy_stats(auth_headers)
+        second = proxy(url)
+        assert second.status_code == 200
+        assert second.content == first.content
+        assert proxy_stats(auth_headers)["hits"] == before["hits"] + 1
+        print(f"✓ Cached image served ({len(second.content)} bytes)")
+
+    def test_conditional_request(self):
+        """A client holding the current copy gets a 304"""
+        url = placeholder_url()
+        first = proxy(url)
+        if first.status_code == 500:
+            pytest.skip("Upstream placeholder host unreachable")
+        etag = first.headers["ETag"]
+        response = proxy(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        print("✓ Conditional request answered with 304")
+
+    def test_concurrent_misses_coalesce(self, auth_headers):
+        """Parallel requests for an uncached URL share one upstream fetch"""
+        url = placeholder_url()
+        before = proxy_stats(auth_headers)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            responses = list(pool.map(lambda _: proxy(url), range(6)))
+        if any(r.status_code == 500 for r in responses):
+            pytest.skip("Upstream placeholder host unreachable")
+        assert all(r.status_code == 200 for r in responses)
+        assert len({r.content for r in responses}) == 1
+
+        after = proxy_stats(auth_headers)
+        # With several workers each may fetch once, but never once per request
+        assert after["misses"] - before["misses"] < 6
+        print(f"✓ 6 concurrent requests, {after['misses'] - before['misses']} upstream fetch(es) in this worker")
+
+    def test_disallowed_domain(self):
+        """Hosts outside the allowlist are refused"""
+        response = proxy("https://example.com/image.png")
+        assert response.status_code == 403
+        print("✓ Disallowed domain refused")
@@ -0,0 +1,64 @@
+"""
+Test List Summary Projections
+Tests: admin lists return summary fields by default, fields= selection, fields=all, invalid fields
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+# Nested data the orders table never shows
+HEAVY_ORDER_FIELDS = {'cart_items', 'price_breakdown', 'color_quantities', 'size_breakdown', 'design_url'}
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping projection tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+class TestListProjections:
+    """Test GET /api/admin/orders?fields="""
+
+    def test_orders_default_to_summary(self, auth_headers):
+        """Order rows leave out nested line-item data"""
+        response = requests.get(f"{BASE_URL}/api/admin/orders?limit=20", headers=auth_headers)
+        assert response.status_code == 200
+        for order in response.json():
+            assert "id" in order
+            assert not HEAVY_ORDER_FIELDS & set(order), f"Summary row has heavy fields: {HEAVY_ORDER_FIELDS & set(order)}"
+        print("✓ Orders list returns summary rows")
+
+    def test_orders_field_selection(self, auth_headers):
+        """fields= limits rows to the requested fields plus id/created_at"""
+        response = requests.get(f"{BASE_URL}/api/admin/orders?limit=5&fields=status,total_price", headers=auth_headers)
+        assert response.status_code == 200
+        for order in response.json():
+            assert set(order) <= {"id", "created_at", "status", "total_price"}, f"Unexpected fields: {set(order)}"
+        print("✓ fields= selection honoured")
+
+    def test_orders_all_fields(self, auth_headers):
+        """fields=all returns whole documents without internal keys"""
+        response = requests.get(f"{BASE_URL}/api/admin/orders?limit=5&fields=all", headers=auth_headers)
+        assert response.status_code == 200
+        for order in response.json():
+            assert "lookup_keys" not in order
+            assert "_id" not in order
+        print("✓ fields=all returns full documents")
+
+    def test_invalid_fields_rejected(self, auth_headers):
+        """Operator-looking field names are a 400"""
+        response = requests.get(f"{BASE_URL}/api/admin/orders?fields=$where", headers=auth_headers)
+        assert response.status_code == 400, f"Expected 400, got {response.status_code}"
+        print("✓ Invalid field names rejected")
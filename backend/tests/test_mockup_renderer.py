@@ -0,0 +1,137 @@
+"""
+Test Mockup Renderer
+Tests: the server composites a POD design onto its garment from the saved transform, an
+unchanged transform reuses the stored mockup, a new transform renders a new one, and a large
+design is drawn at the size its transform asks for
+"""
+import pytest
+import requests
+import os
+import io
+from PIL import Image
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+def make_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.effect_noise((300, 300), 64).convert('RGBA').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def make_halves_png(size: int = 2000) -> bytes:
+    """A design larger than any derivative: red left half, blue right half"""
+    image = Image.new('RGBA', (size, size), (0, 0, 255, 255))
+    image.paste((255, 0, 0, 255), (0, 0, size // 2, size))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def absolute(url: str) -> str:
+    return f"{BASE_URL}{url}" if url.startswith('/') else url
+
+
+def render(design_id: str) -> requests.Response:
+    return requests.post(f"{BASE_URL}/api/pod/design/{design_id}/render-mockup", timeout=60)
+
+
+def upload_design(garment: dict, content: bytes) -> str:
+    files = {'design_file': ('mockup-design.png', io.BytesIO(content), 'image/png')}
+    response = requests.post(f"{BASE_URL}/api/pod/upload-design", files=files,
+                             data={'product_id': garment['id'], 'item_type': garment.get('name', '')})
+    assert response.status_code == 200, response.text
+    return response.json()["temp_design_id"]
+
+
+@pytest.fixture(scope="module")
+def garment():
+    """The first POD garment that has a photo"""
+    items = requests.get(f"{BASE_URL}/api/pod/clothing-items").json()
+    garment = next((item for item in items if item.get('base_image_url') or item.get('image_url')), None)
+    if garment is None:
+        pytest.skip("No POD garment with an image")
+    return garment
+
+
+@pytest.fixture(scope="module")
+def design_id(garment):
+    """A fresh design on the garment"""
+    return upload_design(garment, make_png())
+
+
+class TestMockupRenderer:
+    """Test /api/pod/design/{id}/render-mockup"""
+
+    def test_render(self, design_id):
+        """The mockup is a garment-sized WebP linked to the design"""
+        response = render(design_id)
+        if response.status_code == 503:
+            pytest.skip("Server-side rendering not available")
+        assert response.status_code == 200, response.text
+        mockup_url = response.json()["mockup_file_url"]
+
+        image = requests.get(absolute(mockup_url))
+        assert image.status_code == 200
+        with Image.open(io.BytesIO(image.content)) as mockup:
+            assert mockup.format == 'WEBP'
+            assert mockup.size == (1000, 1000)
+
+        design = requests.get(f"{BASE_URL}/api/pod/design/{design_id}").json()
+        assert design["mockup_file_url"] == mockup_url
+        print(f"✓ Rendered {mockup_url}")
+
+    def test_same_transform_is_reused(self, design_id):
+        """Rendering again without changes returns the stored mockup"""
+        first = render(design_id)
+        if first.status_code == 503:
+            pytest.skip("Server-side rendering not available")
+        second = render(design_id)
+        assert second.status_code == 200
+        assert second.json()["cached"] is True
+        assert second.json()["mockup_file_url"] == first.json()["mockup_file_url"]
+        print("✓ Unchanged transform reused the stored mockup")
+
+    def test_new_transform_renders_again(self, design_id):
+        """A moved and rotated design gets its own mockup"""
+        before = render(design_id)
+        if before.status_code == 503:
+            pytest.skip("Server-side rendering not available")
+        response = requests.put(f"{BASE_URL}/api/pod/design/{design_id}/transform",
+                                json={'position_x': 170, 'position_y': 120, 'scale': 0.4, 'rotation': 30})
+        assert response.status_code == 200
+        after = render(design_id)
+        assert after.status_code == 200
+        assert after.json()["mockup_file_url"] != before.json()["mockup_file_url"]
+        print("✓ New transform rendered a new mockup")
+
+    def test_unknown_design(self):
+        """Rendering a design that does not exist is a 404"""
+        assert render("design_missing").status_code == 404
+        print("✓ Unknown design refused")
+
+    def test_large_design_drawn_to_scale(self, garment):
+        """
+        A 2000px design at scale 0.1 from (100, 100) covers 200x200 stage units, i.e. 400x400
+        output pixels from (200, 200), whatever size the preview it is drawn from has
+        """
+        design_id = upload_design(garment, make_halves_png())
+        response = requests.put(f"{BASE_URL}/api/pod/design/{design_id}/transform",
+                                json={'position_x': 100, 'position_y': 100, 'scale': 0.1, 'rotation': 0})
+        assert response.status_code == 200
+        response = render(design_id)
+        if response.status_code == 503:
+            pytest.skip("Server-side rendering not available")
+        assert response.status_code == 200, response.text
+
+        image = requests.get(absolute(response.json()["mockup_file_url"]))
+        with Image.open(io.BytesIO(image.content)) as mockup:
+            pixels = mockup.convert('RGB')
+            # Well inside each half, away from the edges and the seam between them
+            for point in [(240, 240), (360, 560), (240, 560)]:
+                red, green, blue = pixels.getpixel(point)
+                assert red > green + 60 and red > blue + 60, (point, (red, green, blue))
+            for point in [(440, 240), (560, 400), (560, 560)]:
+                red, green, blue = pixels.getpixel(point)
+                assert blue > red + 60 and blue > green + 60, (point, (red, green, blue))
+        print("✓ Large design placed over its 400px box")
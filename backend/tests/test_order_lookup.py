@@ -0,0 +1,68 @@
+"""
+Test Order Lookup Keys
+Tests: create routes return orders without the internal lookup_keys, and a new order can be
+found by its code through the keyed lookup path, in any case and with surrounding spaces
+"""
+import pytest
+import requests
+import os
+import json
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+@pytest.fixture(scope="module")
+def fabric_order():
+    response = requests.post(f"{BASE_URL}/api/orders/fabric", json={
+        "customer_name": "Lookup Test",
+        "customer_email": "lookup-test@example.com",
+        "customer_phone": "08000000000",
+        "items": [{"name": "Test fabric", "quantity": 2, "price": 1500}],
+        "total_price": 3000
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+class TestOrderLookup:
+    """Test order create responses and GET /api/orders/{order_id}"""
+
+    def test_create_hides_lookup_keys(self, fabric_order):
+        """The created order is returned without internal fields"""
+        order = fabric_order["order"]
+        assert order["order_id"] == fabric_order["order_id"]
+        assert "lookup_keys" not in order
+        assert "_id" not in order
+        print(f"✓ Created {fabric_order['order_id']} without lookup_keys")
+
+    def test_boutique_create_hides_lookup_keys(self):
+        """Boutique orders return the inserted document, minus internal fields"""
+        cart = [{"id": "lookup-test", "name": "Test item", "price": 1000, "quantity": 1}]
+        response = requests.post(f"{BASE_URL}/api/orders/boutique", data={
+            "customer_name": "Lookup Test",
+            "customer_email": "lookup-test@example.com",
+            "customer_phone": "08000000000",
+            "cart_items": json.dumps(cart)
+        })
+        assert response.status_code == 200, response.text
+        assert "lookup_keys" not in response.json()
+        assert "_id" not in response.json()
+        print(f"✓ Boutique order {response.json()['order_id']} without lookup_keys")
+
+    def test_lookup_by_code(self, fabric_order):
+        """The order resolves by its code, normalised the way the tracker does"""
+        code = fabric_order["order_id"]
+        response = requests.get(f"{BASE_URL}/api/orders/{code}")
+        assert response.status_code == 200
+        assert response.json()["order_id"] == code
+        assert "lookup_keys" not in response.json()
+
+        response = requests.get(f"{BASE_URL}/api/public/track/ {code.lower()} ")
+        assert response.status_code == 200
+        assert response.json()["code"] == code
+        print(f"✓ {code} found by code and by its normalised form")
+
+    def test_unknown_code(self):
+        """An unknown code is a 404"""
+        assert requests.get(f"{BASE_URL}/api/orders/FAB-000000-NOPE").status_code == 404
+        print("✓ Unknown order code refused")
@@ -3,6 +3,7 @@ Test suite for POD Guest Tracking System (Stateless Design Upload Flow)
 Tests the following features:
 1. POD design upload returns temp_design_id and saves with status='unassigned'
 2. POD link-design endpoint links design to contact and updates status='assigned'
+   (link-multiple-designs links several in one call, without duplicates on relink)
 3. Admin API returns correct counts for assigned vs unassigned designs
 """
 
@@ -10,6 +11,7 @@ import pytest
 import requests
 import os
 import io
+import uuid
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
 
@@ -153,6 +155,82 @@ class TestPODLinkDesign:
         print("✓ Link non-existent design correctly returns 404")
 
 
+def upload_test_design() -> str:
+    """Upload a minimal PNG and return its temp_design_id"""
+    png = (
+        b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+        b'\x00\x00\x00\nIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01\r\n-\xb4\x00\x00\x00\x00IEND\xaeB`\x82'
+    )
+    files = {'design_file': ('test_design.png', io.BytesIO(png), 'image/png')}
+    response = requests.post(f"{BASE_URL}/api/pod/upload-design", files=files,
+                             data={'product_id': 'tshirt', 'item_type': 'T-Shirt'})
+    assert response.status_code == 200, response.text
+    return response.json()['temp_design_id']
+
+
+class TestPODLinkMultipleDesigns:
+    """Test /api/pod/link-multiple-designs endpoint - linking several designs at once"""
+
+    @pytest.fixture(autouse=True)
+    def setup_admin_session(self):
+        """Admin session, to read the contact back"""
+        login_response = requests.post(f"{BASE_URL}/api/auth/login", json={
+            'email': ADMIN_EMAIL,
+            'password': ADMIN_PASSWORD
+        })
+        if login_response.status_code != 200:
+            pytest.skip(f"Admin login failed: {login_response.text}")
+        self.cookies = {'session_token': login_response.json().get('session_token')}
+
+    def contact_for(self, email):
+        response = requests.get(f"{BASE_URL}/api/admin/pod/guest-contacts",
+                                params={'search': email}, cookies=self.cookies)
+        assert response.status_code == 200
+        return next((contact for contact in response.json()['contacts'] if contact['email'] == email), None)
+
+    def test_link_several_then_relink(self):
+        """Every design is linked in one call; linking them again adds no duplicates"""
+        design_ids = [upload_test_design() for _ in range(3)]
+        link_data = {
+            'design_ids': design_ids,
+            'name': 'Multi Link Test',
+            'email': f"multi-link-{uuid.uuid4().hex[:8]}@example.com",
+            'phone': '+2341234567890'
+        }
+
+        response = requests.post(f"{BASE_URL}/api/pod/link-multiple-designs", json=link_data)
+        assert response.status_code == 200, response.text
+        assert response.json()['linked_count'] == 3
+
+        for design_id in design_ids:
+            design = requests.get(f"{BASE_URL}/api/pod/design/{design_id}").json()
+            assert design['status'] == 'assigned'
+
+        # A repeat call, plus one new design, alongside a duplicate id in the same request
+        new_design_id = upload_test_design()
+        link_data['design_ids'] = design_ids + [new_design_id, new_design_id]
+        response = requests.post(f"{BASE_URL}/api/pod/link-multiple-designs", json=link_data)
+        assert response.status_code == 200, response.text
+
+        contact = self.contact_for(link_data['email'])
+        assert contact is not None
+        assert sorted(contact['designs']) == sorted(design_ids + [new_design_id])
+        print(f"✓ Linked {len(contact['designs'])} designs without duplicates")
+
+    def test_link_only_unknown_designs_fails(self):
+        """Unknown design ids are refused before any contact is created"""
+        email = f"multi-link-missing-{uuid.uuid4().hex[:8]}@example.com"
+        response = requests.post(f"{BASE_URL}/api/pod/link-multiple-designs", json={
+            'design_ids': ['design_nonexistent123456', 'design_nonexistent654321'],
+            'name': 'Test User',
+            'email': email,
+            'phone': '+2341234567890'
+        })
+        assert response.status_code == 404, f"Expected 404, got {response.status_code}"
+        assert self.contact_for(email) is None
+        print("✓ Unknown designs refused without creating a contact")
+
+
 class TestAdminGuestDesignsAPI:
     """Test /api/admin/pod/guest-designs endpoint - admin dashboard"""
     
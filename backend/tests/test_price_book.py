@@ -0,0 +1,108 @@
+"""
+Test Compiled Price Book
+Tests: quotes are priced from the compiled book, pricing writes reach the next quote,
+and batch quotes match single quotes line for line
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+QUOTE = {
+    "clothing_item": "T-Shirt",
+    "quantity": 60,
+    "print_type": "front",
+    "fabric_quality": "standard"
+}
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping price book tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+class TestPriceBook:
+    """Test POST /api/quote/calculate against pricing updates"""
+
+    def test_quote_breakdown(self):
+        """Quotes return the full breakdown"""
+        response = requests.post(f"{BASE_URL}/api/quote/calculate", json=QUOTE)
+        assert response.status_code == 200
+        breakdown = response.json()["breakdown"]
+        for key in ("base_price", "fabric_cost", "print_cost", "discount_percentage", "price_per_item", "total_price"):
+            assert key in breakdown, f"Missing {key}"
+        assert breakdown["discount_percentage"] > 0, "60 pieces should fall in a discount tier"
+        print(f"✓ Quote priced: {breakdown['total_price']}")
+
+    def test_batch_quote_matches_single_quotes(self):
+        """Each batch line is priced exactly like the same single quote"""
+        lines = [
+            QUOTE,
+            {**QUOTE, "quantity": 10, "print_type": "embroidery"},
+            {**QUOTE, "clothing_item": "Hoodie", "quantity": 250, "print_type": "front_back", "fabric_quality": "premium"}
+        ]
+        response = requests.post(f"{BASE_URL}/api/quote/calculate-batch", json={"items": lines})
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["quotes"]) == len(lines)
+
+        for line, quote in zip(lines, data["quotes"]):
+            single = requests.post(f"{BASE_URL}/api/quote/calculate", json=line)
+            assert single.status_code == 200
+            assert quote["estimated_days"] == single.json()["estimated_days"]
+            assert quote["estimated_price"] == pytest.approx(single.json()["estimated_price"])
+        assert data["total_price"] == pytest.approx(sum(quote["estimated_price"] for quote in data["quotes"]))
+        print(f"✓ Batch of {len(lines)} lines priced: {data['total_price']}")
+
+    def test_batch_quote_rejects_empty(self):
+        """An empty batch is a validation error"""
+        response = requests.post(f"{BASE_URL}/api/quote/calculate-batch", json={"items": []})
+        assert response.status_code == 422
+        print("✓ Empty batch rejected")
+
+    def test_out_of_range_quantity_rejected(self):
+        """Quantities beyond 64 bits (or below one) are validation errors, not server errors"""
+        for quantity in (10 ** 20, 0, -5):
+            single = requests.post(f"{BASE_URL}/api/quote/calculate", json={**QUOTE, "quantity": quantity})
+            assert single.status_code == 422
+            batch = requests.post(f"{BASE_URL}/api/quote/calculate-batch",
+                                  json={"items": [QUOTE, {**QUOTE, "quantity": quantity}]})
+            assert batch.status_code == 422
+        print("✓ Out-of-range quantities rejected")
+
+    def test_production_cost_update_reprices(self, auth_headers):
+        """Updating production costs changes the very next quote"""
+        costs = requests.get(f"{BASE_URL}/api/admin/production-costs", headers=auth_headers)
+        assert costs.status_code == 200
+        original = costs.json()
+
+        try:
+            updated = {**original, "bulk_print_cost_per_piece": (original.get("bulk_print_cost_per_piece") or 500) + 111}
+            response = requests.put(f"{BASE_URL}/api/admin/production-costs", json=updated, headers=auth_headers)
+            assert response.status_code == 200
+
+            quote = requests.post(f"{BASE_URL}/api/quote/calculate", json=QUOTE)
+            assert quote.status_code == 200
+            assert quote.json()["breakdown"]["print_cost"] == updated["bulk_print_cost_per_piece"]
+            print("✓ Price book recompiled after production cost update")
+        finally:
+            requests.put(f"{BASE_URL}/api/admin/production-costs", json=original, headers=auth_headers)
+
+    def test_cache_stats_report_price_book(self, auth_headers):
+        """Cache stats include the price book version"""
+        response = requests.get(f"{BASE_URL}/api/admin/cache-stats", headers=auth_headers)
+        assert response.status_code == 200
+        assert "price_book" in response.json()
+        print("✓ Price book stats reported")
@@ -0,0 +1,138 @@
+"""
+Test Authenticated Principal Cache
+Tests: logout, an admin role change and removing an admin each evict the cached principal, so the
+next request sees the change; cached principals expire after the TTL
+"""
+import pytest
+import requests
+import os
+import time
+import uuid
+
+from core.principal_cache import PrincipalCache
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping principal cache tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+@pytest.fixture
+def admin(auth_headers):
+    """A fresh admin, logged in; requests with its session token go through the principal cache"""
+    email = f"principal-test-{uuid.uuid4().hex[:8]}@example.com"
+    password = "principal-test-pass"
+    response = requests.post(f"{BASE_URL}/api/super-admin/create-admin", json={
+        "email": email,
+        "password": password,
+        "name": "Principal Test",
+        "role": {"can_view_orders": True}
+    }, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    user_id = response.json()["user_id"]
+
+    login = requests.post(f"{BASE_URL}/api/auth/login", json={"email": email, "password": password})
+    assert login.status_code == 200, login.text
+    session_token = login.json()["session_token"]
+    return {
+        "user_id": user_id,
+        "session_token": session_token,
+        "headers": {"Authorization": f"Bearer {session_token}"}
+    }
+
+
+def me(headers: dict) -> requests.Response:
+    return requests.get(f"{BASE_URL}/api/auth/me", headers=headers)
+
+
+class TestPrincipalEviction:
+    """Test that writes to a user are seen by the very next authenticated request"""
+
+    def test_logout_evicts_session(self, admin):
+        """A logged-out session token is refused even though its principal was cached"""
+        assert me(admin["headers"]).status_code == 200
+        assert me(admin["headers"]).status_code == 200
+
+        response = requests.post(f"{BASE_URL}/api/auth/logout", cookies={"session_token": admin["session_token"]})
+        assert response.status_code == 200
+
+        assert me(admin["headers"]).status_code == 401
+        print("✓ Logged-out session refused")
+
+    def test_role_change_evicts_principal(self, admin, auth_headers):
+        """A new role is in effect on the next request, not after the cache expires"""
+        assert me(admin["headers"]).json()["role"].get("can_view_orders") is True
+
+        response = requests.patch(f"{BASE_URL}/api/super-admin/admin/{admin['user_id']}/role",
+                                  json={"can_view_orders": False, "can_view_quotes": True}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+
+        role = me(admin["headers"]).json()["role"]
+        assert role.get("can_view_orders") is False
+        assert role.get("can_view_quotes") is True
+        print("✓ Role change seen on the next request")
+
+    def test_admin_removal_evicts_principal(self, admin, auth_headers):
+        """A removed admin loses admin access on the next request"""
+        assert me(admin["headers"]).json()["is_admin"] is True
+        assert requests.get(f"{BASE_URL}/api/admin/pod/guest-designs", headers=admin["headers"]).status_code == 200
+
+        response = requests.delete(f"{BASE_URL}/api/super-admin/admins/{admin['user_id']}", headers=auth_headers)
+        assert response.status_code == 200, response.text
+
+        assert me(admin["headers"]).json()["is_admin"] is False
+        response = requests.get(f"{BASE_URL}/api/admin/pod/guest-designs", headers=admin["headers"])
+        assert response.status_code == 403
+        print("✓ Removed admin refused on the next request")
+
+
+class TestPrincipalCacheExpiry:
+    """Test PrincipalCache's bounds on staleness directly"""
+
+    def test_ttl_bounds_staleness(self):
+        """An entry nobody invalidated is dropped once the TTL has passed"""
+        cache = PrincipalCache(ttl_seconds=1)
+        cache.set(('jwt', 'user_ttl'), {'user_id': 'user_ttl', 'is_admin': True})
+        assert cache.get(('jwt', 'user_ttl'))['is_admin'] is True
+
+        time.sleep(1.1)
+        assert cache.get(('jwt', 'user_ttl')) is None
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+        print("✓ Cached principal expired after the TTL")
+
+    def test_session_expiry_bounds_staleness(self):
+        """A session-backed entry is never served past the session's own expiry"""
+        cache = PrincipalCache(ttl_seconds=60)
+        cache.set(('session', 'expiring'), {'user_id': 'user_session'}, session_expires_at=time.time() + 0.2)
+        assert cache.get(('session', 'expiring')) is not None
+
+        time.sleep(0.3)
+        assert cache.get(('session', 'expiring')) is None
+        print("✓ Cached principal dropped with its session")
+
+    def test_invalidate_user_matches_either_id(self):
+        """invalidate_user drops every key for the user, whichever id field it was cached under"""
+        cache = PrincipalCache()
+        cache.set(('session', 'a'), {'id': 'user_both', 'user_id': 'user_both'})
+        cache.set(('jwt', 'user_both'), {'user_id': 'user_both'})
+        cache.set(('jwt', 'someone_else'), {'user_id': 'someone_else'})
+
+        cache.invalidate_user('user_both')
+        assert cache.get(('session', 'a')) is None
+        assert cache.get(('jwt', 'user_both')) is None
+        assert cache.get(('jwt', 'someone_else')) is not None
+        print("✓ Every entry for the user evicted, others kept")
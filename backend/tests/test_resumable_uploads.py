@@ -0,0 +1,127 @@
+"""
+Test Resumable POD Uploads
+Tests: a print file uploaded in chunks becomes an unassigned design, an interrupted
+upload resumes from the server's offset, stale offsets are refused, and finalize is idempotent
+"""
+import requests
+import os
+import io
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+def make_png() -> bytes:
+    buffer = io.BytesIO()
+    # Noise compresses badly, so the file spans several chunks
+    Image.effect_noise((1024, 1024), 64).convert('RGB').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def create_session(content: bytes) -> dict:
+    response = requests.post(f"{BASE_URL}/api/pod/uploads", json={
+        "filename": "print.png",
+        "content_type": "image/png",
+        "size": len(content),
+        "product_id": "TEST_resumable"
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def put_chunk(upload_id: str, offset: int, chunk: bytes) -> requests.Response:
+    return requests.put(f"{BASE_URL}/api/pod/uploads/{upload_id}", data=chunk,
+                        headers={"Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream"})
+
+
+class TestResumableUploads:
+    """Test the /api/pod/uploads session protocol"""
+
+    def test_chunked_upload_creates_design(self):
+        """Chunks in order, then finalize, give an unassigned design"""
+        content = make_png()
+        session = create_session(content)
+        upload_id = session["upload_id"]
+        assert session["offset"] == 0
+
+        chunk_size = 256 * 1024
+        for offset in range(0, len(content), chunk_size):
+            response = put_chunk(upload_id, offset, content[offset:offset + chunk_size])
+            assert response.status_code == 200
+            assert int(response.headers["Upload-Offset"]) == min(offset + chunk_size, len(content))
+
+        response = requests.post(f"{BASE_URL}/api/pod/uploads/{upload_id}/finalize")
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["status"] == "unassigned"
+        assert data["temp_design_id"].startswith("design_")
+
+        design = requests.get(f"{BASE_URL}/api/pod/design/{data['temp_design_id']}")
+        assert design.status_code == 200
+        print(f"✓ Chunked upload created {data['temp_design_id']}")
+
+    def test_finalize_is_idempotent(self):
+        """Concurrent and repeated finalize calls all lead to the same single design"""
+        content = make_png()
+        upload_id = create_session(content)["upload_id"]
+        assert put_chunk(upload_id, 0, content).status_code == 200
+
+        def finalize(_):
+            return requests.post(f"{BASE_URL}/api/pod/uploads/{upload_id}/finalize")
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(finalize, range(4)))
+        assert all(response.status_code in (200, 409) for response in responses)
+        created = {response.json()["temp_design_id"] for response in responses if response.status_code == 200}
+        assert len(created) == 1
+
+        repeat = finalize(None)
+        assert repeat.status_code == 200
+        assert repeat.json()["temp_design_id"] in created
+        print(f"✓ Finalize returned one design: {repeat.json()['temp_design_id']}")
+
+    def test_resume_from_server_offset(self):
+        """After an interruption the client reads the offset and sends the rest"""
+        content = make_png()
+        upload_id = create_session(content)["upload_id"]
+
+        half = len(content) // 2
+        assert put_chunk(upload_id, 0, content[:half]).status_code == 200
+
+        status = requests.get(f"{BASE_URL}/api/pod/uploads/{upload_id}").json()
+        assert status["offset"] == half
+        assert status["complete"] is False
+
+        assert put_chunk(upload_id, status["offset"], content[half:]).status_code == 200
+        response = requests.post(f"{BASE_URL}/api/pod/uploads/{upload_id}/finalize")
+        assert response.status_code == 200
+        print("✓ Upload resumed from server offset")
+
+    def test_stale_offset_conflict(self):
+        """A chunk for the wrong offset gets a 409 with the current offset"""
+        content = make_png()
+        upload_id = create_session(content)["upload_id"]
+        put_chunk(upload_id, 0, content[:1000])
+
+        response = put_chunk(upload_id, 0, content[:1000])
+        assert response.status_code == 409
+        assert response.json()["detail"]["offset"] == 1000
+
+        incomplete = requests.post(f"{BASE_URL}/api/pod/uploads/{upload_id}/finalize")
+        assert incomplete.status_code == 409
+
+        requests.delete(f"{BASE_URL}/api/pod/uploads/{upload_id}")
+        assert requests.get(f"{BASE_URL}/api/pod/uploads/{upload_id}").status_code == 404
+        print("✓ Stale offset refused and session cancelled")
+
+    def test_reject_non_image(self):
+        """Only image print files can start a session"""
+        response = requests.post(f"{BASE_URL}/api/pod/uploads", json={
+            "filename": "notes.pdf",
+            "content_type": "application/pdf",
+            "size": 1000,
+            "product_id": "TEST_resumable"
+        })
+        assert response.status_code == 400
+        print("✓ Non-image session rejected")
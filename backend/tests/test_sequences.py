@@ -0,0 +1,118 @@
+"""
+Test ID Sequence Allocator
+Tests: numbers are handed out from reserved blocks and carry on across a block boundary, two
+allocators sharing one counter never issue the same code, a new day restarts numbering, and the
+JOB counter is seeded with $max from job orders issued before it existed.
+Runs against a scratch database on MONGO_URL, dropped afterwards.
+"""
+import pytest
+import os
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from core.sequences import SequenceAllocator, create_sequence_allocator, daily_code
+
+MONGO_URL = os.environ.get('MONGO_URL', '')
+
+DAY = datetime(2025, 3, 14, 9, 30, tzinfo=timezone.utc)
+NEXT_DAY = datetime(2025, 3, 15, 0, 5, tzinfo=timezone.utc)
+
+
+def run_with_db(test):
+    """Run test(db) against a fresh scratch database"""
+    if not MONGO_URL:
+        pytest.skip("MONGO_URL not set - skipping sequence allocator tests")
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def scenario():
+        client = AsyncIOMotorClient(MONGO_URL)
+        name = f"test_sequences_{uuid.uuid4().hex[:8]}"
+        try:
+            await test(client[name])
+        finally:
+            await client.drop_database(name)
+            client.close()
+
+    asyncio.run(scenario())
+
+
+def order_allocator(db, block_size: int) -> SequenceAllocator:
+    allocator = SequenceAllocator(db, block_size=block_size)
+    allocator.register(daily_code('order', 'TM', 'order_counters'))
+    return allocator
+
+
+class TestSequenceAllocator:
+    """Test core.sequences.SequenceAllocator against MongoDB"""
+
+    def test_block_boundary(self):
+        """Numbers run on from one block into the next, reserving once per block"""
+        async def test(db):
+            allocator = order_allocator(db, block_size=3)
+            codes = [await allocator.next_id('order', DAY) for _ in range(7)]
+
+            assert codes == [f"TM-0325-14{str(n).zfill(4)}" for n in range(1, 8)]
+            # Three blocks of three reserved for seven codes
+            counter = await db.order_counters.find_one({'day_key': '20250314'})
+            assert counter['counter'] == 9
+            print(f"✓ {codes[0]} .. {codes[-1]} across three blocks")
+
+        run_with_db(test)
+
+    def test_two_allocators_share_counter(self):
+        """Two workers on one counter interleave blocks and never repeat a code"""
+        async def test(db):
+            first = order_allocator(db, block_size=4)
+            second = order_allocator(db, block_size=4)
+
+            async def take(allocator, count):
+                return [await allocator.next_id('order', DAY) for _ in range(count)]
+
+            codes_a, codes_b = await asyncio.gather(take(first, 10), take(second, 10))
+            assert len(set(codes_a) | set(codes_b)) == 20
+            # Each worker's codes still ascend within its own blocks
+            assert codes_a == sorted(codes_a)
+            assert codes_b == sorted(codes_b)
+            print("✓ 20 unique codes from two allocators")
+
+        run_with_db(test)
+
+    def test_day_rollover(self):
+        """A new day restarts at 1 under its own counter, and the old day's block is dropped"""
+        async def test(db):
+            allocator = order_allocator(db, block_size=5)
+            await allocator.next_id('order', DAY)
+            await allocator.next_id('order', DAY)
+
+            assert await allocator.next_id('order', NEXT_DAY) == "TM-0325-150001"
+            assert list(allocator._blocks) == [('order', '20250315')]
+            assert (await db.order_counters.find_one({'day_key': '20250315'}))['counter'] == 5
+
+            # Going back to the earlier day reserves a fresh block after the one already taken
+            assert await allocator.next_id('order', DAY) == "TM-0325-140006"
+            print("✓ Numbering restarted on the new day")
+
+        run_with_db(test)
+
+    def test_job_counter_seeded_from_existing_ids(self):
+        """JOB numbers continue after the highest job order already issued that day"""
+        async def test(db):
+            await db.job_orders.insert_many([
+                {'job_order_id': 'JOB-20250314-007'},
+                {'job_order_id': 'JOB-20250314-012'},
+                {'job_order_id': 'JOB-20250313-099'},
+            ])
+            # A counter below the existing ids is raised by $max, never lowered
+            await db.job_order_counters.insert_one({'day_key': 'job_20250314', 'counter': 3})
+
+            allocator = create_sequence_allocator(db, block_size=2)
+            assert await allocator.next_id('job_order', DAY) == "JOB-20250314-013"
+            assert await allocator.next_id('job_order', DAY) == "JOB-20250314-014"
+            assert await allocator.next_id('job_order', DAY) == "JOB-20250314-015"
+
+            # A day with no job orders starts from 1
+            assert await allocator.next_id('job_order', NEXT_DAY) == "JOB-20250315-001"
+            print("✓ JOB counter seeded past existing job orders")
+
+        run_with_db(test)
@@ -0,0 +1,135 @@
+"""
+Test Storage Backends
+Tests: uploads go through the configured storage backend off the event loop,
+and the backend's call/retry counters are reported to super admins; retries, permanent
+errors and the concurrency limit are checked directly against the in-memory backend
+"""
+import pytest
+import requests
+import os
+import io
+import asyncio
+import time
+
+from services.storage_backends import MemoryStorageBackend
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+PNG_CONTENT = (
+    b'\x89PNG\r\n\x1a\n'
+    b'\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde'
+    b'\x00\x00\x00\x0cIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\x18\xd8N'
+    b'\x00\x00\x00\x00IEND\xaeB`\x82'
+)
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping storage backend tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+class TestStorageBackends:
+    """Test GET /api/admin/storage/stats against uploads"""
+
+    def test_stats_shape(self, auth_headers):
+        """The primary backend and its limits are reported"""
+        response = requests.get(f"{BASE_URL}/api/admin/storage/stats", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["primary"] in data["backends"]
+        for backend in data["backends"].values():
+            assert backend["max_concurrency"] >= 1
+            assert backend["in_flight"] >= 0
+        print(f"✓ Storage backend: {data['primary']}")
+
+    def test_stats_require_super_admin(self):
+        """Anonymous callers cannot read storage stats"""
+        response = requests.get(f"{BASE_URL}/api/admin/storage/stats")
+        assert response.status_code in [401, 403]
+        print("✓ Storage stats protected")
+
+    def test_upload_goes_through_backend(self, auth_headers):
+        """An admin image upload is counted by the backend that stored it"""
+        before = requests.get(f"{BASE_URL}/api/admin/storage/stats", headers=auth_headers).json()
+
+        files = {'image': ('backend_test.png', io.BytesIO(PNG_CONTENT), 'image/png')}
+        response = requests.post(f"{BASE_URL}/api/admin/upload-image", files=files,
+                                 data={'module': 'general'}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        storage_type = response.json()["storage_type"]
+
+        after = requests.get(f"{BASE_URL}/api/admin/storage/stats", headers=auth_headers).json()
+        assert after["backends"][storage_type]["calls"] >= before["backends"].get(storage_type, {}).get("calls", 0) + 1
+        print(f"✓ Upload stored via {storage_type}")
+
+
+class TestMemoryBackendRetries:
+    """Test StorageBackend._call retry, error and concurrency handling on MemoryStorageBackend"""
+
+    def test_transient_failures_are_retried(self):
+        """An upload succeeds after N transient failures, backing off between attempts"""
+        backend = MemoryStorageBackend(fail_next=2, max_retries=3, backoff_seconds=0.05)
+        started = time.monotonic()
+        url = asyncio.run(backend.upload("retry/a.png", PNG_CONTENT, "image/png"))
+        elapsed = time.monotonic() - started
+
+        assert url == "memory://retry/a.png"
+        assert backend.objects["retry/a.png"] == PNG_CONTENT
+        assert (backend.calls, backend.retries, backend.failures) == (1, 2, 0)
+        # Jittered delays of at least half of 0.05s and 0.1s
+        assert elapsed >= 0.07
+        backend.close()
+        print(f"✓ Upload stored after 2 retries in {elapsed:.2f}s")
+
+    def test_retries_run_out(self):
+        """More transient failures than max_retries surface the error"""
+        backend = MemoryStorageBackend(fail_next=5, max_retries=2)
+        with pytest.raises(ConnectionError):
+            asyncio.run(backend.upload("retry/b.png", PNG_CONTENT, "image/png"))
+        assert (backend.retries, backend.failures) == (2, 1)
+        assert "retry/b.png" not in backend.objects
+        backend.close()
+        print("✓ Gave up after max_retries")
+
+    def test_permanent_errors_are_not_retried(self):
+        """Errors retrying cannot fix are raised on the first attempt"""
+        backend = MemoryStorageBackend(fail_next=1, fail_message="403 Forbidden", max_retries=3)
+        with pytest.raises(ConnectionError):
+            asyncio.run(backend.upload("retry/c.png", PNG_CONTENT, "image/png"))
+        assert (backend.retries, backend.failures) == (0, 1)
+        # The failure was used up by the one attempt
+        assert backend.fail_next == 0
+        backend.close()
+        print("✓ Permanent error raised without retrying")
+
+    def test_concurrency_is_bounded(self):
+        """A burst of uploads never runs more than max_concurrency calls at once"""
+        backend = MemoryStorageBackend(latency_seconds=0.05, max_concurrency=2)
+
+        async def burst():
+            return await asyncio.gather(*(
+                backend.upload(f"burst/{n}.png", PNG_CONTENT, "image/png") for n in range(6)
+            ))
+
+        started = time.monotonic()
+        urls = asyncio.run(burst())
+        elapsed = time.monotonic() - started
+
+        assert len(set(urls)) == 6
+        assert len(backend.objects) == 6
+        assert backend.peak_active == 2
+        # Six calls through two workers take at least three rounds
+        assert elapsed >= 0.15
+        backend.close()
+        print(f"✓ {len(urls)} uploads ran at most {backend.peak_active} at a time")
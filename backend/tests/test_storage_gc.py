@@ -0,0 +1,86 @@
+"""
+Test Storage Garbage Collector
+Tests: a dry run reports every sweep without deleting anything, recent uploads are never swept,
+and the sweeper's settings show up in the storage stats
+"""
+import pytest
+import requests
+import os
+import io
+from PIL import Image
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Super admin credentials
+ADMIN_EMAIL = "superadmin@temaruco.com"
+ADMIN_PASSWORD = "superadmin123"
+
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    """Super admin auth header"""
+    response = requests.post(f"{BASE_URL}/api/auth/login", json={
+        "email": ADMIN_EMAIL,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code != 200:
+        pytest.skip("Super admin authentication failed - skipping storage GC tests")
+    return {"Authorization": f"Bearer {response.json().get('token')}"}
+
+
+def make_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.effect_noise((64, 64), 64).convert('RGB').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def dry_run(auth_headers) -> dict:
+    response = requests.post(f"{BASE_URL}/api/admin/storage/gc", params={"dry_run": "true"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+class TestStorageGC:
+    """Test /api/admin/storage/gc"""
+
+    def test_dry_run_report(self, auth_headers):
+        """A dry run reports designs and each file scope, and deletes nothing"""
+        report = dry_run(auth_headers)
+        assert report["dry_run"] is True
+        assert set(report["files"]) == {"mockups", "product_images", "receipts"}
+        for sweep in [report["designs"], *report["files"].values()]:
+            assert sweep["deleted"] == 0
+            assert sweep["orphaned"] <= sweep["scanned"]
+            assert len(sweep["sample"]) <= 20
+
+        again = dry_run(auth_headers)
+        assert again["designs"]["orphaned"] == report["designs"]["orphaned"]
+        print(f"✓ Dry run: {report['designs']['orphaned']} abandoned design(s), "
+              f"{sum(s['orphaned'] for s in report['files'].values())} orphaned file(s)")
+
+    def test_recent_design_is_kept(self, auth_headers):
+        """A design uploaded just now is inside the retention window"""
+        files = {'design_file': ('gc-design.png', io.BytesIO(make_png()), 'image/png')}
+        response = requests.post(f"{BASE_URL}/api/pod/upload-design", files=files,
+                                 data={'product_id': 'tshirt', 'item_type': 'tshirt'})
+        if response.status_code != 200:
+            pytest.skip(f"POD design upload unavailable ({response.status_code})")
+        design_id = response.json()["temp_design_id"]
+
+        requests.post(f"{BASE_URL}/api/admin/storage/gc", params={"dry_run": "false"}, headers=auth_headers)
+        assert requests.get(f"{BASE_URL}/api/pod/design/{design_id}").status_code == 200
+        print(f"✓ Fresh design {design_id} survived a sweep")
+
+    def test_requires_super_admin(self):
+        """Anonymous callers are refused"""
+        response = requests.post(f"{BASE_URL}/api/admin/storage/gc")
+        assert response.status_code in (401, 403)
+        print("✓ Anonymous sweep refused")
+
+    def test_stats(self, auth_headers):
+        """Storage stats include the sweeper's settings"""
+        response = requests.get(f"{BASE_URL}/api/admin/storage/stats", headers=auth_headers)
+        assert response.status_code == 200
+        gc = response.json()["garbage_collector"]
+        assert gc["design_retention_days"] > 0 and gc["file_retention_days"] > 0
+        print(f"✓ Retention: designs {gc['design_retention_days']}d, files {gc['file_retention_days']}d")
@@ -0,0 +1,68 @@
+"""
+Test Streaming Uploads
+Tests: uploads are written to disk chunk by chunk, per-route size limits still apply,
+and oversized multipart bodies are refused with a 413 before they are read
+"""
+import requests
+import os
+import io
+import http.client
+from urllib.parse import urlparse
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+PNG_CONTENT = (
+    b'\x89PNG\r\n\x1a\n'
+    b'\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde'
+    b'\x00\x00\x00\x0cIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\x18\xd8N'
+    b'\x00\x00\x00\x00IEND\xaeB`\x82'
+)
+
+
+class TestStreamingUploads:
+    """Test size limits on streamed uploads"""
+
+    def test_small_upload_is_saved(self):
+        """A small image is stored and served back byte for byte"""
+        files = {'file': ('stream_test.png', io.BytesIO(PNG_CONTENT), 'image/png')}
+        response = requests.post(f"{BASE_URL}/api/branding/upload-design", files=files)
+        assert response.status_code == 200, response.text
+        url = response.json()['url']
+
+        if url.startswith('/'):
+            served = requests.get(f"{BASE_URL}{url}")
+            assert served.status_code == 200
+            assert served.content == PNG_CONTENT
+        print(f"✓ Streamed upload saved: {url}")
+
+    def test_route_limit_is_enforced(self):
+        """The branding route keeps its 2MB limit and message"""
+        large_content = b'\x89PNG\r\n\x1a\n' + b'x' * (3 * 1024 * 1024)
+        files = {'file': ('too_large.png', io.BytesIO(large_content), 'image/png')}
+        response = requests.post(f"{BASE_URL}/api/branding/upload-design", files=files)
+        assert response.status_code == 400
+        assert response.json()['detail'] == "File size must be less than 2MB"
+        print("✓ Oversized branding upload rejected")
+
+    def test_empty_upload_is_rejected(self):
+        """An empty file is refused and not left on disk"""
+        files = {'file': ('empty.png', io.BytesIO(b''), 'image/png')}
+        response = requests.post(f"{BASE_URL}/api/branding/upload-design", files=files)
+        assert response.status_code == 400
+        print("✓ Empty upload rejected")
+
+    def test_oversized_body_rejected_from_content_length(self):
+        """A multipart body declared larger than the request limit gets a 413 without being sent"""
+        url = urlparse(BASE_URL)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        connection = connection_class(url.netloc, timeout=30)
+        try:
+            connection.putrequest('POST', '/api/branding/upload-design')
+            connection.putheader('Content-Type', 'multipart/form-data; boundary=stream-test')
+            connection.putheader('Content-Length', str(1024 * 1024 * 1024))
+            connection.endheaders()
+            response = connection.getresponse()
+            assert response.status == 413
+        finally:
+            connection.close()
+        print("✓ Oversized request body refused with 413")
@@ -0,0 +1,74 @@
+"""
+Test Upload Static Files
+Tests: new uploads get content-fingerprinted URLs served as immutable, and /api/uploads
+answers conditional and byte-range requests
+"""
+import pytest
+import requests
+import os
+import io
+import re
+from PIL import Image
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+@pytest.fixture(scope="module")
+def uploaded():
+    """A PNG uploaded through the public application-document endpoint (always stored locally)"""
+    buffer = io.BytesIO()
+    Image.effect_noise((128, 128), 64).convert('RGB').save(buffer, 'PNG')
+    content = buffer.getvalue()
+    response = requests.post(f"{BASE_URL}/api/admin/applications/upload",
+                             files={'file': ('cv-photo.png', io.BytesIO(content), 'image/png')})
+    assert response.status_code == 200, response.text
+    return {'url': f"{BASE_URL}{response.json()['file_path']}", 'content': content}
+
+
+class TestUploadStaticFiles:
+    """Test cache headers, conditional requests and ranges on /api/uploads"""
+
+    def test_fingerprinted_url_is_immutable(self, uploaded):
+        """The stored name carries a hash prefix and is cached for a year"""
+        assert re.search(r"\.[0-9a-f]{16}\.png$", uploaded['url'])
+        response = requests.get(uploaded['url'])
+        assert response.status_code == 200
+        assert response.content == uploaded['content']
+        cache_control = response.headers["Cache-Control"]
+        assert "immutable" in cache_control and "max-age=31536000" in cache_control
+        assert response.headers["Accept-Ranges"] == "bytes"
+        print(f"✓ {uploaded['url'].rsplit('/', 1)[-1]}: {cache_control}")
+
+    def test_conditional_request(self, uploaded):
+        """If-None-Match with the current ETag gets a 304"""
+        etag = requests.get(uploaded['url']).headers["ETag"]
+        response = requests.get(uploaded['url'], headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        print("✓ Conditional GET answered with 304")
+
+    def test_byte_range(self, uploaded):
+        """A single range gets a 206 with exactly those bytes"""
+        response = requests.get(uploaded['url'], headers={"Range": "bytes=100-199"})
+        assert response.status_code == 206
+        assert response.content == uploaded['content'][100:200]
+        assert response.headers["Content-Range"] == f"bytes 100-199/{len(uploaded['content'])}"
+
+        suffix = requests.get(uploaded['url'], headers={"Range": "bytes=-50"})
+        assert suffix.status_code == 206
+        assert suffix.content == uploaded['content'][-50:]
+        print("✓ Range and suffix-range requests answered with 206")
+
+    def test_unsatisfiable_range(self, uploaded):
+        """A range past the end of the file is a 416"""
+        size = len(uploaded['content'])
+        response = requests.get(uploaded['url'], headers={"Range": f"bytes={size + 10}-"})
+        assert response.status_code == 416
+        assert response.headers["Content-Range"] == f"bytes */{size}"
+        print("✓ Unsatisfiable range refused with 416")
+
+    def test_stale_if_range_sends_whole_file(self, uploaded):
+        """If-Range with an old validator ignores the range"""
+        response = requests.get(uploaded['url'], headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        assert response.status_code == 200
+        assert response.content == uploaded['content']
+        print("✓ Stale If-Range answered with the full file")
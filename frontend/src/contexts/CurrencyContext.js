@@ -1,5 +1,6 @@
 import React, { createContext, useState, useContext, useEffect, useCallback } from 'react';
 import axios from 'axios';
+import { takeBootstrapSection } from '../utils/bootstrap';
 
 const API_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -42,19 +43,18 @@ export const CurrencyProvider = ({ children }) => {
   const detectLocation = useCallback(async () => {
     setLoading(true);
     try {
-      // Try backend detection first (uses CF headers)
-      const backendResponse = await axios.get(`${API_URL}/api/currency/detect`, {
-        timeout: 5000
-      });
+      // Try backend detection first (uses CF headers); the first-load bootstrap already carries it
+      const detected = await takeBootstrapSection('currency')
+        || (await axios.get(`${API_URL}/api/currency/detect`, { timeout: 5000 })).data;
       
-      if (backendResponse.data?.currency_code) {
-        const code = backendResponse.data.country_code || 'US';
+      if (detected?.currency_code) {
+        const code = detected.country_code || 'US';
         setCountryCode(code);
         setCurrency({
-          code: backendResponse.data.currency_code,
-          symbol: backendResponse.data.currency_symbol,
-          name: backendResponse.data.currency_name,
-          rate: backendResponse.data.exchange_rate
+          code: detected.currency_code,
+          symbol: detected.currency_symbol,
+          name: detected.currency_name,
+          rate: detected.exchange_rate
         });
         setLoading(false);
         return;
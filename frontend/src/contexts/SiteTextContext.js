@@ -1,5 +1,6 @@
 import React, { createContext, useContext, useState, useEffect, useCallback, useRef } from 'react';
 import axios from 'axios';
+import { takeBootstrapSection } from '../utils/bootstrap';
 
 const API_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -147,8 +148,10 @@ export const SiteTextProvider = ({ children }) => {
     fetchingRef.current = true;
     
     try {
-      const response = await axios.get(`${API_URL}/api/site-texts`);
-      const fetchedTexts = response.data.texts || {};
+      // First load comes from the shared bootstrap; refreshes hit the endpoint
+      const data = (!force && await takeBootstrapSection('site_texts'))
+        || (await axios.get(`${API_URL}/api/site-texts`)).data;
+      const fetchedTexts = data.texts || {};
       
       // Merge with defaults
       const mergedTexts = { ...DEFAULT_TEXTS, ...fetchedTexts };
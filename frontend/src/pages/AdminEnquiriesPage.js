@@ -94,13 +94,25 @@ const AdminEnquiriesPage = () => {
     }
   };
 
-  const handleViewEnquiry = (enquiry) => {
-    setSelectedEnquiry(enquiry);
+  // List rows only carry table fields - load the full enquiry before showing it
+  const loadEnquiryDetails = async (enquiry) => {
+    try {
+      const response = await axios.get(`${API_URL}/api/admin/enquiries/${enquiry.id}`, {
+        withCredentials: true
+      });
+      return response.data;
+    } catch (error) {
+      return enquiry;
+    }
+  };
+
+  const handleViewEnquiry = async (enquiry) => {
+    setSelectedEnquiry(await loadEnquiryDetails(enquiry));
     setShowViewModal(true);
   };
 
-  const handleCreateQuote = (enquiry) => {
-    setSelectedEnquiry(enquiry);
+  const handleCreateQuote = async (enquiry) => {
+    setSelectedEnquiry(await loadEnquiryDetails(enquiry));
     setQuoteData({
       unit_price: '',
       additional_cost: 0,
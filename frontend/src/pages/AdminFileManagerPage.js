@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Search, Folder, File, Image, FileText, Trash2, Download, ExternalLink, RefreshCw, HardDrive, Cloud, Filter, X } from 'lucide-react';
 import axios from 'axios';
 import { toast } from 'sonner';
+import { getImageUrl } from '../utils/imageUtils';
 
 const API_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -16,32 +17,43 @@ const AdminFileManagerPage = () => {
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
   const [fileToDelete, setFileToDelete] = useState(null);
   const [previewFile, setPreviewFile] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadFiles();
   }, [filterType, filterSource]);
 
-  const loadFiles = async () => {
+  const loadFiles = async (cursor = null) => {
     try {
       const params = new URLSearchParams();
       if (filterType !== 'all') params.append('file_type', filterType);
       if (filterSource !== 'all') params.append('source', filterSource);
       if (searchTerm.trim()) params.append('search', searchTerm.trim());
+      if (cursor) params.append('cursor', cursor);
 
       const response = await axios.get(`${API_URL}/api/admin/files?${params.toString()}`, {
         withCredentials: true
       });
 
-      setFiles(response.data.files || []);
+      const page = response.data.files || [];
+      setFiles(cursor ? (prev) => [...prev, ...page] : page);
+      setNextCursor(response.data.next_cursor || null);
       setStats(response.data.stats || {});
     } catch (error) {
       toast.error('Failed to load files');
       console.error(error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
+  const loadMore = () => {
+    setLoadingMore(true);
+    loadFiles(nextCursor);
+  };
+
   const handleSearch = () => {
     setLoading(true);
     loadFiles();
@@ -299,7 +311,9 @@ const AdminFileManagerPage = () => {
                           className="w-12 h-12 rounded-lg overflow-hidden bg-zinc-100 hover:opacity-80 transition-opacity"
                         >
                           <img
-                            src={file.source === 'local' ? `${API_URL}${file.path}` : file.path}
+                            src={file.thumbnail_url
+                              ? getImageUrl(file.thumbnail_url)
+                              : (file.source === 'local' ? `${API_URL}${file.path}` : file.path)}
                             alt={file.name}
                             className="w-full h-full object-cover"
                             onError={(e) => {
@@ -371,6 +385,18 @@ const AdminFileManagerPage = () => {
             </tbody>
           </table>
         </div>
+        {nextCursor && (
+          <div className="p-4 border-t border-zinc-200 text-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="btn-outline"
+              data-testid="load-more-files-btn"
+            >
+              {loadingMore ? 'Loading...' : `Load more (${files.length} of ${stats.total})`}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Image Preview Modal */}
@@ -317,7 +317,7 @@ const AdminGuestDesignsPage = () => {
                           className="w-12 h-12 bg-zinc-100 rounded overflow-hidden hover:ring-2 hover:ring-[#D90429] transition-all"
                         >
                           <img
-                            src={getImageUrl(design.original_file_url)}
+                            src={getImageUrl(design.thumbnail_url || design.original_file_url)}
                             alt="Original"
                             className="w-full h-full object-contain"
                             onError={(e) => { e.target.src = 'https://placehold.co/48x48/e2e8f0/64748b?text=N/A'; }}
@@ -334,7 +334,7 @@ const AdminGuestDesignsPage = () => {
                           className="w-12 h-12 bg-zinc-100 rounded overflow-hidden hover:ring-2 hover:ring-[#D90429] transition-all"
                         >
                           <img
-                            src={getImageUrl(design.mockup_file_url)}
+                            src={getImageUrl(design.mockup_thumbnail_url || design.mockup_file_url)}
                             alt="Mockup"
                             className="w-full h-full object-contain"
                             onError={(e) => { e.target.src = 'https://placehold.co/48x48/e2e8f0/64748b?text=N/A'; }}
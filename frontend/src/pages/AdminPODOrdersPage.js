@@ -55,8 +55,17 @@ const AdminPODOrdersPage = () => {
     }
   };
 
-  const handleViewOrder = (order) => {
-    setSelectedOrder(order);
+  const handleViewOrder = async (order) => {
+    // List rows only carry table fields - load the full order for the details modal
+    try {
+      const response = await axios.get(
+        `${API_URL}/api/admin/orders/lookup/${order.order_id || order.id}`,
+        { withCredentials: true }
+      );
+      setSelectedOrder(response.data.data);
+    } catch (error) {
+      setSelectedOrder(order);
+    }
     setShowDetailsModal(true);
   };
 
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Routes, Route, Link, useNavigate, useLocation } from 'react-router-dom';
 import { LayoutDashboard, Package, Bell, Plus, LogOut, FileText, Settings, FileQuestion, Shield, DollarSign, Image, Users, TrendingUp, ShoppingCart, BarChart3, X, Menu, Shirt, ChevronDown, ArrowLeft, ShoppingBag, ImageIcon, Mail, FolderOpen, Building2, ClipboardList, BellRing } from 'lucide-react';
-import { getAdminDashboard, getAllOrders, updateOrderStatus, createProduct } from '../utils/api';
+import { getAdminDashboard, getAllOrders, updateOrderStatus, createProduct, lookupOrderByCode } from '../utils/api';
 import api from '../utils/api';
 import { toast } from 'sonner';
 import OrderCodeInput from '../components/OrderCodeInput';
@@ -177,6 +177,17 @@ const AdminOrders = () => {
     }
   };
 
+  // The orders list only carries table fields - load the full order for the details modal
+  const openOrderDetails = async (order) => {
+    try {
+      const response = await lookupOrderByCode(order.order_id || order.id);
+      setSelectedOrder(response.data.data);
+    } catch (error) {
+      setSelectedOrder(order);
+    }
+    setShowOrderModal(true);
+  };
+
   const handleSearch = async () => {
     if (!searchOrderId.trim()) {
       toast.error('Please enter an Order ID');
@@ -348,10 +359,7 @@ const AdminOrders = () => {
                     </td>
                     <td className="px-6 py-4 text-sm">
                       <button 
-                        onClick={() => {
-                          setSelectedOrder(order);
-                          setShowOrderModal(true);
-                        }}
+                        onClick={() => openOrderDetails(order)}
                         className="text-primary hover:underline"
                         data-testid={`view-details-${order.order_id || order.id}`}
                       >
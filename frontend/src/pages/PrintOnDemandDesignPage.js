@@ -281,12 +281,32 @@ const PrintOnDemandDesignPage = () => {
       );
       
       // Update design transform on server if we have a design ID
-      if (designId) {
+      const imageEl = elements.find(el => el.type === 'image' && el.originalWidth && el.originalHeight);
+      if (designId && imageEl) {
+        const { width, height } = calculateDesignDimensions(imageEl.originalWidth, imageEl.originalHeight, newSize);
+        updateDesignTransform({
+          print_size: newSize,
+          ...transformOf({
+            ...imageEl,
+            width,
+            x: printArea.x + (printArea.width - width) / 2,
+            y: printArea.y + (printArea.height - height) / 2
+          })
+        });
+      } else if (designId) {
         updateDesignTransform({ print_size: newSize });
       }
     }
   };
 
+  // Full transform of a placed image element, as the server renders it (scale is relative to the original width)
+  const transformOf = (el) => ({
+    position_x: el.x,
+    position_y: el.y,
+    scale: el.width / (el.originalWidth || 1),
+    rotation: el.rotation || 0
+  });
+
   // Update design transform on server
   const updateDesignTransform = async (transformData) => {
     if (!designId) return;
@@ -434,6 +454,17 @@ const PrintOnDemandDesignPage = () => {
   const uploadMockupToServer = async () => {
     if (!designId || !stageRef.current) return null;
     
+    // The server composites image-only designs from the saved transform (and reuses identical
+    // mockups); text is only drawn on the canvas, so those still upload the canvas
+    if (elements.every(el => el.type === 'image')) {
+      try {
+        const rendered = await axios.post(`${API_URL}/api/pod/design/${designId}/render-mockup`);
+        return rendered.data.mockup_file_url;
+      } catch (error) {
+        console.warn('Server mockup render unavailable, uploading canvas instead:', error);
+      }
+    }
+    
     try {
       // Generate mockup image from canvas
       const dataUrl = stageRef.current.toDataURL({ pixelRatio: 2 });
@@ -495,11 +526,12 @@ const PrintOnDemandDesignPage = () => {
     
     if (designId) {
       const el = elements.find(e => e.id === selectedId);
-      if (el) {
-        updateDesignTransform({
-          position_x: printArea.x + (printArea.width - el.width) / 2,
-          position_y: printArea.y + (printArea.height - el.height) / 2
-        });
+      if (el && el.type === 'image') {
+        updateDesignTransform(transformOf({
+          ...el,
+          x: printArea.x + (printArea.width - el.width) / 2,
+          y: printArea.y + (printArea.height - el.height) / 2
+        }));
       }
     }
   };
@@ -531,6 +563,23 @@ const PrintOnDemandDesignPage = () => {
         return el;
       })
     );
+
+    const imageEl = elements.find(el => el.type === 'image');
+    if (designId && imageEl) {
+      const { width, height } = calculateDesignDimensions(
+        imageEl.originalWidth || originalImageRef.current.width,
+        imageEl.originalHeight || originalImageRef.current.height,
+        printSize
+      );
+      updateDesignTransform(transformOf({
+        ...imageEl,
+        originalWidth: imageEl.originalWidth || originalImageRef.current.width,
+        width,
+        x: printArea.x + (printArea.width - width) / 2,
+        y: printArea.y + (printArea.height - height) / 2,
+        rotation: 0
+      }));
+    }
   };
 
   const handleAddToCart = async () => {
@@ -704,7 +753,7 @@ const PrintOnDemandDesignPage = () => {
                                   item.id === el.id ? { ...item, x: newX, y: newY } : item
                                 ));
                                 if (designId) {
-                                  updateDesignTransform({ position_x: newX, position_y: newY });
+                                  updateDesignTransform(transformOf({ ...el, x: newX, y: newY }));
                                 }
                               }}
                               onTransformEnd={(e) => {
@@ -0,0 +1,34 @@
+import axios from 'axios';
+
+const API_URL = process.env.REACT_APP_BACKEND_URL || window.location.origin;
+
+// One request for everything the storefront needs on first paint (site texts, CMS settings,
+// pricing, currency, categories, clothing items) instead of one per provider
+let bootstrapRequest = null;
+const takenSections = new Set();
+
+const loadBootstrap = () => {
+  if (!bootstrapRequest) {
+    bootstrapRequest = axios.get(`${API_URL}/api/bootstrap`, { timeout: 10000 })
+      .then(response => response.data)
+      .catch(error => {
+        console.warn('Bootstrap load failed, falling back to individual endpoints:', error);
+        return null;
+      });
+  }
+  return bootstrapRequest;
+};
+
+/**
+ * A section of the first-load bootstrap, shaped like the endpoint it replaces.
+ * Each section is handed out once, so later refreshes go to their own endpoint;
+ * resolves to undefined when the section was already taken or the bootstrap failed.
+ */
+export const takeBootstrapSection = async (section) => {
+  if (takenSections.has(section)) {
+    return undefined;
+  }
+  takenSections.add(section);
+  const data = await loadBootstrap();
+  return data ? data[section] : undefined;
+};
@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { takeBootstrapSection } from './bootstrap';
 
 const API_URL = process.env.REACT_APP_BACKEND_URL || window.location.origin;
 
@@ -47,10 +48,12 @@ export const getCMSSettings = async (forceRefresh = false) => {
   }
 
   try {
-    const response = await axios.get(`${API_URL}/api/cms/settings`);
-    cmsCache.settings = response.data;
+    // First load comes from the shared bootstrap; later refreshes hit the endpoint
+    const settings = (!forceRefresh && await takeBootstrapSection('cms_settings'))
+      || (await axios.get(`${API_URL}/api/cms/settings`)).data;
+    cmsCache.settings = settings;
     cmsCache.lastFetch = now;
-    return response.data;
+    return settings;
   } catch (error) {
     console.error('Failed to load CMS settings:', error);
     return {